@@ -1,17 +1,18 @@
-from db.clipping_db.get_table_news import GetNews
-from typing import List, Dict, Any
+from db.clipping_db.get_table_news import AsyncGetNews, GetNews
+from typing import List, Dict, Any, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)    
 
-def get_active_company_clipping(limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+async def get_active_company_clipping(limit: int = 10, offset: int = 0, cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     Busca por todas as empresas ativas no clipping com suporte a paginação.
 
     Args:
         limit (int): Número máximo de empresas retornadas por página.
         offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+        cursor (str): Token `next_cursor` da página anterior (paginação por cursor).
 
     Returns:
         Um dicionário contendo as empresas ativas paginadas e informações de paginação.
@@ -20,8 +21,8 @@ def get_active_company_clipping(limit: int = 10, offset: int = 0) -> Dict[str, A
         Exception: Caso ocorra um erro na consulta ao banco de dados.
     """
     try:
-        get_company = GetNews()
-        result = get_company._get_active_companies(limit, offset)
+        get_company = AsyncGetNews()
+        result = await get_company._get_active_companies(limit, offset, cursor)
 
         if not result or not result.get("active_companies"):
             return {"message": "Nenhuma empresa ativa encontrada.", "total_records": 0}
@@ -34,13 +35,14 @@ def get_active_company_clipping(limit: int = 10, offset: int = 0) -> Dict[str, A
         logger.error(f"Erro ao consultar empresas ativas no clipping: {e}")
         return {"error": f"Erro ao consultar empresas ativas no clipping: {str(e)}"}
     
-def get_deactivate_company_clipping(limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+async def get_deactivate_company_clipping(limit: int = 10, offset: int = 0, cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     Busca por todas as empresas desativadas no clipping com suporte a paginação.
 
     Args:
         limit (int): Número máximo de empresas retornadas por página.
         offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+        cursor (str): Token `next_cursor` da página anterior (paginação por cursor).
 
     Returns:
         Um dicionário contendo as empresas desativadas paginadas e informações de paginação.
@@ -49,8 +51,8 @@ def get_deactivate_company_clipping(limit: int = 10, offset: int = 0) -> Dict[st
         Exception: Caso ocorra um erro na consulta ao banco de dados.
     """
     try:
-        get_company = GetNews()
-        result = get_company._get_deactivate_companies(limit, offset)
+        get_company = AsyncGetNews()
+        result = await get_company._get_deactivate_companies(limit, offset, cursor)
 
         if not result or not result.get("deactivated_companies"):
             return {"message": "Nenhuma empresa desativada encontrada.", "total_records": 0}
@@ -1,6 +1,7 @@
-from db.register_update import EditRegisters
-from db.company_db import InsertCompany
-from typing import Dict, List, Any
+from db.register_update import AsyncEditRegisters
+from db.company_db import AsyncInsertCompany, InsertCompany
+from db.row_formats import page_rows
+from typing import AsyncIterator, Dict, List, Any, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -26,8 +27,8 @@ def create_company_service(name_company: str, cnpj_company: str, email_company:
         logger.error(f"Erro ao criar empresa' {name_company}': {e}")
         return f"Erro ao criar empresa: {str(e)}"
     
-def trash_register_service(
-    table_name: str, schema_name: str, limit: int = 10, offset: int = 0
+async def trash_register_service(
+    table_name: str, schema_name: str, limit: int = 10, offset: int = 0, cursor: Optional[str] = None, count: str = "exact"
 ) -> Dict[str, Any]:
     """
     Lixeira que armazena os registros deletados pelo usuário, com suporte a paginação.
@@ -37,6 +38,8 @@ def trash_register_service(
         schema_name (str): Nome do schema da tabela.
         limit (int): Número máximo de registros retornados por página.
         offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+        cursor (str): Token `next_cursor` da página anterior (paginação por cursor).
+        count (str): Estratégia do total de registros (`exact`, `estimated` ou `none`).
 
     Returns:
         Um dicionário contendo os registros deletados paginados e informações de paginação.
@@ -45,13 +48,13 @@ def trash_register_service(
         Exception: Caso ocorra um erro na consulta ao banco de dados.
     """
     try:
-        trash_db = EditRegisters()
+        trash_db = AsyncEditRegisters()
 
         if not table_name:
             raise ValueError("Insira um valor correto para o nome da tabela.")
 
         # Chama a função que consulta registros deletados com paginação
-        result = trash_db._get_deleted_records(table_name, schema_name, limit, offset)
+        result = await trash_db._get_deleted_records(table_name, schema_name, limit, offset, cursor, count)
 
         if not result or not result.get("trash"):
             return {"message": "Não há dados na lixeira.", "total_records": 0}
@@ -64,7 +67,7 @@ def trash_register_service(
         logger.error(f"Erro ao consultar a tabela '{table_name}': {e}")
         return {"error": f"Erro ao consultar tabela: {str(e)}"}
     
-def get_records_service(table_name: str, schema_name: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+async def get_records_service(table_name: str, schema_name: str, limit: int = 10, offset: int = 0, cursor: Optional[str] = None, count: str = "exact", row_format: str = "json") -> Dict[str, Any]:
     """
     Traz todos os registros ativos da tabela com suporte a paginação.
 
@@ -73,6 +76,9 @@ def get_records_service(table_name: str, schema_name: str, limit: int = 10, offs
         schema_name (str): Nome do schema da tabela.
         limit (int): Número máximo de registros retornados por página (padrão: 10).
         offset (int): Número de registros a serem ignorados antes de começar a busca (padrão: 0).
+        cursor (str): Token `next_cursor` da página anterior (paginação por cursor).
+        count (str): Estratégia do total de registros (`exact`, `estimated` ou `none`).
+        row_format (str): `json` (lista de objetos em `active_records`) ou `columnar` (`columns`/`rows`).
 
     Returns:
         Um dicionário contendo os registros ativos paginados e informações de paginação.
@@ -81,13 +87,13 @@ def get_records_service(table_name: str, schema_name: str, limit: int = 10, offs
         Exception: Caso ocorra um erro na consulta ao banco de dados.
     """
     try:
-        records = EditRegisters()
-        result = records._get_active_record(table_name, schema_name, limit, offset)
+        records = AsyncEditRegisters()
+        result = await records._get_active_record(table_name, schema_name, limit, offset, cursor, count, row_format)
 
-        if not result or not result.get("active_records"):
+        if not page_rows(result, "active_records"):
             return {"message": "Nenhum registro ativo encontrado.", "total_records": 0}
 
-        logger.info(f"Consulta na tabela '{table_name}' realizada com sucesso. Registros retornados: {len(result.get('active_records', []))}")
+        logger.info(f"Consulta na tabela '{table_name}' realizada com sucesso. Registros retornados: {len(page_rows(result, 'active_records'))}")
 
         return result
 
@@ -95,6 +101,14 @@ def get_records_service(table_name: str, schema_name: str, limit: int = 10, offs
         logger.error(f"Erro ao consultar tabela '{table_name}': {e}")
         return {"error": f"Erro ao consultar tabela: {str(e)}"}
 
+def stream_records_service(table_name: str, schema_name: str, limit: int = 10, offset: int = 0, cursor: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Registros ativos da página em lotes, lidos por um cursor do servidor (formato `ndjson`).
+
+    Os erros da consulta surgem ao ler o primeiro lote.
+    """
+    return AsyncEditRegisters()._stream_active_records(table_name, schema_name, limit, offset, cursor)
+
 def add_table_in_company_service(table_name: str, schema_name: str, company_id) -> str:
     """
     Associa uma empresa a uma tabela
@@ -114,13 +128,14 @@ def add_table_in_company_service(table_name: str, schema_name: str, company_id)
         logger.error(f"Erro ao associar tabela' {table_name} à empresa {company_id}': {e}")
         return f"Erro ao criar empresa: {str(e)}"
     
-def get_company_service(limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+async def get_company_service(limit: int = 10, offset: int = 0, cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     Busca por todas as empresas ativas com suporte a paginação.
 
     Args:
         limit (int): Número máximo de empresas retornadas por página.
         offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+        cursor (str): Token `next_cursor` da página anterior (paginação por cursor).
 
     Returns:
         Um dicionário contendo as empresas ativas paginadas e informações de paginação.
@@ -129,8 +144,8 @@ def get_company_service(limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         Exception: Caso ocorra um erro na consulta ao banco de dados.
     """
     try:
-        get_company_db = InsertCompany()
-        result = get_company_db._get_all_companies(limit, offset)
+        get_company_db = AsyncInsertCompany()
+        result = await get_company_db._get_all_companies(limit, offset, cursor)
 
         if not result or not result.get("companies"):
             return {"message": "Nenhuma empresa ativa encontrada.", "total_records": 0}
@@ -143,13 +158,14 @@ def get_company_service(limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         logger.error(f"Erro ao consultar empresas: {e}")
         return {"error": f"Erro ao consultar empresas: {str(e)}"}
     
-def trash_company_service(limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+async def trash_company_service(limit: int = 10, offset: int = 0, cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     Busca por todas as empresas desativadas com suporte a paginação.
 
     Args:
         limit (int): Número máximo de empresas retornadas por página.
         offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+        cursor (str): Token `next_cursor` da página anterior (paginação por cursor).
 
     Returns:
         Um dicionário contendo as empresas inativas paginadas e informações de paginação.
@@ -158,8 +174,8 @@ def trash_company_service(limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         Exception: Caso ocorra um erro na consulta ao banco de dados.
     """
     try:
-        get_company_db = InsertCompany()
-        result = get_company_db._trash_companies(limit, offset)
+        get_company_db = AsyncInsertCompany()
+        result = await get_company_db._trash_companies(limit, offset, cursor)
 
         if not result or not result.get("inactive_companies"):
             return {"message": "Nenhuma empresa inativa encontrada.", "total_records": 0}
@@ -1,24 +1,25 @@
 from db.insert_column import InsertColumn
 from db.register_update import EditRegisters
 from db.create_tables import CreateInDb
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_table_service(table_name: str, schema_name: str) -> str:
+def create_table_service(table_name: str, schema_name: str, partition_interval: Optional[str] = None) -> str:
     """
     Cria tabela no banco de dados
     Args:
         table_name (str): Nome da tabela que vai ser criada
+        partition_interval (str): `month` ou `year` para particionar a tabela por `date`
     Exception:
         Trata erros de conexão com o banco e outras variáveis
     """
     try:
 
         create_table_db = CreateInDb()
-        result = create_table_db._create_table(table_name, schema_name)
+        result = create_table_db._create_table(table_name, schema_name, partition_interval)
         
         logger.info(f"Tabela '{table_name}' criada com sucesso.")
         return result
@@ -48,101 +49,20 @@ def create_schema_service(schema_name: str) -> str:
         logger.error(f"Erro ao criar schema '{schema_name}': {e}")
         return f"Erro ao criar schema: {str(e)}"
     
-def create_column_text_service(table_name: str, schema_name: str,column_name: str) -> str:
+def create_columns_service(table_name: str, schema_name: str, column_names: List[str], column_type: str) -> str:
     """
-    Criar coluna de texto em uma tabela específica
+    Cria as colunas de um mesmo tipo em uma tabela com um único `ALTER TABLE`.
     Args:
-        table_name (str): Nome da tabela onde o novo campo vai ser inserido
-        column_name (str): Nome da coluna a ser criada
-    Exception:
-        Trata erros de conexão com o banco e outras variáveis
+        table_name (str): Nome da tabela onde os novos campos vão ser inseridos
+        column_names (List[str]): Nomes das colunas a serem criadas
+        column_type (str): `text`, `integer`, `float`, `date` ou `boolean`
+    Raises:
+        ColumnLockTimeout: A tabela continuou bloqueada em todas as tentativas
     """
-    try:
-        create_column_db = InsertColumn()
-        result = create_column_db._insert_column_text(table_name, schema_name, column_name)
-        
-        logger.info(f"Tabela '{column_name}' criada com sucesso.")
-        return result
-    except Exception as e:
-        logger.error(f"Erro ao criar tabela '{column_name}': {e}")
-        return f"Erro ao criar tabela: {str(e)}"
+    result = InsertColumn()._insert_columns(table_name, schema_name, column_names, column_type)
+    logger.info(f"Colunas {column_names} ({column_type}) criadas em {schema_name}.{table_name}.")
+    return result
 
-def create_column_integer_service(db_name: str, schema_name: str, column_name: str) -> str:
-    """
-    Criar coluna de número inteiro em uma tabela específica
-    Args:
-        table_name (str): Nome da tabela onde o novo campo vai ser inserido
-        column_name (str): Nome da coluna a ser criada
-    Exception:
-        Trata erros de conexão com o banco e outras variáveis
-    """
-    try:
-        create_column_service = InsertColumn()   
-        result = create_column_service._insert_column_integer_number(db_name, schema_name, column_name)
-        
-        logger.info(f"Tabela '{column_name}' criada com sucesso.")
-        return result
-    except Exception as e:
-        logger.error(f"Erro ao criar tabela '{column_name}': {e}")
-        return f"Erro ao criar tabela: {str(e)}"
-    
-def create_column_float_service(db_name: str, schema_name, column_name: str) -> str:
-    """
-    Criar coluna de número float em uma tabela específica
-    Args:
-        table_name (str): Nome da tabela onde o novo campo vai ser inserido
-        column_name (str): Nome da coluna a ser criada
-    Exception:
-        Trata erros de conexão com o banco e outras variáveis
-    """
-    try:
-        create_column_db = InsertColumn()   
-        result = create_column_db._insert_column_float_number(db_name, schema_name, column_name)
-        
-        logger.info(f"Coluna '{column_name}' criada com sucesso.")
-        return result
-    except Exception as e:
-        logger.error(f"Erro ao criar coluna '{column_name}': {e}")
-        return f"Erro ao criar coluna: {str(e)}"
-    
-def create_column_date_service(db_name: str, schema_name: str, column_name: str) -> str:
-    """
-    Criar coluna de date em uma tabela específica
-    Args:
-        table_name (str): Nome da tabela onde o novo campo vai ser inserido
-        column_name (str): Nome da coluna a ser criada
-    Exception:
-        Trata erros de conexão com o banco e outras variáveis
-    """
-    try:
-        create_column_db = InsertColumn()   
-        result = create_column_db._insert_column_date(db_name, schema_name, column_name)
-        
-        logger.info(f"Coluna '{column_name}' criada com sucesso.")
-        return result
-    except Exception as e:
-        logger.error(f"Erro ao criar coluna '{column_name}': {e}")
-        return f"Erro ao criar coluna: {str(e)}"
-    
-def create_column_boolean_service(db_name: str, schema_name: str, column_name: str) -> str:
-    """
-    Criar coluna de boolean em uma tabela específica
-    Args:
-        table_name (str): Nome da tabela onde o novo campo vai ser inserido
-        column_name (str): Nome da coluna a ser criada
-    Exception:
-        Trata erros de conexão com o banco e outras variáveis
-    """
-    try:
-        create_column_dv = InsertColumn()   
-        result = create_column_dv._insert_column_boolean(db_name, schema_name, column_name)
-        
-        logger.info(f"Coluna '{column_name}' criada com sucesso.")
-        return result
-    except Exception as e:
-        logger.error(f"Erro ao criar coluna '{column_name}': {e}")
-        return f"Erro ao criar coluna: {str(e)}"
-    
 def update_field_name_service(table_name: str, schema_name: str, old_field_name: str, new_field_name: str):
     """
     Atualiza o nome de um campo
@@ -181,56 +101,15 @@ def change_type_field_service(table_name, schema_name, field_name, field_type):
         logger.error(f"Erro ao mudar tipo do campo: '{field_name}': {e}")
         return f"Erro ao mudar nome do campo: {str(e)}"
     
-def delete_column_service(db_name: str, schema_name: str, record_id: str) -> List[Dict[Any, Any]]:
+def set_records_deleted_service(table_name: str, schema_name: str, is_deleted: bool, record_ids: Optional[List[int]] = None, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
     """
-    Lixeira que armazena os registros deletados pelo usuário
-    Args: 
-        table_name: nome da tabela a ser consultada
-        record_id: identificador do registro que deve ser excluido
-    Exception: 
-        Retorna erros internos relacionados a conexão com o banco ou outras variáveis.
-    """
-    try:
-        delete_column_db = EditRegisters()
-
-        if not db_name: 
-            raise ValueError("Insira o nome correto da tabela que deseja deletar")
-
-        if not record_id: 
-            raise ValueError("Insira um valor válido para o id da coluna")
-
-        result = delete_column_db._mark_as_deleted_by_id(db_name, schema_name, record_id)
-
-        logger.info(f"Tabela '{record_id}' delete realizado com sucesso.")
-        return result
-    
-    except Exception as e:
-        logger.error(f"Erro ao deletar dados ' {record_id}': {e}")
-        return f"Erro ao criar tabela: {str(e)}"
-    
-def active_register_service(table_name: str, schema_name: str, record_id: str) -> List[Dict[Any, Any]]:
-    """
-    Reativa registros desativados
-    Args: 
+    Exclui (soft delete) ou restaura em massa os registros de uma lista de ids ou de um range de data
+    Args:
         table_name: nome da tabela a ser consultada
-        record_id: identificador do registro que deve ser excluido
-    Exception: 
-        Retorna erros internos relacionados a conexão com o banco ou outras variáveis.
+        is_deleted: True para excluir, False para restaurar
+        record_ids: identificadores dos registros
+        start_date / end_date: range de data (YYYY-MM-DD), usado quando `record_ids` não é informado
+    Returns:
+        Quantidade de registros alterados, de notícias alteradas no clipping e o estado (`ok`/`failed`) do clipping
     """
-    try:
-        active_column_db = EditRegisters()
-
-        if not table_name: 
-            raise ValueError("Insira o nome correto da tabela que deseja deletar")
-
-        if not record_id: 
-            raise ValueError("Insira um valor válido para o id da coluna")
-
-        result = active_column_db._active_register(table_name, schema_name, record_id)
-
-        logger.info(f"Tabela '{record_id}' delete realizado com sucesso.")
-        return result
-    
-    except Exception as e:
-        logger.error(f"Erro ao deletar dados ' {record_id}': {e}")
-        return f"Erro ao criar tabela: {str(e)}"
\ No newline at end of file
+    return EditRegisters()._set_deleted(table_name, schema_name, is_deleted, record_ids, start_date, end_date)
@@ -1,12 +1,13 @@
-from db.register_update import EditRegisters
-from db.company_db import InsertCompany
-from typing import Dict, Any
+from db.register_update import AsyncEditRegisters
+from db.company_db import AsyncInsertCompany
+from db.row_formats import page_rows
+from typing import AsyncIterator, Dict, Any, List, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def filter_date_service(table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+async def filter_date_service(table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0, cursor: Optional[str] = None, count: str = "exact", row_format: str = "json") -> Dict[str, Any]:
     """
     Lógica para a filtragem de registros por range de data com paginação.
     
@@ -17,6 +18,9 @@ def filter_date_service(table_name: str, schema_name: str, start_date: str, end_
         end_date: Data final do range.
         limit: Número máximo de registros retornados por página (padrão: 10).
         offset: Número de registros a serem ignorados antes de começar a busca (padrão: 0).
+        cursor: Token `next_cursor` da página anterior (paginação por cursor).
+        count: Estratégia do total de registros (`exact`, `estimated` ou `none`).
+        row_format: `json` (lista de objetos em `data`) ou `columnar` (`columns`/`rows`).
     
     Returns:
         Um dicionário contendo os registros da página atual e informações de paginação.
@@ -25,16 +29,24 @@ def filter_date_service(table_name: str, schema_name: str, start_date: str, end_
         Exception: Caso ocorra um erro na consulta.
     """
     try:
-        filter_by_data = InsertCompany()
-        result = filter_by_data._get_news_by_date_range(table_name, schema_name, start_date, end_date, limit, offset)
+        filter_by_data = AsyncInsertCompany()
+        result = await filter_by_data._get_news_by_date_range(table_name, schema_name, start_date, end_date, limit, offset, cursor, count, row_format)
 
-        logger.info(f"Tabela '{table_name}' consultada com sucesso. Registros retornados: {len(result.get('data', []))}")
+        logger.info(f"Tabela '{table_name}' consultada com sucesso. Registros retornados: {len(page_rows(result, 'data'))}")
         return result
     except Exception as e:
         logger.error(f"Erro ao consultar tabela '{table_name}': {e}")
         return {"error": f"Erro ao consultar tabela: {str(e)}"}
+
+def stream_filter_date_service(table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0, cursor: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Registros da página no range de datas em lotes, lidos por um cursor do servidor (formato `ndjson`).
+
+    Os erros da consulta surgem ao ler o primeiro lote.
+    """
+    return AsyncInsertCompany()._stream_news_by_date_range(table_name, schema_name, start_date, end_date, limit, offset, cursor)
     
-def filter_trash_service(table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+async def filter_trash_service(table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0, cursor: Optional[str] = None, count: str = "exact") -> Dict[str, Any]:
     """
     Lógica para a filtragem de registros deletados por range de data dentro da lixeira, com suporte a paginação.
 
@@ -45,6 +57,8 @@ def filter_trash_service(table_name: str, schema_name: str, start_date: str, end
         end_date (str): Data final do range no formato 'YYYY-MM-DD'.
         limit (int): Número máximo de registros retornados por página.
         offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+        cursor (str): Token `next_cursor` da página anterior (paginação por cursor).
+        count (str): Estratégia do total de registros (`exact`, `estimated` ou `none`).
 
     Returns:
         Um dicionário contendo os registros deletados paginados e informações de paginação.
@@ -53,8 +67,8 @@ def filter_trash_service(table_name: str, schema_name: str, start_date: str, end
         Exception: Caso ocorra um erro na consulta ao banco de dados.
     """
     try:
-        filter_by_data = EditRegisters()
-        result = filter_by_data._get_deleted_records_by_date_range(table_name, schema_name, start_date, end_date, limit, offset)
+        filter_by_data = AsyncEditRegisters()
+        result = await filter_by_data._get_deleted_records_by_date_range(table_name, schema_name, start_date, end_date, limit, offset, cursor, count)
 
         if not result or not result.get("deleted_records"):
             return {"message": "Nenhum registro deletado encontrado no período informado.", "total_records": 0}
@@ -67,7 +81,7 @@ def filter_trash_service(table_name: str, schema_name: str, start_date: str, end
         logger.error(f"Erro ao consultar a lixeira da tabela '{table_name}': {e}")
         return {"error": f"Erro ao consultar registros deletados: {str(e)}"}
     
-def filter_company_service(company_id: str, schema_name: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+async def filter_company_service(company_id: str, schema_name: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
     """
     Lista tabelas associadas a uma empresa pelo identificador, com suporte a paginação.
 
@@ -84,8 +98,8 @@ def filter_company_service(company_id: str, schema_name: str, limit: int = 10, o
         Exception: Caso ocorra um erro na consulta ao banco de dados.
     """
     try:
-        filter_by_data = InsertCompany()
-        result = filter_by_data._find_tables_with_company_id(company_id, schema_name, limit, offset)
+        filter_by_data = AsyncInsertCompany()
+        result = await filter_by_data._find_tables_with_company_id(company_id, schema_name, limit, offset)
 
         logger.info(f"Tabelas associadas à empresa '{company_id}' consultadas com sucesso. Total de tabelas retornadas: {len(result.get('tables', []))}")
         return result
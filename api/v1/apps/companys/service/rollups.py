@@ -0,0 +1,36 @@
+from db.rollups import AsyncRollups, rollup_store
+from typing import Any, Dict, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def declare_rollup_service(schema_name: str, table_name: str, dimensions: List[str], measures: List[str]) -> Dict[str, Any]:
+    """
+    Declara o rollup da tabela dinâmica e o reconstrói a partir dos registros ativos.
+
+    Raises:
+        RollupError: Dimensão ou medida inválida.
+    """
+    rollup = rollup_store.declare(schema_name, table_name, dimensions, measures)
+    logger.info(f"Rollup declarado em {schema_name}.{table_name}: dimensões {dimensions}, medidas {measures}.")
+    return rollup
+
+
+def drop_rollup_service(schema_name: str, table_name: str) -> bool:
+    """Remove o rollup da tabela dinâmica. Retorna False caso ela não tenha rollup."""
+    return rollup_store.drop(schema_name, table_name)
+
+
+async def rollup_aggregate_service(schema_name: str, table_name: str, start_date: str, end_date: str, group_by: List[str], filters: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Agregados do rollup no período (contagem e soma das medidas), agrupados pelas dimensões pedidas.
+
+    Returns:
+        As linhas agregadas, ou None caso a tabela não tenha rollup.
+
+    Raises:
+        RollupError: Dimensão não declarada em `group_by` ou nos filtros.
+    """
+    return await AsyncRollups()._aggregate(schema_name, table_name, start_date, end_date, group_by, filters)
@@ -0,0 +1,281 @@
+from concurrent.futures import ThreadPoolExecutor
+from db.ingestion import HandsOnIngestion, IngestionError, NewsIngestion
+from db.jobs import JobStore, job_store
+from config.config import JOB_CHUNK_SIZE, JOB_HEARTBEAT_INTERVAL, JOB_STALE_AFTER, JOB_WORKERS
+from helpers.spreadsheet import iter_spreadsheet, spool_to_disk, spreadsheet_extension
+from starlette.concurrency import run_in_threadpool
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterable, List, Optional, Set
+import asyncio
+import logging
+import os
+import socket
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _run_news(params: Dict[str, Any], items: List[dict]) -> Dict[str, Dict[str, int]]:
+    ingestion = NewsIngestion(params["schema_name"], params["table_name"], params["company_id_clipping"], params["chunk_size"])
+    ingestion.run(items)
+    return ingestion.summary
+
+
+def _run_hands_on(params: Dict[str, Any], items: List[dict]) -> Dict[str, Dict[str, int]]:
+    ingestion = HandsOnIngestion(params["schema_name"], params["table_name"], params["company_id"])
+    ingestion.run(items)
+    return ingestion.summary
+
+
+# Rotina de ingestão de cada tipo de job: recebe os parâmetros e um bloco de itens e
+# devolve as contagens do bloco por banco (ex.: {"clipping": {"inserted": 10, ...}})
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], List[dict]], Dict[str, Dict[str, int]]]] = {
+    "news": _run_news,
+    "hands_on": _run_hands_on,
+}
+
+
+class JobRunner:
+    """
+    Pool local de workers que executa os jobs de ingestão da `JobStore`.
+
+    Cada job é processado em blocos de `chunk_size` itens com a mesma rotina usada pelas rotas
+    síncronas. Os itens inválidos (`IngestionError.errors`) são registrados como erro e o bloco é
+    reaplicado sem eles; qualquer outro erro encerra o job como `failed`. Entre um bloco e outro o
+    worker grava o progresso e verifica se o cancelamento foi pedido.
+
+    Uma thread de fundo renova, a cada `heartbeat_interval` segundos, o heartbeat dos jobs em
+    andamento (um bloco pode demorar mais que `JOB_STALE_AFTER`) e devolve ao pool os jobs de
+    workers que caíram, sem esperar a próxima subida da aplicação.
+
+    Args:
+        store (JobStore): Fila de jobs.
+        workers (int): Quantidade de threads do pool.
+        chunk_size (int): Itens por bloco.
+        heartbeat_interval (float): Segundos entre um heartbeat e outro.
+    """
+
+    def __init__(self, store: JobStore = job_store, workers: int = JOB_WORKERS, chunk_size: int = JOB_CHUNK_SIZE,
+                 heartbeat_interval: float = JOB_HEARTBEAT_INTERVAL) -> None:
+        self.store = store
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._submitted: Set[str] = set()
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Cria as tabelas da fila, sobe o pool e retoma os jobs pendentes, inclusive os deixados por este worker."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self.store.ensure_tables()
+            pending = self.store.pending(JOB_STALE_AFTER, self.worker_name)
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingestion-job")
+            self._stop.clear()
+            self._monitor = threading.Thread(target=self._loop, name="ingestion-job-heartbeat", daemon=True)
+            self._monitor.start()
+        for job_id in pending:
+            self._submit(job_id)
+
+    def shutdown(self) -> None:
+        """Para de aceitar jobs. Jobs interrompidos são retomados na próxima subida."""
+        self._stop.set()
+        self._monitor = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _submit(self, job_id: str) -> None:
+        """Entrega o job ao pool, a menos que ele já esteja no pool deste worker."""
+        with self._lock:
+            if self._executor is None or job_id in self._submitted:
+                return
+            self._submitted.add(job_id)
+            self._executor.submit(self.run, job_id)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.store.heartbeat(self.worker_name)
+                for job_id in self.store.pending(JOB_STALE_AFTER):
+                    self._submit(job_id)
+            except Exception as e:
+                logger.error(f"Não foi possível renovar o heartbeat dos jobs de ingestão: {e}")
+
+    def submit(self, kind: str, params: Dict[str, Any], items: Iterable[dict]) -> str:
+        """
+        Enfileira um job e o entrega ao pool.
+
+        Returns:
+            str: Identificador do job.
+
+        Raises:
+            ValueError: Caso o tipo de job não exista.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Tipo de job inválido: {kind}")
+        self.start()
+        job_id = self.store.create(kind, params, items)
+        self._submit(job_id)
+        logger.info(f"Job {job_id} ({kind}) enfileirado.")
+        return job_id
+
+    async def submit_stream(self, kind: str, params: Dict[str, Any], batches: AsyncIterator[List[dict]]) -> str:
+        """
+        Enfileira um job cujos itens chegam em lotes (corpo da requisição lido em streaming).
+
+        Cada lote é gravado na fila enquanto o próximo é lido da requisição; o job só vai para os
+        workers quando o último lote chega. Se a leitura falhar, o job é encerrado como `failed`.
+
+        Returns:
+            str: Identificador do job.
+
+        Raises:
+            ValueError: Caso o tipo de job não exista ou o corpo seja inválido.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Tipo de job inválido: {kind}")
+        await run_in_threadpool(self.start)
+        job_id = await run_in_threadpool(self.store.open, kind, params)
+
+        received = 0
+        writing: Optional[asyncio.Future] = None
+        try:
+            async for batch in batches:
+                if writing is not None:
+                    await writing
+                writing = asyncio.ensure_future(run_in_threadpool(self.store.append, job_id, received + 1, batch))
+                received += len(batch)
+            if writing is not None:
+                await writing
+        except Exception as e:
+            if writing is not None:
+                if not writing.done():
+                    await asyncio.wait([writing])
+                if not writing.cancelled():
+                    writing.exception()
+            await run_in_threadpool(self.store.finish, job_id, "failed", str(e))
+            raise
+
+        if await run_in_threadpool(self.store.seal, job_id) == "queued":
+            self._submit(job_id)
+            logger.info(f"Job {job_id} ({kind}) enfileirado com {received} itens recebidos em streaming.")
+        return job_id
+
+    def _apply(self, handler: Callable, params: Dict[str, Any], chunk: List[tuple], errors: List[Dict[str, Any]], result: Dict[str, Any]) -> None:
+        """Aplica um bloco, descartando os itens inválidos, e soma as contagens do bloco em `result`."""
+        pending = list(chunk)
+        while pending:
+            try:
+                counts = handler(params, [item for _, item in pending])
+                result["saved_rows"] += len(pending)
+                for target, target_counts in counts.items():
+                    totals = result.setdefault(target, {})
+                    for name, value in target_counts.items():
+                        totals[name] = totals.get(name, 0) + value
+                return
+            except IngestionError as e:
+                # Todos os itens inválidos do bloco saem de uma vez; a linha do erro passa a ser a posição no job
+                positions = [position for position, _ in pending]
+                errors.extend({**error, "row": positions[error["row"] - 1]} for error in e.errors)
+                invalid = {error["row"] - 1 for error in e.errors}
+                pending = [entry for index, entry in enumerate(pending) if index not in invalid]
+
+    def run(self, job_id: str) -> None:
+        """Executa um job até o fim, falha ou cancelamento."""
+        try:
+            self._run(job_id)
+        finally:
+            with self._lock:
+                self._submitted.discard(job_id)
+
+    def _run(self, job_id: str) -> None:
+        job = self.store.claim(job_id, self.worker_name)
+        if job is None:
+            return
+
+        handler = JOB_HANDLERS[job["kind"]]
+        processed = job["processed_rows"]
+        result = job["result"] or {"saved_rows": 0}
+        try:
+            while True:
+                chunk = self.store.rows(job_id, processed, self.chunk_size)
+                if not chunk:
+                    break
+
+                errors: List[Dict[str, Any]] = []
+                self._apply(handler, job["params"], chunk, errors, result)
+                processed = chunk[-1][0]
+
+                if self.store.progress(job_id, processed, errors, result):
+                    self.store.finish(job_id, "cancelled", "Cancelado a pedido do usuário.")
+                    logger.info(f"Job {job_id} cancelado após {processed} itens.")
+                    return
+
+            self.store.finish(job_id, "succeeded")
+            logger.info(f"Job {job_id} concluído: {processed} itens processados.")
+
+        except Exception as e:
+            logger.error(f"Erro no job {job_id}: {e}")
+            self.store.finish(job_id, "failed", str(e))
+
+
+job_runner = JobRunner()
+
+
+def submit_job_service(kind: str, params: Dict[str, Any], items: Iterable[dict]) -> Dict[str, Any]:
+    """
+    Enfileira um upload para processamento em segundo plano.
+
+    Returns:
+        Identificador do job e o estado inicial.
+    """
+    job_id = job_runner.submit(kind, params, items)
+    return {"job_id": job_id, "status": "queued"}
+
+
+async def submit_job_stream_service(kind: str, params: Dict[str, Any], batches: AsyncIterator[List[dict]]) -> Dict[str, Any]:
+    """
+    Enfileira um upload lido em streaming, gravando os lotes na fila à medida que chegam.
+
+    Raises:
+        ValueError: Caso o corpo da requisição seja inválido (o job fica como `failed`).
+    """
+    job_id = await job_runner.submit_stream(kind, params, batches)
+    job = await run_in_threadpool(job_runner.store.get, job_id)
+    return {"job_id": job_id, "status": job["status"] if job else "queued"}
+
+
+def submit_spreadsheet_job_service(kind: str, params: Dict[str, Any], file: BinaryIO, filename: str, encoding: str = "utf-8-sig") -> Dict[str, Any]:
+    """
+    Enfileira o upload de uma planilha .xlsx/.csv.
+
+    O arquivo é gravado em disco e lido linha a linha direto para a fila do job, em lotes,
+    então a memória usada não depende do tamanho da planilha. O arquivo é apagado em seguida.
+
+    Raises:
+        ValueError: Caso o arquivo não seja uma planilha válida.
+    """
+    extension = spreadsheet_extension(filename)
+    path = spool_to_disk(file, extension)
+    try:
+        job = submit_job_service(kind, params, iter_spreadsheet(path, extension, encoding))
+        logger.info(f"Planilha '{filename}' enfileirada no job {job['job_id']}.")
+        return job
+    finally:
+        os.remove(path)
+
+
+def get_job_service(job_id: str) -> Optional[Dict[str, Any]]:
+    """Estado e progresso de um job (linhas processadas, linhas/s, erros)."""
+    return job_runner.store.get(job_id)
+
+
+def cancel_job_service(job_id: str) -> Optional[Dict[str, Any]]:
+    """Pede o cancelamento de um job."""
+    return job_runner.store.cancel(job_id)
@@ -0,0 +1,64 @@
+from db.ingestion import IngestionError
+from starlette.concurrency import run_in_threadpool
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _write_batch(ingestion: Any, batch: List[dict], offset: int) -> List[Dict[str, Any]]:
+    try:
+        return ingestion.write_batch(batch)
+    except IngestionError as e:
+        # Linhas do erro relativas ao upload inteiro, não ao lote
+        errors = [{**error, "row": error["row"] + offset} for error in e.errors]
+        raise IngestionError(e.index + offset, str(e), errors)
+
+
+async def ingest_stream_service(batches: AsyncIterator[List[dict]], ingestion: Any) -> Dict[str, Any]:
+    """
+    Grava um upload lido em streaming numa única transação, lote a lote, enquanto o próximo lote é lido da requisição.
+
+    Cada lote é validado e gravado no threadpool pela ingestão (`NewsIngestion`, com commit em
+    duas fases nos dois bancos, ou `HandsOnIngestion`), sempre na transação aberta por `begin`.
+    O commit só acontece depois que o corpo inteiro foi lido e gravado sem erro; qualquer falha
+    (item inválido, JSON quebrado, erro de banco) desfaz todos os lotes.
+
+    Args:
+        batches (AsyncIterator[List[dict]]): Lotes de itens (ver `iter_json_batches`).
+        ingestion (Any): Ingestão do upload (`begin`, `write_batch`, `commit`, `rollback` e `summary`).
+
+    Returns:
+        `data`: o identificador gravado em cada tabela para cada item;
+        `summary`: contagens somadas de todos os lotes.
+
+    Raises:
+        IngestionError: Caso algum item seja inválido; nada é gravado.
+    """
+    data: List[Dict[str, Any]] = []
+    received = 0
+    writing: Optional[asyncio.Future] = None
+
+    await run_in_threadpool(ingestion.begin)
+    try:
+        async for batch in batches:
+            if writing is not None:
+                data.extend(await writing)
+            writing = asyncio.ensure_future(run_in_threadpool(_write_batch, ingestion, batch, received))
+            received += len(batch)
+        if writing is not None:
+            data.extend(await writing)
+    except Exception:
+        # O lote em gravação usa a conexão da transação: espera ele terminar antes de desfazer
+        if writing is not None:
+            if not writing.done():
+                await asyncio.wait([writing])
+            if not writing.cancelled():
+                writing.exception()
+        await run_in_threadpool(ingestion.rollback)
+        raise
+    await run_in_threadpool(ingestion.commit)
+
+    logger.info(f"Upload em streaming de {received} itens realizado com sucesso.")
+    return {"data": data, "summary": ingestion.summary}
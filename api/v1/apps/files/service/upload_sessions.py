@@ -0,0 +1,40 @@
+from db.upload_sessions import upload_session_store
+from typing import Any, Dict, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_upload_session_service(schema_name: str, table_name: str, company_id: int) -> Dict[str, Any]:
+    """Abre uma sessão de upload em blocos para a tabela dinâmica."""
+    session = upload_session_store.create({"schema_name": schema_name, "table_name": table_name, "company_id": company_id})
+    logger.info(f"Sessão de upload {session['id']} aberta para {schema_name}.{table_name}.")
+    return session
+
+
+def upload_chunk_service(session_id: str, chunk_number: int, json_data: List[dict]) -> Optional[Dict[str, Any]]:
+    """
+    Grava um bloco numerado da sessão (idempotente: reenviar um bloco confirmado não grava de novo).
+
+    Raises:
+        ChunkOrderError: Bloco fora de ordem ou sessão concluída.
+        IngestionError: Item inválido no bloco.
+    """
+    result = upload_session_store.apply_chunk(session_id, chunk_number, json_data)
+    if result is not None and not result["replayed"]:
+        logger.info(f"Sessão {session_id}: bloco {chunk_number} gravado ({len(json_data)} itens).")
+    return result
+
+
+def get_upload_session_service(session_id: str) -> Optional[Dict[str, Any]]:
+    """Estado da sessão: último bloco confirmado, próximo esperado e resumo parcial."""
+    return upload_session_store.get(session_id)
+
+
+def complete_upload_session_service(session_id: str) -> Optional[Dict[str, Any]]:
+    """Conclui a sessão e devolve o resumo consolidado de todos os blocos."""
+    session = upload_session_store.complete(session_id)
+    if session is not None:
+        logger.info(f"Sessão de upload {session_id} concluída: {session['rows']} itens em {session['chunks']} blocos.")
+    return session
@@ -1,7 +1,9 @@
 from db.insert_column import InsertColumn
 from db.register_update import EditRegisters
 from db.manager.manager_db import ManagerDb
-from typing import List, Dict, Any
+from db.schema_cache import schema_cache
+from db.indexes import retrofit_default_indexes
+from typing import List, Dict, Any, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -71,4 +73,25 @@ def delete_column_service(table_name: str, schema_name: str, column_name: str) -
     except Exception as e:
         logger.error(f"Erro ao deletar tabela '{column_name}': {e}")
         return f"Erro ao deletar tabela: {str(e)}"
-    
\ No newline at end of file
+    
+
+def schema_cache_stats_service() -> Dict[str, Any]:
+    """
+    Retorna os contadores do cache de metadados das tabelas do hands-on
+    """
+    return schema_cache.stats()
+
+
+def default_indexes_service(schema_name: str, table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Aplica o perfil de índices padrão nas tabelas existentes (`CREATE INDEX CONCURRENTLY`)
+    Args:
+        schema_name (str): Nome do esquema das tabelas
+        table_name (str): Nome da tabela; todas as tabelas do schema quando não informado
+    Exception:
+        Repassa o erro do banco para a rota
+    """
+    report = retrofit_default_indexes(schema_name, table_name)
+    created = sum(1 for entry in report if entry["status"] in ("created", "rebuilt"))
+    logger.info(f"Perfil de índices aplicado no schema '{schema_name}': {created} índice(s) criado(s).")
+    return report
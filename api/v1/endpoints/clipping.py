@@ -2,6 +2,7 @@ from api.v1.apps.clipping.service.clipping_service import  get_active_company_cl
 from fastapi import APIRouter, HTTPException, status, Query
 from fastapi.encoders import jsonable_encoder
 from typing import Optional
+from helpers.utils import check_cursor
 
 router = APIRouter()
 
@@ -33,15 +34,17 @@ router = APIRouter()
     },
     status_code=status.HTTP_200_OK
 )
-def active_company(
+async def active_company(
     limit: Optional[int] = Query(10, description="Número máximo de empresas por página", ge=1),
     offset: Optional[int] = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` da página anterior; quando informado, `offset` é ignorado"),
 ):
     """
     Lista todas as empresas ativas no clipping de forma paginada.
     """
     try:
-        objs = get_active_company_clipping(limit, offset)
+        check_cursor(cursor)
+        objs = await get_active_company_clipping(limit, offset, cursor)
 
         if not objs or not objs.get("active_companies"):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhuma empresa ativa encontrada.")
@@ -83,15 +86,17 @@ def active_company(
     },
     status_code=status.HTTP_200_OK
 )
-def deactive_company(
+async def deactive_company(
     limit: Optional[int] = Query(10, description="Número máximo de empresas por página", ge=1),
     offset: Optional[int] = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` da página anterior; quando informado, `offset` é ignorado"),
 ):
     """
     Lista todas as empresas desativadas no clipping de forma paginada.
     """
     try:
-        objs = get_deactivate_company_clipping(limit, offset)
+        check_cursor(cursor)
+        objs = await get_deactivate_company_clipping(limit, offset, cursor)
 
         if not objs or not objs.get("deactivated_companies"):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhuma empresa desativada encontrada.")
@@ -1,10 +1,10 @@
 from api.v1.apps.companys.service.company_service import create_company_service, get_company_service, trash_company_service, deactive_company_service, active_company_service, update_company_service
 from fastapi import APIRouter, HTTPException, status, Response, Query
 from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from helpers.responses import FastJSONResponse
 from decouple import config
 from typing import Dict, Optional
-from helpers.utils import normalize_string
+from helpers.utils import check_cursor, normalize_string
 import re
 
 router = APIRouter()
@@ -38,21 +38,23 @@ router = APIRouter()
     },
     status_code=status.HTTP_200_OK
 )
-def all_company(
+async def all_company(
     limit: Optional[int] = Query(10, description="Número máximo de empresas por página", ge=1),
     offset: Optional[int] = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` da página anterior; quando informado, `offset` é ignorado"),
 ):
     """
     Lista todas as empresas ativas de forma paginada.
     """
     try:
+        check_cursor(cursor)
         # Chama o serviço com paginação
-        company_objects = get_company_service(limit, offset)
+        company_objects = await get_company_service(limit, offset, cursor)
 
         if not company_objects or not company_objects.get("companies"):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhuma empresa ativa encontrada.")
 
-        return jsonable_encoder(company_objects)
+        return FastJSONResponse(company_objects)
 
     except HTTPException as exception:
         raise exception
@@ -88,21 +90,23 @@ def all_company(
     },
     status_code=status.HTTP_200_OK
 )
-def trash_company(
+async def trash_company(
     limit: Optional[int] = Query(10, description="Número máximo de empresas por página", ge=1),
     offset: Optional[int] = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` da página anterior; quando informado, `offset` é ignorado"),
 ):
     """
     Listagem paginada de todas as empresas desativadas.
     """
     try:
+        check_cursor(cursor)
         # Chama o serviço com paginação
-        trash_company_objects = trash_company_service(limit, offset)
+        trash_company_objects = await trash_company_service(limit, offset, cursor)
 
         if not trash_company_objects or not trash_company_objects.get("inactive_companies"):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhuma empresa inativa encontrada.")
 
-        return jsonable_encoder(trash_company_objects)
+        return FastJSONResponse(trash_company_objects)
 
     except HTTPException as exception:
         raise exception
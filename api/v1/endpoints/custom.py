@@ -1,12 +1,18 @@
-from api.v1.apps.companys.service.customize_company import create_table_service, create_column_text_service, create_column_integer_service, create_column_float_service, create_column_date_service, create_column_boolean_service, update_field_name_service, change_type_field_service, delete_column_service, active_register_service, create_schema_service
-from api.v1.apps.companys.service.company_service import trash_register_service, get_records_service, add_table_in_company_service
-from api.v1.apps.companys.service.filters import filter_date_service, filter_company_service, filter_trash_service
+from api.v1.apps.companys.service.customize_company import create_table_service, create_columns_service, update_field_name_service, change_type_field_service, set_records_deleted_service, create_schema_service
+from api.v1.apps.companys.service.company_service import trash_register_service, get_records_service, stream_records_service, add_table_in_company_service
+from api.v1.apps.companys.service.filters import filter_date_service, stream_filter_date_service, filter_company_service, filter_trash_service
+from api.v1.apps.companys.service.rollups import declare_rollup_service, drop_rollup_service, rollup_aggregate_service
+from db.insert_column import ColumnLockTimeout
+from db.partitions import PARTITION_INTERVALS
+from db.rollups import RollupError
+from db.row_formats import ROW_FORMAT_DESCRIPTION, ROW_FORMAT_PATTERN, page_rows
 from fastapi import APIRouter, HTTPException, status, Response, Query
 from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from helpers.responses import FastJSONResponse, ndjson_response
 from loguru import logger
+from datetime import date
 from typing import Dict, List, Any, Optional
-from helpers.utils import normalize_string
+from helpers.utils import check_cursor, normalize_string
 
 router = APIRouter()
 
@@ -39,17 +45,21 @@ router = APIRouter()
     },
     status_code=status.HTTP_200_OK
 )
-def filter_by_date(
+async def filter_by_date(
     table_name: str = Query(..., description="Nome da tabela"),
     schema_name: str = Query(..., description="Nome do schema"),
     start_date: str = Query(..., description="Data inicial no formato YYYY-MM-DD"),
     end_date: str = Query(..., description="Data final no formato YYYY-MM-DD"),
     limit: Optional[int] = Query(10, description="Número máximo de registros por página", ge=1),
     offset: Optional[int] = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` da página anterior; quando informado, `offset` é ignorado"),
+    count: str = Query("exact", description="Total de registros: exact, estimated (estimativa do PostgreSQL) ou none", regex="^(exact|estimated|none)$"),
+    row_format: str = Query("json", alias="format", description=ROW_FORMAT_DESCRIPTION, regex=ROW_FORMAT_PATTERN),
 ):
     """Listagem dos registros por filtro em range de data com paginação"""
 
     try:
+        check_cursor(cursor)
         # Validação adicional do formato das datas
         if not start_date or not end_date:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma data válida no formato YYYY-MM-DD.")
@@ -59,12 +69,18 @@ def filter_by_date(
 
         table_name = normalize_string(table_name)
         schema_name = normalize_string(schema_name)
-        filter_by_date_objects = filter_date_service(table_name, schema_name, start_date, end_date, limit, offset)
+        if row_format == "ndjson":
+            response = await ndjson_response(stream_filter_date_service(table_name, schema_name, start_date, end_date, limit, offset, cursor))
+            if response is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhuma informação encontrada para o período informado.")
+            return response
 
-        if not filter_by_date_objects or not filter_by_date_objects.get("data"):
+        filter_by_date_objects = await filter_date_service(table_name, schema_name, start_date, end_date, limit, offset, cursor, count, row_format)
+
+        if not page_rows(filter_by_date_objects, "data"):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhuma informação encontrada para o período informado.")
 
-        return jsonable_encoder(filter_by_date_objects)
+        return FastJSONResponse(filter_by_date_objects)
 
     except HTTPException as exception:
         raise exception
@@ -103,18 +119,21 @@ def filter_by_date(
     },
     status_code=status.HTTP_200_OK
 )
-def filter_trash_by_date(
+async def filter_trash_by_date(
     table_name: str = Query(..., description="Nome da tabela"),
     schema_name: str = Query(..., description="Nome do schema"),
     start_date: str = Query(..., description="Data inicial no formato YYYY-MM-DD"),
     end_date: str = Query(..., description="Data final no formato YYYY-MM-DD"),
     limit: Optional[int] = Query(10, description="Número máximo de registros por página", ge=1),
     offset: Optional[int] = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` da página anterior; quando informado, `offset` é ignorado"),
+    count: str = Query("exact", description="Total de registros: exact, estimated (estimativa do PostgreSQL) ou none", regex="^(exact|estimated|none)$"),
 ):
     """
     Listagem paginada de registros deletados dentro da lixeira por intervalo de datas.
     """
     try:
+        check_cursor(cursor)
         if not table_name:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Valor inválido para o nome da tabela.")
 
@@ -127,12 +146,12 @@ def filter_trash_by_date(
         table_name = normalize_string(table_name)
         schema_name = normalize_string(schema_name)
 
-        filter_trash_objects = filter_trash_service(table_name, schema_name, start_date, end_date, limit, offset)
+        filter_trash_objects = await filter_trash_service(table_name, schema_name, start_date, end_date, limit, offset, cursor, count)
 
         if not filter_trash_objects or not filter_trash_objects.get("deleted_records"):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhum registro deletado encontrado nesse intervalo de datas.")
 
-        return jsonable_encoder(filter_trash_objects)
+        return FastJSONResponse(filter_trash_objects)
 
     except HTTPException as exception:
         raise exception
@@ -172,7 +191,7 @@ def filter_trash_by_date(
     },
     status_code=status.HTTP_200_OK
 )
-def filter_by_company(
+async def filter_by_company(
     company_id: str = Query(..., description="Identificador da empresa"),
     schema_name: str = Query(..., description="Nome do schema no banco de dados"),
     limit: Optional[int] = Query(10, description="Número máximo de tabelas por página", ge=1),
@@ -187,12 +206,12 @@ def filter_by_company(
 
         # Chama o serviço com paginação
         schema_name = normalize_string(schema_name)
-        filter_company_objects = filter_company_service(company_id, schema_name, limit, offset)
+        filter_company_objects = await filter_company_service(company_id, schema_name, limit, offset)
 
         if not filter_company_objects or not filter_company_objects.get("tables"):
             raise HTTPException(status_code=404, detail="Nenhuma informação encontrada para o identificador informado.")
 
-        return jsonable_encoder(filter_company_objects)
+        return FastJSONResponse(filter_company_objects)
 
     except HTTPException as exception:
         raise exception
@@ -229,26 +248,29 @@ def filter_by_company(
     },
     status_code=status.HTTP_200_OK
 )
-def get_trash(
+async def get_trash(
     table_name: str = Query(..., description="Nome da tabela"),
     schema_name: str = Query(..., description="Nome do schema"),
     limit: Optional[int] = Query(10, description="Número máximo de registros por página", ge=1),
     offset: Optional[int] = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` da página anterior; quando informado, `offset` é ignorado"),
+    count: str = Query("exact", description="Total de registros: exact, estimated (estimativa do PostgreSQL) ou none", regex="^(exact|estimated|none)$"),
 ) -> Dict[str, Any]:
     """Lixeira de registros deletados com suporte a paginação."""
     
     try:
+        check_cursor(cursor)
         if not table_name:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira um nome válido para a tabela.")
         
         table_name = normalize_string(table_name)
         schema_name = normalize_string(schema_name)
-        trash_register_objects = trash_register_service(table_name, schema_name, limit, offset)
+        trash_register_objects = await trash_register_service(table_name, schema_name, limit, offset, cursor, count)
 
         if not trash_register_objects or not trash_register_objects.get("trash"):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Não há nada na lixeira.")
 
-        return jsonable_encoder(trash_register_objects)
+        return FastJSONResponse(trash_register_objects)
     
     except HTTPException as exception:
         raise exception
@@ -285,25 +307,35 @@ def get_trash(
     },
     status_code=status.HTTP_200_OK
 )
-def get_registers(
+async def get_registers(
     table_name: str = Query(..., description="Nome da tabela"),
     schema_name: str = Query(..., description="Nome do schema"),
     limit: Optional[int] = Query(10, description="Número máximo de registros por página", ge=1),
     offset: Optional[int] = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` da página anterior; quando informado, `offset` é ignorado"),
+    count: str = Query("exact", description="Total de registros: exact, estimated (estimativa do PostgreSQL) ou none", regex="^(exact|estimated|none)$"),
+    row_format: str = Query("json", alias="format", description=ROW_FORMAT_DESCRIPTION, regex=ROW_FORMAT_PATTERN),
 ):
     """Traz todos os registros ativos em uma tabela consultada com suporte a paginação."""
     try:
+        check_cursor(cursor)
         if not table_name:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira um valor válido para o nome da tabela.")
 
         table_name = normalize_string(table_name)
         schema_name = normalize_string(schema_name)
-        get_records_objects = get_records_service(table_name, schema_name, limit, offset)
+        if row_format == "ndjson":
+            response = await ndjson_response(stream_records_service(table_name, schema_name, limit, offset, cursor))
+            if response is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Não foi possível encontrar dados.")
+            return response
+
+        get_records_objects = await get_records_service(table_name, schema_name, limit, offset, cursor, count, row_format)
 
-        if not get_records_objects or not get_records_objects.get("active_records"):
+        if not page_rows(get_records_objects, "active_records"):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Não foi possível encontrar dados.")
 
-        return jsonable_encoder(get_records_objects)
+        return FastJSONResponse(get_records_objects)
 
     except HTTPException as exception:
         raise exception
@@ -321,7 +353,8 @@ def get_registers(
                     {
                         "tables": [
                         {
-                            "table_name": "braskem"
+                            "table_name": "braskem",
+                            "partition_interval": "month"
                         }
                         ],
                         "schemas": [
@@ -350,6 +383,13 @@ def add_table(json: dict) -> str:
             if not table_name:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira um valor válido para o nome da tabela")
 
+            # Particionamento opcional por range de `date`: "month" ou "year"
+            partition_interval = data.get('partition_interval')
+            if partition_interval is not None:
+                partition_interval = str(partition_interval).strip().lower()
+                if partition_interval not in PARTITION_INTERVALS:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"'partition_interval' deve ser um de: {', '.join(PARTITION_INTERVALS)}")
+
             for data in json['schemas']:
                 schema_name = data.get('schema_name')
                 schema_name = normalize_string(schema_name)
@@ -358,7 +398,7 @@ def add_table(json: dict) -> str:
                     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira um valor válido para o schema")
                 table_name = normalize_string(table_name)
                 schema_name = normalize_string(schema_name)
-                create = create_table_service(table_name, schema_name)
+                create = create_table_service(table_name, schema_name, partition_interval)
 
         return JSONResponse(status_code=status.HTTP_201_CREATED, content=f"Tabela {table_name} criada com sucesso.")
     
@@ -413,6 +453,42 @@ def add_schema(json: dict) -> JSONResponse:
         logger.error(f"Erro interno ao criar schema: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
+def _add_columns(payload: dict, column_type: str) -> None:
+    """
+    Corpo comum das rotas `/create-column-*/`: valida o payload inteiro e cria as colunas de cada
+    tabela com um único `ALTER TABLE` (ver `InsertColumn._insert_columns`).
+
+    Raises:
+        HTTPException: 400 para payload inválido e 503 quando a tabela segue bloqueada após as novas tentativas.
+    """
+    tables = payload.get("tables", [])
+    schemas = payload.get("schemas", [])
+    columns = payload.get("columns", [])
+
+    if not isinstance(tables, list) or not isinstance(columns, list):
+        raise HTTPException(status_code=400, detail="'tables' e 'columns' devem ser listas de objetos")
+
+    table_names = [table.get("table_name") for table in tables]
+    if not all(table_names):
+        raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da tabela.")
+    schema_names = [schema.get("schema_name") for schema in schemas]
+    if not all(schema_names):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma valor válido para o schema")
+    column_names = [column.get("column_name") for column in columns]
+    if not all(column_names):
+        raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da coluna.")
+
+    column_names = list(dict.fromkeys(normalize_string(column_name) for column_name in column_names))
+    if not column_names:
+        return
+    for table_name in table_names:
+        for schema_name in schema_names:
+            try:
+                create_columns_service(normalize_string(table_name), normalize_string(schema_name), column_names, column_type)
+            except ColumnLockTimeout as e:
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+
 @router.post("/create-column-text/", responses={
     201: {
         "description": "Colunas criadas com sucesso",
@@ -448,36 +524,7 @@ def add_schema(json: dict) -> JSONResponse:
 def add_column_text(payload: dict) -> Dict[str, str]:
     """Criar campo do tipo texto para uma tabela específica"""
     try:
-        tables = payload.get("tables", [])
-        schemas = payload.get("schemas", [])
-        columns = payload.get("columns", [])
-
-        if not isinstance(tables, list) or not isinstance(columns, list):
-            raise HTTPException(status_code=400, detail="'tables' e 'columns' devem ser listas de objetos")
-
-        for table in tables:
-            table_name = table.get("table_name")
-
-            if not table_name:
-                raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da tabela.")
-            
-            for schema in schemas:
-                schema_name = schema.get("schema_name")
-
-                if not schema_name:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma valor válido para o schema")
-                
-                for column in columns:
-                    column_name = column.get("column_name")
-
-                    if not column_name:
-                        raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da coluna.")
-                    
-                    table_name = normalize_string(table_name)
-                    schema_name = normalize_string(schema_name)
-                    column_name = normalize_string(column_name)
-                    create = create_column_text_service(table_name, schema_name, column_name)
-            
+        _add_columns(payload, "text")
         return JSONResponse(status_code=status.HTTP_201_CREATED, content=f"Coluna de texto criada com sucesso")
 
     except HTTPException as exception:
@@ -521,35 +568,7 @@ def add_column_text(payload: dict) -> Dict[str, str]:
 }, status_code=status.HTTP_201_CREATED)
 def add_column_integer_number(payload: dict) -> Dict[str, str]:
     try:
-        tables = payload.get("tables", [])
-        columns = payload.get("columns", [])
-        schemas = payload.get("schemas", [])
-
-        if not isinstance(tables, list) or not isinstance(columns, list):
-            raise HTTPException(status_code=400, detail="'tables' e 'columns' devem ser listas de objetos")
-
-        for table in tables:
-            table_name = table.get("table_name")
-            if not table_name:
-                raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da tabela")
-
-            for schema in schemas:
-                schema_name = schema.get("schema_name")
-
-                if not schema_name:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma valor válido para o schema")
-
-                for column in columns:
-                    column_name = column.get("column_name")
-                    if not column_name:
-                        raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da coluna")
-                    
-                    table_name = normalize_string(table_name)
-                    schema_name = normalize_string(schema_name)
-                    column_name = normalize_string(column_name)
-
-                    create = create_column_integer_service(table_name, schema_name, column_name)
-            
+        _add_columns(payload, "integer")
         return JSONResponse(status_code=status.HTTP_201_CREATED, content=f"Coluna de número inteiro criada com sucesso")
 
     except HTTPException as exception:
@@ -593,35 +612,7 @@ def add_column_integer_number(payload: dict) -> Dict[str, str]:
 def add_column_float_number(payload: dict) -> Dict[str, str]:
     """Adiciona uma coluna do tipo float"""
     try:
-        tables = payload.get("tables", [])
-        columns = payload.get("columns", [])
-        schemas = payload.get("schemas", [])
-
-        if not isinstance(tables, list) or not isinstance(columns, list):
-            raise HTTPException(status_code=400, detail="'tables' e 'columns' devem ser listas de objetos")
-
-        for table in tables:
-            table_name = table.get("table_name")
-            if not table_name:
-                raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da tabela.")
-
-
-            for schema in schemas:
-                schema_name = schema.get("schema_name")
-
-                if not schema_name:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma valor válido para o schema")
-
-                for column in columns:
-                    column_name = column.get("column_name")
-                    if not column_name:
-                        raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da coluna.")
-                    
-                    table_name = normalize_string(table_name)
-                    schema_name = normalize_string(schema_name)
-                    column_name = normalize_string(column_name)
-                    create = create_column_float_service(table_name, schema_name, column_name)
-            
+        _add_columns(payload, "float")
         return JSONResponse(status_code=status.HTTP_201_CREATED, content=f"Coluna de número float criada com sucesso")
 
     except HTTPException as exception:
@@ -665,35 +656,8 @@ def add_column_float_number(payload: dict) -> Dict[str, str]:
 def add_column_date(payload: dict) -> Dict[str, str]:
     """Adiciona uma coluna do tipo date"""
     try:
-        tables = payload.get("tables", [])
-        columns = payload.get("columns", [])
-        schemas = payload.get("schemas", [])
-
-        if not isinstance(tables, list) or not isinstance(columns, list):
-            raise HTTPException(status_code=400, detail="'tables' e 'columns' devem ser listas de objetos")
-
-        for table in tables:
-            table_name = table.get("table_name")
-            if not table_name:
-                raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da tabela")
-
-            for schema in schemas:
-                schema_name = schema.get("schema_name")
-
-                if not schema_name:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma valor válido para o schema")
-
-                for column in columns:
-                    column_name = column.get("column_name")
-                    if not column_name:
-                        raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da coluna")
-                
-                    table_name = normalize_string(table_name)
-                    schema_name = normalize_string(schema_name)
-                    column_name = normalize_string(column_name)
-                    create = create_column_date_service(table_name, schema_name, column_name)
-            
-            return JSONResponse(status_code=status.HTTP_201_CREATED, content=f"Coluna de date criada com sucesso")
+        _add_columns(payload, "date")
+        return JSONResponse(status_code=status.HTTP_201_CREATED, content=f"Coluna de date criada com sucesso")
 
     except HTTPException as exception:
         raise exception
@@ -736,36 +700,9 @@ def add_column_date(payload: dict) -> Dict[str, str]:
 def add_column_boolean(payload: dict) -> Dict[str, str]:
     """Adiciona uma coluna do tipo boolean"""
     try:
-        tables = payload.get("tables", [])
-        columns = payload.get("columns", [])
-        schemas = payload.get("schemas", [])
-
-        if not isinstance(tables, list) or not isinstance(columns, list):
-            raise HTTPException(status_code=400, detail="'tables' e 'columns' devem ser listas de objetos")
-
-        for table in tables:
-            table_name = table.get("table_name")
-            if not table_name:
-                raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da tabela")
-
-            for schema in schemas:
-                schema_name = schema.get("schema_name")
-
-                if not schema_name:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma valor válido para o schema")
-
-                for column in columns:
-                    column_name = column.get("column_name")
-                    if not column_name:
-                        raise HTTPException(status_code=400, detail="Insira um valor válido para o nome da coluna")
-                    
-                    table_name = normalize_string(table_name)
-                    schema_name = normalize_string(schema_name)
-                    column_name = normalize_string(column_name)
-                    create = create_column_boolean_service(table_name, schema_name, column_name)
-
+        _add_columns(payload, "boolean")
         return JSONResponse(status_code=status.HTTP_201_CREATED, content=f"Coluna de boolean  criada com sucesso")
-            
+
     except HTTPException as exception:
         raise exception
             
@@ -968,6 +905,65 @@ def update_type_field(payload: dict):
         raise HTTPException(status_code=500, detail=str(e))
     
 
+def _set_records_deleted(payload: dict, is_deleted: bool, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Corpo comum de `/active-register/` e `/delete_record/`: exclui ou restaura, em uma operação
+    por tabela, os ids de `columns` ou os registros do range `date_range`
+    ({"start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD"}).
+
+    Cada tabela é confirmada por conta própria e entra em `records` logo após o commit, com o
+    estado da atualização do clipping (`clipping`: 'ok' ou 'failed'), para que uma falha no meio
+    informe o que já foi gravado. Uma falha no clipping interrompe as tabelas seguintes.
+
+    Returns:
+        As quantidades alteradas em cada tabela (`records`).
+    """
+    tables = payload.get("tables", [])
+    columns = payload.get("columns", [])
+    schemas = payload.get("schemas", [])
+    date_range = payload.get("date_range")
+
+    if not isinstance(tables, list) or not isinstance(columns, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'tables' e 'columns' devem ser listas de objetos")
+
+    table_names = [normalize_string(table.get("table_name")) for table in tables]
+    if not all(table_names):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Valor inválido para o nome da tabela")
+    schema_names = [normalize_string(schema.get("schema_name")) for schema in schemas]
+    if not all(schema_names):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma valor válido para o schema")
+
+    record_ids, start_date, end_date = None, None, None
+    if date_range:
+        if not isinstance(date_range, dict):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira um 'date_range' válido no formato YYYY-MM-DD.")
+        start_date, end_date = date_range.get("start_date"), date_range.get("end_date")
+        try:
+            date.fromisoformat(start_date)
+            date.fromisoformat(end_date)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira um 'date_range' válido no formato YYYY-MM-DD.")
+    else:
+        try:
+            record_ids = [int(column.get("record_id")) for column in columns]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira um valor certo para o identificador do registro.")
+        if not record_ids:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe os registros em 'columns' ou um 'date_range'.")
+
+    for table_name in table_names:
+        for schema_name in schema_names:
+            record = {
+                "table_name": table_name,
+                "schema_name": schema_name,
+                **set_records_deleted_service(table_name, schema_name, is_deleted, record_ids, start_date, end_date),
+            }
+            records.append(record)
+            if record["clipping"] == "failed":
+                raise Exception(f"{schema_name}.{table_name} foi alterada, mas as notícias não foram atualizadas no clipping.")
+    return records
+
+
 @router.put(
     "/active-register/",
     responses={
@@ -1000,46 +996,27 @@ def update_type_field(payload: dict):
             }
         },
     },
-    400: {"description": "Insira dados válidos"}
+    400: {"description": "Insira dados válidos"},
+    500: {"description": "Erro interno; `records` traz as tabelas já alteradas"}
 }, status_code=status.HTTP_201_CREATED
 )
 def active_register(payload: dict) -> Dict[str, str]:
-    """Restaura os registros da tabela"""
+    """
+    Restaura os registros da tabela: os ids de `columns` ou, com `date_range`
+    ({"start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD"}), todos os registros do período.
+    """
+    records: List[Dict[str, Any]] = []
     try:
-        tables = payload.get("tables", [])
-        columns = payload.get("columns", [])
-        schemas = payload.get("schemas", [])
-
-        if not isinstance(tables, list) or not isinstance(columns, list):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'tables' e 'columns' devem ser listas de objetos")
-
-        for table in tables:
-            table_name = table.get("table_name")
-            if not table_name:
-                raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Valor inválido para o nome da tabela")
-
-            for schema in schemas:
-                schema_name = schema.get("schema_name")
-
-                if not schema_name:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma valor válido para o schema")
-
-                for column in columns:
-                    record_id = column.get("record_id")
-                    if not record_id:
-                        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Insira um valor certo para o identificador do registro que deseja excluir.")
-                    
-                    table_name = normalize_string(table_name)
-                    schema_name = normalize_string(schema_name)
-                    active_register_service(table_name, schema_name, record_id)
-                
-        return JSONResponse(status_code=status.HTTP_200_OK, content="Coluna restaurada com sucesso.")
+        _set_records_deleted(payload, False, records)
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Coluna restaurada com sucesso.", "records": records})
 
     except HTTPException as http_err:
         raise http_err
-    
+
     except Exception as e:
-        return {"error": str(e)}
+        logger.error(f"Erro no endpoint active-register: {str(e)}")
+        # As tabelas de `records` já foram alteradas (ver `clipping` de cada uma); as demais não
+        raise HTTPException(status_code=500, detail={"message": f"Erro interno: {str(e)}", "records": records})
     
 
 @router.delete("/delete_record/", responses={
@@ -1072,44 +1049,148 @@ def active_register(payload: dict) -> Dict[str, str]:
             }
         },
     },
-    400: {"description": "Insira dados válidos"}
+    400: {"description": "Insira dados válidos"},
+    500: {"description": "Erro interno; `records` traz as tabelas já alteradas"}
 }, status_code=status.HTTP_201_CREATED)
 def deactive_record(payload: dict) -> Dict[str, str]:
-    """Deleta um registro utilizando o softdelete"""
+    """
+    Deleta registros utilizando o softdelete: os ids de `columns` ou, com `date_range`
+    ({"start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD"}), todos os registros do período.
+    """
+    records: List[Dict[str, Any]] = []
     try:
-        tables = payload.get("tables", [])
-        columns = payload.get("columns", [])
-        schemas = payload.get("schemas", [])
+        _set_records_deleted(payload, True, records)
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Coluna deletada com sucesso.", "records": records})
 
-        if not isinstance(tables, list) or not isinstance(columns, list):
-            raise HTTPException(status_code=400, detail="'tables' e 'columns' devem ser listas de objetos")
+    except HTTPException as http_err:
+        raise http_err
 
-        for table in tables:
-            table_name = table.get("table_name")
-            table_name = table_name.lower()
-            if not table_name:
-                raise HTTPException(status_code=400, detail="Valor inválido para o nome da tabela")
+    except Exception as e:
+        logger.error(f"Erro no endpoint delete_record: {str(e)}")
+        # As tabelas de `records` já foram alteradas (ver `clipping` de cada uma); as demais não
+        raise HTTPException(status_code=500, detail={"message": f"Erro interno: {str(e)}", "records": records})
 
-            for schema in schemas:
-                schema_name = schema.get("schema_name")
-                schema_name.lower()
 
-                if not schema_name:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira uma valor válido para o schema")
-            
-                for column in columns:
-                    record_id = column.get("record_id")
-                    if not record_id:
-                        raise HTTPException(status_code=400, detail="Insira um valor certo para o identificador do registro que deseja excluir.")
-                    
-                    table_name = normalize_string(table_name)
-                    schema_name = normalize_string(schema_name)
-                    delete_column_service(table_name, schema_name, record_id)
-                
-        return JSONResponse(status_code=status.HTTP_200_OK, content="Coluna deletada com sucesso.")
+@router.put("/rollups/", responses={
+    200: {
+        "description": "Rollup declarado e reconstruído",
+        "content": {
+            "application/json": {
+                "example": {
+                    "schema_name": "meu_schema",
+                    "table_name": "braskem",
+                    "dimensions": ["sentimento", "tema", "veiculo", "tipo_veiculo"],
+                    "measures": ["alcance", "valoracao"],
+                    "groups": 1280
+                }
+            }
+        },
+    },
+    400: {"description": "Insira dados válidos"}
+}, status_code=status.HTTP_200_OK)
+def declare_rollup(payload: dict):
+    """
+    Declara o rollup de uma tabela dinâmica: contagem de registros e soma das `measures` por dia
+    e `dimensions`.
+
+    O rollup é reconstruído a partir dos registros ativos e, depois disso, mantido pelos uploads
+    e pela exclusão/restauração de registros, que recalculam apenas os dias alterados.
+    """
+    try:
+        table_name = normalize_string(payload.get("table_name"))
+        schema_name = normalize_string(payload.get("schema_name"))
+        dimensions = payload.get("dimensions", [])
+        measures = payload.get("measures", [])
+
+        if not table_name or not schema_name:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira valores válidos para 'table_name' e 'schema_name'")
+        if not isinstance(dimensions, list) or not isinstance(measures, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'dimensions' e 'measures' devem ser listas de colunas")
+
+        rollup = declare_rollup_service(schema_name, table_name, [normalize_string(column) for column in dimensions], [normalize_string(column) for column in measures])
+        return FastJSONResponse(rollup)
+
+    except HTTPException as exception:
+        raise exception
+
+    except RollupError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    except Exception as e:
+        logger.error(f"Erro ao declarar rollup: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {str(e)}")
+
+
+@router.delete("/rollups/", responses={
+    200: {"description": "Rollup removido"},
+    404: {"description": "A tabela não tem rollup"}
+}, status_code=status.HTTP_200_OK)
+def drop_rollup(
+    table_name: str = Query(..., description="Nome da tabela"),
+    schema_name: str = Query(..., description="Nome do schema"),
+):
+    """Remove o rollup de uma tabela dinâmica."""
+    try:
+        if not drop_rollup_service(normalize_string(schema_name), normalize_string(table_name)):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"A tabela {table_name} não tem rollup.")
+        return JSONResponse(status_code=status.HTTP_200_OK, content="Rollup removido com sucesso.")
+
+    except HTTPException as exception:
+        raise exception
 
-    except HTTPException as http_err:
-        raise http_err
-    
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        logger.error(f"Erro ao remover rollup: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {str(e)}")
+
+
+@router.get("/rollups/", responses={
+    200: {
+        "description": "Agregados do período",
+        "content": {
+            "application/json": {
+                "example": {
+                    "group_by": ["day", "sentimento"],
+                    "measures": ["alcance", "valoracao"],
+                    "rows": [
+                        {"day": "2024-01-01", "sentimento": "Positivo", "records": 42, "alcance": 158000, "valoracao": 21350.5}
+                    ]
+                }
+            }
+        },
+    },
+    400: {"description": "Insira dados válidos"},
+    404: {"description": "A tabela não tem rollup"},
+    500: {"description": "Erro interno"},
+}, status_code=status.HTTP_200_OK)
+async def get_rollup(
+    table_name: str = Query(..., description="Nome da tabela"),
+    schema_name: str = Query(..., description="Nome do schema"),
+    start_date: str = Query(..., description="Data inicial no formato YYYY-MM-DD"),
+    end_date: str = Query(..., description="Data final no formato YYYY-MM-DD"),
+    group_by: str = Query("day", description="Dimensões do agrupamento separadas por vírgula (`day` e/ou as dimensões declaradas); vazio para o total do período"),
+    filters: Optional[List[str]] = Query(None, alias="filter", description="Filtros `dimensao=valor` (pode repetir)"),
+):
+    """Agregados (contagem de registros e soma das medidas) servidos do rollup, sem ler os registros."""
+    try:
+        dimensions = [normalize_string(name) for name in group_by.split(",") if name.strip()]
+        conditions = {}
+        for condition in filters or []:
+            name, separator, value = condition.partition("=")
+            if not separator or not name.strip():
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Filtro inválido: '{condition}'. Use dimensao=valor.")
+            conditions[normalize_string(name)] = value
+
+        rollup = await rollup_aggregate_service(normalize_string(schema_name), normalize_string(table_name), start_date, end_date, dimensions, conditions)
+        if rollup is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"A tabela {table_name} não tem rollup.")
+        return FastJSONResponse(rollup)
+
+    except HTTPException as exception:
+        raise exception
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    except Exception as e:
+        logger.error(f"Erro no endpoint rollups: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {str(e)}")
@@ -1,229 +1,144 @@
-from fastapi import APIRouter, HTTPException, Query, status, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
-import pandas as pd
-import psycopg2
+from fastapi import APIRouter, File, HTTPException, Path, Query, Request, UploadFile, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from api.v1.apps.clipping.service.clipping_service import save_news_service
-from psycopg2.extras import RealDictCursor
-from datetime import datetime
-import os
-from config.config import DB_HOST_CLIPPING, DB_NAME_CLIPPING, DB_OPTIONS_CLIPPING, DB_PASSWORD_CLIPPING, DB_USER_CLIPPING
-from config.config import DB_HOST_HANDSON, DB_NAME_HANDSON, DB_PASSWORD_HANDSON, DB_USER_HANDSON
+from api.v1.apps.files.service.service import ingest_stream_service
+from api.v1.apps.files.service.jobs import cancel_job_service, get_job_service, submit_job_stream_service, submit_spreadsheet_job_service
+from api.v1.apps.files.service.upload_sessions import (
+    complete_upload_session_service,
+    create_upload_session_service,
+    get_upload_session_service,
+    upload_chunk_service,
+)
+from db.ingestion import HandsOnIngestion, IngestionError, NewsIngestion
+from db.upload_sessions import ChunkOrderError
+from db.export import EXPORT_FORMATS, NewsExport
+from db.clipping_db.news_join import AsyncNewsCodeJoin
+from db.connection import AsyncDatabase
+from db.register_update import AsyncEditRegisters
+from db.row_formats import ROW_FORMAT_DESCRIPTION, ROW_FORMAT_PATTERN, statement_columns
+from db.async_pool import get_clipping_async_pool, get_handson_async_pool, to_asyncpg
+from db.pagination import BY_NEWS_CODE, quote_ident
+from db.counting import count_rows_async
+from config.config import CLIPPING_UPSERT_CHUNK_SIZE, EXPORT_BATCH_SIZE, JOB_CHUNK_SIZE
 from fastapi.encoders import jsonable_encoder
 from loguru import logger
-from typing import List, Union, Dict
-import unicodedata
-import re
-from psycopg2 import sql
+from typing import Any, AsyncIterator, List, Dict, Optional
+from uuid import UUID
+from helpers.json_stream import JSONStreamError, iter_json_batches
+from helpers.responses import FastJSONResponse, ndjson_response
+from helpers.utils import check_cursor
 
 router = APIRouter()
 
-def parse_date(date_str):
-    """
-    Tenta converter uma string de data para um formato 'YYYY-MM-DD',
-    suportando diferentes formatos de entrada.
-    """
-    formats = ["%d/%m/%Y %H:%M:%S", "%d/%m/%Y"]
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d")
-        except ValueError:
-            continue
-    raise ValueError(f"Formato de data inválido: {date_str}")
-
-# FIXME melhorar a estrutura do código, separar em partes menores
-# TODO colocar a lógica principal dentro de uma task do celery e importar nesse endpoint
-def normalize_column_name(name: str) -> str:
-    """Converte nomes de colunas para minúsculas, substitui espaços por '_', remove acentos e caracteres especiais."""
-    name = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore').decode('utf-8')  # Remove acentos
-    name = re.sub(r'[^a-zA-Z0-9_]', '_', name)  # Substitui espaços e caracteres especiais por '_'
-    name = re.sub(r'__+', '_', name)  # Remove underscores duplos
-    return name.lower()  # Converte para minúsculas
-
-def clean_value(value: Union[str, None], is_integer: bool = False, is_string: bool = False) -> Union[str, int, None]:
-    """
-    Normaliza os valores:
-    - Se for string vazia, retorna None.
-    - Se for inteiro e inválido, retorna 0.
-    - Se for string e deve ser forçada para VARCHAR, converte para string.
-    """
-    if value is None or value == "":
-        return None if not is_integer else 0
-
-    if is_integer:
-        return int(value)
+# O corpo das rotas de upload é lido em streaming; o schema fica só na documentação
+UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"type": "array", "items": {"type": "object"}}}},
+    },
+}
 
-    if is_string:
-        return str(value)  # 🔹 Converte explicitamente para string
+def _job_accepted(job: Dict[str, Any]) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"message": "Upload recebido e enfileirado", **job, "status_url": f"/file/jobs/{job['job_id']}/"},
+    )
 
-    return value
 
 @router.post(
     "/upload_file/{table_name}/",
+    openapi_extra=UPLOAD_BODY,
     responses={
         201: {"description": "Dados salvos com sucesso", "content": {"application/json": {}}},
+        202: {"description": "Upload enfileirado; acompanhe em /file/jobs/{job_id}/", "content": {"application/json": {}}},
         400: {"description": "Insira dados válidos"},
     },
     status_code=status.HTTP_201_CREATED,
 )
-def save_news(json_data: List[dict], company_id_clipping: str, schema_name: str, table_name: str = None):
-    """Upload de notícias para a tabela de news no clipping e para o hands-on."""
-    connection_handson = None
-    cursor_handson = None
-    connection_clipping = None
-    cursor_clipping = None
-    print(company_id_clipping)
-
+async def save_news(
+    request: Request,
+    company_id_clipping: str,
+    schema_name: str,
+    table_name: str = None,
+    chunk_size: int = Query(CLIPPING_UPSERT_CHUNK_SIZE, description="Notícias gravadas por comando em clippings_news", ge=1),
+    background: bool = Query(True, description="Processa o upload em segundo plano e retorna o id do job"),
+):
+    """
+    Upload de notícias para a tabela de news no clipping e para o hands-on.
+
+    O corpo (lista JSON de itens) é lido em streaming e repassado em lotes de `JOB_CHUNK_SIZE`
+    itens, sem carregar o payload inteiro em memória. Por padrão os lotes vão para um job
+    (202 com `job_id`) processado pelos workers; com `background=false` cada lote é gravado pelo
+    `NewsIngestion` (upsert set-based) enquanto o próximo é lido, todos na mesma transação em duas
+    fases nos dois bancos: o upload só é confirmado quando o corpo inteiro chega sem erro, e um item
+    inválido em qualquer lote devolve 400 sem gravar nada. `summary` traz as contagens de
+    inseridos/atualizados/inalterados.
+    """
+    batches = iter_json_batches(request.stream(), JOB_CHUNK_SIZE)
     try:
-        # 🔹 **Conexão com o banco HANDSON**
-        connection_handson = psycopg2.connect(
-            dbname=DB_NAME_HANDSON,
-            user=DB_USER_HANDSON,
-            password=DB_PASSWORD_HANDSON,
-            host=DB_HOST_HANDSON,
-        )
-        cursor_handson = connection_handson.cursor()
-
-        # 🔹 **Conexão com o banco CLIPPING**
-        connection_clipping = psycopg2.connect(
-            dbname=DB_NAME_CLIPPING,
-            user=DB_USER_CLIPPING,
-            password=DB_PASSWORD_CLIPPING,
-            host=DB_HOST_CLIPPING,
-            options=DB_OPTIONS_CLIPPING
+        if background:
+            return _job_accepted(await submit_job_stream_service("news", {
+                "company_id_clipping": company_id_clipping,
+                "schema_name": schema_name,
+                "table_name": table_name,
+                "chunk_size": chunk_size,
+            }, batches))
+
+        saved = await ingest_stream_service(batches, NewsIngestion(schema_name, table_name, company_id_clipping, chunk_size))
+        return jsonable_encoder({"message": "Dados salvos com sucesso", **saved})
+
+    except IngestionError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "errors": e.errors})
+    except JSONStreamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro interno: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro interno: {str(e)}"
         )
-        cursor_clipping = connection_clipping.cursor()
-
-        results = []
-
-        for index, item in enumerate(json_data, start=1):
-            try:
-                publication_date = parse_date(item["DATA"])
-            except ValueError:
-                logger.error(f"Erro ao processar a data no item {index}: {item.get('DATA')}")
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Erro ao processar a data no item {index}. Formato inválido: {item['DATA']}",
-                )
-
-            news_id = clean_value(item["CÓDIGO DA NOTÍCIA"], is_string=True)
-
-            clipping_data = {
-                "news_code": news_id,
-                "publication_date": publication_date,
-                "vehicle": item.get("VEÍCULO"),
-                "title": item.get("TÍTULO"),
-                "theme": item.get("TEMA"),
-                "subject_name_slug": item.get("MICROTEMA"),
-                "media_type": item.get("TIPO VEÍCULO"),
-                "tier": clean_value(item.get("TIER", 0), is_integer=True),
-                "feeling": item.get("SENTIMENTO"),
-                "readers": clean_value(item.get("ALCANCE", 0), is_integer=True),
-                "journalist": item.get("JORNALISTA"),
-                "original_link": item.get("LINK ORIGINAL"),
-                "valuation": str(item.get("VALORAÇÃO", "0.00")).replace("R$", "").replace(".", "").replace(",", "."),
-                "created_date": datetime.now(),
-                "modified_date": datetime.now(),
-                "is_active": True,
-                "approved_news": True,
-                "company_id": clean_value(company_id_clipping, is_integer=True)
-            }
-
-            results.append({"table": "clippings_news", "id": news_id})
 
-            cursor_clipping.execute("""
-                SELECT news_code FROM news_charisma.clippings_news WHERE news_code = %s;
-            """, (news_id,))
-            existing_news = cursor_clipping.fetchone()
 
-            if existing_news:
-                update_fields = ', '.join([f"{col} = %s" for col in clipping_data.keys()])
-                update_values = tuple(clipping_data.values()) + (news_id,)
-
-                update_clipping_query = f"""
-                    UPDATE news_charisma.clippings_news
-                    SET {update_fields}
-                    WHERE news_code = %s;
-                """
-                cursor_clipping.execute(update_clipping_query, update_values)
-            else:
-                clipping_columns = ", ".join(clipping_data.keys())
-                clipping_placeholders = ", ".join(["%s"] * len(clipping_data))
-                clipping_values = tuple(clipping_data.values())
-
-                insert_clipping_query = f"""
-                    INSERT INTO news_charisma.clippings_news ({clipping_columns})
-                    VALUES ({clipping_placeholders})
-                    RETURNING id;
-                """
-                cursor_clipping.execute(insert_clipping_query, clipping_values)
-
-            connection_clipping.commit()
-
-            cursor_handson.execute(f"""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name = %s;
-            """, (table_name,))
-            table_columns = {row[0] for row in cursor_handson.fetchall()}
-
-            normalized_data = {
-                normalize_column_name(key): clean_value(value, is_integer=False)
-                for key, value in item.items()
-                if normalize_column_name(key) in table_columns
-            }
+@router.post(
+    "/upload_file/{table_name}/spreadsheet/",
+    responses={
+        202: {"description": "Planilha enfileirada; acompanhe em /file/jobs/{job_id}/", "content": {"application/json": {}}},
+        400: {"description": "Arquivo inválido"},
+    },
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def save_news_spreadsheet(
+    table_name: str,
+    company_id_clipping: str,
+    schema_name: str,
+    file: UploadFile = File(..., description="Planilha .xlsx ou .csv com o mesmo cabeçalho dos itens do upload JSON"),
+    chunk_size: int = Query(CLIPPING_UPSERT_CHUNK_SIZE, description="Notícias gravadas por comando em clippings_news", ge=1),
+    encoding: str = Query("utf-8-sig", description="Codificação do arquivo .csv"),
+):
+    """
+    Upload de notícias enviando a planilha original (.xlsx ou .csv) em multipart, sem conversão para JSON.
 
-            if "news_code" in table_columns:
-                normalized_data["news_code"] = news_id
-            
-            if "date" in table_columns:
-                normalized_data["date"] = publication_date
-
-            if "company_id" in table_columns:
-                normalized_data["company_id"] = company_id_clipping
-            
-            if normalized_data:
-                columns = ", ".join(normalized_data.keys())
-                placeholders = ", ".join(["%s"] * len(normalized_data))
-                values = tuple(normalized_data.values())
-
-                update_fields = ', '.join([f"{col} = EXCLUDED.{col}" for col in normalized_data.keys()])
-
-                upsert_query = f"""
-                    INSERT INTO {schema_name}.{table_name} ({columns})
-                    VALUES ({placeholders})
-                    ON CONFLICT (news_code, company_id, date)
-                    DO UPDATE SET {update_fields}
-                    RETURNING id;
-                """
-                cursor_handson.execute(upsert_query, values)
-                table_id = cursor_handson.fetchone()[0]
-                results.append({"table": table_name, "id": table_id})
-
-        connection_handson.commit()
-
-        return jsonable_encoder({"message": "Dados salvos com sucesso", "data": results})
-    
+    O arquivo é gravado em disco e lido linha a linha (openpyxl em modo `read_only` ou leitor CSV),
+    e as linhas seguem em lotes para o mesmo job de ingestão do `/upload_file/{table_name}/`.
+    """
+    try:
+        return _job_accepted(submit_spreadsheet_job_service("news", {
+            "company_id_clipping": company_id_clipping,
+            "schema_name": schema_name,
+            "table_name": table_name,
+            "chunk_size": chunk_size,
+        }, file.file, file.filename, encoding))
+
+    except (ValueError, LookupError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Erro interno: {e}")
-        if connection_handson:
-            connection_handson.rollback()
-        if connection_clipping:
-            connection_clipping.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Erro interno: {str(e)}"
         )
     finally:
-        if cursor_handson:
-            cursor_handson.close()
-        if connection_handson:
-            connection_handson.close()
-        if cursor_clipping:
-            cursor_clipping.close()
-        if connection_clipping:
-            connection_clipping.close()
-
-
+        file.file.close()
 
 
 # FIXME melhorar a estrutura do código, separar em partes menores
@@ -234,311 +149,323 @@ async def export_to_excel(
     schema_name: str,
     start_date: str, 
     end_date: str, 
-    background_tasks: BackgroundTasks
+    export_format: str = Query("xlsx", alias="format", description="Formato do arquivo: xlsx, csv ou parquet", regex="^(xlsx|csv|parquet)$"),
+    batch_size: int = Query(EXPORT_BATCH_SIZE, description="Registros lidos do banco por lote", ge=1),
 ):
     """
-    Exporta os dados combinados da tabela dinâmica e 'clippings_news' para um arquivo Excel.
-    Se não houver dados em 'clippings_news', apenas os dados do 'hands-on' são exportados sem a coluna `news_code`.
+    Exporta os dados combinados da tabela dinâmica e 'clippings_news' em Excel (padrão), CSV ou Parquet.
+
+    Os registros são lidos em lotes e o arquivo é enviado como `StreamingResponse`.
+    O CSV é serializado pelo PostgreSQL (`COPY ... TO STDOUT`) e o Parquet é tipado a partir
+    dos tipos das colunas. Registros sem notícia correspondente em 'clippings_news' saem com
+    as colunas do clipping vazias. Se nenhum registro do período tiver `news_code`, só os dados
+    do hands-on são exportados, sem as colunas do clipping e sem a coluna `news_code`.
     """
-    file_path = None
     try:
-        logger.info("Estabelecendo conexões com os bancos de dados...")
-        handson_connection = psycopg2.connect(
-            dbname=DB_NAME_HANDSON,
-            user=DB_USER_HANDSON,
-            password=DB_PASSWORD_HANDSON,
-            host=DB_HOST_HANDSON,
-        )
-        clipping_connection = psycopg2.connect(
-            dbname=DB_NAME_CLIPPING,
-            user=DB_USER_CLIPPING,
-            password=DB_PASSWORD_CLIPPING,
-            host=DB_HOST_CLIPPING,
-            options=DB_OPTIONS_CLIPPING
-        )
-
-        handson_cursor = handson_connection.cursor(cursor_factory=RealDictCursor)
-        clipping_cursor = clipping_connection.cursor(cursor_factory=RealDictCursor)
-
-        logger.info(f"Buscando dados da tabela '{table_name}' entre {start_date} e {end_date}...")
-        handson_cursor.execute(f"""
-            SELECT *
-            FROM {schema_name}.{table_name}
-            WHERE is_deleted = FALSE
-            AND date BETWEEN %s AND %s;
-        """, (start_date, end_date))
-        dynamic_data = handson_cursor.fetchall()
-
-        if not dynamic_data:
-            logger.warning(f"Nenhum dado encontrado na tabela {table_name} no intervalo especificado.")
-            raise HTTPException(status_code=404, detail=f"Nenhum dado encontrado no intervalo de datas especificado.")
-
-        logger.info("Filtrando `news_code` válidos...")
-        news_codes = [
-            str(row["news_code"]) for row in dynamic_data 
-            if "news_code" in row and row["news_code"]
-        ]
-
-        logger.info(f"Total de news_codes válidos: {len(news_codes)}")
-
-        if news_codes:
-            logger.info(f"Buscando dados da tabela 'clippings_news' para os news_codes: {news_codes}")
-            placeholder = ",".join(["%s"] * len(news_codes))
-            clipping_cursor.execute(f"""
-                SELECT *
-                FROM clippings_news
-                WHERE news_code IN ({placeholder});
-            """, tuple(news_codes))
-            clipping_data = clipping_cursor.fetchall()
-        else:
-            clipping_data = []
-
-        logger.info("Convertendo dados para DataFrames...")
-        df_dynamic = pd.DataFrame(dynamic_data)
-
-        if clipping_data:
-            logger.info("Dados encontrados em 'clippings_news', combinando com a tabela dinâmica...")
-            df_clippings = pd.DataFrame(clipping_data)
-
-            logger.info("Removendo colunas desnecessárias da tabela dinâmica...")
-            df_dynamic = df_dynamic.drop(columns=["id", "news_code"], errors="ignore")
-
-            logger.info("Combinando os dados lado a lado...")
-            df_combined = pd.concat([df_clippings.reset_index(drop=True), df_dynamic.reset_index(drop=True)], axis=1)
-        else:
-            logger.warning("Nenhum dado encontrado em 'clippings_news'. Exportando apenas os dados do hands-on.")
-            df_combined = df_dynamic.drop(columns=["news_code"], errors="ignore")  # 🚀 REMOVE `news_code` QUANDO NÃO HÁ `clippings_news`
-
-        logger.info("Removendo timezone dos campos datetime...")
-        for col in df_combined.select_dtypes(include=["datetime64[ns, UTC]"]).columns:
-            df_combined[col] = df_combined[col].dt.tz_localize(None)
-
-        logger.info("Gerando o arquivo Excel...")
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        file_path = f"/tmp/exported_data_{timestamp}.xlsx"
-        df_combined.to_excel(file_path, index=False)
-
-        background_tasks.add_task(os.remove, file_path)
-
-        logger.info(f"Arquivo Excel gerado em: {file_path}")
-        return FileResponse(
-            file_path,
-            filename=f"{table_name}_{start_date}_{end_date}.xlsx",
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        logger.info(f"Buscando dados da tabela '{table_name}' entre {start_date} e {end_date} ({export_format})...")
+        has_data = await AsyncEditRegisters()._has_active_records_in_range(table_name, schema_name, start_date, end_date)
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Erro ao exportar os dados: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao exportar os dados: {str(e)}")
-    finally:
-        if handson_cursor:
-            handson_cursor.close()
-        if clipping_cursor:
-            clipping_cursor.close()
-        if handson_connection:
-            handson_connection.close()
-        if clipping_connection:
-            clipping_connection.close()
-            
+
+    if not has_data:
+        logger.warning(f"Nenhum dado encontrado na tabela {table_name} no intervalo especificado.")
+        raise HTTPException(status_code=404, detail=f"Nenhum dado encontrado no intervalo de datas especificado.")
+
+    # O arquivo é gerado pelo psycopg2 (cursor nomeado e COPY) no threadpool do StreamingResponse
+    export = NewsExport(schema_name, table_name, start_date, end_date, batch_size)
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        export.stream(export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table_name}_{start_date}_{end_date}.{extension}"'},
+    )
+
+
+async def _table_exists(connection, schema_name: str, table_name: str) -> bool:
+    return await connection.fetchval("""
+        SELECT EXISTS (
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_schema = $1
+            AND table_name = $2
+        );
+    """, schema_name, table_name)
+
+
+def _combined_columnar(columns: List[str], joined: List[tuple]) -> Dict[str, Any]:
+    """Página combinada no formato `columnar`: colunas de cada banco uma vez e as linhas como listas."""
+    clipping_columns = next((list(clipping) for _, clipping in joined if clipping), [])
+    return {
+        "columns": {"dynamic_table_data": columns, "clipping_data": clipping_columns},
+        "rows": [
+            [list(row), [clipping[column] for column in clipping_columns] if clipping else None]
+            for row, clipping in joined
+        ],
+    }
+
+
+async def _combined_batches(query: str, args: List[Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Registros da tabela dinâmica lidos por um cursor do servidor e combinados com o clipping lote a lote."""
+    clipping_pool = await get_clipping_async_pool()
+    async with clipping_pool.acquire() as clipping_connection:
+        news_join = AsyncNewsCodeJoin(clipping_connection)
+        async for records in AsyncDatabase().stream(query, *args):
+            yield [
+                {"dynamic_table_data": dict(row), "clipping_data": related_clipping or {}}
+                for row, related_clipping in await news_join.join(records, lambda row: row.get("news_code"))
+            ]
+
 
 @router.get("/get_data/{schema_name}/{table_name}/")
 async def get_combined_data(
     schema_name: str,
     table_name: str,
     limit: int = Query(10, description="Número máximo de registros por página", ge=1),
-    offset: int = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0)
+    offset: int = Query(0, description="Número de registros a serem ignorados antes de retornar os resultados", ge=0),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` da página anterior; quando informado, `offset` é ignorado"),
+    count: str = Query("exact", description="Total de registros: exact, estimated (estimativa do PostgreSQL) ou none", regex="^(exact|estimated|none)$"),
+    row_format: str = Query("json", alias="format", description=ROW_FORMAT_DESCRIPTION, regex=ROW_FORMAT_PATTERN),
 ):
     """
     Obtém dados de uma tabela dinâmica e combina com dados de clippings_news, com suporte a paginação.
-    """
-    clipping_connection = None
-    dynamic_connection = None
 
+    Aceita paginação por `limit/offset` ou por cursor (`next_cursor`), ordenada por `news_code, id`.
+    No formato `columnar` as colunas de cada banco vêm uma vez em `columns` e cada linha de `rows` é
+    `[valores da tabela dinâmica, valores do clipping ou null]`; no `ndjson` cada linha é um objeto
+    `{"dynamic_table_data", "clipping_data"}`.
+    """
+    check_cursor(cursor, BY_NEWS_CODE)
+    # Registros sem `news_code` ficam no fim da ordenação (fase dos nulos do keyset)
+    query, args = BY_NEWS_CODE.page_text(f"{quote_ident(schema_name)}.{quote_ident(table_name)}", "TRUE", [], cursor, limit, 0 if cursor else offset)
     try:
-        clipping_connection = psycopg2.connect(
-            dbname=DB_NAME_CLIPPING,
-            user=DB_USER_CLIPPING,
-            password=DB_PASSWORD_CLIPPING,
-            host=DB_HOST_CLIPPING,
-            port="5432",
-            options=DB_OPTIONS_CLIPPING,
-        )
-
-        dynamic_connection = psycopg2.connect(
-            dbname=DB_NAME_HANDSON,
-            user=DB_USER_HANDSON,
-            password=DB_PASSWORD_HANDSON,
-            host=DB_HOST_HANDSON,
-        )
-
-        clipping_cursor = clipping_connection.cursor(cursor_factory=RealDictCursor)
-        dynamic_cursor = dynamic_connection.cursor(cursor_factory=RealDictCursor)
-
-        dynamic_cursor.execute("""
-            SELECT EXISTS (
-                SELECT 1
-                FROM information_schema.tables
-                WHERE table_schema = %s
-                AND table_name = %s
-            );
-        """, (schema_name, table_name))
-
-        if not dynamic_cursor.fetchone()["exists"]:
-            raise HTTPException(status_code=400, detail=f"Tabela {schema_name}.{table_name} não existe.")
-
-        query = sql.SQL("""
-            SELECT * FROM {}.{}
-            ORDER BY news_code
-            LIMIT %s OFFSET %s
-        """).format(
-            sql.Identifier(schema_name),
-            sql.Identifier(table_name)
-        )
-        dynamic_cursor.execute(query, (limit, offset))
-        dynamic_data = dynamic_cursor.fetchall()
-
-        if not dynamic_data:
-            return {"message": f"Nenhum dado encontrado na tabela {schema_name}.{table_name}."}
+        handson_pool = await get_handson_async_pool()
 
-        news_codes = [
-            str(row["news_code"]) for row in dynamic_data 
-            if "news_code" in row and row["news_code"] is not None
-        ]
+        if row_format == "ndjson":
+            async with handson_pool.acquire() as dynamic_connection:
+                table_exists = await _table_exists(dynamic_connection, schema_name, table_name)
+            if not table_exists:
+                raise HTTPException(status_code=400, detail=f"Tabela {schema_name}.{table_name} não existe.")
 
-        if not news_codes:
-            return {"message": "Nenhum `news_code` válido encontrado na tabela dinâmica."}
+            response = await ndjson_response(_combined_batches(query, args))
+            if response is None:
+                return {"message": f"Nenhum dado encontrado na tabela {schema_name}.{table_name}."}
+            return response
 
-        logger.info(f"news_codes válidos: {news_codes}")
+        clipping_pool = await get_clipping_async_pool()
+        async with handson_pool.acquire() as dynamic_connection, clipping_pool.acquire() as clipping_connection:
 
-        placeholder = ",".join(["%s"] * len(news_codes))
-        clipping_cursor.execute(f"""
-            SELECT *
-            FROM clippings_news
-            WHERE news_code IN ({placeholder});
-        """, tuple(news_codes))
-        clipping_data = clipping_cursor.fetchall()
+            if not await _table_exists(dynamic_connection, schema_name, table_name):
+                raise HTTPException(status_code=400, detail=f"Tabela {schema_name}.{table_name} não existe.")
 
-        combined_data = []
-        for dynamic_row in dynamic_data:
-            related_clipping = next(
-                (clip for clip in clipping_data if clip["news_code"] == str(dynamic_row["news_code"])), 
-                {}
+            statement = await dynamic_connection.prepare(to_asyncpg(query))
+            records = await statement.fetch(*args)
+            # No columnar as linhas do asyncpg são usadas direto, sem montar um dicionário por linha
+            dynamic_data = records if row_format == "columnar" else [dict(row) for row in records]
 
-            ) if dynamic_row.get("news_code") is not None else {}
+            if not dynamic_data:
+                return {"message": f"Nenhum dado encontrado na tabela {schema_name}.{table_name}."}
 
-            combined_data.append({
-                "dynamic_table_data": dynamic_row,
-                "clipping_data": related_clipping
-            })
+            # Registros sem `news_code` voltam com o clipping nulo, sem encerrar a paginação
+            joined = await AsyncNewsCodeJoin(clipping_connection).join(dynamic_data, lambda row: row.get("news_code"))
 
-        dynamic_cursor.execute(f"SELECT COUNT(*) FROM {schema_name}.{table_name}")
-        total_records = dynamic_cursor.fetchone()["count"]
-
-        return {
-            "total_records": total_records,
-            "page_size": limit,
-            "current_offset": offset,
-            "data": combined_data
-        }
+            total_records = await count_rows_async(dynamic_connection, schema_name, table_name, strategy=count)
 
+            page = {
+                "total_records": total_records,
+                "count_strategy": count,
+                "page_size": limit,
+                "current_offset": None if cursor else offset,
+                "next_cursor": BY_NEWS_CODE.next_cursor(dynamic_data, limit),
+            }
+            if row_format == "columnar":
+                page.update(_combined_columnar(statement_columns(statement), joined))
+            else:
+                page["data"] = [
+                    {
+                        "dynamic_table_data": dynamic_row,
+                        "clipping_data": related_clipping or {}
+                    }
+                    for dynamic_row, related_clipping in joined
+                ]
+            return FastJSONResponse(page)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar dados: {str(e)}")
-    finally:
-        if clipping_cursor:
-            clipping_cursor.close()
-        if dynamic_cursor:
-            dynamic_cursor.close()
-        if clipping_connection:
-            clipping_connection.close()
-        if dynamic_connection:
-            dynamic_connection.close()
 
 
 @router.post(
     "/upload-file-handson/{table_name}/",
+    openapi_extra=UPLOAD_BODY,
     responses={
         201: {"description": "Dados salvos com sucesso", "content": {"application/json": {}}},
+        202: {"description": "Upload enfileirado; acompanhe em /file/jobs/{job_id}/", "content": {"application/json": {}}},
         400: {"description": "Insira dados válidos"},
     },
     status_code=status.HTTP_201_CREATED,
 )
-def save_data_hands_on(json_data: List[Dict], schema_name: str, table_name: str, company_id: int):
-    """Upload de dados para a tabela no hands-on, sem salvar `news_code`."""
-    connection_handson = None
-    cursor_handson = None
-    
+async def save_data_hands_on(
+    request: Request,
+    schema_name: str,
+    table_name: str,
+    company_id: int,
+    background: bool = Query(True, description="Processa o upload em segundo plano e retorna o id do job"),
+):
+    """
+    Upload de dados para a tabela no hands-on, sem salvar `news_code`.
+
+    O corpo é lido em streaming e repassado em lotes, como em `/upload_file/{table_name}/`.
+    Para uploads grandes que precisam ser retomados após uma falha, use as sessões de upload em
+    blocos (`/file/upload-file-handson/{table_name}/sessions/`).
+    """
+    batches = iter_json_batches(request.stream(), JOB_CHUNK_SIZE)
     try:
-        connection_handson = psycopg2.connect(
-            dbname=DB_NAME_HANDSON,
-            user=DB_USER_HANDSON,
-            password=DB_PASSWORD_HANDSON,
-            host=DB_HOST_HANDSON,
+        if background:
+            return _job_accepted(await submit_job_stream_service("hands_on", {
+                "schema_name": schema_name,
+                "table_name": table_name,
+                "company_id": company_id,
+            }, batches))
+
+        saved = await ingest_stream_service(batches, HandsOnIngestion(schema_name, table_name, company_id))
+        return jsonable_encoder({"message": "Dados salvos com sucesso", **saved})
+
+    except IngestionError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "errors": e.errors})
+    except JSONStreamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro interno: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro interno: {str(e)}"
         )
-        cursor_handson = connection_handson.cursor()
-
-        results = []
-
-        for index, item in enumerate(json_data, start=1):
-            try:
-                publication_date = parse_date(item["DATA"])
-            except ValueError:
-                logger.error(f"Erro ao processar a data no item {index}: {item.get('DATA')}")
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Erro ao processar a data no item {index}. Formato inválido: {item['DATA']}",
-                )
-
-            cursor_handson.execute(f"""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name = %s;
-            """, (table_name,))
-            table_columns = {row[0] for row in cursor_handson.fetchall()}
-
-            normalized_data = {
-                normalize_column_name(key): clean_value(value, is_integer=("integer" in table_columns))
-                for key, value in item.items()
-                if normalize_column_name(key) in table_columns and normalize_column_name(key) != "news_code"
-            }
 
-            if "date" in table_columns:
-                normalized_data["date"] = publication_date
 
-            normalized_data["company_id"] = company_id
+@router.post(
+    "/upload-file-handson/{table_name}/sessions/",
+    responses={
+        201: {"description": "Sessão de upload aberta", "content": {"application/json": {}}},
+    },
+    status_code=status.HTTP_201_CREATED,
+)
+def create_upload_session(schema_name: str, table_name: str, company_id: int):
+    """
+    Abre uma sessão de upload em blocos para `/upload-file-handson/`.
+
+    O cliente envia os itens em blocos numerados a partir de 1 em
+    `PUT /file/upload-file-handson/sessions/{session_id}/chunks/{chunk_number}/`; cada bloco é
+    confirmado com o seu checkpoint. Após uma falha, `GET` da sessão informa o `next_chunk` para retomar.
+    """
+    try:
+        return jsonable_encoder(create_upload_session_service(schema_name, table_name, company_id))
+    except Exception as e:
+        logger.error(f"Erro interno: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
-            if normalized_data:
-                columns = ", ".join(normalized_data.keys())
-                placeholders = ", ".join(["%s"] * len(normalized_data))
-                values = tuple(normalized_data.values())
 
-                update_fields = ', '.join([
-                    f"{col} = EXCLUDED.{col}" for col in normalized_data.keys()
-                ])
+@router.get(
+    "/upload-file-handson/sessions/{session_id}/",
+    responses={
+        200: {"description": "Estado da sessão de upload"},
+        404: {"description": "Sessão não encontrada"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+def get_upload_session(session_id: UUID):
+    """Estado da sessão: `last_chunk` confirmado, `next_chunk` esperado e o resumo dos blocos gravados."""
+    session = get_upload_session_service(str(session_id))
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Sessão {session_id} não encontrada.")
+    return jsonable_encoder(session)
 
-                upsert_query = f"""
-                    INSERT INTO {schema_name}.{table_name} ({columns})
-                    VALUES ({placeholders})
-                    ON CONFLICT DO NOTHING
-                    RETURNING id;
-                """
-                logger.info(f"Executando query para HANDSON: {upsert_query} com valores {values}")
-                cursor_handson.execute(upsert_query, values)
-                table_id = cursor_handson.fetchone()[0]
-                results.append({"table": table_name, "id": table_id})
 
-        connection_handson.commit()
-        return jsonable_encoder({"message": "Dados salvos com sucesso", "data": results})
+@router.put(
+    "/upload-file-handson/sessions/{session_id}/chunks/{chunk_number}/",
+    responses={
+        200: {"description": "Bloco confirmado (ou já confirmado antes, com `replayed`)"},
+        400: {"description": "Insira dados válidos"},
+        404: {"description": "Sessão não encontrada"},
+        409: {"description": "Bloco fora de ordem ou sessão concluída"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+def upload_session_chunk(session_id: UUID, json_data: List[Dict], chunk_number: int = Path(..., ge=1)):
+    """
+    Grava um bloco da sessão em uma transação própria, junto com o checkpoint.
 
+    Reenviar um bloco já confirmado devolve a mesma resposta sem gravar de novo, então o
+    cliente pode repetir com segurança o último bloco cuja confirmação não chegou.
+    """
+    try:
+        result = upload_chunk_service(str(session_id), chunk_number, json_data)
+    except ChunkOrderError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "next_chunk": e.next_chunk})
+    except IngestionError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "errors": e.errors})
     except Exception as e:
         logger.error(f"Erro interno: {e}")
-        if connection_handson:
-            connection_handson.rollback()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro interno: {str(e)}"
-        )
-    finally:
-        if cursor_handson:
-            cursor_handson.close()
-        if connection_handson:
-            connection_handson.close()
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Sessão {session_id} não encontrada.")
+    return jsonable_encoder(result)
+
+
+@router.post(
+    "/upload-file-handson/sessions/{session_id}/complete/",
+    responses={
+        200: {"description": "Sessão concluída com o resumo de todos os blocos"},
+        404: {"description": "Sessão não encontrada"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+def complete_upload_session(session_id: UUID):
+    """Conclui a sessão (novos blocos passam a ser recusados) e devolve o resumo consolidado do upload."""
+    session = complete_upload_session_service(str(session_id))
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Sessão {session_id} não encontrada.")
+    return jsonable_encoder(session)
+
+
+@router.get(
+    "/jobs/{job_id}/",
+    responses={
+        200: {"description": "Estado e progresso do job"},
+        404: {"description": "Job não encontrado"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+def get_job(job_id: UUID):
+    """
+    Estado de um job de upload: `status`, `total_rows`, `processed_rows`, `rows_per_second`,
+    `error_count` e os primeiros erros (`errors`, com a linha do item no upload).
+    """
+    job = get_job_service(str(job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado.")
+    return jsonable_encoder(job)
+
+
+@router.post(
+    "/jobs/{job_id}/cancel/",
+    responses={
+        200: {"description": "Cancelamento solicitado"},
+        404: {"description": "Job não encontrado"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+def cancel_job(job_id: UUID):
+    """
+    Cancela um job. Na fila, o job é cancelado na hora; em execução, ele para no fim do bloco atual
+    e o que já foi gravado é mantido.
+    """
+    job = cancel_job_service(str(job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado.")
+    return jsonable_encoder(job)
@@ -1,5 +1,6 @@
-from api.v1.apps.manager.service.manager_service import delete_table_service, delete_schema_service, delete_column_service
-from fastapi import APIRouter, HTTPException, status
+from api.v1.apps.manager.service.manager_service import delete_table_service, delete_schema_service, delete_column_service, schema_cache_stats_service, default_indexes_service
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import Optional
 from fastapi.responses import JSONResponse
 from helpers.utils import normalize_string
 
@@ -174,4 +175,59 @@ def delete_column(json: dict) -> str:
         raise exception
             
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+
+@router.get("/schema-cache/", responses={
+    200: {
+        "description": "Contadores do cache de metadados das tabelas",
+        "content": {
+            "application/json": {
+                "example": {"entries": 3, "hits": 120, "misses": 3, "invalidations": 1, "hit_ratio": 0.9756}
+            }
+        },
+    },
+})
+def schema_cache_stats():
+    """Retorna os contadores de acertos/falhas do cache de metadados das tabelas"""
+    return schema_cache_stats_service()
+
+
+@router.post("/default-indexes/", responses={
+    200: {
+        "description": "Perfil de índices aplicado",
+        "content": {
+            "application/json": {
+                "example": {
+                    "indexes": [
+                        {"table_name": "braskem", "index_name": "braskem_active_date_idx", "status": "created"},
+                        {"table_name": "braskem", "index_name": "braskem_trash_idx", "status": "skipped", "missing_columns": ["deleted_at"]},
+                        {"table_name": "braskem", "index_name": "braskem_company_id_idx", "status": "exists"}
+                    ]
+                }
+            }
+        },
+    },
+    400: {"description": "Insira dados válidos"}
+})
+def default_indexes(
+    schema_name: str = Query(..., description="Nome do schema"),
+    table_name: Optional[str] = Query(None, description="Nome da tabela; todas as tabelas do schema quando não informado"),
+):
+    """
+    Aplica nas tabelas existentes o perfil de índices criado junto com as novas tabelas: ativos por
+    data (`date DESC, id WHERE is_deleted = FALSE`), lixeira (`deleted_at DESC, id WHERE is_deleted = TRUE`)
+    e `company_id`. Os índices são criados com `CREATE INDEX CONCURRENTLY`, sem bloquear escritas.
+    """
+    try:
+        schema_name = normalize_string(schema_name)
+        if not schema_name:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insira um valor válido para o schema")
+        table_name = normalize_string(table_name) if table_name else None
+
+        return {"indexes": default_indexes_service(schema_name, table_name)}
+
+    except HTTPException as exception:
+        raise exception
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
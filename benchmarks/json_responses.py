@@ -0,0 +1,71 @@
+"""
+Compara a serialização das rotas de leitura: `jsonable_encoder` + `JSONResponse` (caminho
+anterior) contra `FastJSONResponse` (orjson).
+
+Uso, na raiz do projeto:
+
+    python -m benchmarks.json_responses [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import timeit
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from helpers.responses import FastJSONResponse
+
+
+def sample_page(rows: int) -> dict:
+    """Página no formato de `get_records`, com os tipos que o psycopg2/asyncpg devolvem."""
+    start = datetime(2024, 1, 1, 10, 30)
+    return {
+        "total_records": rows,
+        "page_size": rows,
+        "current_offset": 0,
+        "next_cursor": None,
+        "active_records": [
+            {
+                "id": index,
+                "news_code": str(uuid.UUID(int=index)),
+                "company_id": uuid.UUID(int=index % 50),
+                "date": date(2024, 1, 1) + timedelta(days=index % 365),
+                "created_at": start + timedelta(minutes=index),
+                "deleted_at": None,
+                "is_deleted": False,
+                "title": f"Notícia {index}",
+                "readers": index * 7,
+                "valuation": Decimal(f"{index}.50"),
+            }
+            for index in range(rows)
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    page = sample_page(args.rows)
+    # Os dois caminhos precisam produzir o mesmo JSON
+    assert json.loads(JSONResponse(jsonable_encoder(page)).body) == json.loads(FastJSONResponse(page).body)
+
+    paths = {
+        "jsonable_encoder + JSONResponse": lambda: JSONResponse(jsonable_encoder(page)).body,
+        "FastJSONResponse (orjson)": lambda: FastJSONResponse(page).body,
+    }
+    timings = {name: min(timeit.repeat(path, number=1, repeat=args.repeat)) for name, path in paths.items()}
+
+    baseline = timings["jsonable_encoder + JSONResponse"]
+    print(f"{args.rows} linhas, melhor de {args.repeat} execuções:")
+    for name, seconds in timings.items():
+        print(f"  {name:<34} {seconds * 1000:9.1f} ms  ({baseline / seconds:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
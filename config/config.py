@@ -21,3 +21,48 @@ DB_HOST_HANDSON=os.environ.get("DB_HOST_HANDSON")
 SUPER_ADMIN = os.environ.get('SUPER_ADMIN')
 ADMIN = os.environ.get('ADMIN')
 VIEWER = os.environ.get('VIEWER')
+
+#Pool de conexões
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_HEALTH_CHECK = os.environ.get("DB_POOL_HEALTH_CHECK", "true").lower() == "true"
+
+#Ingestão
+CLIPPING_UPSERT_CHUNK_SIZE = int(os.environ.get("CLIPPING_UPSERT_CHUNK_SIZE", 1000))
+SCHEMA_CACHE_TTL = float(os.environ.get("SCHEMA_CACHE_TTL", 300))
+
+#Exportação
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 5000))
+NEWS_JOIN_LOOKUP_SIZE = int(os.environ.get("NEWS_JOIN_LOOKUP_SIZE", 1000))
+
+#Listagens em NDJSON: linhas lidas do cursor do servidor por vez
+NDJSON_FETCH_SIZE = int(os.environ.get("NDJSON_FETCH_SIZE", 500))
+
+#Compressão das respostas (br, zstd ou gzip)
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 1024))
+COMPRESSION_THREAD_SIZE = int(os.environ.get("COMPRESSION_THREAD_SIZE", 64 * 1024))
+
+#Exclusão/restauração em massa: news_code propagados ao clipping por UPDATE
+CLIPPING_STATUS_BATCH_SIZE = int(os.environ.get("CLIPPING_STATUS_BATCH_SIZE", 5000))
+
+#DDL das colunas: espera máxima pelo lock da tabela (segundos) e novas tentativas
+DDL_LOCK_TIMEOUT = float(os.environ.get("DDL_LOCK_TIMEOUT", 2))
+DDL_LOCK_RETRIES = int(os.environ.get("DDL_LOCK_RETRIES", 5))
+DDL_RETRY_DELAY = float(os.environ.get("DDL_RETRY_DELAY", 0.5))
+
+#Contagem das listagens
+COUNT_CACHE_TTL = float(os.environ.get("COUNT_CACHE_TTL", 30))
+COUNT_CACHE_MAX_ENTRIES = int(os.environ.get("COUNT_CACHE_MAX_ENTRIES", 1024))
+
+#Jobs de ingestão em segundo plano
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_CHUNK_SIZE = int(os.environ.get("JOB_CHUNK_SIZE", 1000))
+JOB_STALE_AFTER = float(os.environ.get("JOB_STALE_AFTER", 300))
+# Intervalo do heartbeat dos jobs em andamento e da verificação de jobs parados (menor que JOB_STALE_AFTER)
+JOB_HEARTBEAT_INTERVAL = float(os.environ.get("JOB_HEARTBEAT_INTERVAL", 60))
+JOB_MAX_ERRORS = int(os.environ.get("JOB_MAX_ERRORS", 100))
+
+#Commit em duas fases (clipping + hands-on); exige max_prepared_transactions > 0 nos dois bancos
+TWO_PHASE_RECOVERY_AGE = float(os.environ.get("TWO_PHASE_RECOVERY_AGE", 60))
+TWO_PHASE_RECOVERY_INTERVAL = float(os.environ.get("TWO_PHASE_RECOVERY_INTERVAL", 300))
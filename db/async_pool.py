@@ -0,0 +1,118 @@
+import asyncio
+import json
+import re
+import shlex
+from typing import Dict, Optional
+
+import asyncpg
+
+from config.config import (
+    DB_HOST_CLIPPING,
+    DB_HOST_HANDSON,
+    DB_NAME_CLIPPING,
+    DB_NAME_HANDSON,
+    DB_OPTIONS_CLIPPING,
+    DB_PASSWORD_CLIPPING,
+    DB_PASSWORD_HANDSON,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_USER_CLIPPING,
+    DB_USER_HANDSON,
+)
+
+_PLACEHOLDER = re.compile(r"%%|%s")
+
+
+def to_asyncpg(query: str) -> str:
+    """
+    Converte os placeholders `%s` do psycopg2 para os `$1, $2, ...` do asyncpg.
+
+    Assim as queries do acesso assíncrono seguem escritas como as do acesso síncrono
+    (inclusive as condições geradas por `Keyset.after_text`).
+    """
+    counter = iter(range(1, len(query) + 1))
+    return _PLACEHOLDER.sub(lambda match: "%" if match.group() == "%%" else f"${next(counter)}", query)
+
+
+def server_settings(options: Optional[str]) -> Dict[str, str]:
+    """Traduz o `options` do libpq (`-c search_path=...`) para o `server_settings` do asyncpg."""
+    settings: Dict[str, str] = {}
+    tokens = shlex.split(options or "")
+    for index, token in enumerate(tokens):
+        if token == "-c" and index + 1 < len(tokens):
+            setting = tokens[index + 1]
+        elif token.startswith("-c") and len(token) > 2:
+            setting = token[2:]
+        else:
+            continue
+        name, _, value = setting.partition("=")
+        settings[name.strip()] = value.strip()
+    return settings
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    # json/jsonb decodificados como no psycopg2
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+_pools: Dict[str, asyncpg.Pool] = {}
+_pools_lock: Optional[asyncio.Lock] = None
+
+
+def _lock() -> asyncio.Lock:
+    # Criado sob demanda para ficar no event loop da aplicação (no Python 3.9 o Lock se prende ao loop corrente)
+    global _pools_lock
+    if _pools_lock is None:
+        _pools_lock = asyncio.Lock()
+    return _pools_lock
+
+
+async def _get_pool(name: str, **connect_kwargs) -> asyncpg.Pool:
+    """Cria o pool na primeira chamada (dentro do event loop da aplicação) e o reaproveita depois."""
+    pool = _pools.get(name)
+    if pool is not None:
+        return pool
+    async with _lock():
+        if name not in _pools:
+            _pools[name] = await asyncpg.create_pool(
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                timeout=DB_POOL_TIMEOUT,
+                init=_init_connection,
+                **connect_kwargs,
+            )
+        return _pools[name]
+
+
+async def get_handson_async_pool() -> asyncpg.Pool:
+    """Pool assíncrono compartilhado pelo processo para o banco do hands-on."""
+    return await _get_pool(
+        "handson",
+        database=DB_NAME_HANDSON,
+        user=DB_USER_HANDSON,
+        password=DB_PASSWORD_HANDSON,
+        host=DB_HOST_HANDSON,
+    )
+
+
+async def get_clipping_async_pool() -> asyncpg.Pool:
+    """Pool assíncrono compartilhado pelo processo para o banco do clipping."""
+    return await _get_pool(
+        "clipping",
+        database=DB_NAME_CLIPPING,
+        user=DB_USER_CLIPPING,
+        password=DB_PASSWORD_CLIPPING,
+        host=DB_HOST_CLIPPING,
+        server_settings=server_settings(DB_OPTIONS_CLIPPING),
+    )
+
+
+async def close_async_pools() -> None:
+    """Fecha os pools assíncronos (usado no shutdown da aplicação)."""
+    async with _lock():
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        await pool.close()
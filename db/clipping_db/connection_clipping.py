@@ -1,5 +1,8 @@
 from config.config import DB_HOST_CLIPPING, DB_NAME_CLIPPING, DB_OPTIONS_CLIPPING, DB_PASSWORD_CLIPPING, DB_USER_CLIPPING
-import psycopg2
+from db.pool import ConnectionPool, get_clipping_pool
+from db.async_pool import get_clipping_async_pool
+from db.connection import AsyncDatabase
+import asyncpg
 
 class DatabaseClipping:
 
@@ -9,21 +12,50 @@ class DatabaseClipping:
         self.db_password = DB_PASSWORD_CLIPPING
         self.db_host = DB_HOST_CLIPPING
         self.options = DB_OPTIONS_CLIPPING
+        self.connection = None
+        self._lease_id = 0
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return get_clipping_pool()
 
     def _conn(self):
-        """Estabelece uma conexão com o banco de dados."""
-        self.connection = psycopg2.connect(
-            dbname=self.db_name,
-            user=self.db_user,
-            password=self.db_password,
-            host=self.db_host,
-            options=self.options
-        )
+        """
+        Obtém uma conexão do pool do banco de dados.
+
+        A mesma conexão é reaproveitada pela instância até ser devolvida com `close()`.
+        """
+        if self.connection is None or self.connection.closed or self.connection.lease_id != self._lease_id:
+            self.connection = self.pool.getconn()
+            self._lease_id = self.connection.lease_id
         return self.connection
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Devolve ao pool a conexão emprestada pela instância."""
+        self.close()
+
+    def close(self) -> None:
+        """
+        Devolve ao pool a conexão emprestada pela instância.
+
+        Pode ser chamado mais de uma vez: depois da primeira devolução a conexão pode estar com
+        outro chamador, e o pool só a aceita de volta enquanto o empréstimo da instância for o atual.
+        """
+        if self.connection is not None:
+            self.pool.putconn(self.connection, self._lease_id)
+
+    def rollback(self) -> None:
+        """Desfaz a transação da instância, caso ela ainda detenha a conexão."""
+        if self.connection is not None and self.connection.lease_id == self._lease_id:
+            self.connection.rollback()
+
     def execute_query(self, query: str):
         """Executa uma query no banco de dados."""
         conn = self._conn()
+        cursor = None
         try:
             cursor = conn.cursor()
             cursor.execute(query)
@@ -33,5 +65,13 @@ class DatabaseClipping:
             conn.rollback()
             raise e
         finally:
-            cursor.close()
-            conn.close()
+            if cursor:
+                cursor.close()
+            self.close()
+
+
+class AsyncDatabaseClipping(AsyncDatabase):
+    """Acesso assíncrono (asyncpg) de leitura ao banco do clipping."""
+
+    async def pool(self) -> asyncpg.Pool:
+        return await get_clipping_async_pool()
@@ -1,27 +1,35 @@
-from db.clipping_db.connection_clipping import DatabaseClipping
-from config.config import DB_HOST_CLIPPING, DB_NAME_CLIPPING, DB_OPTIONS_CLIPPING, DB_PASSWORD_CLIPPING, DB_USER_CLIPPING
-from config.config import DB_HOST_HANDSON, DB_NAME_HANDSON, DB_PASSWORD_HANDSON, DB_USER_HANDSON
-import psycopg2
-from typing import List, Dict, Any
+from db.clipping_db.connection_clipping import AsyncDatabaseClipping, DatabaseClipping
+from db.async_pool import to_asyncpg
+from db.pool import get_handson_pool
+from db.pagination import BY_ID
+from config.config import CLIPPING_STATUS_BATCH_SIZE, CLIPPING_UPSERT_CHUNK_SIZE
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from typing import Any, Callable, Dict, List, Optional
+
+CLIPPING_SCHEMA = "news_charisma"
+CLIPPING_TABLE = "clippings_news"
+# Colunas de auditoria: mudam a cada upload e não contam como alteração da notícia
+NEWS_AUDIT_COLUMNS = ("created_date", "modified_date")
 
 class GetNews(DatabaseClipping):
 
     def __init__(self) -> None:
         super().__init__()
-        self.conn = self._conn()
 
     @property
     def conn_to_database(self):
-        return self.conn
+        return self._conn()
     
 
-    def _get_active_companies(self, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    def _get_active_companies(self, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> Dict[str, Any]:
         """
         Busca por todas as empresas ativas com suporte a paginação.
 
         Args:
             limit (int): Número máximo de empresas retornadas por página.
             offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+            cursor_token (str): Token `next_cursor` da página anterior; quando informado, `offset` é ignorado.
 
         Returns:
             Um dicionário contendo as empresas ativas paginadas e informações de paginação.
@@ -31,12 +39,14 @@ class GetNews(DatabaseClipping):
         """
         try:
             # Query para buscar empresas ativas com paginação
-            query = """
+            after, after_params = BY_ID.after(cursor_token)
+            query = sql.SQL("""
                 SELECT * FROM company_company
                 WHERE is_active = TRUE
-                ORDER BY id ASC
+                AND {}
+                ORDER BY {}
                 LIMIT %s OFFSET %s;
-            """
+            """).format(after, BY_ID.order_by())
 
             # Query para contar o total de empresas ativas
             count_query = """
@@ -50,7 +60,7 @@ class GetNews(DatabaseClipping):
                 total_records = cursor.fetchone()[0]
 
                 # Executa a query paginada
-                cursor.execute(query, (limit, offset))
+                cursor.execute(query, after_params + [limit, 0 if cursor_token else offset])
                 rows = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
 
@@ -60,7 +70,8 @@ class GetNews(DatabaseClipping):
             return {
                 "total_records": total_records,
                 "page_size": limit,
-                "current_offset": offset,
+                "current_offset": None if cursor_token else offset,
+                "next_cursor": BY_ID.next_cursor(result, limit),
                 "active_companies": result
             }
 
@@ -68,8 +79,7 @@ class GetNews(DatabaseClipping):
             raise Exception(f"Erro ao consultar empresas ativas: {str(e)}")
 
         finally:
-            if self.conn_to_database:
-                self.conn_to_database.close()
+            self.close()
 
     def _deactivate_clipping_news(self, news_code: str) -> None:
         """
@@ -95,20 +105,58 @@ class GetNews(DatabaseClipping):
                 self.connection.commit()
 
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao desativar a notícia {news_code}: {str(e)}")
 
         finally:
-            if self.connection:
-                self.connection.close()
+            self.close()
+
+    def _set_clipping_news_active(self, news_codes: List[str], is_active: bool, batch_size: int = CLIPPING_STATUS_BATCH_SIZE) -> int:
+        """
+        Ativa ou desativa as notícias no clipping, com um `UPDATE ... news_code = ANY(%s)` por lote.
+
+        Os lotes são confirmados juntos, em uma única transação.
+
+        Args:
+            news_codes (List[str]): Códigos das notícias.
+            is_active (bool): Novo valor de `is_active`.
+            batch_size (int): Quantidade de códigos por UPDATE.
+
+        Returns:
+            A quantidade de notícias alteradas.
+
+        Finally:
+            Fecha a conexão com o banco de dados.
+        """
+        try:
+            updated = 0
+            with self.conn_to_database.cursor() as cursor:
+                for start in range(0, len(news_codes), batch_size):
+                    cursor.execute("""
+                        UPDATE news_charisma.clippings_news
+                        SET is_active = %s
+                        WHERE news_code = ANY(%s)
+                        AND is_active IS DISTINCT FROM %s;
+                    """, (is_active, news_codes[start:start + batch_size], is_active))
+                    updated += cursor.rowcount
+            self.connection.commit()
+            return updated
+
+        except Exception as e:
+            self.rollback()
+            raise Exception(f"Erro ao {'ativar' if is_active else 'desativar'} {len(news_codes)} notícias: {str(e)}")
+
+        finally:
+            self.close()
 
-    def _get_deactivate_companies(self, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    def _get_deactivate_companies(self, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> Dict[str, Any]:
         """
         Busca por todas as empresas desativadas com suporte a paginação.
 
         Args:
             limit (int): Número máximo de empresas retornadas por página.
             offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+            cursor_token (str): Token `next_cursor` da página anterior; quando informado, `offset` é ignorado.
 
         Returns:
             Um dicionário contendo as empresas desativadas paginadas e informações de paginação.
@@ -118,12 +166,14 @@ class GetNews(DatabaseClipping):
         """
         try:
             # Query para buscar empresas desativadas com paginação
-            query = """
+            after, after_params = BY_ID.after(cursor_token)
+            query = sql.SQL("""
                 SELECT * FROM company_company
                 WHERE is_active = FALSE
-                ORDER BY id ASC
+                AND {}
+                ORDER BY {}
                 LIMIT %s OFFSET %s;
-            """
+            """).format(after, BY_ID.order_by())
 
             # Query para contar o total de empresas desativadas
             count_query = """
@@ -137,7 +187,7 @@ class GetNews(DatabaseClipping):
                 total_records = cursor.fetchone()[0]
 
                 # Executa a query paginada
-                cursor.execute(query, (limit, offset))
+                cursor.execute(query, after_params + [limit, 0 if cursor_token else offset])
                 rows = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
 
@@ -147,7 +197,8 @@ class GetNews(DatabaseClipping):
             return {
                 "total_records": total_records,
                 "page_size": limit,
-                "current_offset": offset,
+                "current_offset": None if cursor_token else offset,
+                "next_cursor": BY_ID.next_cursor(result, limit),
                 "deactivated_companies": result
             }
 
@@ -155,8 +206,7 @@ class GetNews(DatabaseClipping):
             raise Exception(f"Erro ao consultar empresas desativadas: {str(e)}")
 
         finally:
-            if self.conn_to_database:
-                self.conn_to_database.close()
+            self.close()
 
     def _active_clipping_news(self, news_code: str) -> None:
         """
@@ -182,12 +232,11 @@ class GetNews(DatabaseClipping):
                 self.connection.commit()
 
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao ativar a notícia {news_code}: {str(e)}")
 
         finally:
-            if self.connection:
-                self.connection.close()
+            self.close()
 
     def _save_news(self, news_data):
         """
@@ -236,10 +285,187 @@ class GetNews(DatabaseClipping):
         except Exception as e:
             raise Exception(f"Erro ao salvar notícia: {str(e)}")
         finally:
-            if self.connection:
-                self.connection.close()
+            self.close()
         
     
+    def _news_code_has_unique_index(self, cursor) -> bool:
+        """Verifica se `clippings_news` possui um índice único simples em `news_code`."""
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                WHERE i.indrelid = %s::regclass
+                AND i.indisunique
+                AND i.indnatts = 1
+                AND i.indpred IS NULL
+                AND i.indexprs IS NULL
+                AND a.attname = 'news_code'
+            );
+        """, (f"{CLIPPING_SCHEMA}.{CLIPPING_TABLE}",))
+        return cursor.fetchone()[0]
+
+    def _news_column_types(self, cursor, columns: List[str]) -> Dict[str, str]:
+        """Retorna o tipo SQL de cada coluna de `clippings_news` para tipar os VALUES em lote."""
+        cursor.execute("""
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+            FROM pg_attribute a
+            WHERE a.attrelid = %s::regclass
+            AND a.attname = ANY(%s)
+            AND a.attnum > 0
+            AND NOT a.attisdropped;
+        """, (f"{CLIPPING_SCHEMA}.{CLIPPING_TABLE}", list(columns)))
+        return dict(cursor.fetchall())
+
+    def _upsert_news(self, cursor, news_rows: List[Dict[str, Any]], chunk_size: int = CLIPPING_UPSERT_CHUNK_SIZE, on_chunk: Optional[Callable[[], None]] = None) -> Dict[str, int]:
+        """
+        Grava as notícias em `clippings_news` em lote pelo cursor informado, usando `news_code` como chave.
+
+        Quando existe um índice único em `news_code` cada bloco é um único
+        `INSERT ... ON CONFLICT (news_code) DO UPDATE`; caso contrário a existência do bloco
+        inteiro é resolvida em uma consulta e as notícias são gravadas com um UPDATE e um
+        INSERT multi-linha. Notícias já gravadas com o mesmo conteúdo (colunas fora de
+        `NEWS_AUDIT_COLUMNS`) não são reescritas. A transação fica a cargo de quem chama
+        (`on_chunk` roda ao fim de cada bloco).
+
+        Args:
+            cursor: Cursor da conexão do clipping.
+            news_rows (List[Dict[str, Any]]): Notícias com as mesmas chaves (colunas de `clippings_news`).
+            chunk_size (int): Quantidade de notícias por bloco.
+            on_chunk (Callable): Chamado ao fim de cada bloco (ex.: commit).
+
+        Returns:
+            Dict[str, int]: Quantidade de notícias inseridas, atualizadas e inalteradas.
+        """
+        if chunk_size < 1:
+            raise ValueError("O tamanho do bloco deve ser maior que zero.")
+
+        summary = {"inserted": 0, "updated": 0, "unchanged": 0}
+        if not news_rows:
+            return summary
+
+        # A última ocorrência de cada news_code vence, como no upsert linha a linha.
+        # Sem isso o ON CONFLICT falharia ao tocar a mesma linha duas vezes no mesmo comando.
+        by_code: Dict[Any, Dict[str, Any]] = {}
+        without_code = []
+        for row in news_rows:
+            if row.get("news_code") is None:
+                without_code.append(row)
+            else:
+                by_code[row["news_code"]] = row
+        rows = list(by_code.values()) + without_code
+
+        columns = list(rows[0].keys())
+        table = sql.SQL("{}.{}").format(sql.Identifier(CLIPPING_SCHEMA), sql.Identifier(CLIPPING_TABLE))
+        column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+        content = [col for col in columns if col not in NEWS_AUDIT_COLUMNS]
+
+        def changed(stored: str, incoming: str) -> sql.Composed:
+            # Comparação de linha inteira: NULL = NULL conta como igual
+            return sql.SQL("({}) IS DISTINCT FROM ({})").format(
+                sql.SQL(", ").join(sql.SQL("{}.{}").format(sql.Identifier(stored), sql.Identifier(col)) for col in content),
+                sql.SQL(", ").join(sql.SQL("{}.{}").format(sql.Identifier(incoming), sql.Identifier(col)) for col in content),
+            )
+
+        use_on_conflict = self._news_code_has_unique_index(cursor)
+        types = self._news_column_types(cursor, columns)
+        template = "(" + ", ".join(f"%s::{types[col]}" for col in columns) + ")"
+
+        upsert_query = sql.SQL("""
+            INSERT INTO {table} AS c ({columns}) VALUES %s
+            ON CONFLICT (news_code) DO UPDATE SET {assignments}
+            WHERE {changed}
+            RETURNING (xmax = 0);
+        """).format(
+            table=table,
+            columns=column_list,
+            assignments=sql.SQL(", ").join(
+                sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(col), sql.Identifier(col)) for col in columns
+            ),
+            changed=changed("c", "excluded"),
+        ).as_string(cursor)
+
+        insert_query = sql.SQL("INSERT INTO {table} ({columns}) VALUES %s;").format(
+            table=table, columns=column_list
+        ).as_string(cursor)
+
+        update_query = sql.SQL("""
+            UPDATE {table} AS c
+            SET {assignments}
+            FROM (VALUES %s) AS v ({columns})
+            WHERE c.news_code = v.news_code
+            AND {changed}
+            RETURNING c.news_code;
+        """).format(
+            table=table,
+            columns=column_list,
+            assignments=sql.SQL(", ").join(
+                sql.SQL("{} = v.{}").format(sql.Identifier(col), sql.Identifier(col)) for col in columns
+            ),
+            changed=changed("c", "v"),
+        ).as_string(cursor)
+
+        for start in range(0, len(rows), chunk_size):
+            chunk = [tuple(row[col] for col in columns) for row in rows[start:start + chunk_size]]
+
+            if use_on_conflict:
+                # Notícias inalteradas não passam no WHERE do DO UPDATE e não voltam no RETURNING
+                flags = execute_values(cursor, upsert_query, chunk, template=template, page_size=len(chunk), fetch=True)
+                inserted = sum(1 for (is_insert,) in flags if is_insert)
+                summary["inserted"] += inserted
+                summary["updated"] += len(flags) - inserted
+                summary["unchanged"] += len(chunk) - len(flags)
+            else:
+                codes = [row[columns.index("news_code")] for row in chunk]
+                cursor.execute(sql.SQL("SELECT DISTINCT news_code FROM {} WHERE news_code = ANY(%s);").format(table), (codes,))
+                existing = {row[0] for row in cursor.fetchall()}
+
+                to_update = [row for row, code in zip(chunk, codes) if code is not None and code in existing]
+                to_insert = [row for row, code in zip(chunk, codes) if code is None or code not in existing]
+
+                updated = 0
+                if to_update:
+                    updated = len(execute_values(cursor, update_query, to_update, template=template, page_size=len(to_update), fetch=True))
+                if to_insert:
+                    execute_values(cursor, insert_query, to_insert, template=template, page_size=len(to_insert))
+
+                summary["inserted"] += len(to_insert)
+                summary["updated"] += updated
+                summary["unchanged"] += len(to_update) - updated
+
+            if on_chunk is not None:
+                on_chunk()
+
+        return summary
+
+    def _bulk_upsert_news(self, news_rows: List[Dict[str, Any]], chunk_size: int = CLIPPING_UPSERT_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        Grava as notícias em `clippings_news` em lote (ver `_upsert_news`), com um commit por bloco.
+
+        Args:
+            news_rows (List[Dict[str, Any]]): Notícias com as mesmas chaves (colunas de `clippings_news`).
+            chunk_size (int): Quantidade de notícias por bloco/commit.
+
+        Returns:
+            Dict[str, int]: Quantidade de notícias inseridas, atualizadas e inalteradas.
+
+        Exception:
+            Faz rollback do bloco atual; os blocos anteriores permanecem gravados.
+
+        Finally:
+            Fecha a conexão com o banco de dados.
+        """
+        try:
+            with self.conn_to_database.cursor() as cursor:
+                return self._upsert_news(cursor, news_rows, chunk_size, on_chunk=self.connection.commit)
+
+        except Exception as e:
+            self.rollback()
+            raise Exception(f"Erro ao gravar notícias em lote: {str(e)}")
+
+        finally:
+            self.close()
+
     def _transfer_company_to_handson(self, company_name: str) -> int:
         """
         Busca a empresa ativa pelo nome na tabela `company_company` no banco CLIPPING e,
@@ -255,89 +481,109 @@ class GetNews(DatabaseClipping):
             Trata erros de conexão com o banco de dados ou outras variáveis.
 
         Finally:
-            Fecha as conexões com os bancos.
+            Devolve as conexões aos pools dos bancos.
         """
-        connection_clipping = None
-        connection_handson = None
-        cursor_clipping = None
-        cursor_handson = None
-
         try:
-            # Conectar ao banco Clipping (para buscar a empresa)
-            connection_clipping = psycopg2.connect(
-                dbname=DB_NAME_CLIPPING,
-                user=DB_USER_CLIPPING,
-                password=DB_PASSWORD_CLIPPING,
-                host=DB_HOST_CLIPPING,
-                options=DB_OPTIONS_CLIPPING
-            )
-            cursor_clipping = connection_clipping.cursor()
-
-            # 🔍 Buscar a empresa ativa no banco Clipping
-            query_clipping = """
-                SELECT id, corporate_name, cnpj, email
-                FROM company_company 
-                WHERE is_active = TRUE 
-                AND LOWER(TRIM(corporate_name)) = LOWER(TRIM(%s));
-            """
-            cursor_clipping.execute(query_clipping, (company_name,))
-            company_data = cursor_clipping.fetchone()
+            # Busca a empresa ativa no banco Clipping usando a conexão da instância
+            with self.conn_to_database.cursor() as cursor_clipping:
+                query_clipping = """
+                    SELECT id, corporate_name, cnpj, email
+                    FROM company_company 
+                    WHERE is_active = TRUE 
+                    AND LOWER(TRIM(corporate_name)) = LOWER(TRIM(%s));
+                """
+                cursor_clipping.execute(query_clipping, (company_name,))
+                company_data = cursor_clipping.fetchone()
 
             if not company_data:
                 raise Exception(f"Empresa '{company_name}' não encontrada no Clipping ou está inativa.")
 
             company_id, corporate_name, cnpj, email = company_data  # Pegamos o ID original
 
-            # Conectar ao banco Hands-On (para inserir a empresa)
-            connection_handson = psycopg2.connect(
-                dbname=DB_NAME_HANDSON,
-                user=DB_USER_HANDSON,
-                password=DB_PASSWORD_HANDSON,
-                host=DB_HOST_HANDSON
-            )
-            cursor_handson = connection_handson.cursor()
+            # Conexão emprestada do pool do Hands-On (para inserir a empresa)
+            with get_handson_pool().connection() as connection_handson:
+                with connection_handson.cursor() as cursor_handson:
+                    # 🔹 **Definir o schema correto**
+                    SCHEMA_HANDSON = "public"  # 🔹 Ajuste conforme necessário
+                    # SET LOCAL para não vazar o search_path para o próximo uso da conexão do pool
+                    cursor_handson.execute(f"SET LOCAL search_path TO {SCHEMA_HANDSON};")
+
+                    # 🔍 Verificar se a empresa já existe no Hands-On
+                    query_check = f"""
+                        SELECT id FROM {SCHEMA_HANDSON}.company 
+                        WHERE LOWER(TRIM(name)) = LOWER(TRIM(%s));
+                    """
+                    cursor_handson.execute(query_check, (corporate_name,))
+                    existing_company = cursor_handson.fetchone()
+
+                    if existing_company:
+                        return existing_company[0]  # Retorna o ID da empresa já existente
+
+                    # 🟢 Inserir empresa no Hands-On com `OVERRIDING SYSTEM VALUE`
+                    query_insert = f"""
+                        INSERT INTO {SCHEMA_HANDSON}.company (id, name, cnpj, email_company, is_active)
+                        OVERRIDING SYSTEM VALUE
+                        VALUES (%s, %s, %s, %s, TRUE)
+                        RETURNING id;
+                    """
+                    cursor_handson.execute(query_insert, (company_id, corporate_name, cnpj, email))
+                    new_company_id = cursor_handson.fetchone()[0]
+
+                # Commit na transação do Hands-On
+                connection_handson.commit()
+                return new_company_id
 
-            # 🔹 **Definir o schema correto**
-            SCHEMA_HANDSON = "public"  # 🔹 Ajuste conforme necessário
-            cursor_handson.execute(f"SET search_path TO {SCHEMA_HANDSON};")
+        except Exception as e:
+            raise Exception(f"Erro ao transferir empresa '{company_name}': {str(e)}")
 
-            # 🔍 Verificar se a empresa já existe no Hands-On
-            query_check = f"""
-                SELECT id FROM {SCHEMA_HANDSON}.company 
-                WHERE LOWER(TRIM(name)) = LOWER(TRIM(%s));
-            """
-            cursor_handson.execute(query_check, (corporate_name,))
-            existing_company = cursor_handson.fetchone()
+        finally:
+            self.close()
 
-            if existing_company:
-                return existing_company[0]  # Retorna o ID da empresa já existente
 
-            # 🟢 Inserir empresa no Hands-On com `OVERRIDING SYSTEM VALUE`
-            query_insert = f"""
-                INSERT INTO {SCHEMA_HANDSON}.company (id, name, cnpj, email_company, is_active)
-                OVERRIDING SYSTEM VALUE
-                VALUES (%s, %s, %s, %s, TRUE)
-                RETURNING id;
-            """
-            cursor_handson.execute(query_insert, (company_id, corporate_name, cnpj, email))
-            new_company_id = cursor_handson.fetchone()[0]
+class AsyncGetNews(AsyncDatabaseClipping):
+    """Leituras de `GetNews` pelo pool assíncrono, para as rotas `async def`."""
 
-            # Commit na transação do Hands-On
-            connection_handson.commit()
-            return new_company_id
+    async def _list_companies(self, is_active: bool, key: str, limit: int, offset: int, cursor_token: Optional[str]) -> Dict[str, Any]:
+        after, after_params = BY_ID.after_text(cursor_token)
+        async with self.acquire() as conn:
+            total_records = await conn.fetchval("SELECT COUNT(*) FROM company_company WHERE is_active = $1;", is_active)
+            rows = await conn.fetch(to_asyncpg(f"""
+                SELECT * FROM company_company
+                WHERE is_active = %s
+                AND {after}
+                ORDER BY {BY_ID.order_by_text()}
+                LIMIT %s OFFSET %s;
+            """), is_active, *after_params, limit, 0 if cursor_token else offset)
+
+        result = [dict(row) for row in rows]
+        return {
+            "total_records": total_records,
+            "page_size": limit,
+            "current_offset": None if cursor_token else offset,
+            "next_cursor": BY_ID.next_cursor(result, limit),
+            key: result
+        }
+
+    async def _get_active_companies(self, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Empresas ativas do clipping, paginadas (ver `GetNews._get_active_companies`).
 
+        Raises:
+            Exception: Caso ocorra um erro na consulta ao banco de dados.
+        """
+        try:
+            return await self._list_companies(True, "active_companies", limit, offset, cursor_token)
         except Exception as e:
-            if connection_handson:
-                connection_handson.rollback()
-            raise Exception(f"Erro ao transferir empresa '{company_name}': {str(e)}")
+            raise Exception(f"Erro ao consultar empresas ativas: {str(e)}")
 
-        finally:
-            # Fechar cursores e conexões
-            if cursor_clipping:
-                cursor_clipping.close()
-            if connection_clipping:
-                connection_clipping.close()
-            if cursor_handson:
-                cursor_handson.close()
-            if connection_handson:
-                connection_handson.close()
\ No newline at end of file
+    async def _get_deactivate_companies(self, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Empresas desativadas do clipping, paginadas (ver `GetNews._get_deactivate_companies`).
+
+        Raises:
+            Exception: Caso ocorra um erro na consulta ao banco de dados.
+        """
+        try:
+            return await self._list_companies(False, "deactivated_companies", limit, offset, cursor_token)
+        except Exception as e:
+            raise Exception(f"Erro ao consultar empresas desativadas: {str(e)}")
@@ -0,0 +1,98 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from psycopg2 import sql
+
+from db.clipping_db.get_table_news import CLIPPING_TABLE
+from db.pagination import quote_ident
+from config.config import NEWS_JOIN_LOOKUP_SIZE
+
+
+def news_code_key(value: Any) -> Optional[str]:
+    """Chave de join de um `news_code`: texto, ou None quando o código está vazio."""
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+class NewsCodeJoin:
+    """
+    Join por `news_code` entre registros do hands-on e `clippings_news`.
+
+    As notícias são buscadas em lotes com `news_code = ANY(%s)` e indexadas em um dicionário,
+    então o custo é linear no número de registros e cada registro só é combinado com a notícia
+    do seu próprio código. Quando há mais de uma notícia com o mesmo código, vale a primeira.
+
+    Args:
+        cursor: Cursor do banco do clipping (tupla ou `RealDictCursor`).
+        lookup_size (int): Quantidade de códigos por consulta.
+    """
+
+    def __init__(self, cursor, lookup_size: int = NEWS_JOIN_LOOKUP_SIZE) -> None:
+        self.cursor = cursor
+        self.lookup_size = lookup_size
+
+    def fetch(self, news_codes: Iterable[str]) -> Dict[str, Any]:
+        """Busca as notícias dos códigos informados, indexadas pelo `news_code`."""
+        codes = list(dict.fromkeys(code for code in news_codes if code))
+        clippings: Dict[str, Any] = {}
+
+        query = sql.SQL("SELECT * FROM {} WHERE news_code = ANY(%s);").format(sql.Identifier(CLIPPING_TABLE))
+        for start in range(0, len(codes), self.lookup_size):
+            self.cursor.execute(query, (codes[start:start + self.lookup_size],))
+            rows = self.cursor.fetchall()
+            if not rows:
+                continue
+            if isinstance(rows[0], dict):
+                for row in rows:
+                    clippings.setdefault(row["news_code"], row)
+            else:
+                code_index = [column[0] for column in self.cursor.description].index("news_code")
+                for row in rows:
+                    clippings.setdefault(row[code_index], row)
+        return clippings
+
+    def join(self, rows: Sequence[Any], code_of: Callable[[Any], Any]) -> List[Tuple[Any, Optional[Any]]]:
+        """
+        Combina cada registro com a sua notícia.
+
+        Args:
+            rows: Registros do hands-on.
+            code_of: Função que extrai o `news_code` de um registro.
+
+        Returns:
+            Lista de pares (registro, notícia ou None), na ordem de `rows`.
+        """
+        keys = [news_code_key(code_of(row)) for row in rows]
+        clippings = self.fetch(key for key in keys if key)
+        return [(row, clippings.get(key) if key else None) for row, key in zip(rows, keys)]
+
+
+class AsyncNewsCodeJoin:
+    """
+    Versão de `NewsCodeJoin` para uma conexão do asyncpg. As notícias vêm como dicionários.
+
+    Args:
+        conn: Conexão do pool assíncrono do banco do clipping.
+        lookup_size (int): Quantidade de códigos por consulta.
+    """
+
+    def __init__(self, conn, lookup_size: int = NEWS_JOIN_LOOKUP_SIZE) -> None:
+        self.conn = conn
+        self.lookup_size = lookup_size
+
+    async def fetch(self, news_codes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Busca as notícias dos códigos informados, indexadas pelo `news_code`."""
+        codes = list(dict.fromkeys(code for code in news_codes if code))
+        clippings: Dict[str, Dict[str, Any]] = {}
+
+        query = f"SELECT * FROM {quote_ident(CLIPPING_TABLE)} WHERE news_code = ANY($1::text[]);"
+        for start in range(0, len(codes), self.lookup_size):
+            for row in await self.conn.fetch(query, codes[start:start + self.lookup_size]):
+                clippings.setdefault(row["news_code"], dict(row))
+        return clippings
+
+    async def join(self, rows: Sequence[Any], code_of: Callable[[Any], Any]) -> List[Tuple[Any, Optional[Dict[str, Any]]]]:
+        """Combina cada registro com a sua notícia (ver `NewsCodeJoin.join`)."""
+        keys = [news_code_key(code_of(row)) for row in rows]
+        clippings = await self.fetch(key for key in keys if key)
+        return [(row, clippings.get(key) if key else None) for row, key in zip(rows, keys)]
@@ -1,17 +1,22 @@
-from db.connection import Database
-from typing import List, Dict, Any
+from db.connection import AsyncDatabase, Database
+from db.async_pool import to_asyncpg
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from psycopg2 import sql
 import pandas as pd
+from db.schema_cache import schema_cache
+from db.pagination import BY_DATE_DESC, BY_ID, quote_ident
+from db.counting import count_rows, count_rows_async
+from db.row_formats import rows_payload, statement_columns
+from db.partitions import NOT_A_PARTITION
 
 class InsertCompany(Database):
 
     def __init__(self) -> None:
         super().__init__()
-        self.conn = self._conn()
 
     @property
     def conn_to_database(self):
-        return self.conn
+        return self._conn()
 
     def _create_company(self, name_company: str, cnpj_company: str, email_company: str) -> str:
         """
@@ -41,10 +46,10 @@ class InsertCompany(Database):
             result = self.execute_query(query.as_string(self._conn()))
             return result
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao criar coluna: {e}")
         finally:
-            self.connection.close()
+            self.close()
 
     def _associate_table_with_company(self, table_name: str, company_id: int) -> str:
         """
@@ -75,18 +80,19 @@ class InsertCompany(Database):
             return result
         
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao criar coluna: {e}")
         finally:
-            self.connection.close()
+            self.close()
 
-    def _get_all_companies(self, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    def _get_all_companies(self, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> Dict[str, Any]:
         """
         Retorna empresas onde is_active é True, com suporte a paginação.
 
         Args:
             limit (int): Número máximo de empresas retornadas por página.
             offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+            cursor_token (str): Token `next_cursor` da página anterior; quando informado, `offset` é ignorado.
 
         Returns:
             Um dicionário contendo as empresas ativas paginadas e informações de paginação.
@@ -96,13 +102,15 @@ class InsertCompany(Database):
         """
         try:
             # Query para buscar empresas ativas com paginação
-            query = """
+            after, after_params = BY_ID.after(cursor_token)
+            query = sql.SQL("""
                 SELECT *
                 FROM company
                 WHERE is_active = TRUE
-                ORDER BY id ASC
+                AND {}
+                ORDER BY {}
                 LIMIT %s OFFSET %s;
-            """
+            """).format(after, BY_ID.order_by())
 
             # Query para contar o total de empresas ativas
             count_query = """
@@ -117,7 +125,7 @@ class InsertCompany(Database):
                 total_records = cursor.fetchone()[0]
 
                 # Executa a query paginada
-                cursor.execute(query, (limit, offset))
+                cursor.execute(query, after_params + [limit, 0 if cursor_token else offset])
                 rows = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
 
@@ -127,25 +135,26 @@ class InsertCompany(Database):
             return {
                 "total_records": total_records,
                 "page_size": limit,
-                "current_offset": offset,
+                "current_offset": None if cursor_token else offset,
+                "next_cursor": BY_ID.next_cursor(result, limit),
                 "companies": result
             }
 
         except Exception as e:
-            self.conn_to_database.rollback()
+            self.rollback()
             raise Exception(f"Erro ao consultar empresas ativas: {str(e)}")
 
         finally:
-            if self.conn_to_database:
-                self.conn_to_database.close()
+            self.close()
     
-    def _trash_companies(self, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    def _trash_companies(self, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> Dict[str, Any]:
         """
         Retorna empresas onde is_active é False, com suporte a paginação.
 
         Args:
             limit (int): Número máximo de empresas retornadas por página.
             offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+            cursor_token (str): Token `next_cursor` da página anterior; quando informado, `offset` é ignorado.
 
         Returns:
             Um dicionário contendo as empresas inativas paginadas e informações de paginação.
@@ -155,13 +164,15 @@ class InsertCompany(Database):
         """
         try:
             # Query para buscar empresas inativas com paginação
-            query = """
+            after, after_params = BY_ID.after(cursor_token)
+            query = sql.SQL("""
                 SELECT *
                 FROM company
                 WHERE is_active = FALSE
-                ORDER BY id ASC
+                AND {}
+                ORDER BY {}
                 LIMIT %s OFFSET %s;
-            """
+            """).format(after, BY_ID.order_by())
 
             # Query para contar o total de empresas inativas
             count_query = """
@@ -176,7 +187,7 @@ class InsertCompany(Database):
                 total_records = cursor.fetchone()[0]
 
                 # Executa a query paginada
-                cursor.execute(query, (limit, offset))
+                cursor.execute(query, after_params + [limit, 0 if cursor_token else offset])
                 rows = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
 
@@ -186,17 +197,17 @@ class InsertCompany(Database):
             return {
                 "total_records": total_records,
                 "page_size": limit,
-                "current_offset": offset,
+                "current_offset": None if cursor_token else offset,
+                "next_cursor": BY_ID.next_cursor(result, limit),
                 "inactive_companies": result
             }
 
         except Exception as e:
-            self.conn_to_database.rollback()
+            self.rollback()
             raise Exception(f"Erro ao consultar empresas inativas: {str(e)}")
 
         finally:
-            if self.conn_to_database:
-                self.conn_to_database.close()
+            self.close()
         
     def _mark_company_as_deleted_by_id(self, record_id: int) -> str:
         """
@@ -217,10 +228,10 @@ class InsertCompany(Database):
             result = self.execute_query(query) 
             return result
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao criar coluna: {e}")
         finally:
-            self.connection.close()
+            self.close()
     
     def _active_company(self, record_id: int) -> Dict[str, str]:
         """
@@ -241,13 +252,13 @@ class InsertCompany(Database):
             result = self.execute_query(query) 
             return result
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao criar coluna: {e}")
         finally:
-            self.connection.close()
+            self.close()
     
     # FIXME verificar a possível criação de um campo padrão para a consulta no range de data
-    def _get_news_by_date_range(self, table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    def _get_news_by_date_range(self, table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None, count_strategy: str = "exact") -> Dict[str, Any]:
         """
         Filtra registros pelo range de data com paginação.
         
@@ -258,6 +269,8 @@ class InsertCompany(Database):
             end_date: Data final para o range de data.
             limit: Número máximo de registros retornados por página.
             offset: Número de registros a serem ignorados antes de começar a retornar os resultados.
+            cursor_token: Token `next_cursor` da página anterior; quando informado, `offset` é ignorado.
+            count_strategy: Estratégia do total (`exact`, `estimated` ou `none`).
 
         Returns:
             Um dicionário contendo os registros da página atual e informações de paginação.
@@ -266,29 +279,18 @@ class InsertCompany(Database):
             Exception: Erro ao consultar notícias.
         """
         try:
-            query = f"""
-                SELECT *
-                FROM {schema_name}.{table_name}
-                WHERE is_deleted = FALSE
-                AND date BETWEEN %s AND %s
-                ORDER BY date DESC
-                LIMIT %s OFFSET %s;
-            """
-
-            count_query = f"""
-                SELECT COUNT(*)
-                FROM {schema_name}.{table_name}
-                WHERE is_deleted = FALSE
-                AND date BETWEEN %s AND %s;
-            """
+            # `date BETWEEN` já exclui as datas nulas: não há fase dos nulos
+            query, params = BY_DATE_DESC.page_text(
+                f"{quote_ident(schema_name)}.{quote_ident(table_name)}", "is_deleted = FALSE AND date BETWEEN %s AND %s", [start_date, end_date],
+                cursor_token, limit, 0 if cursor_token else offset, nulls=False,
+            )
 
             with self.conn_to_database.cursor() as cursor:
-                cursor.execute(query, (start_date, end_date, limit, offset))
+                cursor.execute(sql.SQL(query), params)
                 rows = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
 
-                cursor.execute(count_query, (start_date, end_date))
-                total_records = cursor.fetchone()[0]
+                total_records = count_rows(cursor, schema_name, table_name, sql.SQL("is_deleted = FALSE AND date BETWEEN %s AND %s"), [start_date, end_date], count_strategy)
 
                 if not rows:
                     return {"message": "Nenhum registro encontrado para o período informado.", "total_records": total_records}
@@ -297,15 +299,16 @@ class InsertCompany(Database):
 
                 return {
                     "total_records": total_records,
+                    "count_strategy": count_strategy,
                     "page_size": limit,
-                    "current_offset": offset,
+                    "current_offset": None if cursor_token else offset,
+                    "next_cursor": BY_DATE_DESC.next_cursor(result, limit),
                     "data": result
                 }
         except Exception as e:
             raise Exception(f"Erro ao consultar notícias: {str(e)}")
         finally:
-            if self.conn:
-                self.conn.close()
+            self.close()
 
     def _find_tables_with_company_id(self, company_id: int, schema_name: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         """
@@ -325,11 +328,12 @@ class InsertCompany(Database):
         """
         try:
             # Consulta para obter todas as tabelas que possuem a coluna 'company_id' no schema
-            query_tables = """
+            query_tables = f"""
                 SELECT table_name
                 FROM information_schema.columns
                 WHERE column_name = 'company_id'
                 AND table_schema = %s
+                AND {NOT_A_PARTITION}
                 GROUP BY table_name
                 ORDER BY table_name
                 LIMIT %s OFFSET %s;
@@ -340,11 +344,12 @@ class InsertCompany(Database):
                 tables = [row[0] for row in cursor.fetchall()]
 
             # Consulta para contar o total de tabelas sem paginação
-            count_query = """
+            count_query = f"""
                 SELECT COUNT(DISTINCT table_name)
                 FROM information_schema.columns
                 WHERE column_name = 'company_id'
-                AND table_schema = %s;
+                AND table_schema = %s
+                AND {NOT_A_PARTITION};
             """
 
             with self.conn_to_database.cursor() as cursor:
@@ -353,6 +358,9 @@ class InsertCompany(Database):
 
             related_tables_with_data = []
             with self.conn_to_database.cursor() as cursor:
+                # Metadados de todas as tabelas da página em uma única consulta (ou direto do cache)
+                tables_metadata = schema_cache.get_many(cursor, schema_name, tables)
+
                 for table in tables:
                     query_check = f"""
                         SELECT * FROM {schema_name}.{table} WHERE company_id = %s LIMIT 1;
@@ -360,16 +368,10 @@ class InsertCompany(Database):
                     cursor.execute(query_check, (company_id,))
                     rows = cursor.fetchall()
 
-                    if rows:
-                        column_names_and_types_query = """
-                            SELECT column_name, data_type
-                            FROM information_schema.columns
-                            WHERE table_name = %s
-                            AND table_schema = %s;
-                        """
-                        cursor.execute(column_names_and_types_query, (table, schema_name))
+                    if rows and table in tables_metadata:
                         columns_with_types = [
-                            {"name": row[0], "type": row[1]} for row in cursor.fetchall()
+                            {"name": column["name"], "type": column["data_type"]}
+                            for column in tables_metadata[table]["columns"].values()
                         ]
 
                         related_tables_with_data.append({
@@ -386,8 +388,7 @@ class InsertCompany(Database):
         except Exception as e:
             raise Exception(f"Erro ao buscar tabelas relacionadas ao company_id: {str(e)}")
         finally:
-            if self.conn_to_database:
-                self.conn_to_database.close()
+            self.close()
 
 
     def _export_data_to_excel(self, start_date: str, end_date: str) -> str:
@@ -408,8 +409,7 @@ class InsertCompany(Database):
         except Exception as e:
             raise Exception(f"Erro ao buscar tabelas relacionadas ao company_id: {str(e)}")
         finally:
-            if self.conn_to_database:
-                self.conn_to_database.close()
+            self.close()
 
     def _update_company(self, company_id: int, name_company: str = None, cnpj_company: str = None, email_company: str = None) -> str:
         """
@@ -452,7 +452,158 @@ class InsertCompany(Database):
         except Exception as e:
             raise Exception(f"Erro ao atualizar empresa: {str(e)}")
         finally:
-            if self.conn_to_database:
-                self.conn_to_database.close()
+            self.close()
+
+    
+
+class AsyncInsertCompany(AsyncDatabase):
+    """Leituras de `InsertCompany` pelo pool assíncrono, para as rotas `async def`."""
+
+    async def _list_companies(self, is_active: bool, key: str, limit: int, offset: int, cursor_token: Optional[str]) -> Dict[str, Any]:
+        after, after_params = BY_ID.after_text(cursor_token)
+        async with self.acquire() as conn:
+            total_records = await conn.fetchval("SELECT COUNT(*) FROM company WHERE is_active = $1;", is_active)
+            rows = await conn.fetch(to_asyncpg(f"""
+                SELECT *
+                FROM company
+                WHERE is_active = %s
+                AND {after}
+                ORDER BY {BY_ID.order_by_text()}
+                LIMIT %s OFFSET %s;
+            """), is_active, *after_params, limit, 0 if cursor_token else offset)
+
+        result = [dict(row) for row in rows]
+        return {
+            "total_records": total_records,
+            "page_size": limit,
+            "current_offset": None if cursor_token else offset,
+            "next_cursor": BY_ID.next_cursor(result, limit),
+            key: result
+        }
+
+    async def _get_all_companies(self, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retorna empresas onde is_active é True, com suporte a paginação (ver `InsertCompany._get_all_companies`).
+
+        Raises:
+            Exception: Caso ocorra um erro na consulta ao banco de dados.
+        """
+        try:
+            return await self._list_companies(True, "companies", limit, offset, cursor_token)
+        except Exception as e:
+            raise Exception(f"Erro ao consultar empresas ativas: {str(e)}")
+
+    async def _trash_companies(self, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retorna empresas onde is_active é False, com suporte a paginação (ver `InsertCompany._trash_companies`).
+
+        Raises:
+            Exception: Caso ocorra um erro na consulta ao banco de dados.
+        """
+        try:
+            return await self._list_companies(False, "inactive_companies", limit, offset, cursor_token)
+        except Exception as e:
+            raise Exception(f"Erro ao consultar empresas inativas: {str(e)}")
+
+    @staticmethod
+    def _news_by_date_range_query(table_name: str, schema_name: str, dates: List[Any], limit: int, offset: int, cursor_token: Optional[str]) -> Tuple[str, List[Any]]:
+        # `date BETWEEN` já exclui as datas nulas: não há fase dos nulos
+        return BY_DATE_DESC.page_text(
+            f"{quote_ident(schema_name)}.{quote_ident(table_name)}", "is_deleted = FALSE AND date BETWEEN %s AND %s", dates,
+            cursor_token, limit, 0 if cursor_token else offset, nulls=False,
+        )
+
+    async def _get_news_by_date_range(self, table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None, count_strategy: str = "exact", row_format: str = "json") -> Dict[str, Any]:
+        """
+        Filtra registros pelo range de data com paginação (ver `InsertCompany._get_news_by_date_range`).
+
+        Com `row_format="columnar"` as linhas saem em `columns`/`rows` em vez de `data`.
+
+        Raises:
+            Exception: Erro ao consultar notícias.
+        """
+        try:
+            dates = [self._date(start_date), self._date(end_date)]
+            query, params = self._news_by_date_range_query(table_name, schema_name, dates, limit, offset, cursor_token)
+
+            async with self.acquire() as conn:
+                statement = await conn.prepare(to_asyncpg(query))
+                rows = await statement.fetch(*params)
+                total_records = await count_rows_async(conn, schema_name, table_name, "is_deleted = FALSE AND date BETWEEN %s AND %s", dates, count_strategy)
+
+            if not rows:
+                return {"message": "Nenhum registro encontrado para o período informado.", "total_records": total_records}
+
+            return {
+                "total_records": total_records,
+                "count_strategy": count_strategy,
+                "page_size": limit,
+                "current_offset": None if cursor_token else offset,
+                "next_cursor": BY_DATE_DESC.next_cursor(rows, limit),
+                **rows_payload(statement_columns(statement), rows, "data", row_format),
+            }
+        except Exception as e:
+            raise Exception(f"Erro ao consultar notícias: {str(e)}")
 
-    
\ No newline at end of file
+    async def _stream_news_by_date_range(self, table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Mesma página de `_get_news_by_date_range` em lotes, lida por um cursor do servidor (formato `ndjson`)."""
+        dates = [self._date(start_date), self._date(end_date)]
+        query, params = self._news_by_date_range_query(table_name, schema_name, dates, limit, offset, cursor_token)
+        async for records in self.stream(query, *params):
+            yield [dict(record) for record in records]
+
+    async def _find_tables_with_company_id(self, company_id: int, schema_name: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        """
+        Filtra tabelas pelo ID da empresa com paginação (ver `InsertCompany._find_tables_with_company_id`).
+
+        Raises:
+            Exception: Caso ocorra um erro durante a consulta.
+        """
+        try:
+            async with self.acquire() as conn:
+                tables = [row["table_name"] for row in await conn.fetch(f"""
+                    SELECT table_name
+                    FROM information_schema.columns
+                    WHERE column_name = 'company_id'
+                    AND table_schema = $1
+                    AND {NOT_A_PARTITION}
+                    GROUP BY table_name
+                    ORDER BY table_name
+                    LIMIT $2 OFFSET $3;
+                """, schema_name, limit, offset)]
+
+                total_tables = await conn.fetchval(f"""
+                    SELECT COUNT(DISTINCT table_name)
+                    FROM information_schema.columns
+                    WHERE column_name = 'company_id'
+                    AND table_schema = $1
+                    AND {NOT_A_PARTITION};
+                """, schema_name)
+
+                tables_metadata = await schema_cache.get_many_async(conn, schema_name, tables)
+
+                related_tables_with_data = []
+                for table in tables:
+                    if table not in tables_metadata:
+                        continue
+                    has_rows = await conn.fetchval(
+                        f"SELECT EXISTS (SELECT 1 FROM {quote_ident(schema_name)}.{quote_ident(table)} WHERE company_id = $1);",
+                        int(company_id),
+                    )
+                    if has_rows:
+                        related_tables_with_data.append({
+                            "table_name": table,
+                            "columns": [
+                                {"name": column["name"], "type": column["data_type"]}
+                                for column in tables_metadata[table]["columns"].values()
+                            ]
+                        })
+
+            return {
+                "total_tables": total_tables,
+                "page_size": limit,
+                "current_offset": offset,
+                "tables": related_tables_with_data
+            }
+        except Exception as e:
+            raise Exception(f"Erro ao buscar tabelas relacionadas ao company_id: {str(e)}")
@@ -1,5 +1,10 @@
-import psycopg2
-from config.config import DB_HOST_HANDSON, DB_NAME_HANDSON, DB_PASSWORD_HANDSON, DB_USER_HANDSON
+from config.config import DB_HOST_HANDSON, DB_NAME_HANDSON, DB_PASSWORD_HANDSON, DB_USER_HANDSON, NDJSON_FETCH_SIZE
+from db.pool import ConnectionPool, get_handson_pool
+from db.async_pool import get_handson_async_pool, to_asyncpg
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Union
+import asyncpg
 
 
 class Database:
@@ -9,17 +14,47 @@ class Database:
         self.db_user = DB_USER_HANDSON
         self.db_password = DB_PASSWORD_HANDSON
         self.db_host = DB_HOST_HANDSON
+        self.connection = None
+        self._lease_id = 0
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return get_handson_pool()
 
     def _conn(self):
-        """Estabelece uma conexão com o banco de dados."""
-        self.connection = psycopg2.connect(
-            dbname=self.db_name,
-            user=self.db_user,
-            password=self.db_password,
-            host=self.db_host
-        )
+        """
+        Obtém uma conexão do pool do banco de dados.
+
+        A mesma conexão é reaproveitada pela instância até ser devolvida com `close()`,
+        então `execute_query` e os métodos das subclasses compartilham a mesma sessão.
+        """
+        if self.connection is None or self.connection.closed or self.connection.lease_id != self._lease_id:
+            self.connection = self.pool.getconn()
+            self._lease_id = self.connection.lease_id
         return self.connection
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Devolve ao pool a conexão emprestada pela instância."""
+        self.close()
+
+    def close(self) -> None:
+        """
+        Devolve ao pool a conexão emprestada pela instância.
+
+        Pode ser chamado mais de uma vez: depois da primeira devolução a conexão pode estar com
+        outro chamador, e o pool só a aceita de volta enquanto o empréstimo da instância for o atual.
+        """
+        if self.connection is not None:
+            self.pool.putconn(self.connection, self._lease_id)
+
+    def rollback(self) -> None:
+        """Desfaz a transação da instância, caso ela ainda detenha a conexão."""
+        if self.connection is not None and self.connection.lease_id == self._lease_id:
+            self.connection.rollback()
+
     def execute_query(self, query: str):
         """Executa uma query no banco de dados."""
         conn = self._conn()
@@ -31,3 +66,57 @@ class Database:
         except Exception as e:
             conn.rollback()
             raise e
+
+
+class AsyncDatabase:
+    """
+    Acesso assíncrono (asyncpg) de leitura ao banco do hands-on.
+
+    As queries usam os mesmos placeholders `%s` do psycopg2 e são convertidas por `to_asyncpg`.
+    Cada chamada empresta uma conexão do pool e a devolve ao terminar, sem bloquear o event loop.
+    """
+
+    async def pool(self) -> asyncpg.Pool:
+        return await get_handson_async_pool()
+
+    @staticmethod
+    def _date(value: Union[str, date]) -> date:
+        """O asyncpg exige `date` nos parâmetros de data; as rotas recebem 'YYYY-MM-DD'."""
+        if isinstance(value, str):
+            try:
+                return date.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"Data inválida: {value}. Use o formato YYYY-MM-DD.")
+        return value
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        """Empresta uma conexão do pool assíncrono."""
+        pool = await self.pool()
+        async with pool.acquire() as conn:
+            yield conn
+
+    async def fetch(self, query: str, *args: Any) -> List[Dict[str, Any]]:
+        """Executa uma consulta e retorna as linhas como dicionários."""
+        async with self.acquire() as conn:
+            rows = await conn.fetch(to_asyncpg(query), *args)
+        return [dict(row) for row in rows]
+
+    async def fetchval(self, query: str, *args: Any) -> Any:
+        """Executa uma consulta e retorna a primeira coluna da primeira linha."""
+        async with self.acquire() as conn:
+            return await conn.fetchval(to_asyncpg(query), *args)
+
+    async def stream(self, query: str, *args: Any, fetch_size: int = NDJSON_FETCH_SIZE) -> AsyncIterator[List[asyncpg.Record]]:
+        """
+        Executa uma consulta por um cursor do servidor e devolve as linhas em lotes de `fetch_size`.
+
+        A conexão fica emprestada (em uma transação somente leitura) até o último lote ser lido.
+        """
+        async with self.acquire() as conn, conn.transaction(readonly=True):
+            cursor = await conn.cursor(to_asyncpg(query), *args)
+            while True:
+                records = await cursor.fetch(fetch_size)
+                if not records:
+                    return
+                yield records
@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from psycopg2 import sql
+
+from db.async_pool import to_asyncpg
+from db.pagination import quote_ident
+from config.config import COUNT_CACHE_MAX_ENTRIES, COUNT_CACHE_TTL
+
+# Estratégias aceitas pelo parâmetro `count` das listagens
+COUNT_STRATEGIES = ("exact", "estimated", "none")
+
+
+class CountCache:
+    """
+    Cache de curta duração dos totais das listagens, por (schema, tabela, filtro).
+
+    Uploads e soft-deletes chamam `invalidate` para a tabela alterada; o TTL limita o
+    tempo em que um total pode ficar desatualizado por alterações de outros processos.
+
+    Args:
+        ttl (float): Segundos de validade de um total.
+        max_entries (int): Quantidade máxima de totais guardados.
+    """
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, max_entries: int = COUNT_CACHE_MAX_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[Any, ...], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key: Tuple[Any, ...], value: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                for expired in [k for k, (loaded_at, _) in self._entries.items() if now - loaded_at > self.ttl]:
+                    del self._entries[expired]
+                while len(self._entries) >= self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (now, value)
+
+    def invalidate(self, schema_name: str, table_name: Optional[str] = None) -> None:
+        """Descarta os totais de uma tabela ou, sem `table_name`, de todo o schema."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == schema_name and (table_name is None or k[1] == table_name)]:
+                del self._entries[key]
+
+
+count_cache = CountCache()
+
+
+def _cache_key(schema_name: str, table_name: str, strategy: str, filter_text: str, params: Sequence[Any]) -> Tuple[Any, ...]:
+    # Mesma chave para o acesso síncrono e o assíncrono, que compartilham o cache
+    return (schema_name, table_name, strategy, filter_text, tuple(str(param) for param in params))
+
+
+def _check_strategy(strategy: str) -> None:
+    if strategy not in COUNT_STRATEGIES:
+        raise ValueError(f"Estratégia de contagem inválida: {strategy}. Use uma de {', '.join(COUNT_STRATEGIES)}.")
+
+
+def _estimate(cursor, table: sql.Composable, where: Optional[sql.Composable], params: Sequence[Any], schema_name: str, table_name: str) -> int:
+    if where is None:
+        cursor.execute("""
+            SELECT c.reltuples::bigint
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s
+            AND c.relname = %s;
+        """, (schema_name, table_name))
+        row = cursor.fetchone()
+        # reltuples é -1 (ou 0) enquanto a tabela não foi analisada: usa a estimativa do planner
+        if row and row[0] and row[0] > 0:
+            return int(row[0])
+
+    cursor.execute(sql.SQL("EXPLAIN (FORMAT JSON) SELECT 1 FROM {} WHERE {};").format(table, where or sql.SQL("TRUE")), list(params))
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(
+    cursor,
+    schema_name: str,
+    table_name: str,
+    where: Optional[sql.Composable] = None,
+    params: Sequence[Any] = (),
+    strategy: str = "exact",
+) -> Optional[int]:
+    """
+    Total de registros de uma listagem segundo a estratégia pedida.
+
+    Args:
+        cursor: Cursor do banco da tabela.
+        schema_name (str): Schema da tabela.
+        table_name (str): Nome da tabela.
+        where (sql.Composable): Filtro da listagem (sem o `WHERE`), ou None para a tabela toda.
+        params (Sequence[Any]): Parâmetros do filtro.
+        strategy (str): `exact` (COUNT(*)), `estimated` (pg_class.reltuples ou EXPLAIN) ou `none`.
+
+    Returns:
+        O total (exato ou estimado), ou None com a estratégia `none`.
+    """
+    _check_strategy(strategy)
+    if strategy == "none":
+        return None
+
+    key = _cache_key(schema_name, table_name, strategy, where.as_string(cursor) if where is not None else "", params)
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached
+
+    table = sql.SQL("{}.{}").format(sql.Identifier(schema_name), sql.Identifier(table_name))
+    # Cursor simples na mesma conexão, já que o chamador pode usar `RealDictCursor`
+    with cursor.connection.cursor() as count_cursor:
+        if strategy == "exact":
+            count_cursor.execute(sql.SQL("SELECT COUNT(*) FROM {} WHERE {};").format(table, where or sql.SQL("TRUE")), list(params))
+            total = count_cursor.fetchone()[0]
+        else:
+            total = _estimate(count_cursor, table, where, params, schema_name, table_name)
+
+    count_cache.set(key, total)
+    return total
+
+
+async def count_rows_async(
+    conn,
+    schema_name: str,
+    table_name: str,
+    where: Optional[str] = None,
+    params: Sequence[Any] = (),
+    strategy: str = "exact",
+) -> Optional[int]:
+    """
+    Versão assíncrona de `count_rows`, para uma conexão do asyncpg.
+
+    Args:
+        conn: Conexão do pool assíncrono do banco da tabela.
+        where (str): Filtro da listagem (sem o `WHERE`) com placeholders `%s`, ou None para a tabela toda.
+
+    Returns:
+        O total (exato ou estimado), ou None com a estratégia `none`.
+    """
+    _check_strategy(strategy)
+    if strategy == "none":
+        return None
+
+    key = _cache_key(schema_name, table_name, strategy, where or "", params)
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached
+
+    table = f"{quote_ident(schema_name)}.{quote_ident(table_name)}"
+    if strategy == "exact":
+        total = await conn.fetchval(to_asyncpg(f"SELECT COUNT(*) FROM {table} WHERE {where or 'TRUE'};"), *params)
+    else:
+        total = None
+        if where is None:
+            reltuples = await conn.fetchval("""
+                SELECT c.reltuples::bigint
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = $1
+                AND c.relname = $2;
+            """, schema_name, table_name)
+            if reltuples and reltuples > 0:
+                total = int(reltuples)
+        if total is None:
+            plan = await conn.fetchval(to_asyncpg(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} WHERE {where or 'TRUE'};"), *params)
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            total = int(plan[0]["Plan"]["Plan Rows"])
+
+    count_cache.set(key, total)
+    return total
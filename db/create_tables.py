@@ -1,6 +1,10 @@
 import psycopg2 
+from typing import Optional
 from db.connection import Database
 from psycopg2 import sql
+from db.schema_cache import schema_cache
+from db.indexes import DEFAULT_INDEXES, create_index_query
+from db.partitions import partition_comment
 
 
 class CreateInDb(Database):
@@ -8,14 +12,26 @@ class CreateInDb(Database):
     def __init__(self) -> None:
         super().__init__()
 
-    def _create_table(self, table_name: str, schema_name: str) -> str:
+    def _create_table(self, table_name: str, schema_name: str, partition_interval: Optional[str] = None) -> str:
         """
         Cria uma tabela no banco de dados com os campos `uuid`, `created_at`, 
         e restrição de unicidade em `news_code` e `uuid`.
 
+        `row_hash` guarda o hash do conteúdo gravado pela ingestão, usado para não
+        reescrever registros que chegam iguais em um novo upload.
+
+        A tabela já nasce com o perfil de índices das listagens (`DEFAULT_INDEXES`): ativos por
+        data, lixeira por `deleted_at` e `company_id`.
+
+        Com `partition_interval` a tabela é particionada por range de `date` (uma partição por
+        mês ou por ano, criadas pelos uploads em `db.partitions.ensure_partitions`). Nesse caso
+        `date` é obrigatória e entra na chave primária e no UNIQUE de `news_code`, já que toda
+        restrição de unicidade de uma tabela particionada precisa conter a chave de partição.
+
         Args:
             table_name (str): Nome da tabela a ser criada.
             schema_name (str): Nome do schema onde a tabela será criada.
+            partition_interval (str): `month` ou `year` para particionar a tabela; None para uma tabela comum.
 
         Returns:
             str: Confirmação da criação da tabela.
@@ -24,25 +40,51 @@ class CreateInDb(Database):
             Exception: Caso ocorra um erro na criação da tabela.
         """
         try:
-            query = sql.SQL(
-                """
-                CREATE TABLE {}.{} (
-                    id SERIAL PRIMARY KEY,
-                    date DATE NULL,
-                    is_deleted BOOLEAN DEFAULT FALSE,
-                    news_code VARCHAR NULL,
-                    company_id INTEGER REFERENCES company(id) NULL,
-                    UNIQUE(news_code, id) 
-                );
-                """
-            ).format(
-                sql.Identifier(schema_name),
-                sql.Identifier(table_name)
-            )
+            if partition_interval:
+                query = sql.SQL(
+                    """
+                    CREATE TABLE {}.{} (
+                        id SERIAL,
+                        date DATE NOT NULL,
+                        is_deleted BOOLEAN DEFAULT FALSE,
+                        deleted_at TIMESTAMP NULL,
+                        news_code VARCHAR NULL,
+                        company_id INTEGER REFERENCES company(id) NULL,
+                        row_hash TEXT NULL,
+                        PRIMARY KEY (id, date),
+                        UNIQUE(news_code, id, date)
+                    ) PARTITION BY RANGE (date);
+                    COMMENT ON TABLE {}.{} IS {};
+                    """
+                ).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(table_name),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(table_name),
+                    sql.Literal(partition_comment(partition_interval)),
+                )
+            else:
+                query = sql.SQL(
+                    """
+                    CREATE TABLE {}.{} (
+                        id SERIAL PRIMARY KEY,
+                        date DATE NULL,
+                        is_deleted BOOLEAN DEFAULT FALSE,
+                        deleted_at TIMESTAMP NULL,
+                        news_code VARCHAR NULL,
+                        company_id INTEGER REFERENCES company(id) NULL,
+                        row_hash TEXT NULL,
+                        UNIQUE(news_code, id) 
+                    );
+                    """
+                ).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(table_name)
+                )
 
             result = self.execute_query(query)
             
-            # Adiciona a restrição de unicidade
+            # Adiciona a restrição de unicidade (já contém `date`, a chave de partição)
             unique_constraint_query = sql.SQL(
                 """
                 ALTER TABLE {}.{} ADD CONSTRAINT unique_news UNIQUE (news_code, company_id, date);
@@ -52,15 +94,19 @@ class CreateInDb(Database):
                 sql.Identifier(table_name)
             )
             self.execute_query(unique_constraint_query)
+
+            for index in DEFAULT_INDEXES:
+                self.execute_query(create_index_query(schema_name, table_name, index))
             
             return f"Tabela {schema_name}.{table_name} criada com sucesso."
 
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao criar tabela: {e}")
 
         finally:
-            self.connection.close()
+            schema_cache.invalidate(schema_name, table_name)
+            self.close()
 
     def _create_schema(self, schema_name: str) -> str:
         """
@@ -82,9 +128,9 @@ class CreateInDb(Database):
             result = self.execute_query(query)
             return result
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao criar schema: {e}")
         finally:
-            self.connection.close()
+            self.close()
         
     
\ No newline at end of file
@@ -5,11 +5,10 @@ class DeveloperDb(Database):
 
     def __init__(self):
         super().__init__()
-        self.conn = self._conn()
 
     @property
     def conn_to_database(self):
-        return self.conn
+        return self._conn()
     
 
     def _create_company_table(self) -> str:
@@ -35,8 +34,8 @@ class DeveloperDb(Database):
             result = self.execute_query(query)
             return result
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao criar tabela: {e}")
         finally:
-            self.connection.close()
+            self.close()
     
@@ -0,0 +1,461 @@
+import io
+import tempfile
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+from loguru import logger
+from psycopg2 import sql
+
+from db.clipping_db.get_table_news import CLIPPING_SCHEMA, CLIPPING_TABLE
+from db.clipping_db.news_join import NewsCodeJoin
+from db.pool import get_clipping_pool, get_handson_pool
+from config.config import EXPORT_BATCH_SIZE
+
+# Limite de linhas de uma planilha do Excel (incluindo o cabeçalho)
+EXCEL_MAX_ROWS = 1048576
+# Tamanho dos blocos enviados ao cliente na resposta
+STREAM_CHUNK_SIZE = 64 * 1024
+# Colunas da tabela dinâmica que não vão para o arquivo quando há dados do clipping
+DROPPED_DYNAMIC_COLUMNS = ("id", "news_code", "row_hash")
+# Quando nenhum registro do período tem `news_code` só o hands-on é exportado, mantendo o `id`
+DROPPED_DYNAMIC_COLUMNS_WITHOUT_CLIPPING = ("news_code", "row_hash")
+# Tabela temporária do hands-on que recebe as notícias de cada lote na exportação CSV
+CSV_STAGE_TABLE = "_export_clippings"
+
+# Tipos do Arrow a partir do OID do tipo no PostgreSQL; os demais são exportados como texto
+ARROW_TYPES = {
+    16: pa.bool_(),
+    20: pa.int64(),
+    21: pa.int16(),
+    23: pa.int32(),
+    700: pa.float32(),
+    701: pa.float64(),
+    1082: pa.date32(),
+    1083: pa.time64("us"),
+    1114: pa.timestamp("us"),
+    1184: pa.timestamp("us", tz="UTC"),
+}
+NUMERIC_OID = 1700
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, memoryview):
+        return value.tobytes().hex()
+    return str(value)
+
+
+def _excel_value(value: Any) -> Any:
+    """Converte valores que o xlsxwriter não sabe escrever (json, uuid, bytes) para texto."""
+    if value is None or isinstance(value, (str, bool, int, float, Decimal, datetime, date, time)):
+        return value
+    return _text(value)
+
+
+def _arrow_type(column) -> pa.DataType:
+    """Tipo do Arrow para uma coluna do `cursor.description`."""
+    if column.type_code == NUMERIC_OID:
+        if column.precision and column.precision <= 38 and column.scale is not None:
+            return pa.decimal128(column.precision, column.scale)
+        return pa.float64()
+    return ARROW_TYPES.get(column.type_code, pa.string())
+
+
+def _arrow_array(values: Sequence[Any], arrow_type: pa.DataType) -> pa.Array:
+    if pa.types.is_string(arrow_type):
+        values = [_text(value) for value in values]
+    elif pa.types.is_floating(arrow_type):
+        values = [None if value is None else float(value) for value in values]
+    return pa.array(values, type=arrow_type)
+
+
+def _unique_names(names: Sequence[str]) -> List[str]:
+    """Renomeia colunas repetidas (ex.: `company_id` nas duas tabelas) com um sufixo numérico."""
+    seen: Dict[str, int] = {}
+    unique = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            unique.append(f"{name}_{seen[name]}")
+        else:
+            seen[name] = 0
+            unique.append(name)
+    return unique
+
+
+class _ChunkSink:
+    """Destino de escrita que acumula os bytes até serem drenados para a resposta."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class NewsExport:
+    """
+    Exportação em streaming da tabela dinâmica combinada com `clippings_news`.
+
+    A tabela dinâmica é lida em lotes de `batch_size` linhas e cada lote busca as notícias
+    correspondentes no clipping, então a memória usada depende do tamanho do lote e não do
+    período exportado. O mesmo filtro (período e `is_deleted = FALSE`) vale para todos os formatos.
+
+    Args:
+        schema_name (str): Schema da tabela dinâmica.
+        table_name (str): Nome da tabela dinâmica.
+        start_date (str): Data inicial do período (inclusiva).
+        end_date (str): Data final do período (inclusiva).
+        batch_size (int): Linhas lidas por ida ao banco.
+    """
+
+    def __init__(self, schema_name: str, table_name: str, start_date: str, end_date: str, batch_size: int = EXPORT_BATCH_SIZE) -> None:
+        self.schema_name = schema_name
+        self.table_name = table_name
+        self.start_date = start_date
+        self.end_date = end_date
+        self.batch_size = batch_size
+
+        self.dynamic_columns: List[str] = []
+        self.clipping_columns: List[str] = []
+        self._dynamic_description: Sequence[Any] = ()
+        self._clipping_description: Sequence[Any] = ()
+        # Desligado em `open` quando nenhum registro do período tem `news_code`
+        self.with_clipping = True
+
+        self._handson = None
+        self._clipping = None
+        self._cursor = None
+
+    @property
+    def _table(self) -> sql.Composed:
+        return sql.SQL("{}.{}").format(sql.Identifier(self.schema_name), sql.Identifier(self.table_name))
+
+    @property
+    def _filter(self) -> sql.SQL:
+        return sql.SQL("is_deleted = FALSE AND date BETWEEN %s AND %s")
+
+    def open(self, check_exists: bool = True) -> bool:
+        """
+        Abre as conexões e lê as colunas das duas tabelas.
+
+        Args:
+            check_exists (bool): Verifica se há registros no período. A rota de exportação faz essa
+                verificação antes, pelo pool assíncrono, e abre a exportação já dentro do stream.
+
+        Returns:
+            bool: False caso não exista nenhum registro no período.
+        """
+        self._handson = get_handson_pool().getconn()
+        self._clipping = get_clipping_pool().getconn()
+        # As buscas no clipping são somente leitura e não precisam segurar uma transação aberta
+        self._clipping.autocommit = True
+
+        with self._handson.cursor() as cursor:
+            if check_exists:
+                cursor.execute(sql.SQL("SELECT EXISTS (SELECT 1 FROM {} WHERE {});").format(self._table, self._filter),
+                               (self.start_date, self.end_date))
+                if not cursor.fetchone()[0]:
+                    return False
+
+            cursor.execute(sql.SQL("SELECT * FROM {} LIMIT 0;").format(self._table))
+            self._dynamic_description = cursor.description
+            self.dynamic_columns = [column.name for column in cursor.description]
+
+            self.with_clipping = False
+            if "news_code" in self.dynamic_columns:
+                cursor.execute(sql.SQL("SELECT EXISTS (SELECT 1 FROM {} WHERE {} AND news_code IS NOT NULL AND news_code::text <> '');").format(
+                    self._table, self._filter), (self.start_date, self.end_date))
+                self.with_clipping = cursor.fetchone()[0]
+
+        if not self.with_clipping:
+            return True
+
+        with self._clipping.cursor() as cursor:
+            cursor.execute(sql.SQL("SELECT * FROM {} LIMIT 0;").format(sql.Identifier(CLIPPING_TABLE)))
+            self._clipping_description = cursor.description
+            self.clipping_columns = [column.name for column in cursor.description]
+
+        return True
+
+    def close(self) -> None:
+        """Fecha o cursor e devolve as conexões aos pools. Pode ser chamado mais de uma vez."""
+        if self._cursor is not None:
+            try:
+                if not self._cursor.closed and not self._handson.closed:
+                    self._cursor.close()
+            except Exception as e:
+                logger.warning(f"Erro ao fechar o cursor da exportação: {e}")
+            self._cursor = None
+
+        for connection in (self._handson, self._clipping):
+            if connection is not None:
+                connection.close()
+        self._handson = None
+        self._clipping = None
+
+    @property
+    def _kept_dynamic(self) -> List[int]:
+        dropped = DROPPED_DYNAMIC_COLUMNS if self.with_clipping else DROPPED_DYNAMIC_COLUMNS_WITHOUT_CLIPPING
+        return [i for i, col in enumerate(self.dynamic_columns) if col not in dropped]
+
+    @property
+    def columns(self) -> List[str]:
+        """Cabeçalho do arquivo: colunas do clipping seguidas das colunas da tabela dinâmica."""
+        return self.clipping_columns + [self.dynamic_columns[i] for i in self._kept_dynamic]
+
+    def _join_batch(self, batch: List[tuple]) -> Iterator[List[Any]]:
+        code_index = self.dynamic_columns.index("news_code") if "news_code" in self.dynamic_columns else None
+        keep = self._kept_dynamic
+        empty = (None,) * len(self.clipping_columns)
+
+        if code_index is None or not self.with_clipping:
+            pairs = [(row, None) for row in batch]
+        else:
+            with self._clipping.cursor() as cursor:
+                pairs = NewsCodeJoin(cursor).join(batch, lambda row: row[code_index])
+
+        for row, clipping in pairs:
+            yield list(clipping or empty) + [row[i] for i in keep]
+
+    def iter_batches(self) -> Iterator[List[List[Any]]]:
+        """Percorre as linhas combinadas, lote a lote, na ordem das colunas de `columns`."""
+        self._cursor = self._handson.cursor(name=f"export_{uuid.uuid4().hex}")
+        self._cursor.itersize = self.batch_size
+        self._cursor.execute(sql.SQL("SELECT * FROM {} WHERE {};").format(self._table, self._filter),
+                             (self.start_date, self.end_date))
+
+        total = 0
+        while True:
+            batch = self._cursor.fetchmany(self.batch_size)
+            if not batch:
+                break
+            total += len(batch)
+            yield list(self._join_batch(batch))
+        logger.info(f"Exportação de {self.schema_name}.{self.table_name}: {total} registros lidos.")
+
+    def iter_rows(self) -> Iterator[List[Any]]:
+        for batch in self.iter_batches():
+            yield from batch
+
+    def write_xlsx(self, output) -> None:
+        """
+        Escreve o arquivo Excel linha a linha no modo `constant_memory` do xlsxwriter.
+
+        Ao atingir o limite de linhas do Excel, a exportação continua em uma nova planilha.
+        """
+        workbook = xlsxwriter.Workbook(output, {
+            "constant_memory": True,
+            "remove_timezone": True,
+            "default_date_format": "yyyy-mm-dd",
+            "strings_to_urls": False,
+            "strings_to_numbers": False,
+            "strings_to_formulas": False,
+        })
+        columns = self.columns
+        worksheet: Optional[Any] = None
+        row_number = EXCEL_MAX_ROWS
+
+        try:
+            for row in self.iter_rows():
+                if row_number >= EXCEL_MAX_ROWS:
+                    worksheet = workbook.add_worksheet()
+                    worksheet.write_row(0, 0, columns)
+                    row_number = 1
+                worksheet.write_row(row_number, 0, [_excel_value(value) for value in row])
+                row_number += 1
+        finally:
+            workbook.close()
+
+    def _stream_xlsx(self) -> Iterator[bytes]:
+        # O xlsx é um zip que só fica válido quando o workbook é fechado, então os bytes
+        # saem depois da escrita; a memória continua limitada ao lote corrente.
+        with tempfile.TemporaryFile(suffix=".xlsx") as output:
+            self.write_xlsx(output)
+            output.seek(0)
+            while True:
+                chunk = output.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    def arrow_schema(self) -> pa.Schema:
+        """Schema do Parquet, tipado a partir dos tipos das colunas no PostgreSQL."""
+        descriptions = list(self._clipping_description) + [self._dynamic_description[i] for i in self._kept_dynamic]
+        return pa.schema([
+            pa.field(name, _arrow_type(column))
+            for name, column in zip(_unique_names(self.columns), descriptions)
+        ])
+
+    def _stream_parquet(self) -> Iterator[bytes]:
+        schema = self.arrow_schema()
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        try:
+            for batch in self.iter_batches():
+                columns = list(zip(*batch))
+                writer.write_table(pa.Table.from_arrays(
+                    [_arrow_array(values, field.type) for values, field in zip(columns, schema)],
+                    schema=schema,
+                ))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    def _clipping_types(self) -> List[Tuple[str, str]]:
+        with self._clipping.cursor() as cursor:
+            cursor.execute("""
+                SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+                FROM pg_attribute a
+                WHERE a.attrelid = %s::regclass
+                AND a.attnum > 0
+                AND NOT a.attisdropped
+                ORDER BY a.attnum;
+            """, (f"{CLIPPING_SCHEMA}.{CLIPPING_TABLE}",))
+            return cursor.fetchall()
+
+    def _stage_clippings(self, handson_cursor, codes: List[str]) -> None:
+        """Copia as notícias de um lote do clipping para a tabela temporária do hands-on."""
+        handson_cursor.execute(sql.SQL("TRUNCATE {};").format(sql.Identifier(CSV_STAGE_TABLE)))
+        if not codes:
+            return
+        buffer = io.BytesIO()
+        with self._clipping.cursor() as clipping_cursor:
+            clipping_cursor.copy_expert(clipping_cursor.mogrify(
+                sql.SQL("COPY (SELECT DISTINCT ON (news_code) * FROM {} WHERE news_code = ANY(%s)) TO STDOUT;").format(
+                    sql.Identifier(CLIPPING_TABLE)
+                ),
+                (list(dict.fromkeys(codes)),),
+            ).decode(), buffer)
+        buffer.seek(0)
+        handson_cursor.copy_expert(sql.SQL("COPY {} FROM STDIN;").format(sql.Identifier(CSV_STAGE_TABLE)), buffer)
+
+    def _stream_csv(self) -> Iterator[bytes]:
+        """
+        CSV serializado pelo próprio PostgreSQL com `COPY (SELECT ...) TO STDOUT`.
+
+        As notícias de cada lote são copiadas do clipping para uma tabela temporária no
+        hands-on (COPY texto nas duas pontas) e o join é feito no `COPY` final do lote.
+        A tabela temporária some no rollback feito quando a conexão volta ao pool.
+        """
+        with self._handson.cursor() as handson_cursor:
+            if self.with_clipping:
+                handson_cursor.execute(sql.SQL("CREATE TEMP TABLE {} ({});").format(
+                    sql.Identifier(CSV_STAGE_TABLE),
+                    sql.SQL(", ").join(
+                        sql.SQL("{} {}").format(sql.Identifier(name), sql.SQL(column_type))
+                        for name, column_type in self._clipping_types()
+                    ),
+                ))
+                join = sql.SQL("LEFT JOIN {} c ON c.news_code = d.news_code AND d.news_code <> ''").format(sql.Identifier(CSV_STAGE_TABLE))
+            else:
+                join = sql.SQL("")
+
+            select_columns = sql.SQL(", ").join(
+                [sql.SQL("c.{}").format(sql.Identifier(col)) for col in self.clipping_columns]
+                + [sql.SQL("d.{}").format(sql.Identifier(self.dynamic_columns[i])) for i in self._kept_dynamic]
+            )
+            sink = _ChunkSink()
+            last_id = 0
+            header = True
+
+            while True:
+                # Lotes por chave (id) para que cada COPY cubra exatamente as linhas do lote
+                handson_cursor.execute(sql.SQL("""
+                    SELECT id, {code} FROM {table}
+                    WHERE {filter} AND id > %s
+                    ORDER BY id
+                    LIMIT %s;
+                """).format(
+                    code=sql.Identifier("news_code") if "news_code" in self.dynamic_columns else sql.SQL("NULL"),
+                    table=self._table,
+                    filter=self._filter,
+                ), (self.start_date, self.end_date, last_id, self.batch_size))
+                keys = handson_cursor.fetchall()
+                if not keys:
+                    break
+                first_id, last_id = keys[0][0], keys[-1][0]
+                if self.with_clipping:
+                    self._stage_clippings(handson_cursor, [str(code) for _, code in keys if code])
+
+                copy_query = sql.SQL("""
+                    COPY (
+                        SELECT {columns}
+                        FROM {table} d
+                        {join}
+                        WHERE {filter} AND d.id BETWEEN %s AND %s
+                        ORDER BY d.id
+                    ) TO STDOUT WITH (FORMAT csv, HEADER {header});
+                """).format(
+                    columns=select_columns,
+                    table=self._table,
+                    join=join,
+                    filter=sql.SQL("d.is_deleted = FALSE AND d.date BETWEEN %s AND %s"),
+                    header=sql.SQL("TRUE" if header else "FALSE"),
+                )
+                handson_cursor.copy_expert(
+                    handson_cursor.mogrify(copy_query, (self.start_date, self.end_date, first_id, last_id)).decode(),
+                    sink,
+                )
+                header = False
+                yield sink.drain()
+
+    def stream(self, export_format: str) -> Iterator[bytes]:
+        """
+        Gera o arquivo no formato pedido em blocos, fechando a exportação no fim.
+
+        Abre a exportação (sem repetir a verificação de registros) caso `open` ainda não tenha sido chamado.
+
+        Args:
+            export_format (str): `xlsx`, `csv` ou `parquet`.
+        """
+        streams: Dict[str, Callable[[], Iterator[bytes]]] = {
+            "xlsx": self._stream_xlsx,
+            "csv": self._stream_csv,
+            "parquet": self._stream_parquet,
+        }
+        try:
+            if self._handson is None:
+                self.open(check_exists=False)
+            for chunk in streams[export_format]():
+                if chunk:
+                    yield chunk
+        except Exception as e:
+            logger.error(f"Erro ao gerar a exportação de {self.schema_name}.{self.table_name}: {e}")
+            raise
+        finally:
+            self.close()
+
+
+# Content-type e extensão de cada formato de exportação
+EXPORT_FORMATS = {
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
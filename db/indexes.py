@@ -0,0 +1,166 @@
+import hashlib
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from psycopg2 import sql
+
+from db.pool import get_handson_pool
+
+# Limite de tamanho de identificadores do PostgreSQL (NAMEDATALEN - 1)
+MAX_IDENTIFIER_LENGTH = 63
+
+
+class IndexSpec(NamedTuple):
+    """Índice do perfil padrão: sufixo do nome, colunas exigidas na tabela e definição (após `ON tabela`)."""
+    suffix: str
+    columns: Tuple[str, ...]
+    definition: str
+
+
+# Perfil de índices das tabelas dinâmicas, alinhado com as listagens:
+# - registros ativos por range de data, ordenados por `date DESC, id` (BY_DATE_DESC)
+# - lixeira ordenada por `deleted_at DESC, id` (BY_DELETED_AT_DESC)
+# - tabelas/registros de uma empresa
+# A listagem por `id` usa a PK e a por `news_code, id` usa o UNIQUE(news_code, id).
+DEFAULT_INDEXES = (
+    IndexSpec("active_date_idx", ("date", "id", "is_deleted"), "(date DESC NULLS LAST, id) WHERE is_deleted = FALSE"),
+    IndexSpec("trash_idx", ("deleted_at", "id", "is_deleted"), "(deleted_at DESC NULLS LAST, id) WHERE is_deleted = TRUE"),
+    IndexSpec("company_id_idx", ("company_id",), "(company_id)"),
+)
+
+
+def suffixed_identifier(name: str, suffix: str) -> str:
+    """
+    Identificador `<nome>_<sufixo>` (nomes de índices e partições de uma tabela).
+
+    Nomes acima de 63 caracteres seriam truncados pelo PostgreSQL (e poderiam colidir), então o
+    nome é encurtado e recebe um hash do nome completo.
+    """
+    identifier = f"{name}_{suffix}"
+    if len(identifier) <= MAX_IDENTIFIER_LENGTH:
+        return identifier
+    digest = hashlib.md5(name.encode()).hexdigest()[:8]
+    keep = MAX_IDENTIFIER_LENGTH - len(suffix) - len(digest) - 2
+    return f"{name[:keep]}_{digest}_{suffix}"
+
+
+def index_name(table_name: str, suffix: str) -> str:
+    """Nome do índice `<tabela>_<sufixo>` (ver `suffixed_identifier`)."""
+    return suffixed_identifier(table_name, suffix)
+
+
+def create_index_query(schema_name: str, table_name: str, spec: IndexSpec, concurrently: bool = False, only: bool = False, name: Optional[str] = None) -> sql.Composed:
+    """`CREATE INDEX [CONCURRENTLY] IF NOT EXISTS` de um índice do perfil (`ON ONLY` no pai de uma tabela particionada)."""
+    return sql.SQL("CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {only}{schema}.{table} {definition};").format(
+        concurrently=sql.SQL("CONCURRENTLY " if concurrently else ""),
+        name=sql.Identifier(name or index_name(table_name, spec.suffix)),
+        only=sql.SQL("ONLY " if only else ""),
+        schema=sql.Identifier(schema_name),
+        table=sql.Identifier(table_name),
+        definition=sql.SQL(spec.definition),
+    )
+
+
+def _profile_tables(cursor, schema_name: str, table_name: Optional[str]) -> Dict[str, Tuple[bool, set]]:
+    """Tabelas do schema (ou só a informada), sem as partições, com (particionada?, colunas)."""
+    cursor.execute("""
+        SELECT c.relname, c.relkind = 'p', array_agg(a.attname::text)
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+        WHERE n.nspname = %s
+        AND (%s::text IS NULL OR c.relname = %s)
+        AND c.relkind IN ('r', 'p')
+        AND NOT c.relispartition
+        GROUP BY c.relname, c.relkind
+        ORDER BY c.relname;
+    """, (schema_name, table_name, table_name))
+    return {name: (partitioned, set(columns)) for name, partitioned, columns in cursor.fetchall()}
+
+
+def _partitions(cursor, schema_name: str, table_name: str) -> List[str]:
+    cursor.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(format('%%I.%%I', %s, %s))
+        ORDER BY c.relname;
+    """, (schema_name, table_name))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _index_validity(cursor, schema_name: str, name: str) -> Optional[bool]:
+    """`indisvalid` do índice, ou None caso ele não exista."""
+    cursor.execute("""
+        SELECT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %s
+        AND c.relname = %s;
+    """, (schema_name, name))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _create_partitioned_index(cursor, schema_name: str, table_name: str, spec: IndexSpec) -> None:
+    """
+    Índice de uma tabela particionada sem bloquear escritas: o índice do pai é criado `ON ONLY`
+    (inválido), cada partição ganha o seu com `CONCURRENTLY` e é anexada; com todas anexadas o
+    índice do pai fica válido.
+    """
+    name = index_name(table_name, spec.suffix)
+    cursor.execute(create_index_query(schema_name, table_name, spec, only=True))
+    for partition in _partitions(cursor, schema_name, table_name):
+        partition_index = index_name(partition, spec.suffix)
+        cursor.execute(create_index_query(schema_name, partition, spec, concurrently=True, name=partition_index))
+        cursor.execute(sql.SQL("ALTER INDEX {}.{} ATTACH PARTITION {}.{};").format(
+            sql.Identifier(schema_name), sql.Identifier(name),
+            sql.Identifier(schema_name), sql.Identifier(partition_index),
+        ))
+
+
+def retrofit_default_indexes(schema_name: str, table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Aplica o perfil de índices padrão nas tabelas existentes com `CREATE INDEX CONCURRENTLY`.
+
+    Os índices são criados fora de transação, um por vez, sem bloquear escritas na tabela.
+    Um índice inválido deixado por uma criação concorrente interrompida é removido
+    (`DROP INDEX CONCURRENTLY`) e recriado. Nas tabelas particionadas o índice é montado
+    partição a partição (ver `_create_partitioned_index`). Índices cujas colunas a tabela não
+    tem são pulados.
+
+    Args:
+        schema_name (str): Schema das tabelas.
+        table_name (str): Apenas esta tabela; todas as do schema quando None.
+
+    Returns:
+        Uma linha por tabela e índice, com o status `created`, `rebuilt`, `exists` ou `skipped`.
+    """
+    report: List[Dict[str, Any]] = []
+    with get_handson_pool().connection() as connection:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            for table, (partitioned, columns) in _profile_tables(cursor, schema_name, table_name).items():
+                for spec in DEFAULT_INDEXES:
+                    name = index_name(table, spec.suffix)
+                    entry = {"table_name": table, "index_name": name}
+                    missing = [column for column in spec.columns if column not in columns]
+                    if missing:
+                        report.append({**entry, "status": "skipped", "missing_columns": missing})
+                        continue
+
+                    valid = _index_validity(cursor, schema_name, name)
+                    if valid:
+                        report.append({**entry, "status": "exists"})
+                        continue
+
+                    if partitioned:
+                        # O índice inválido do pai é completado anexando as partições que faltam
+                        _create_partitioned_index(cursor, schema_name, table, spec)
+                    else:
+                        if valid is False:
+                            cursor.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}.{};").format(
+                                sql.Identifier(schema_name), sql.Identifier(name)))
+                        cursor.execute(create_index_query(schema_name, table, spec, concurrently=True))
+                    report.append({**entry, "status": "rebuilt" if valid is False else "created"})
+    return report
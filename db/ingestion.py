@@ -0,0 +1,530 @@
+import hashlib
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from loguru import logger
+from psycopg2 import sql
+from psycopg2.extras import Json
+
+from db.clipping_db.get_table_news import CLIPPING_TABLE, GetNews
+from db.pool import get_handson_pool
+from db.two_phase import TwoPhaseWrite
+from db.schema_cache import schema_cache
+from db.partitions import ensure_partitions, partition_interval
+from db.rollups import rollup_store
+from db.counting import count_cache
+from config.config import CLIPPING_UPSERT_CHUNK_SIZE
+from helpers.normalization import DATE_HEADER, column_name, normalize_news_batch, parse_dates
+from helpers.utils import clean_value
+
+# Chave da restrição `unique_news` criada por `CreateInDb._create_table`
+HANDSON_CONFLICT_KEY = ("news_code", "company_id", "date")
+# Hash do conteúdo gravado, criado por `CreateInDb._create_table` (tabelas antigas podem não ter)
+ROW_HASH_COLUMN = "row_hash"
+
+
+class IngestionError(ValueError):
+    """
+    Erro de validação do payload de upload.
+
+    `index` é o primeiro item inválido (1 = primeiro item) e `errors` traz todos os itens
+    inválidos do lote, como {"row", "column", "value", "message"}.
+    """
+
+    def __init__(self, index: int, message: str, errors: Optional[List[Dict[str, Any]]] = None) -> None:
+        super().__init__(message)
+        self.index = index
+        self.errors = errors or [{"row": index, "message": message}]
+
+
+def _invalid_rows(errors: List[Dict[str, Any]]) -> IngestionError:
+    rows = sorted({error["row"] for error in errors})
+    first = errors[0]
+    logger.error(f"{len(rows)} itens inválidos no upload, o primeiro é o item {first['row']}: {first['message']}")
+    return IngestionError(
+        rows[0],
+        f"{len(rows)} itens inválidos. Item {first['row']}: {first['message']} Valor: {first['value']}",
+        errors,
+    )
+
+
+def _copy_value(value: Any) -> str:
+    """Serializa um valor no formato texto do `COPY` do PostgreSQL."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    elif isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def copy_rows(cursor, stage_name: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> None:
+    """Carrega as linhas na tabela com um único `COPY ... FROM STDIN`."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cursor.copy_expert(sql.SQL("COPY {} ({}) FROM STDIN;").format(
+        sql.Identifier(stage_name),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+    ), buffer)
+
+
+def _json_dumps(value: Any) -> str:
+    return json.dumps(value, default=str)
+
+
+def content_hash(data: Dict[str, Any]) -> str:
+    """Hash (md5) do conteúdo de um registro da tabela dinâmica, independente da ordem das colunas."""
+    content = {column: value for column, value in data.items() if column != ROW_HASH_COLUMN}
+    return hashlib.md5(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def with_content_hash(data: Dict[str, Any], table_columns: set) -> Dict[str, Any]:
+    """Acrescenta `row_hash` ao registro quando a tabela tem a coluna."""
+    if ROW_HASH_COLUMN in table_columns and data:
+        data[ROW_HASH_COLUMN] = content_hash(data)
+    return data
+
+
+def _row_key(values: Sequence[Any]) -> Tuple[Optional[str], ...]:
+    return tuple(None if value is None else str(value) for value in values)
+
+
+class NewsIngestion:
+    """
+    Ingestão em lote do upload de notícias para o clipping e para a tabela dinâmica do hands-on.
+
+    Em vez de consultar e gravar item a item, o payload inteiro é preparado em memória.
+    As notícias vão para `clippings_news` pelo upsert em blocos de `GetNews._upsert_news`
+    e a tabela dinâmica é aplicada com comandos set-based, mantendo o mesmo formato de
+    `results` retornado pelo endpoint. Os dois bancos são confirmados juntos (commit em duas fases).
+
+    Args:
+        schema_name (str): Schema da tabela dinâmica.
+        table_name (str): Nome da tabela dinâmica.
+        company_id_clipping (str): Identificador da empresa no clipping.
+        chunk_size (int): Notícias por bloco no upsert de `clippings_news`.
+    """
+
+    def __init__(self, schema_name: str, table_name: str, company_id_clipping: str, chunk_size: int = CLIPPING_UPSERT_CHUNK_SIZE) -> None:
+        self.schema_name = schema_name
+        self.table_name = table_name
+        self.company_id = clean_value(company_id_clipping, is_integer=True)
+        self.chunk_size = chunk_size
+        self.summary: Dict[str, Dict[str, int]] = {}
+
+    def _get_table(self, cursor) -> Optional[Dict[str, Any]]:
+        return schema_cache.get(cursor, self.schema_name, self.table_name)
+
+    def _prepare(self, json_data: List[dict], table_columns: set) -> List[Tuple[Any, Dict[str, Any], Dict[str, Any]]]:
+        """
+        Valida e normaliza todos os itens antes de qualquer escrita, na etapa colunar de `normalize_news_batch`.
+
+        Raises:
+            IngestionError: Caso algum item tenha data, TIER, ALCANCE ou VALORAÇÃO inválidos
+                (com todos os itens inválidos do lote em `errors`).
+        """
+        prepared, errors = normalize_news_batch(json_data, table_columns, self.company_id)
+        if errors:
+            raise _invalid_rows(errors)
+        for _, _, normalized_data in prepared:
+            with_content_hash(normalized_data, table_columns)
+        return prepared
+
+    def _upsert_query(self, columns: Sequence[str], source: sql.Composable) -> sql.Composed:
+        return sql.SQL("""
+            INSERT INTO {schema}.{table} ({columns})
+            {source}
+            ON CONFLICT ({conflict})
+            DO UPDATE SET {assignments}
+            RETURNING id, {conflict}, (xmax = 0);
+        """).format(
+            schema=sql.Identifier(self.schema_name),
+            table=sql.Identifier(self.table_name),
+            columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+            source=source,
+            conflict=sql.SQL(", ").join(map(sql.Identifier, HANDSON_CONFLICT_KEY)),
+            assignments=sql.SQL(", ").join(
+                sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(col), sql.Identifier(col)) for col in columns
+            ),
+        )
+
+    def _stored_hashes(self, cursor, keys: Iterable[Tuple[Optional[str], ...]]) -> Dict[Tuple[Optional[str], ...], Tuple[int, Optional[str]]]:
+        """`row_hash` e id dos registros já gravados com as chaves informadas (chave -> (id, hash))."""
+        cursor.execute(sql.SQL("""
+            SELECT t.id, t.{hash}, {key}
+            FROM {schema}.{table} AS t
+            JOIN jsonb_populate_recordset(NULL::{schema}.{table}, %s) AS k USING ({conflict});
+        """).format(
+            hash=sql.Identifier(ROW_HASH_COLUMN),
+            key=sql.SQL(", ").join(sql.SQL("t.{}").format(sql.Identifier(col)) for col in HANDSON_CONFLICT_KEY),
+            schema=sql.Identifier(self.schema_name),
+            table=sql.Identifier(self.table_name),
+            conflict=sql.SQL(", ").join(map(sql.Identifier, HANDSON_CONFLICT_KEY)),
+        ), (Json([dict(zip(HANDSON_CONFLICT_KEY, key)) for key in keys]),))
+        return {_row_key(row[2:]): (row[0], row[1]) for row in cursor.fetchall()}
+
+    def _merge_handson(self, cursor, prepared: List[Tuple[Any, Dict[str, Any], Dict[str, Any]]]) -> Tuple[Dict[int, int], Dict[str, int]]:
+        """
+        Aplica os registros na tabela dinâmica com um upsert set-based por conjunto de colunas.
+
+        Quando a tabela tem `row_hash`, os hashes gravados são lidos antes e os registros
+        com o mesmo conteúdo ficam de fora do upsert (não geram UPDATE, WAL nem tuplas mortas).
+
+        Returns:
+            Posição do item no payload -> id do registro na tabela dinâmica, e a quantidade de
+            registros inseridos, atualizados e inalterados.
+        """
+        # Itens com conjuntos de colunas diferentes não podem compartilhar o mesmo INSERT
+        # sem sobrescrever colunas ausentes com NULL, então são agrupados pela assinatura.
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for position, (_, _, normalized_data) in enumerate(prepared):
+            if normalized_data:
+                groups.setdefault(tuple(normalized_data.keys()), []).append(position)
+
+        ids: Dict[int, int] = {}
+        summary = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for columns, positions in groups.items():
+            missing = [col for col in HANDSON_CONFLICT_KEY if col not in columns]
+            if missing:
+                raise Exception(f"A tabela {self.schema_name}.{self.table_name} não possui as colunas {missing} da chave de upsert.")
+
+            key_index = [columns.index(col) for col in HANDSON_CONFLICT_KEY]
+
+            by_key: Dict[Tuple[Optional[str], ...], List[Any]] = {}
+            positions_by_key: Dict[Tuple[Optional[str], ...], List[int]] = {}
+            null_key_positions = []
+            for position in positions:
+                values = list(prepared[position][2].values())
+                key = _row_key([values[i] for i in key_index])
+                if None in key:
+                    # NULL nunca conflita: cada item gera seu próprio registro
+                    null_key_positions.append(position)
+                    continue
+                by_key[key] = values
+                positions_by_key.setdefault(key, []).append(position)
+
+            if by_key and ROW_HASH_COLUMN in columns:
+                hash_index = columns.index(ROW_HASH_COLUMN)
+                for key, (record_id, stored_hash) in self._stored_hashes(cursor, by_key.keys()).items():
+                    if stored_hash == by_key[key][hash_index]:
+                        del by_key[key]
+                        summary["unchanged"] += 1
+                        for position in positions_by_key[key]:
+                            ids[position] = record_id
+
+            if by_key:
+                # O lote vai como um único parâmetro jsonb, tipado pelas colunas da própria tabela.
+                # Tabela temporária não serve aqui: o PostgreSQL não prepara (2PC) transações que a usaram.
+                cursor.execute(self._upsert_query(columns, sql.SQL("SELECT {} FROM jsonb_populate_recordset(NULL::{}.{}, %s)").format(
+                    sql.SQL(", ").join(map(sql.Identifier, columns)),
+                    sql.Identifier(self.schema_name),
+                    sql.Identifier(self.table_name),
+                )), (Json([dict(zip(columns, values)) for values in by_key.values()], dumps=_json_dumps),))
+                for row in cursor.fetchall():
+                    summary["inserted" if row[-1] else "updated"] += 1
+                    for position in positions_by_key.get(_row_key(row[1:-1]), []):
+                        ids[position] = row[0]
+
+            if null_key_positions:
+                values_query = self._upsert_query(columns, sql.SQL("VALUES ({})").format(
+                    sql.SQL(", ").join(sql.Placeholder() * len(columns))
+                ))
+                for position in null_key_positions:
+                    cursor.execute(values_query, tuple(prepared[position][2].values()))
+                    ids[position] = cursor.fetchone()[0]
+                summary["inserted"] += len(null_key_positions)
+
+        return ids, summary
+
+    def _write_handson(self, cursor, prepared: List[Tuple[Any, Dict[str, Any], Dict[str, Any]]]) -> Tuple[Dict[int, int], Dict[str, int]]:
+        """Grava a tabela dinâmica (`_merge_handson`) e recalcula os dias tocados do rollup, na mesma transação."""
+        written = self._merge_handson(cursor, prepared)
+        rollup_store.refresh(cursor, self.schema_name, self.table_name, [normalized_data.get("date") for _, _, normalized_data in prepared])
+        return written
+
+    def begin(self) -> None:
+        """
+        Abre a transação do upload: lê a tabela dinâmica e inicia o commit em duas fases nos dois bancos.
+
+        Cada `write_batch` grava um lote nessa mesma transação, e nada fica visível até `commit`
+        (ou é descartado com `rollback`).
+        """
+        self._handson = get_handson_pool().getconn()
+        self._handson_lease = self._handson.lease_id
+        self._news = GetNews()
+        self._written = 0
+        self.summary = {}
+        try:
+            with self._handson.cursor() as cursor:
+                self._table = self._get_table(cursor)
+            self._handson.commit()
+            self._writer = TwoPhaseWrite("news")
+            self._writer.begin({"clipping": self._news.conn_to_database, "handson": self._handson})
+        except Exception:
+            self._release()
+            raise
+
+    def write_batch(self, json_data: List[dict]) -> List[Dict[str, Any]]:
+        """
+        Valida e grava um lote na transação aberta por `begin`, sem commit.
+
+        `clippings_news` e a tabela dinâmica são gravadas ao mesmo tempo, cada uma no seu ramo
+        da transação. As contagens de inseridos/atualizados/inalterados de cada banco são somadas
+        em `self.summary`.
+
+        Returns:
+            List[Dict[str, Any]]: Para cada item do lote, a entrada de `clippings_news` (id = news_code)
+            seguida da entrada da tabela dinâmica (id do registro), quando houver.
+
+        Raises:
+            IngestionError: Caso algum item do lote seja inválido. O lote não é gravado e a
+                transação continua aberta para o `rollback`.
+        """
+        table_columns = set(self._table["columns"]) if self._table else set()
+        prepared = self._prepare(json_data, table_columns)
+
+        interval = partition_interval(self._table)
+        if interval:
+            dates = [normalized_data.get("date") for _, _, normalized_data in prepared]
+            if self._written:
+                with self._handson.cursor() as cursor:
+                    ensure_partitions(self.schema_name, self.table_name, interval, dates, cursor=cursor)
+            else:
+                ensure_partitions(self.schema_name, self.table_name, interval, dates)
+
+        news_rows = [clipping_data for _, clipping_data, _ in prepared]
+        written = self._writer.write({
+            "clipping": lambda cursor: self._news._upsert_news(cursor, news_rows, self.chunk_size),
+            "handson": lambda cursor: self._write_handson(cursor, prepared),
+        })
+        self._written += len(prepared)
+
+        clipping_summary, (ids, handson_summary) = written["clipping"], written["handson"]
+        for target, counts in (("clipping", clipping_summary), ("handson", handson_summary)):
+            totals = self.summary.setdefault(target, {})
+            for name, value in counts.items():
+                totals[name] = totals.get(name, 0) + value
+
+        results = []
+        for position, (news_id, _, normalized_data) in enumerate(prepared):
+            results.append({"table": CLIPPING_TABLE, "id": news_id})
+            if normalized_data:
+                results.append({"table": self.table_name, "id": ids.get(position)})
+        return results
+
+    def commit(self) -> None:
+        """
+        Confirma nos dois bancos todos os lotes gravados desde `begin`.
+
+        Raises:
+            TwoPhaseCommitError: Caso algum ramo não confirme após a decisão de commit.
+        """
+        try:
+            self._writer.commit()
+        finally:
+            self._release()
+        count_cache.invalidate(self.schema_name, self.table_name)
+
+        for target, counts in self.summary.items():
+            logger.info(f"{target}: {counts['inserted']} inseridos, {counts['updated']} atualizados, {counts['unchanged']} inalterados.")
+        logger.info(f"Ingestão de {self._written} itens em {self.schema_name}.{self.table_name} concluída.")
+
+    def rollback(self) -> None:
+        """Desfaz nos dois bancos todos os lotes gravados desde `begin`."""
+        try:
+            self._writer.rollback()
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self._news.close()
+        get_handson_pool().putconn(self._handson, self._handson_lease)
+
+    def run(self, json_data: List[dict]) -> List[Dict[str, Any]]:
+        """
+        Executa a ingestão completa do payload numa transação só (`begin`, `write_batch`, `commit`).
+
+        Os dois bancos são confirmados juntos com commit em duas fases (`TwoPhaseWrite`): ou o
+        upload entra nos dois bancos, ou em nenhum.
+
+        Returns:
+            List[Dict[str, Any]]: Para cada item, a entrada de `clippings_news` (id = news_code)
+            seguida da entrada da tabela dinâmica (id do registro), quando houver.
+
+        Raises:
+            IngestionError: Caso algum item seja inválido. Nada é gravado nesse caso.
+        """
+        self.begin()
+        try:
+            results = self.write_batch(json_data)
+        except Exception:
+            self.rollback()
+            raise
+        self.commit()
+        return results
+
+
+class HandsOnIngestion:
+    """
+    Upload de dados somente para a tabela dinâmica do hands-on, sem `news_code`.
+
+    Mesma lógica que rodava dentro da rota `/file/upload-file-handson/`: cada item é inserido
+    com `ON CONFLICT DO NOTHING`, e itens em conflito voltam com `id` None.
+
+    Args:
+        schema_name (str): Schema da tabela dinâmica.
+        table_name (str): Nome da tabela dinâmica.
+        company_id (int): Identificador da empresa gravado em cada registro.
+    """
+
+    def __init__(self, schema_name: str, table_name: str, company_id: int) -> None:
+        self.schema_name = schema_name
+        self.table_name = table_name
+        self.company_id = company_id
+        self.summary: Dict[str, Dict[str, int]] = {}
+
+    def _prepare(self, json_data: List[dict], table_columns: set) -> List[Dict[str, Any]]:
+        """
+        Valida e normaliza todos os itens antes de qualquer escrita.
+
+        Raises:
+            IngestionError: Caso algum item tenha a data em formato inválido.
+        """
+        dates, invalid = parse_dates(pd.Series([item.get(DATE_HEADER) for item in json_data], dtype=object))
+        if invalid.any():
+            raise _invalid_rows([
+                {"row": row + 1, "column": DATE_HEADER, "value": json_data[row].get(DATE_HEADER), "message": "Formato de data inválido."}
+                for row in invalid.to_numpy().nonzero()[0].tolist()
+            ])
+
+        is_integer = "integer" in table_columns
+        prepared = []
+        for publication_date, item in zip(dates.tolist(), json_data):
+            normalized_data = {}
+            for key, value in item.items():
+                column = column_name(key)
+                if column in table_columns and column != "news_code":
+                    normalized_data[column] = clean_value(value, is_integer=is_integer)
+
+            if "date" in table_columns:
+                normalized_data["date"] = publication_date
+
+            normalized_data["company_id"] = self.company_id
+            prepared.append(with_content_hash(normalized_data, table_columns))
+        return prepared
+
+    def write(self, cursor, json_data: List[dict], in_transaction: bool = False) -> List[Dict[str, Any]]:
+        """
+        Grava os itens na tabela dinâmica pelo cursor informado, sem commit.
+
+        A quantidade de itens inseridos e ignorados (já existentes) fica em `self.summary`. Os
+        dias dos itens inseridos são recalculados no rollup da tabela, quando houver.
+
+        Args:
+            cursor: Cursor da transação de escrita.
+            json_data (List[dict]): Itens do upload.
+            in_transaction (bool): A transação do cursor já escreveu na tabela (lotes anteriores
+                do mesmo upload); as partições que faltarem são criadas nela (ver `ensure_partitions`).
+
+        Returns:
+            List[Dict[str, Any]]: O id gravado para cada item (None quando o item já existia).
+
+        Raises:
+            IngestionError: Caso algum item seja inválido. Nada é gravado nesse caso.
+        """
+        table = schema_cache.get(cursor, self.schema_name, self.table_name)
+        table_columns = set(table["columns"]) if table else set()
+        prepared = self._prepare(json_data, table_columns)
+
+        interval = partition_interval(table)
+        if interval:
+            ensure_partitions(self.schema_name, self.table_name, interval, [normalized_data.get("date") for normalized_data in prepared],
+                              cursor=cursor if in_transaction else None)
+
+        results = []
+        for normalized_data in prepared:
+            columns = list(normalized_data.keys())
+            cursor.execute(sql.SQL("""
+                INSERT INTO {}.{} ({})
+                VALUES ({})
+                ON CONFLICT DO NOTHING
+                RETURNING id;
+            """).format(
+                sql.Identifier(self.schema_name),
+                sql.Identifier(self.table_name),
+                sql.SQL(", ").join(map(sql.Identifier, columns)),
+                sql.SQL(", ").join(sql.Placeholder() * len(columns)),
+            ), tuple(normalized_data.values()))
+            row = cursor.fetchone()
+            results.append({"table": self.table_name, "id": row[0] if row else None})
+
+        rollup_store.refresh(cursor, self.schema_name, self.table_name, [
+            normalized_data.get("date") for normalized_data, result in zip(prepared, results) if result["id"] is not None
+        ])
+
+        inserted = sum(1 for result in results if result["id"] is not None)
+        self.summary = {"handson": {"inserted": inserted, "skipped": len(results) - inserted}}
+        return results
+
+    def begin(self) -> None:
+        """Abre a transação do upload; cada `write_batch` grava um lote nela até `commit` ou `rollback`."""
+        self._connection = get_handson_pool().getconn()
+        self._lease_id = self._connection.lease_id
+        self._written = 0
+        self.summary = {}
+
+    def write_batch(self, json_data: List[dict]) -> List[Dict[str, Any]]:
+        """
+        Grava um lote na transação aberta por `begin` (ver `write`), somando as contagens em `self.summary`.
+
+        Raises:
+            IngestionError: Caso algum item do lote seja inválido. O lote não é gravado e a
+                transação continua aberta para o `rollback`.
+        """
+        totals = self.summary.get("handson", {})
+        with self._connection.cursor() as cursor:
+            results = self.write(cursor, json_data, in_transaction=self._written > 0)
+        self._written += len(json_data)
+        self.summary = {"handson": {name: totals.get(name, 0) + value for name, value in self.summary["handson"].items()}}
+        return results
+
+    def commit(self) -> None:
+        """Confirma todos os lotes gravados desde `begin`."""
+        try:
+            self._connection.commit()
+        finally:
+            get_handson_pool().putconn(self._connection, self._lease_id)
+        count_cache.invalidate(self.schema_name, self.table_name)
+
+    def rollback(self) -> None:
+        """Desfaz todos os lotes gravados desde `begin` (a devolução ao pool faz o rollback)."""
+        get_handson_pool().putconn(self._connection, self._lease_id)
+
+    def run(self, json_data: List[dict]) -> List[Dict[str, Any]]:
+        """
+        Grava os itens na tabela dinâmica em uma única transação (`begin`, `write_batch`, `commit`).
+
+        Returns:
+            List[Dict[str, Any]]: O id gravado para cada item (None quando o item já existia).
+
+        Raises:
+            IngestionError: Caso algum item seja inválido. Nada é gravado nesse caso.
+        """
+        self.begin()
+        try:
+            results = self.write_batch(json_data)
+        except Exception:
+            self.rollback()
+            raise
+        self.commit()
+        return results
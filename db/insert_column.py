@@ -1,122 +1,87 @@
+import random
+import time
+from typing import List, Sequence
+
 from db.connection import Database
-from psycopg2 import sql
+from psycopg2 import errors, sql
+from db.schema_cache import schema_cache
+from config.config import DDL_LOCK_RETRIES, DDL_LOCK_TIMEOUT, DDL_RETRY_DELAY
+from loguru import logger
+
+# Tipo SQL de cada rota `/custom/create-column-*/`
+COLUMN_TYPES = {
+    "text": "VARCHAR(1250)",
+    "integer": "INTEGER",
+    "float": "FLOAT",
+    "date": "DATE",
+    "boolean": "BOOLEAN",
+}
+
+
+class ColumnLockTimeout(Exception):
+    """A tabela continuou bloqueada por outras transações em todas as tentativas do DDL."""
+
+
+def add_columns_query(schema_name: str, table_name: str, columns: Sequence[str], column_type: str) -> sql.Composed:
+    """Um único `ALTER TABLE` com um `ADD COLUMN IF NOT EXISTS` por coluna."""
+    return sql.SQL("ALTER TABLE {}.{} {};").format(
+        sql.Identifier(schema_name),
+        sql.Identifier(table_name),
+        sql.SQL(", ").join(
+            sql.SQL("ADD COLUMN IF NOT EXISTS {} {}").format(sql.Identifier(column), sql.SQL(COLUMN_TYPES[column_type]))
+            for column in columns
+        ),
+    )
+
 
 class InsertColumn(Database):
 
     def __init__(self) -> None:
         super().__init__()
-        self.conn = self._conn()
 
     @property
     def conn_to_database(self):
-        return self.conn
+        return self._conn()
 
-    def _insert_column_text(self, table_name: str, schema_name: str, new_column: str):
+    def _insert_columns(self, table_name: str, schema_name: str, columns: List[str], column_type: str) -> str:
         """
-        Criar coluna de texto em uma tabela específica
+        Cria várias colunas do mesmo tipo em uma tabela com um único `ALTER TABLE`, em uma transação.
+
+        O `ACCESS EXCLUSIVE` da tabela é pedido uma vez para todas as colunas. Com `lock_timeout`
+        o DDL desiste em `DDL_LOCK_TIMEOUT` segundos em vez de ficar na fila do lock (e travar
+        atrás dele as leituras que chegarem), e tenta de novo até `DDL_LOCK_RETRIES` vezes, com
+        espera crescente e aleatória entre as tentativas. Colunas que já existem são mantidas.
+
         Args:
-            table_name (str): Nome da tabela onde o novo campo vai ser inserido
+            table_name (str): Nome da tabela onde os campos vão ser inseridos.
             schema_name (str): Nome do schema onde a tabela está localizada.
-            column_name (str): Nome da coluna a ser criada
-        Exception: 
-            Faz um rollback para garantir que nenhum registro com problema seja salvo
-            Retorna um erro sobre o problema da consulta
-        Finally: 
-            Fecha conexão com o banco de dados
-        """
-        try: 
-            query = sql.SQL("ALTER TABLE {}.{} ADD COLUMN {} VARCHAR(1250);").format(sql.Identifier(schema_name), sql.Identifier(table_name), sql.Identifier(new_column))
-            result = self.execute_query(query)
-            return result
-        except Exception as e:
-            self.connection.rollback()
-            raise Exception(f"Erro ao criar coluna: {e}")
+            columns (List[str]): Nomes das colunas a serem criadas.
+            column_type (str): Chave de `COLUMN_TYPES` (`text`, `integer`, `float`, `date` ou `boolean`).
 
-    
-    def _insert_column_integer_number(self, table_name, schema_name, new_column):
-        """
-        Criar coluna de número inteiro em uma tabela específica
-        Args:
-            table_name (str): Nome da tabela onde o novo campo vai ser inserido
-            column_name (str): Nome da coluna a ser criada
-        Exception: 
-            Faz um rollback para garantir que nenhum registro com problema seja salvo
-            Retorna um erro sobre o problema da consulta
-        Finally:
-            Fecha conexão com o banco de dados
-        """
-        try:
-            query = sql.SQL("ALTER TABLE {}.{} ADD COLUMN {} INTEGER;").format(sql.Identifier(schema_name), sql.Identifier(table_name), sql.Identifier(new_column))
-            result = self.execute_query(query)
-            return result
-        except Exception as e:
-            self.connection.rollback()
-            raise Exception(f"Erro ao criar coluna: {e}")
-        finally:
-            self.connection.close()
-    
-    def _insert_column_float_number(self, table_name, schema_name, new_column):
-        """
-        Criar coluna de número float em uma tabela específica
-        Args:
-            table_name (str): Nome da tabela onde o novo campo vai ser inserido
-            column_name (str): Nome da coluna a ser criada
-        Exception: 
-            Faz um rollback para garantir que nenhum registro com problema seja salvo
-            Retorna um erro sobre o problema da consulta
-        Finally:
-            Fecha conexão com o banco de dados
+        Raises:
+            ColumnLockTimeout: Caso o lock da tabela não seja obtido em nenhuma tentativa.
         """
+        query = add_columns_query(schema_name, table_name, columns, column_type)
+        connection = self.conn_to_database
         try:
-            query = sql.SQL("ALTER TABLE {}.{} ADD COLUMN {} FLOAT;").format(sql.Identifier(schema_name), sql.Identifier(table_name), sql.Identifier(new_column))
-            result = self.execute_query(query)
-            return result
-        except Exception as e:
-            self.connection.rollback()
-            raise Exception(f"Erro ao criar coluna: {e}")
+            for attempt in range(1, DDL_LOCK_RETRIES + 1):
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT set_config('lock_timeout', %s, true);", (f"{int(DDL_LOCK_TIMEOUT * 1000)}ms",))
+                        cursor.execute(query)
+                    connection.commit()
+                    return f"{len(columns)} colunas criadas em {schema_name}.{table_name}."
+                except errors.LockNotAvailable:
+                    connection.rollback()
+                    if attempt == DDL_LOCK_RETRIES:
+                        break
+                    delay = DDL_RETRY_DELAY * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                    logger.warning(f"Lock de {schema_name}.{table_name} ocupado (tentativa {attempt}/{DDL_LOCK_RETRIES}); nova tentativa em {delay:.2f}s.")
+                    time.sleep(delay)
+            raise ColumnLockTimeout(f"A tabela {schema_name}.{table_name} está ocupada; nenhuma coluna foi criada. Tente novamente.")
+        except Exception:
+            connection.rollback()
+            raise
         finally:
-            self.connection.close()
-    
-    def _insert_column_date(self, table_name, schema_name, new_column):
-        """Criar coluna de número date em uma tabela específica
-        Args:
-            table_name (str): Nome da tabela onde o novo campo vai ser inserido
-            column_name (str): Nome da coluna a ser criada
-        Exception: 
-            Faz um rollback para garantir que nenhum registro com problema seja salvo
-            Retorna um erro sobre o problema da consulta
-        Finally:
-            Fecha conexão com o banco de dados
-        """
-        try:
-            query = sql.SQL("ALTER TABLE {}.{} ADD COLUMN {} DATE;").format(sql.Identifier(schema_name), sql.Identifier(table_name), sql.Identifier(new_column))
-            result = self.execute_query(query)
-            return result
-        except Exception as e:
-            self.connection.rollback()
-            raise Exception(f"Erro ao criar coluna: {e}")
-        finally:
-            self.connection.close()
-    
-    def _insert_column_boolean(self, table_name, schema_name, new_column):
-        """Criar coluna de boolena date em uma tabela específica
-        Args:
-            table_name (str): Nome da tabela onde o novo campo vai ser inserido
-            column_name (str): Nome da coluna a ser criada
-        Exception: 
-            Faz um rollback para garantir que nenhum registro com problema seja salvo
-            Retorna um erro sobre o problema da consulta
-        Finally:
-            Fecha conexão com o banco de dados
-        """
-        try:
-            query = sql.SQL("ALTER TABLE {}.{} ADD COLUMN {} BOOLEAN;").format(sql.Identifier(schema_name), sql.Identifier(table_name), sql.Identifier(new_column))
-            result = self.execute_query(query)
-            return result
-        except Exception as e:
-            self.connection.rollback()
-            raise Exception(f"Erro ao criar coluna: {e}")
-        finally:
-            self.connection.close()
-
-    
\ No newline at end of file
+            schema_cache.invalidate(schema_name, table_name)
+            self.close()
@@ -0,0 +1,333 @@
+import json
+import uuid
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from psycopg2.extras import Json, RealDictCursor
+
+from db.ingestion import copy_rows
+from db.pool import get_handson_pool
+from config.config import JOB_CHUNK_SIZE, JOB_MAX_ERRORS
+
+JOBS_TABLE = "ingestion_jobs"
+JOB_ROWS_TABLE = "ingestion_job_rows"
+
+JOB_STATUSES = ("receiving", "queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+_DDL = """
+    CREATE TABLE IF NOT EXISTS ingestion_jobs (
+        id UUID PRIMARY KEY,
+        kind TEXT NOT NULL,
+        params JSONB NOT NULL DEFAULT '{}'::jsonb,
+        status TEXT NOT NULL DEFAULT 'queued',
+        total_rows INTEGER NOT NULL DEFAULT 0,
+        processed_rows INTEGER NOT NULL DEFAULT 0,
+        error_count INTEGER NOT NULL DEFAULT 0,
+        errors JSONB NOT NULL DEFAULT '[]'::jsonb,
+        result JSONB,
+        message TEXT,
+        cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+        worker TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        started_at TIMESTAMPTZ,
+        heartbeat_at TIMESTAMPTZ,
+        finished_at TIMESTAMPTZ
+    );
+    CREATE INDEX IF NOT EXISTS ingestion_jobs_pending_idx
+        ON ingestion_jobs (created_at)
+        WHERE status IN ('queued', 'running');
+    CREATE TABLE IF NOT EXISTS ingestion_job_rows (
+        job_id UUID NOT NULL REFERENCES ingestion_jobs (id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        item JSONB NOT NULL,
+        PRIMARY KEY (job_id, position)
+    );
+"""
+
+_JOB_COLUMNS = """
+    id::text AS id, kind, params, status, total_rows, processed_rows, error_count, errors, result,
+    message, cancel_requested, worker, created_at, started_at, heartbeat_at, finished_at,
+    CASE
+        WHEN started_at IS NULL THEN NULL
+        ELSE round((processed_rows / GREATEST(EXTRACT(EPOCH FROM COALESCE(finished_at, now()) - started_at), 0.001))::numeric, 2)
+    END AS rows_per_second
+"""
+
+
+class JobStore:
+    """
+    Fila de jobs de ingestão guardada no banco do hands-on, sem broker externo.
+
+    `ingestion_jobs` guarda o estado e o progresso de cada job e `ingestion_job_rows` guarda os
+    itens do upload numerados a partir de 1. Como os itens são processados em ordem, `processed_rows`
+    também é o ponto de retomada de um job interrompido. Os itens são apagados quando o job termina.
+    """
+
+    def ensure_tables(self) -> None:
+        """Cria as tabelas da fila caso ainda não existam."""
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            # Evita corrida de CREATE TABLE IF NOT EXISTS entre processos que sobem juntos
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (JOBS_TABLE,))
+            cursor.execute(_DDL)
+            connection.commit()
+
+    @staticmethod
+    def _copy_items(cursor, job_id: str, first_position: int, items: List[dict]) -> None:
+        copy_rows(cursor, JOB_ROWS_TABLE, ("job_id", "position", "item"), (
+            (job_id, position, json.dumps(item, default=str))
+            for position, item in enumerate(items, start=first_position)
+        ))
+
+    def create(self, kind: str, params: Dict[str, Any], items: Iterable[dict], batch_size: int = JOB_CHUNK_SIZE) -> str:
+        """
+        Registra um job na fila com os seus itens.
+
+        Args:
+            kind (str): Tipo do job (define a rotina de ingestão usada pelo worker).
+            params (Dict[str, Any]): Parâmetros da rotina (schema, tabela, empresa...).
+            items (Iterable[dict]): Itens do upload; podem vir de um gerador e são gravados em lotes com `COPY`.
+            batch_size (int): Itens por `COPY`.
+
+        Returns:
+            str: Identificador do job.
+        """
+        job_id = str(uuid.uuid4())
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO ingestion_jobs (id, kind, params) VALUES (%s, %s, %s);",
+                (job_id, kind, Json(params)),
+            )
+
+            total = 0
+            iterator = iter(items)
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                self._copy_items(cursor, job_id, total + 1, batch)
+                total += len(batch)
+
+            cursor.execute("UPDATE ingestion_jobs SET total_rows = %s WHERE id = %s;", (total, job_id))
+            connection.commit()
+        return job_id
+
+    def open(self, kind: str, params: Dict[str, Any]) -> str:
+        """
+        Registra um job ainda recebendo itens (`receiving`): os workers só o pegam depois de `seal`.
+
+        Usado quando os itens chegam aos poucos (corpo da requisição lido em streaming). Cada lote
+        gravado renova o `heartbeat_at`; um job parado em `receiving` é encerrado por `pending`.
+
+        Returns:
+            str: Identificador do job.
+        """
+        job_id = str(uuid.uuid4())
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO ingestion_jobs (id, kind, params, status, heartbeat_at) VALUES (%s, %s, %s, 'receiving', now());",
+                (job_id, kind, Json(params)),
+            )
+            connection.commit()
+        return job_id
+
+    def append(self, job_id: str, first_position: int, items: List[dict]) -> None:
+        """
+        Grava (com `COPY`) um lote de itens de um job `receiving`, numerados a partir de `first_position`.
+
+        Raises:
+            ValueError: Caso o job não esteja mais recebendo itens (encerrado por `pending`).
+        """
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            self._copy_items(cursor, job_id, first_position, items)
+            cursor.execute("""
+                UPDATE ingestion_jobs
+                SET total_rows = total_rows + %s, heartbeat_at = now()
+                WHERE id = %s
+                AND status = 'receiving'
+                RETURNING id;
+            """, (len(items), job_id))
+            if cursor.fetchone() is None:
+                raise ValueError(f"O job {job_id} não está mais recebendo itens.")
+            connection.commit()
+
+    def seal(self, job_id: str) -> str:
+        """
+        Encerra o recebimento dos itens e libera o job para os workers.
+
+        Returns:
+            str: O novo status: `queued`, ou `cancelled` caso o cancelamento tenha sido pedido durante o recebimento.
+        """
+        job = self._one("""
+            UPDATE ingestion_jobs
+            SET status = CASE WHEN cancel_requested THEN 'cancelled' ELSE 'queued' END,
+                finished_at = CASE WHEN cancel_requested THEN now() ELSE NULL END
+            WHERE id = %s
+            AND status = 'receiving'
+            RETURNING status;
+        """, (job_id,))
+        status = job["status"] if job else "cancelled"
+        if status == "cancelled":
+            self._delete_rows(job_id)
+        return status
+
+    def _delete_rows(self, job_id: str) -> None:
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            cursor.execute("DELETE FROM ingestion_job_rows WHERE job_id = %s;", (job_id,))
+            connection.commit()
+
+    def _one(self, query: str, params: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        with get_handson_pool().connection() as connection, connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            connection.commit()
+        return dict(row) if row else None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Estado e progresso de um job, ou None caso ele não exista."""
+        return self._one(f"SELECT {_JOB_COLUMNS} FROM ingestion_jobs WHERE id = %s;", (job_id,))
+
+    def claim(self, job_id: str, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        Marca o job como `running` para este worker.
+
+        Returns:
+            O job, ou None caso ele já tenha sido pego por outro worker, cancelado ou finalizado.
+        """
+        return self._one(f"""
+            UPDATE ingestion_jobs
+            SET status = 'running',
+                worker = %s,
+                started_at = COALESCE(started_at, now()),
+                heartbeat_at = now()
+            WHERE id = %s
+            AND status = 'queued'
+            AND NOT cancel_requested
+            RETURNING {_JOB_COLUMNS};
+        """, (worker, job_id))
+
+    def rows(self, job_id: str, after_position: int, limit: int) -> List[Tuple[int, dict]]:
+        """Próximo bloco de itens do job, como pares (posição, item)."""
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT position, item
+                FROM ingestion_job_rows
+                WHERE job_id = %s
+                AND position > %s
+                ORDER BY position
+                LIMIT %s;
+            """, (job_id, after_position, limit))
+            rows = cursor.fetchall()
+            connection.commit()
+        return [(position, item) for position, item in rows]
+
+    def progress(self, job_id: str, processed_rows: int, errors: List[Dict[str, Any]], result: Dict[str, Any]) -> bool:
+        """
+        Grava o progresso depois de um bloco (e serve de heartbeat do worker).
+
+        Apenas os primeiros `JOB_MAX_ERRORS` erros são guardados em detalhe; `error_count` conta todos.
+
+        Returns:
+            bool: True caso o cancelamento do job tenha sido pedido.
+        """
+        row = self._one("""
+            UPDATE ingestion_jobs
+            SET processed_rows = %s,
+                error_count = error_count + %s,
+                errors = CASE
+                    WHEN jsonb_array_length(errors) >= %s THEN errors
+                    ELSE errors || %s
+                END,
+                result = %s,
+                heartbeat_at = now()
+            WHERE id = %s
+            RETURNING cancel_requested;
+        """, (processed_rows, len(errors), JOB_MAX_ERRORS, Json(errors[:JOB_MAX_ERRORS]), Json(result), job_id))
+        return bool(row and row["cancel_requested"])
+
+    def finish(self, job_id: str, status: str, message: Optional[str] = None) -> None:
+        """Finaliza o job e apaga os seus itens."""
+        if status not in FINISHED_STATUSES:
+            raise ValueError(f"Status final inválido: {status}")
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE ingestion_jobs
+                SET status = %s, message = %s, finished_at = now(), heartbeat_at = now()
+                WHERE id = %s;
+            """, (status, message, job_id))
+            cursor.execute("DELETE FROM ingestion_job_rows WHERE job_id = %s;", (job_id,))
+            connection.commit()
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Pede o cancelamento de um job.
+
+        Um job na fila é cancelado na hora; um job em execução para no fim do bloco atual,
+        mantendo o que já foi gravado; um job ainda recebendo itens é cancelado ao fim do recebimento.
+
+        Returns:
+            O job atualizado, ou None caso ele não exista.
+        """
+        job = self._one(f"""
+            UPDATE ingestion_jobs
+            SET cancel_requested = status NOT IN ('succeeded', 'failed', 'cancelled'),
+                status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+                finished_at = CASE WHEN status = 'queued' THEN now() ELSE finished_at END
+            WHERE id = %s
+            RETURNING {_JOB_COLUMNS};
+        """, (job_id,))
+        if job and job["status"] == "cancelled":
+            self._delete_rows(job_id)
+        return job
+
+    def heartbeat(self, worker: str) -> None:
+        """Renova o heartbeat de todos os jobs `running` deste worker (inclusive no meio de um bloco demorado)."""
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE ingestion_jobs
+                SET heartbeat_at = now()
+                WHERE status = 'running'
+                AND worker = %s;
+            """, (worker,))
+            connection.commit()
+
+    def pending(self, stale_after: float, worker: Optional[str] = None) -> List[str]:
+        """
+        Jobs a (re)enfileirar: na subida da aplicação e periodicamente, pelo `JobRunner`.
+
+        Jobs `running` sem heartbeat há mais de `stale_after` segundos (worker que caiu) voltam para a
+        fila e são retomados de `processed_rows`; na subida, `worker` devolve também os jobs que
+        este mesmo worker (host:pid) deixou `running` ao cair, sem esperar o heartbeat vencer. Jobs
+        `receiving` parados pelo mesmo tempo (processo que caiu no meio do upload) nunca seriam
+        selados: são encerrados como `failed` e os itens recebidos são apagados.
+
+        Args:
+            stale_after (float): Segundos sem heartbeat para considerar o worker morto.
+            worker (str): Worker que está subindo; nenhum job `running` dele está vivo.
+        """
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE ingestion_jobs
+                SET status = 'queued', worker = NULL
+                WHERE status = 'running'
+                AND (heartbeat_at < now() - make_interval(secs => %s) OR worker = %s);
+            """, (stale_after, worker))
+            cursor.execute("""
+                UPDATE ingestion_jobs
+                SET status = 'failed',
+                    message = 'Recebimento dos itens interrompido antes do fim do upload.',
+                    finished_at = now()
+                WHERE status = 'receiving'
+                AND COALESCE(heartbeat_at, created_at) < now() - make_interval(secs => %s)
+                RETURNING id::text;
+            """, (stale_after,))
+            abandoned = [row[0] for row in cursor.fetchall()]
+            if abandoned:
+                cursor.execute("DELETE FROM ingestion_job_rows WHERE job_id = ANY(%s::uuid[]);", (abandoned,))
+            cursor.execute("SELECT id::text FROM ingestion_jobs WHERE status = 'queued' ORDER BY created_at;")
+            job_ids = [row[0] for row in cursor.fetchall()]
+            connection.commit()
+        return job_ids
+
+
+job_store = JobStore()
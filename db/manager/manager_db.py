@@ -1,15 +1,17 @@
 from db.connection import Database
 from psycopg2 import sql
+from db.schema_cache import schema_cache
+from db.counting import count_cache
+from db.rollups import rollup_store
 
 class ManagerDb(Database):
 
     def __init__(self):
         super().__init__()
-        self.conn = self._conn()
 
     @property
     def conn_to_database(self):
-        return self.conn
+        return self._conn()
     
     def _delete_table(self, table_name: str, schema_name: str) -> str:
         """
@@ -35,12 +37,15 @@ class ManagerDb(Database):
             )
 
             result = self.execute_query(query)
+            rollup_store.drop(schema_name, table_name)
             return result
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao deletar a tabela {table_name}: {e}")
         finally:
-            self.connection.close()
+            schema_cache.invalidate(schema_name, table_name)
+            count_cache.invalidate(schema_name, table_name)
+            self.close()
 
     def _delete_schema(self, schema_name: str) -> str:
         """
@@ -64,12 +69,15 @@ class ManagerDb(Database):
             )
 
             result = self.execute_query(query)
+            rollup_store.drop(schema_name)
             return result
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao deletar o schema {schema_name}: {e}")
         finally:
-            self.connection.close()
+            schema_cache.invalidate(schema_name)
+            count_cache.invalidate(schema_name)
+            self.close()
 
 
     def _delete_column(self, table_name: str, schema_name: str, column_name: str) -> str:
@@ -100,7 +108,8 @@ class ManagerDb(Database):
             result = self.execute_query(query)
             return result
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao deletar a coluna {column_name} da tabela {table_name}: {e}")
         finally:
-            self.connection.close()
\ No newline at end of file
+            schema_cache.invalidate(schema_name, table_name)
+            self.close()
\ No newline at end of file
@@ -0,0 +1,211 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from psycopg2 import sql
+
+
+def quote_ident(name: str) -> str:
+    """Cita um identificador do Postgres (mesma regra do `sql.Identifier`)."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class InvalidCursorError(ValueError):
+    """Token de paginação malformado ou gerado para outra ordenação."""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"t": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "t" in value:
+            return datetime.fromisoformat(value["t"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "n" in value:
+            return Decimal(value["n"])
+    return value
+
+
+def encode_cursor(signature: str, values: Sequence[Any]) -> str:
+    """Gera o token opaco com os valores das chaves de ordenação do último registro da página."""
+    payload = json.dumps({"o": signature, "v": [_encode_value(value) for value in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """
+    Lê um token gerado por `encode_cursor`.
+
+    Raises:
+        InvalidCursorError: Caso o token não seja válido.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if not isinstance(payload, dict) or not isinstance(payload.get("o"), str) or not isinstance(payload.get("v"), list):
+            raise ValueError("estrutura inesperada")
+        return {"o": payload["o"], "v": [_decode_value(value) for value in payload["v"]]}
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Cursor de paginação inválido: {e}")
+
+
+class Keyset:
+    """
+    Paginação por chave (keyset) para uma ordenação fixa.
+
+    Em vez de `OFFSET`, a página seguinte começa depois dos valores de ordenação do último
+    registro da página anterior, então o custo de cada página não depende da profundidade.
+    As colunas são ordenadas com `NULLS LAST` e a última coluna deve ser única e não nula (`id`).
+
+    A condição começa por um limite simples na primeira coluna (`date <= %s AND (...)`), que o
+    índice da ordenação usa como ponto de partida. Esse limite deixa de fora os registros com a
+    primeira coluna nula (o fim da ordenação), que formam uma segunda fase da paginação
+    (`date IS NULL AND id > %s`). `page_text` monta a página a partir de um cursor com valor não
+    nulo como a continuação dos não nulos seguida do início da fase dos nulos (`UNION ALL` de duas
+    buscas no índice), então uma página só vem incompleta quando a listagem acabou.
+
+    Args:
+        *order: Pares (coluna, decrescente).
+    """
+
+    def __init__(self, *order: Tuple[str, bool]) -> None:
+        self.order = order
+        self.signature = ",".join(f"{column}:{'desc' if descending else 'asc'}" for column, descending in order)
+
+    def _identifier(self, column: str, alias: Optional[str]) -> str:
+        return f"{quote_ident(alias)}.{quote_ident(column)}" if alias else quote_ident(column)
+
+    def order_by_text(self, alias: Optional[str] = None) -> str:
+        """Cláusula `ORDER BY` (sem a palavra-chave) da ordenação, como texto."""
+        return ", ".join(
+            f"{self._identifier(column, alias)} {'DESC' if descending else 'ASC'} NULLS LAST"
+            for column, descending in self.order
+        )
+
+    def order_by(self, alias: Optional[str] = None) -> sql.SQL:
+        """Cláusula `ORDER BY` (sem a palavra-chave) da ordenação."""
+        return sql.SQL(self.order_by_text(alias))
+
+    def after_text(self, token: Optional[str], alias: Optional[str] = None) -> Tuple[str, List[Any]]:
+        """
+        Condição `WHERE` que seleciona os registros depois do token (ou `TRUE` sem token), como
+        texto com placeholders `%s`.
+
+        Raises:
+            InvalidCursorError: Caso o token seja inválido ou de outra ordenação.
+        """
+        if not token:
+            return "TRUE", []
+
+        payload = decode_cursor(token)
+        if payload["o"] != self.signature or len(payload["v"]) != len(self.order):
+            raise InvalidCursorError("Cursor de paginação gerado para outra listagem.")
+
+        return self._condition(0, payload["v"], alias)
+
+    def after(self, token: Optional[str], alias: Optional[str] = None) -> Tuple[sql.SQL, List[Any]]:
+        """
+        Condição `WHERE` que seleciona os registros depois do token (ou `TRUE` sem token).
+
+        Raises:
+            InvalidCursorError: Caso o token seja inválido ou de outra ordenação.
+        """
+        condition, params = self.after_text(token, alias)
+        return sql.SQL(condition), params
+
+    def _condition(self, index: int, values: List[Any], alias: Optional[str]) -> Tuple[str, List[Any]]:
+        column, descending = self.order[index]
+        identifier = self._identifier(column, alias)
+        value = values[index]
+        op = "<" if descending else ">"
+        last = index == len(self.order) - 1
+
+        if last:
+            if value is None:
+                # Início da fase dos nulos (cursor de `_null_tail_cursor`): sem limite no id
+                return "TRUE", []
+            return f"{identifier} {op} %s", [value]
+
+        rest, rest_params = self._condition(index + 1, values, alias)
+        if value is None:
+            # NULLS LAST: depois de um NULL só vêm outros NULL
+            return f"({identifier} IS NULL AND {rest})", rest_params
+
+        return f"({identifier} {op}= %s AND ({identifier} {op} %s OR ({identifier} = %s AND {rest})))", [value, value, value] + rest_params
+
+    def _null_tail_cursor(self, token: Optional[str]) -> Optional[str]:
+        """
+        Cursor do início da fase dos nulos quando `token` ainda está nos valores não nulos da
+        primeira coluna; None quando não há fase seguinte.
+        """
+        if not token or len(self.order) < 2:
+            return None
+        values = decode_cursor(token)["v"]
+        if values[0] is None:
+            return None
+        return encode_cursor(self.signature, [None] * len(self.order))
+
+    def page_text(self, source: str, where: str, params: Sequence[Any], token: Optional[str], limit: int, offset: int, nulls: bool = True) -> Tuple[str, List[Any]]:
+        """
+        Consulta de uma página (`SELECT * FROM source WHERE where ...`), como texto com placeholders `%s`.
+
+        Args:
+            source (str): Tabela, já citada (`quote_ident`).
+            where (str): Filtro da listagem, com placeholders `%s`.
+            params (Sequence): Parâmetros de `where`.
+            token (str): Cursor da página anterior.
+            limit (int): Tamanho da página.
+            offset (int): Deslocamento (ignorado pelo chamador quando há cursor).
+            nulls (bool): O filtro pode trazer registros com a primeira coluna nula. Falso quando
+                ele já os exclui (ex.: `date BETWEEN`), e a página nunca consulta a fase dos nulos.
+
+        Returns:
+            A consulta e os seus parâmetros.
+
+        Raises:
+            InvalidCursorError: Caso o token seja inválido ou de outra ordenação.
+        """
+        def select(condition: str) -> str:
+            return f"SELECT * FROM {source} WHERE {where} AND {condition} ORDER BY {self.order_by_text()}"
+
+        after, after_params = self.after_text(token)
+        tail = self._null_tail_cursor(token) if nulls else None
+        if tail is None:
+            return f"{select(after)} LIMIT %s OFFSET %s", [*params, *after_params, limit, offset]
+
+        # Resto dos valores não nulos + começo dos nulos, cada parte com a sua busca no índice
+        tail_condition, tail_params = self.after_text(tail)
+        query = f"""
+            SELECT * FROM (
+                SELECT * FROM ({select(after)} LIMIT %s) AS head
+                UNION ALL
+                SELECT * FROM ({select(tail_condition)} LIMIT %s) AS tail
+            ) AS page
+            ORDER BY {self.order_by_text()}
+            LIMIT %s
+        """
+        return query, [*params, *after_params, limit, *params, *tail_params, limit, limit]
+
+    def next_cursor(self, rows: Sequence[Dict[str, Any]], limit: int) -> Optional[str]:
+        """Token da próxima página, ou None quando a página veio incompleta (última página)."""
+        if not rows or len(rows) < limit:
+            return None
+        last = rows[-1]
+        return encode_cursor(self.signature, [last[column] for column, _ in self.order])
+
+
+# Ordenações usadas pelas listagens
+BY_ID = Keyset(("id", False))
+BY_DATE_DESC = Keyset(("date", True), ("id", False))
+BY_DELETED_AT_DESC = Keyset(("deleted_at", True), ("id", False))
+BY_NEWS_CODE = Keyset(("news_code", False), ("id", False))
@@ -0,0 +1,143 @@
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from loguru import logger
+from psycopg2 import sql
+
+from db.indexes import suffixed_identifier
+from db.pool import get_handson_pool
+
+# Intervalos das partições por `date` aceitos em `/custom/create-table/`
+PARTITION_INTERVALS = ("month", "year")
+# O intervalo fica no comentário da tabela pai (`COMMENT ON TABLE ... IS 'partition_interval=month'`)
+PARTITION_COMMENT_PREFIX = "partition_interval="
+
+# Filtro das consultas ao information_schema que listam as tabelas dinâmicas: as partições
+# também aparecem lá, mas são detalhe de armazenamento da tabela pai
+NOT_A_PARTITION = """NOT EXISTS (
+    SELECT 1
+    FROM pg_class pc
+    JOIN pg_namespace pn ON pn.oid = pc.relnamespace
+    WHERE pn.nspname = table_schema
+    AND pc.relname = table_name
+    AND pc.relispartition
+)"""
+
+
+def _as_date(value: Union[str, date]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def partition_start(day: Union[str, date], interval: str) -> date:
+    """Início da partição que contém a data."""
+    day = _as_date(day)
+    return day.replace(month=1, day=1) if interval == "year" else day.replace(day=1)
+
+
+def partition_end(start: date, interval: str) -> date:
+    """Fim (exclusivo) da partição que começa em `start`."""
+    if interval == "year":
+        return start.replace(year=start.year + 1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(table_name: str, start: date, interval: str) -> str:
+    """Nome da partição: `<tabela>_p2024_01` (mensal) ou `<tabela>_p2024` (anual)."""
+    suffix = f"p{start:%Y}" if interval == "year" else f"p{start:%Y_%m}"
+    return suffixed_identifier(table_name, suffix)
+
+
+def create_partition_query(schema_name: str, table_name: str, start: date, interval: str) -> sql.Composed:
+    """`CREATE TABLE IF NOT EXISTS ... PARTITION OF` da partição que começa em `start`."""
+    return sql.SQL("CREATE TABLE IF NOT EXISTS {schema}.{partition} PARTITION OF {schema}.{table} FOR VALUES FROM ({start}) TO ({end});").format(
+        schema=sql.Identifier(schema_name),
+        partition=sql.Identifier(partition_name(table_name, start, interval)),
+        table=sql.Identifier(table_name),
+        start=sql.Literal(start.isoformat()),
+        end=sql.Literal(partition_end(start, interval).isoformat()),
+    )
+
+
+def partition_comment(interval: str) -> str:
+    return f"{PARTITION_COMMENT_PREFIX}{interval}"
+
+
+def partition_interval(table: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Intervalo das partições de uma tabela a partir dos seus metadados no `schema_cache`.
+
+    Returns:
+        `month` ou `year`, ou None caso a tabela não seja particionada por `date`.
+    """
+    if not table or not table.get("partitioned"):
+        return None
+    comment = table.get("comment") or ""
+    if comment.startswith(PARTITION_COMMENT_PREFIX):
+        interval = comment[len(PARTITION_COMMENT_PREFIX):].strip()
+        if interval in PARTITION_INTERVALS:
+            return interval
+    return None
+
+
+def _create_missing(cursor, schema_name: str, table_name: str, interval: str, names: Dict[str, date]) -> List[str]:
+    cursor.execute("""
+        SELECT name
+        FROM unnest(%s::text[]) AS name
+        WHERE to_regclass(format('%%I.%%I', %s::text, name)) IS NULL;
+    """, (list(names), schema_name))
+    missing = [row[0] for row in cursor.fetchall()]
+    if not missing:
+        return []
+
+    # Uploads simultâneos na mesma tabela criam as partições um de cada vez
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (f"{schema_name}.{table_name}:partitions",))
+    for name in missing:
+        cursor.execute(create_partition_query(schema_name, table_name, names[name], interval))
+    return missing
+
+
+def ensure_partitions(schema_name: str, table_name: str, interval: str, dates: Iterable[Any], cursor=None) -> List[str]:
+    """
+    Cria as partições que faltam para as datas de um upload.
+
+    Roda na sua própria conexão, antes da transação de escrita do upload: o DDL não fica preso
+    ao commit em duas fases e uma partição criada continua válida mesmo que o upload falhe.
+    A verificação é uma consulta só; o lock (advisory, por tabela) e o DDL só acontecem quando
+    falta alguma partição.
+
+    Quando a transação do upload já escreveu na tabela (upload em lotes numa transação só), o
+    DDL em outra conexão esperaria pelo lock que a própria transação segura; nesse caso o cursor
+    dela é informado e as partições são criadas dentro dela, sem commit.
+
+    Args:
+        schema_name (str): Schema da tabela.
+        table_name (str): Tabela pai, particionada por `date`.
+        interval (str): `month` ou `year`.
+        dates (Iterable): Datas do upload ('YYYY-MM-DD' ou `date`); vazias são ignoradas.
+        cursor: Cursor da transação do upload, quando ela já escreveu na tabela.
+
+    Returns:
+        Os nomes das partições criadas.
+    """
+    starts = {partition_start(day, interval) for day in dates if day}
+    if not starts:
+        return []
+    names = {partition_name(table_name, start, interval): start for start in sorted(starts)}
+
+    if cursor is not None:
+        missing = _create_missing(cursor, schema_name, table_name, interval, names)
+    else:
+        with get_handson_pool().connection() as connection:
+            with connection.cursor() as own_cursor:
+                missing = _create_missing(own_cursor, schema_name, table_name, interval, names)
+            connection.commit()
+
+    if missing:
+        logger.info(f"Partições criadas em {schema_name}.{table_name}: {', '.join(missing)}")
+    return missing
@@ -0,0 +1,253 @@
+import itertools
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import psycopg2
+from psycopg2 import extensions
+from loguru import logger
+
+from config.config import DB_HOST_CLIPPING, DB_NAME_CLIPPING, DB_OPTIONS_CLIPPING, DB_PASSWORD_CLIPPING, DB_USER_CLIPPING
+from config.config import DB_HOST_HANDSON, DB_NAME_HANDSON, DB_PASSWORD_HANDSON, DB_USER_HANDSON
+from config.config import DB_POOL_HEALTH_CHECK, DB_POOL_MAX_SIZE, DB_POOL_MIN_SIZE, DB_POOL_TIMEOUT
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera configurado."""
+
+
+class PooledConnection(extensions.connection):
+    """
+    Conexão psycopg2 que pertence a um pool.
+
+    `close()` devolve a conexão ao pool em vez de encerrar a sessão, então o código
+    que já fecha a conexão no `finally` continua funcionando sem alterações.
+
+    O mesmo objeto é emprestado a vários chamadores ao longo do tempo; `lease_id` identifica o
+    empréstimo atual. Quem guarda a conexão entre chamadas deve devolvê-la com
+    `putconn(conn, lease_id)`, que não faz nada se aquele empréstimo já terminou.
+    """
+
+    _pool: Optional["ConnectionPool"] = None
+    lease_id: int = 0
+
+    def close(self) -> None:
+        if self._pool is not None and not self.closed:
+            self._pool.putconn(self)
+        else:
+            super().close()
+
+    def _close_physical(self) -> None:
+        """Encerra de fato a sessão com o banco."""
+        if not self.closed:
+            super().close()
+
+
+class ConnectionPool:
+    """
+    Pool de conexões thread-safe para um banco PostgreSQL.
+
+    Args:
+        name (str): Nome usado nos logs.
+        min_size (int): Conexões abertas na criação do pool e mantidas ociosas.
+        max_size (int): Número máximo de conexões simultâneas.
+        timeout (float): Segundos de espera por uma conexão livre.
+        health_check (bool): Executa `SELECT 1` antes de entregar uma conexão ociosa.
+        **connect_kwargs: Parâmetros repassados para `psycopg2.connect`.
+    """
+
+    def __init__(self, name: str, min_size: int, max_size: int, timeout: float, health_check: bool, **connect_kwargs) -> None:
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"Tamanho de pool inválido: min={min_size}, max={max_size}")
+
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check = health_check
+        self._connect_kwargs = {k: v for k, v in connect_kwargs.items() if v is not None}
+
+        self._idle: List[PooledConnection] = []
+        # Conexões emprestadas ficam em um WeakSet: se algum chamador esquecer de
+        # devolver a conexão, o coletor de lixo a fecha e a vaga volta ao pool.
+        self._in_use: "weakref.WeakSet[PooledConnection]" = weakref.WeakSet()
+        self._opening = 0
+        self._lease_ids = itertools.count(1)
+        self._cond = threading.Condition(threading.Lock())
+
+        for _ in range(min_size):
+            self._idle.append(self._connect())
+
+    def _connect(self) -> PooledConnection:
+        conn = psycopg2.connect(connection_factory=PooledConnection, **self._connect_kwargs)
+        conn._pool = self
+        return conn
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        if conn.closed:
+            return False
+        if not self.health_check:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self) -> PooledConnection:
+        """
+        Empresta uma conexão do pool, aguardando até `timeout` segundos caso todas estejam em uso.
+
+        Raises:
+            PoolTimeoutError: Caso nenhuma conexão fique livre a tempo.
+        """
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            with self._cond:
+                while not self._idle and len(self._in_use) + self._opening >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Pool '{self.name}' esgotado: {self.max_size} conexões em uso há mais de {self.timeout}s."
+                        )
+                    # Acorda periodicamente para perceber vagas liberadas pelo coletor de lixo
+                    self._cond.wait(min(remaining, 1.0))
+
+                conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    self._opening += 1
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                finally:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+            elif not self._is_healthy(conn):
+                logger.warning(f"Pool '{self.name}': conexão inválida descartada.")
+                conn._close_physical()
+                continue
+
+            with self._cond:
+                conn.lease_id = next(self._lease_ids)
+                self._in_use.add(conn)
+            return conn
+
+    def putconn(self, conn: PooledConnection, lease_id: Optional[int] = None) -> None:
+        """
+        Devolve uma conexão ao pool, desfazendo qualquer transação pendente.
+
+        Args:
+            conn (PooledConnection): Conexão emprestada por `getconn`.
+            lease_id (int): Empréstimo sendo devolvido. Quando informado e a conexão já foi
+                devolvida (e talvez emprestada a outro chamador), nada é feito.
+        """
+        with self._cond:
+            if conn not in self._in_use or (lease_id is not None and conn.lease_id != lease_id):
+                return
+            self._in_use.discard(conn)
+            conn.lease_id = 0
+
+        keep = not conn.closed
+        if keep:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error:
+                keep = False
+
+        with self._cond:
+            if keep and len(self._idle) < self.max_size:
+                self._idle.append(conn)
+            else:
+                conn._close_physical()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """
+        Empresta uma conexão durante o bloco `with`.
+
+        Faz rollback caso o bloco lance uma exceção e sempre devolve a conexão ao pool.
+        """
+        conn = self.getconn()
+        lease_id = conn.lease_id
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed and conn.lease_id == lease_id:
+                conn.rollback()
+            raise
+        finally:
+            self.putconn(conn, lease_id)
+
+    def closeall(self) -> None:
+        """Encerra todas as conexões ociosas do pool."""
+        with self._cond:
+            while self._idle:
+                self._idle.pop()._close_physical()
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna a ocupação atual do pool."""
+        with self._cond:
+            return {"idle": len(self._idle), "in_use": len(self._in_use), "max_size": self.max_size}
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(name: str, **connect_kwargs) -> ConnectionPool:
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = ConnectionPool(
+                    name,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    health_check=DB_POOL_HEALTH_CHECK,
+                    **connect_kwargs,
+                )
+                _pools[name] = pool
+    return pool
+
+
+def get_handson_pool() -> ConnectionPool:
+    """Pool compartilhado pelo processo para o banco do hands-on."""
+    return _get_pool(
+        "handson",
+        dbname=DB_NAME_HANDSON,
+        user=DB_USER_HANDSON,
+        password=DB_PASSWORD_HANDSON,
+        host=DB_HOST_HANDSON,
+    )
+
+
+def get_clipping_pool() -> ConnectionPool:
+    """Pool compartilhado pelo processo para o banco do clipping."""
+    return _get_pool(
+        "clipping",
+        dbname=DB_NAME_CLIPPING,
+        user=DB_USER_CLIPPING,
+        password=DB_PASSWORD_CLIPPING,
+        host=DB_HOST_CLIPPING,
+        options=DB_OPTIONS_CLIPPING,
+    )
+
+
+def close_pools() -> None:
+    """Fecha as conexões ociosas de todos os pools (usado no shutdown da aplicação)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
@@ -1,64 +1,126 @@
 from psycopg2 import sql
-from db.connection import Database
-from typing import Any, Dict
+from db.connection import AsyncDatabase, Database
+from db.async_pool import to_asyncpg
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from db.clipping_db.get_table_news import GetNews
+from db.schema_cache import schema_cache
+from db.pagination import BY_DATE_DESC, BY_DELETED_AT_DESC, BY_ID, Keyset, quote_ident
+from db.counting import count_cache, count_rows, count_rows_async
+from db.row_formats import rows_payload, statement_columns
+from db.rollups import rollup_store
 from loguru import logger
 
 class EditRegisters(Database):
 
     def __init__(self):
         super().__init__()
-        self.conn = self._conn()
 
     @property
     def conn_to_database(self):
-        return self.conn
+        return self._conn()
 
-    def _mark_as_deleted_by_id(self, table_name: str, schema_name: str, record_id: int):
+    def _set_deleted(self, table_name: str, schema_name: str, is_deleted: bool, record_ids: Optional[List[int]] = None, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, int]:
         """
-        Marca um registro como is_deleted = TRUE e desativa a notícia (is_active = FALSE).
-        
+        Exclui (soft delete) ou restaura em massa os registros de uma lista de ids ou de um range de data.
+
+        Ver `_update_deleted`.
+
+        Returns:
+            Quantidade de registros alterados (`updated`), de notícias alteradas no clipping
+            (`clipping_updated`) e se o clipping foi atualizado (`clipping`: 'ok' ou 'failed').
+        """
+        rows, clipping_updated = self._update_deleted(table_name, schema_name, is_deleted, record_ids, start_date, end_date)
+        return {"updated": len(rows), "clipping_updated": clipping_updated, "clipping": "ok" if clipping_updated is not None else "failed"}
+
+    def _update_deleted(self, table_name: str, schema_name: str, is_deleted: bool, record_ids: Optional[List[int]] = None, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Tuple[List[Tuple[Any, Any]], int]:
+        """
+        Exclui (soft delete) ou restaura em massa os registros de uma lista de ids ou de um range de data.
+
+        A tabela dinâmica é alterada em um único `UPDATE ... RETURNING news_code`, só nos registros
+        que mudam de estado, e `deleted_at` recebe a data da exclusão (ou volta a NULL na
+        restauração) nas tabelas que têm a coluna. Os dias alterados são recalculados no rollup na
+        mesma transação. Depois do commit, as notícias no clipping são ativadas/desativadas com um
+        UPDATE por lote de `news_code` (`GetNews._set_clipping_news_active`).
+
         Args:
-            table_name (str): Nome da tabela a ser consultada.
+            table_name (str): Nome da tabela.
             schema_name (str): Nome do schema no banco.
-            record_id (int): Identificador do registro.
+            is_deleted (bool): True para excluir, False para restaurar.
+            record_ids (List[int]): Ids dos registros.
+            start_date (str): Data inicial (YYYY-MM-DD), usada quando `record_ids` não é informado.
+            end_date (str): Data final (YYYY-MM-DD).
 
-        Exception:
-            Faz um rollback para garantir que nenhum registro com problema seja salvo.
-            Retorna um erro sobre o problema da consulta.
+        Returns:
+            As linhas (news_code, date) dos registros alterados e a quantidade de notícias alteradas
+            no clipping. A quantidade é None quando a atualização do clipping falhou depois do
+            commit da tabela dinâmica (o erro vai para o log).
+
+        Raises:
+            ValueError: Caso não sejam informados nem os ids nem o range de data.
+            Exception: Caso ocorra um erro na atualização; nada é gravado na tabela dinâmica nesse caso.
         """
         try:
-            query = sql.SQL("""
-                UPDATE {}.{}
-                SET is_deleted = TRUE
-                WHERE id = %s
-                RETURNING news_code;
-            """).format(
-                sql.Identifier(schema_name),
-                sql.Identifier(table_name)
-            )
-            
-            with self.conn_to_database.cursor() as cursor:
-                cursor.execute(query, (record_id,))
-                result = cursor.fetchone()
-                self.connection.commit()
+            if record_ids is not None:
+                where, params = sql.SQL("id = ANY(%s::int[])"), [list(record_ids)]
+            elif start_date and end_date:
+                where, params = sql.SQL("date BETWEEN %s AND %s"), [start_date, end_date]
+            else:
+                raise ValueError("Informe os ids dos registros ou o range de data.")
 
-                if result:
-                    news_code = result[0]
-                    logger.error(news_code)  # Obtém o news_code do registro
-                    GetNews()._deactivate_clipping_news(news_code)  # 🔹 Chama a função para desativar a notícia
+            with self.conn_to_database.cursor() as cursor:
+                # Tabelas antigas podem não ter `deleted_at`
+                has_deleted_at = "deleted_at" in schema_cache.columns(cursor, schema_name, table_name)
+                query = sql.SQL("""
+                    UPDATE {}.{}
+                    SET is_deleted = %s{}
+                    WHERE {}
+                    AND is_deleted IS DISTINCT FROM %s
+                    RETURNING news_code, date;
+                """).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(table_name),
+                    sql.SQL(", deleted_at = {}").format(sql.SQL("now()" if is_deleted else "NULL")) if has_deleted_at else sql.SQL(""),
+                    where,
+                )
+                cursor.execute(query, [is_deleted, *params, is_deleted])
+                rows = cursor.fetchall()
+                rollup_store.refresh(cursor, schema_name, table_name, [row[1] for row in rows])
+            self.connection.commit()
+            count_cache.invalidate(schema_name, table_name)
 
-            return result
+        except ValueError:
+            raise
 
         except Exception as e:
-            self.connection.rollback()
-            raise Exception(f"Erro ao marcar registro {record_id} como deletado: {e}")
+            self.rollback()
+            raise Exception(f"Erro ao {'excluir' if is_deleted else 'restaurar'} registros de {schema_name}.{table_name}: {e}")
 
         finally:
-            if self.connection:
-                self.connection.close()
-        
-    def _get_deleted_records(self, table_name: str, schema_name: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+            self.close()
+
+        news_codes = list(dict.fromkeys(row[0] for row in rows if row[0]))
+        try:
+            clipping_updated = GetNews()._set_clipping_news_active(news_codes, not is_deleted) if news_codes else 0
+        except Exception as e:
+            # A tabela dinâmica já foi confirmada: o chamador precisa saber que ela mudou
+            logger.error(f"{schema_name}.{table_name}: {len(rows)} registros alterados, mas o clipping não foi atualizado: {e}")
+            return rows, None
+        logger.info(f"{schema_name}.{table_name}: {len(rows)} registros {'excluídos' if is_deleted else 'restaurados'}, {clipping_updated} notícias alteradas no clipping.")
+        return rows, clipping_updated
+
+    def _mark_as_deleted_by_id(self, table_name: str, schema_name: str, record_id: int):
+        """
+        Marca um registro como is_deleted = TRUE e desativa a notícia (is_active = FALSE).
+
+        Atalho de `_update_deleted` para um único id.
+
+        Returns:
+            A linha (news_code, date) do registro, ou None caso ele não exista ou já estivesse excluído.
+        """
+        rows, _ = self._update_deleted(table_name, schema_name, True, record_ids=[record_id])
+        return rows[0] if rows else None
+
+    def _get_deleted_records(self, table_name: str, schema_name: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None, count_strategy: str = "exact") -> Dict[str, Any]:
         """
         Filtra os registros que estão com o is_deleted marcado como True, com suporte a paginação.
 
@@ -67,6 +129,8 @@ class EditRegisters(Database):
             schema_name (str): Nome do schema da tabela.
             limit (int): Número máximo de registros retornados por página.
             offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+            cursor_token (str): Token `next_cursor` da página anterior; quando informado, `offset` é ignorado.
+            count_strategy (str): Estratégia do total (`exact`, `estimated` ou `none`).
 
         Returns:
             Um dicionário contendo os registros deletados paginados e informações de paginação.
@@ -75,28 +139,17 @@ class EditRegisters(Database):
             Exception: Caso ocorra um erro na consulta ao banco de dados.
         """
         try:
-            # Query para buscar registros deletados com paginação
-            query = f"""
-                SELECT * FROM {schema_name}.{table_name}
-                WHERE is_deleted = TRUE
-                ORDER BY deleted_at DESC
-                LIMIT %s OFFSET %s;
-            """
-
-            # Query para contar o total de registros deletados
-            count_query = f"""
-                SELECT COUNT(*)
-                FROM {schema_name}.{table_name}
-                WHERE is_deleted = TRUE;
-            """
+            # Query para buscar registros deletados com paginação (por offset ou por cursor)
+            query, params = BY_DELETED_AT_DESC.page_text(
+                f"{quote_ident(schema_name)}.{quote_ident(table_name)}", "is_deleted = TRUE", [],
+                cursor_token, limit, 0 if cursor_token else offset,
+            )
 
             with self.conn_to_database.cursor() as cursor:
-                # Executa a query de contagem total
-                cursor.execute(count_query)
-                total_records = cursor.fetchone()[0]
+                total_records = count_rows(cursor, schema_name, table_name, sql.SQL("is_deleted = TRUE"), [], count_strategy)
 
                 # Executa a query paginada
-                cursor.execute(query, (limit, offset))
+                cursor.execute(sql.SQL(query), params)
                 rows = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
 
@@ -105,20 +158,21 @@ class EditRegisters(Database):
 
             return {
                 "total_records": total_records,
+                "count_strategy": count_strategy,
                 "page_size": limit,
-                "current_offset": offset,
+                "current_offset": None if cursor_token else offset,
+                "next_cursor": BY_DELETED_AT_DESC.next_cursor(result, limit),
                 "trash": result
             }
 
         except Exception as e:
-            self.conn_to_database.rollback()
+            self.rollback()
             raise Exception(f"Erro ao consultar registros marcados como is_deleted: {e}")
 
         finally:
-            if self.conn_to_database:
-                self.conn_to_database.close()
+            self.close()
 
-    def _get_active_record(self, table_name: str, schema_name: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    def _get_active_record(self, table_name: str, schema_name: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None, count_strategy: str = "exact") -> Dict[str, Any]:
         """
         Filtra os registros que estão com is_deleted marcado como False, com suporte a paginação.
 
@@ -127,6 +181,8 @@ class EditRegisters(Database):
             schema_name (str): Nome do schema da tabela.
             limit (int): Número máximo de registros retornados por página.
             offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+            cursor_token (str): Token `next_cursor` da página anterior; quando informado, `offset` é ignorado.
+            count_strategy (str): Estratégia do total (`exact`, `estimated` ou `none`).
 
         Returns:
             Um dicionário contendo os registros ativos paginados e informações de paginação.
@@ -135,28 +191,21 @@ class EditRegisters(Database):
             Exception: Caso ocorra um erro na consulta ao banco de dados.
         """
         try:
-            # Query para buscar registros ativos com paginação
-            query = f"""
-                SELECT * FROM {schema_name}.{table_name}
+            # Query para buscar registros ativos com paginação (por offset ou por cursor)
+            after, after_params = BY_ID.after(cursor_token)
+            query = sql.SQL("""
+                SELECT * FROM {}.{}
                 WHERE is_deleted = FALSE
-                ORDER BY id ASC
+                AND {}
+                ORDER BY {}
                 LIMIT %s OFFSET %s;
-            """
-
-            # Query para contar o total de registros ativos
-            count_query = f"""
-                SELECT COUNT(*)
-                FROM {schema_name}.{table_name}
-                WHERE is_deleted = FALSE;
-            """
+            """).format(sql.Identifier(schema_name), sql.Identifier(table_name), after, BY_ID.order_by())
 
-            with self.conn.cursor() as cursor:
-                # Executa a query de contagem total
-                cursor.execute(count_query)
-                total_records = cursor.fetchone()[0]
+            with self.conn_to_database.cursor() as cursor:
+                total_records = count_rows(cursor, schema_name, table_name, sql.SQL("is_deleted = FALSE"), [], count_strategy)
 
                 # Executa a query paginada
-                cursor.execute(query, (limit, offset))
+                cursor.execute(query, after_params + [limit, 0 if cursor_token else offset])
                 rows = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
 
@@ -165,18 +214,19 @@ class EditRegisters(Database):
 
             return {
                 "total_records": total_records,
+                "count_strategy": count_strategy,
                 "page_size": limit,
-                "current_offset": offset,
+                "current_offset": None if cursor_token else offset,
+                "next_cursor": BY_ID.next_cursor(result, limit),
                 "active_records": result
             }
 
         except Exception as e:
-            self.conn.rollback()
+            self.rollback()
             raise Exception(f"Erro ao consultar registros ativos: {e}")
 
         finally:
-            if self.conn:
-                self.conn.close()
+            self.close()
     
     def _rename_field_with_validation(self, table_name: str, schema_name: str, old_field_name: str, new_field_name: str) -> str:
         """
@@ -202,7 +252,7 @@ class EditRegisters(Database):
                 SELECT COUNT(*) AS total_records, COUNT({old_field_name})
                 FROM {schema_name}.{table_name};
             """
-            with self.conn.cursor() as cursor:
+            with self.conn_to_database.cursor() as cursor:
                 cursor.execute(validate_query)
                 result = cursor.fetchone()
                 total_records, non_null_records = result
@@ -211,18 +261,18 @@ class EditRegisters(Database):
                 ALTER TABLE {schema_name}.{table_name}
                 RENAME COLUMN {old_field_name} TO {new_field_name};
             """
-            with self.conn.cursor() as cursor:
+            with self.conn_to_database.cursor() as cursor:
                 cursor.execute(rename_query)
                 self.connection.commit()
 
             return f"Coluna renomeada de '{old_field_name}' para '{new_field_name}' com sucesso."
 
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao renomear coluna: {e}")
         finally:
-            if self.connection:
-                self.connection.close()
+            schema_cache.invalidate(schema_name, table_name)
+            self.close()
 
     def _change_field_type_with_validation(self, table_name: str, schema_name: str, field_name: str, new_field_type: str):
         """
@@ -250,21 +300,21 @@ class EditRegisters(Database):
                 USING {field_name}::{new_field_type};
             """
 
-            with self.conn.cursor() as cursor:
+            with self.conn_to_database.cursor() as cursor:
                 cursor.execute(alter_query)
                 self.connection.commit()
 
             return f"Tipo da coluna '{field_name}' alterado para '{new_field_type}' com sucesso."
 
         except Exception as e:
-            self.connection.rollback()
+            self.rollback()
             raise Exception(f"Erro ao alterar o tipo da coluna: {e}")
 
         finally:
-            if self.connection:
-                self.connection.close()
+            schema_cache.invalidate(schema_name, table_name)
+            self.close()
 
-    def _get_deleted_records_by_date_range(self, table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    def _get_deleted_records_by_date_range(self, table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None, count_strategy: str = "exact") -> Dict[str, Any]:
         """
         Filtra registros deletados (is_deleted = TRUE) pelo range de datas, com suporte a paginação.
 
@@ -275,6 +325,8 @@ class EditRegisters(Database):
             end_date (str): Data final no formato 'YYYY-MM-DD'.
             limit (int): Número máximo de registros retornados por página.
             offset (int): Número de registros a serem ignorados antes de retornar os resultados.
+            cursor_token (str): Token `next_cursor` da página anterior; quando informado, `offset` é ignorado.
+            count_strategy (str): Estratégia do total (`exact`, `estimated` ou `none`).
 
         Returns:
             Um dicionário contendo os registros deletados paginados e informações de paginação.
@@ -283,31 +335,18 @@ class EditRegisters(Database):
             Exception: Caso ocorra um erro na consulta ao banco de dados.
         """
         try:
-            # Query para buscar registros deletados com paginação
-            query = f"""
-                SELECT *
-                FROM {schema_name}.{table_name}
-                WHERE is_deleted = TRUE
-                AND date BETWEEN %s AND %s
-                ORDER BY date DESC
-                LIMIT %s OFFSET %s;
-            """
-
-            # Query para contar o total de registros deletados no período
-            count_query = f"""
-                SELECT COUNT(*)
-                FROM {schema_name}.{table_name}
-                WHERE is_deleted = TRUE
-                AND date BETWEEN %s AND %s;
-            """
+            # Query para buscar registros deletados com paginação (por offset ou por cursor)
+            # `date BETWEEN` já exclui as datas nulas: não há fase dos nulos
+            query, params = BY_DATE_DESC.page_text(
+                f"{quote_ident(schema_name)}.{quote_ident(table_name)}", "is_deleted = TRUE AND date BETWEEN %s AND %s", [start_date, end_date],
+                cursor_token, limit, 0 if cursor_token else offset, nulls=False,
+            )
 
-            with self.conn.cursor() as cursor:
-                # Executa a query de contagem total
-                cursor.execute(count_query, (start_date, end_date))
-                total_records = cursor.fetchone()[0]
+            with self.conn_to_database.cursor() as cursor:
+                total_records = count_rows(cursor, schema_name, table_name, sql.SQL("is_deleted = TRUE AND date BETWEEN %s AND %s"), [start_date, end_date], count_strategy)
 
                 # Executa a query paginada
-                cursor.execute(query, (start_date, end_date, limit, offset))
+                cursor.execute(sql.SQL(query), params)
                 rows = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
 
@@ -316,8 +355,10 @@ class EditRegisters(Database):
 
             return {
                 "total_records": total_records,
+                "count_strategy": count_strategy,
                 "page_size": limit,
-                "current_offset": offset,
+                "current_offset": None if cursor_token else offset,
+                "next_cursor": BY_DATE_DESC.next_cursor(result, limit),
                 "deleted_records": result
             }
 
@@ -325,50 +366,113 @@ class EditRegisters(Database):
             raise Exception(f"Erro ao consultar registros deletados: {str(e)}")
 
         finally:
-            if self.conn:
-                self.conn.close()
+            self.close()
 
     def _active_register(self, table_name: str, schema_name: str, record_id: int):
         """
         Marca um registro como is_deleted = FALSE e ativa a notícia (is_active = TRUE).
-        
-        Args:
-            table_name (str): Nome da tabela a ser consultada.
-            schema_name (str): Nome do schema no banco.
-            record_id (int): Identificador do registro.
 
-        Exception:
-            Faz um rollback para garantir que nenhum registro com problema seja salvo.
-            Retorna um erro sobre o problema da consulta.
+        Atalho de `_update_deleted` para um único id.
+
+        Returns:
+            A linha (news_code, date) do registro, ou None caso ele não exista ou já estivesse ativo.
+        """
+        rows, _ = self._update_deleted(table_name, schema_name, False, record_ids=[record_id])
+        return rows[0] if rows else None
+
+class AsyncEditRegisters(AsyncDatabase):
+    """Leituras de `EditRegisters` pelo pool assíncrono, para as rotas `async def`."""
+
+    @staticmethod
+    def _page_query(table_name: str, schema_name: str, where: str, params: List[Any], keyset: Keyset, limit: int, offset: int, cursor_token: Optional[str], nulls: bool) -> Tuple[str, List[Any]]:
+        """Consulta da página e os seus parâmetros (ver `Keyset.page_text`)."""
+        return keyset.page_text(
+            f"{quote_ident(schema_name)}.{quote_ident(table_name)}", where, params,
+            cursor_token, limit, 0 if cursor_token else offset, nulls=nulls,
+        )
+
+    async def _page(self, table_name: str, schema_name: str, where: str, params: List[Any], keyset: Keyset, key: str, limit: int, offset: int, cursor_token: Optional[str], count_strategy: str, row_format: str = "json", nulls: bool = True) -> Dict[str, Any]:
+        """
+        Página de uma tabela dinâmica filtrada por `where` (com placeholders `%s`) e ordenada por `keyset`.
+
+        As linhas saem em `key` (formato `json`) ou em `columns`/`rows` (formato `columnar`). `nulls`
+        é falso quando `where` já exclui os registros com a primeira coluna da ordenação nula.
+        """
+        query, query_params = self._page_query(table_name, schema_name, where, params, keyset, limit, offset, cursor_token, nulls)
+
+        async with self.acquire() as conn:
+            total_records = await count_rows_async(conn, schema_name, table_name, where, params, count_strategy)
+            statement = await conn.prepare(to_asyncpg(query))
+            records = await statement.fetch(*query_params)
+
+        return {
+            "total_records": total_records,
+            "count_strategy": count_strategy,
+            "page_size": limit,
+            "current_offset": None if cursor_token else offset,
+            "next_cursor": keyset.next_cursor(records, limit),
+            **rows_payload(statement_columns(statement), records, key, row_format),
+        }
+
+    async def _stream_page(self, table_name: str, schema_name: str, where: str, params: List[Any], keyset: Keyset, limit: int, offset: int, cursor_token: Optional[str], nulls: bool = True) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Mesma página de `_page`, lida em lotes por um cursor do servidor (formato `ndjson`)."""
+        query, query_params = self._page_query(table_name, schema_name, where, params, keyset, limit, offset, cursor_token, nulls)
+        async for records in self.stream(query, *query_params):
+            yield [dict(record) for record in records]
+
+    async def _get_deleted_records(self, table_name: str, schema_name: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None, count_strategy: str = "exact") -> Dict[str, Any]:
+        """
+        Registros com is_deleted = TRUE, paginados (ver `EditRegisters._get_deleted_records`).
+
+        Raises:
+            Exception: Caso ocorra um erro na consulta ao banco de dados.
         """
         try:
-            query = sql.SQL("""
-                UPDATE {}.{}
-                SET is_deleted = FALSE
-                WHERE id = %s
-                RETURNING news_code;
-            """
-            ).format(
-                sql.Identifier(schema_name),
-                sql.Identifier(table_name)
-            )
-            
-            with self.conn_to_database.cursor() as cursor:
-                cursor.execute(query, (record_id,))
-                result = cursor.fetchone()
-                self.connection.commit()
+            return await self._page(table_name, schema_name, "is_deleted = TRUE", [], BY_DELETED_AT_DESC, "trash", limit, offset, cursor_token, count_strategy)
+        except Exception as e:
+            raise Exception(f"Erro ao consultar registros marcados como is_deleted: {e}")
 
-                if result:
-                    news_code = result[0]
-                    logger.info(f"Ativando notícia com news_code: {news_code}")  # Obtém o news_code do registro
-                    GetNews()._active_clipping_news(news_code)  # 🔹 Chama a função para ativar a notícia
+    async def _get_active_record(self, table_name: str, schema_name: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None, count_strategy: str = "exact", row_format: str = "json") -> Dict[str, Any]:
+        """
+        Registros com is_deleted = FALSE, paginados (ver `EditRegisters._get_active_record`).
 
-            return result
+        Com `row_format="columnar"` as linhas saem em `columns`/`rows` em vez de `active_records`.
 
+        Raises:
+            Exception: Caso ocorra um erro na consulta ao banco de dados.
+        """
+        try:
+            return await self._page(table_name, schema_name, "is_deleted = FALSE", [], BY_ID, "active_records", limit, offset, cursor_token, count_strategy, row_format)
         except Exception as e:
-            self.connection.rollback()
-            raise Exception(f"Erro ao ativar registro {record_id}: {e}")
+            raise Exception(f"Erro ao consultar registros ativos: {e}")
 
-        finally:
-            if self.connection:
-                self.connection.close()
\ No newline at end of file
+    def _stream_active_records(self, table_name: str, schema_name: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Registros ativos da página em lotes, lidos por um cursor do servidor (formato `ndjson`)."""
+        return self._stream_page(table_name, schema_name, "is_deleted = FALSE", [], BY_ID, limit, offset, cursor_token)
+
+    async def _get_deleted_records_by_date_range(self, table_name: str, schema_name: str, start_date: str, end_date: str, limit: int = 10, offset: int = 0, cursor_token: Optional[str] = None, count_strategy: str = "exact") -> Dict[str, Any]:
+        """
+        Registros deletados no range de datas, paginados (ver `EditRegisters._get_deleted_records_by_date_range`).
+
+        Raises:
+            Exception: Caso ocorra um erro na consulta ao banco de dados.
+        """
+        try:
+            dates = [self._date(start_date), self._date(end_date)]
+            return await self._page(table_name, schema_name, "is_deleted = TRUE AND date BETWEEN %s AND %s", dates, BY_DATE_DESC, "deleted_records", limit, offset, cursor_token, count_strategy, nulls=False)
+        except Exception as e:
+            raise Exception(f"Erro ao consultar registros deletados: {str(e)}")
+
+    async def _has_active_records_in_range(self, table_name: str, schema_name: str, start_date: str, end_date: str) -> bool:
+        """Indica se há registros ativos no range de datas (usado antes de iniciar uma exportação)."""
+        return await self.fetchval(
+            f"""
+            SELECT EXISTS (
+                SELECT 1 FROM {quote_ident(schema_name)}.{quote_ident(table_name)}
+                WHERE is_deleted = FALSE
+                AND date BETWEEN %s AND %s
+            );
+            """,
+            self._date(start_date),
+            self._date(end_date),
+        )
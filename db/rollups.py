@@ -0,0 +1,283 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import asyncpg
+from loguru import logger
+from psycopg2 import sql
+
+from db.connection import AsyncDatabase
+from db.pagination import quote_ident
+from db.pool import get_handson_pool
+from db.schema_cache import schema_cache
+
+ROLLUPS_TABLE = "dynamic_table_rollups"
+ROLLUP_VALUES_TABLE = "dynamic_table_rollup_values"
+# Dimensão implícita de todo rollup: o dia do registro (`date`)
+ROLLUP_DAY = "day"
+# Nomes usados pelas colunas da resposta de `AsyncRollups._aggregate`
+RESERVED_NAMES = (ROLLUP_DAY, "records")
+# Tipos aceitos como medida (somada por dia e dimensões)
+NUMERIC_TYPES = ("smallint", "integer", "bigint", "numeric", "real", "double precision")
+
+_DDL = """
+    CREATE TABLE IF NOT EXISTS dynamic_table_rollups (
+        schema_name TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        dimensions TEXT[] NOT NULL,
+        measures TEXT[] NOT NULL,
+        stale BOOLEAN NOT NULL DEFAULT FALSE,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (schema_name, table_name)
+    );
+    CREATE TABLE IF NOT EXISTS dynamic_table_rollup_values (
+        schema_name TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        day DATE NOT NULL,
+        dimension_values TEXT[] NOT NULL,
+        records BIGINT NOT NULL,
+        sums NUMERIC[] NOT NULL,
+        PRIMARY KEY (schema_name, table_name, day, dimension_values)
+    );
+"""
+
+_DEFINITION_QUERY = """
+    SELECT dimensions, measures, stale, refreshed_at
+    FROM dynamic_table_rollups
+    WHERE schema_name = %s
+    AND table_name = %s;
+"""
+
+
+class RollupError(ValueError):
+    """Definição de rollup inválida (coluna inexistente, medida não numérica, nome repetido)."""
+
+
+def _rebuild_query(schema_name: str, table_name: str, dimensions: Sequence[str], measures: Sequence[str], by_days: bool) -> sql.Composed:
+    """
+    Recalcula as linhas do rollup a partir dos registros ativos da tabela dinâmica.
+
+    Com `by_days` apenas os dias do parâmetro `%(days)s` são recalculados.
+    """
+    dimension_columns = [sql.Identifier(column) for column in dimensions]
+    return sql.SQL("""
+        INSERT INTO dynamic_table_rollup_values (schema_name, table_name, day, dimension_values, records, sums)
+        SELECT %(schema_name)s, %(table_name)s, date, ARRAY[{dimension_values}]::text[], count(*), ARRAY[{sums}]::numeric[]
+        FROM {schema}.{table}
+        WHERE is_deleted = FALSE
+        AND date IS NOT NULL
+        {days}
+        GROUP BY {group_by};
+    """).format(
+        dimension_values=sql.SQL(", ").join(sql.SQL("{}::text").format(column) for column in dimension_columns),
+        sums=sql.SQL(", ").join(sql.SQL("coalesce(sum({}), 0)").format(sql.Identifier(column)) for column in measures),
+        schema=sql.Identifier(schema_name),
+        table=sql.Identifier(table_name),
+        days=sql.SQL("AND date = ANY(%(days)s::date[])" if by_days else ""),
+        group_by=sql.SQL(", ").join([sql.Identifier("date"), *dimension_columns]),
+    )
+
+
+class RollupStore:
+    """
+    Rollups dos painéis: contagem de registros e soma das medidas por dia e dimensões.
+
+    O dono da tabela dinâmica declara as dimensões (ex.: sentimento, tema, veículo, tipo de
+    veículo) e as medidas numéricas (ex.: alcance, valoração). As linhas ficam em
+    `dynamic_table_rollup_values`, uma por (dia, valores das dimensões).
+
+    A manutenção é incremental por dia: as escritas na tabela dinâmica (uploads, exclusão e
+    restauração) chamam `refresh` com os dias tocados, na mesma transação, e só esses dias são
+    recalculados a partir dos registros ativos (pelo índice de `date`). Recalcular o dia, em vez
+    de somar diferenças, mantém o rollup exato mesmo quando um upload altera as dimensões de um
+    registro já existente.
+    """
+
+    def __init__(self) -> None:
+        self._tables_ready = False
+
+    def ensure_tables(self) -> None:
+        """Cria as tabelas dos rollups caso ainda não existam."""
+        if self._tables_ready:
+            return
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (ROLLUPS_TABLE,))
+            cursor.execute(_DDL)
+            connection.commit()
+        self._tables_ready = True
+
+    def _validate(self, cursor, schema_name: str, table_name: str, dimensions: List[str], measures: List[str]) -> None:
+        columns = schema_cache.columns(cursor, schema_name, table_name)
+        if not columns:
+            raise RollupError(f"Tabela {schema_name}.{table_name} não encontrada.")
+        if not measures:
+            raise RollupError("Informe ao menos uma medida.")
+        names = dimensions + measures
+        repeated = sorted({name for name in names if names.count(name) > 1})
+        if repeated:
+            raise RollupError(f"Colunas repetidas: {', '.join(repeated)}")
+        reserved = [name for name in names if name in RESERVED_NAMES]
+        if reserved:
+            raise RollupError(f"Nomes reservados: {', '.join(reserved)}")
+        missing = [name for name in names if name not in columns]
+        if missing:
+            raise RollupError(f"Colunas inexistentes em {table_name}: {', '.join(missing)}")
+        not_numeric = [name for name in measures if columns[name]["data_type"] not in NUMERIC_TYPES]
+        if not_numeric:
+            raise RollupError(f"Medidas precisam ser numéricas: {', '.join(not_numeric)}")
+
+    def declare(self, schema_name: str, table_name: str, dimensions: List[str], measures: List[str]) -> Dict[str, Any]:
+        """
+        Declara (ou redefine) o rollup da tabela e o reconstrói a partir de todos os registros ativos.
+
+        Raises:
+            RollupError: Caso alguma dimensão ou medida seja inválida.
+        """
+        self.ensure_tables()
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            self._validate(cursor, schema_name, table_name, dimensions, measures)
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (f"{schema_name}.{table_name}:rollup",))
+            cursor.execute("""
+                INSERT INTO dynamic_table_rollups (schema_name, table_name, dimensions, measures)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (schema_name, table_name) DO UPDATE
+                SET dimensions = EXCLUDED.dimensions, measures = EXCLUDED.measures, stale = FALSE, refreshed_at = now();
+            """, (schema_name, table_name, dimensions, measures))
+            cursor.execute("DELETE FROM dynamic_table_rollup_values WHERE schema_name = %s AND table_name = %s;", (schema_name, table_name))
+            cursor.execute(_rebuild_query(schema_name, table_name, dimensions, measures, by_days=False),
+                           {"schema_name": schema_name, "table_name": table_name})
+            groups = cursor.rowcount
+            connection.commit()
+        logger.info(f"Rollup de {schema_name}.{table_name} reconstruído: {groups} grupos.")
+        return {"schema_name": schema_name, "table_name": table_name, "dimensions": dimensions, "measures": measures, "groups": groups}
+
+    def drop(self, schema_name: str, table_name: Optional[str] = None) -> bool:
+        """Remove o rollup da tabela ou, sem `table_name`, os de todo o schema. Retorna False caso não houvesse rollup."""
+        self.ensure_tables()
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            for table in (ROLLUP_VALUES_TABLE, ROLLUPS_TABLE):
+                cursor.execute(sql.SQL("DELETE FROM {} WHERE schema_name = %s AND (%s::text IS NULL OR table_name = %s);").format(sql.Identifier(table)),
+                               (schema_name, table_name, table_name))
+            dropped = cursor.rowcount > 0
+            connection.commit()
+        return dropped
+
+    def refresh(self, cursor, schema_name: str, table_name: str, days: Iterable[Any]) -> int:
+        """
+        Recalcula os dias informados do rollup da tabela, pelo cursor da escrita e sem commit.
+
+        Não faz nada quando a tabela não tem rollup. Caso uma dimensão ou medida declarada não
+        exista mais (coluna renomeada ou removida), o rollup é marcado como `stale` em vez de
+        falhar a escrita; declarar o rollup de novo o reconstrói.
+
+        Args:
+            cursor: Cursor da transação que alterou a tabela dinâmica.
+            days (Iterable): Dias tocados pela escrita ('YYYY-MM-DD' ou `date`); vazios são ignorados.
+
+        Returns:
+            A quantidade de dias recalculados.
+        """
+        days = sorted({str(day)[:10] for day in days if day})
+        if not days:
+            return 0
+        self.ensure_tables()
+        cursor.execute(_DEFINITION_QUERY, (schema_name, table_name))
+        definition = cursor.fetchone()
+        if not definition:
+            return 0
+        dimensions, measures, stale = definition[0], definition[1], definition[2]
+        if stale:
+            return 0
+
+        columns = schema_cache.columns(cursor, schema_name, table_name)
+        missing = [column for column in [*dimensions, *measures] if column not in columns]
+        if missing:
+            logger.warning(f"Rollup de {schema_name}.{table_name} desatualizado: colunas ausentes ({', '.join(missing)}).")
+            cursor.execute("UPDATE dynamic_table_rollups SET stale = TRUE WHERE schema_name = %s AND table_name = %s;", (schema_name, table_name))
+            return 0
+
+        # Escritas simultâneas na mesma tabela recalculam um dia de cada vez, já vendo as anteriores
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (f"{schema_name}.{table_name}:rollup",))
+        cursor.execute("""
+            DELETE FROM dynamic_table_rollup_values
+            WHERE schema_name = %s
+            AND table_name = %s
+            AND day = ANY(%s::date[]);
+        """, (schema_name, table_name, days))
+        cursor.execute(_rebuild_query(schema_name, table_name, dimensions, measures, by_days=True),
+                       {"schema_name": schema_name, "table_name": table_name, "days": days})
+        cursor.execute("UPDATE dynamic_table_rollups SET refreshed_at = now() WHERE schema_name = %s AND table_name = %s;", (schema_name, table_name))
+        return len(days)
+
+
+class AsyncRollups(AsyncDatabase):
+    """Leitura dos rollups (asyncpg), para as rotas dos painéis."""
+
+    async def _aggregate(self, schema_name: str, table_name: str, start_date: str, end_date: str, group_by: List[str], filters: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Agrega o rollup no período, agrupado pelas dimensões pedidas.
+
+        Args:
+            group_by (List[str]): `day` e/ou dimensões declaradas; vazio para o total do período.
+            filters (Dict[str, str]): Valor exigido por dimensão (ex.: {"sentimento": "Positivo"}).
+
+        Returns:
+            As linhas com `records` e a soma de cada medida, ou None caso a tabela não tenha rollup.
+
+        Raises:
+            RollupError: Caso `group_by` ou `filters` use uma dimensão não declarada.
+        """
+        filters = filters or {}
+        try:
+            rows = await self.fetch(_DEFINITION_QUERY, schema_name, table_name)
+        except asyncpg.UndefinedTableError:
+            return None
+        if not rows:
+            return None
+        definition = rows[0]
+        dimensions, measures = list(definition["dimensions"]), list(definition["measures"])
+
+        position = {dimension: index for index, dimension in enumerate(dimensions, start=1)}
+        unknown = [name for name in [*group_by, *filters] if name != ROLLUP_DAY and name not in position]
+        if unknown:
+            raise RollupError(f"Dimensões não declaradas no rollup: {', '.join(unknown)}")
+
+        group_columns = [
+            ROLLUP_DAY if name == ROLLUP_DAY else f"dimension_values[{position[name]}] AS {quote_ident(name)}"
+            for name in group_by
+        ]
+        sums = [f"sum(sums[{index}]) AS {quote_ident(measure)}" for index, measure in enumerate(measures, start=1)]
+        where = ["schema_name = %s", "table_name = %s", "day BETWEEN %s AND %s"]
+        params: List[Any] = [schema_name, table_name, self._date(start_date), self._date(end_date)]
+        for name, value in filters.items():
+            if name == ROLLUP_DAY:
+                where.append("day = %s")
+                params.append(self._date(value))
+            else:
+                where.append(f"dimension_values[{position[name]}] = %s")
+                params.append(value)
+
+        grouping = ", ".join(str(index) for index in range(1, len(group_by) + 1))
+        query = f"""
+            SELECT {", ".join([*group_columns, "sum(records)::bigint AS records", *sums])}
+            FROM dynamic_table_rollup_values
+            WHERE {" AND ".join(where)}
+            {f"GROUP BY {grouping} ORDER BY {grouping}" if group_by else ""};
+        """
+        result = await self.fetch(query, *params)
+        if not group_by and result and result[0]["records"] is None:
+            result = []
+        return {
+            "schema_name": schema_name,
+            "table_name": table_name,
+            "start_date": start_date,
+            "end_date": end_date,
+            "group_by": group_by,
+            "dimensions": dimensions,
+            "measures": measures,
+            "stale": definition["stale"],
+            "refreshed_at": definition["refreshed_at"],
+            "rows": result,
+        }
+
+
+rollup_store = RollupStore()
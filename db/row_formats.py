@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+# Formatos das listagens grandes: `json` (lista de objetos, padrão), `columnar`
+# ({"columns": [...], "rows": [[...], ...]}) e `ndjson` (um objeto por linha, em streaming)
+ROW_FORMATS = ("json", "columnar", "ndjson")
+ROW_FORMAT_PATTERN = "^(json|columnar|ndjson)$"
+ROW_FORMAT_DESCRIPTION = (
+    "Formato da listagem: json (lista de objetos), columnar (nomes das colunas uma vez e as linhas como listas) "
+    "ou ndjson (um objeto JSON por linha, enviado à medida que as linhas são lidas do banco; sem total nem `next_cursor`)"
+)
+
+
+def statement_columns(statement) -> List[str]:
+    """Nomes das colunas de uma consulta preparada do asyncpg (disponíveis mesmo sem linhas)."""
+    return [attribute.name for attribute in statement.get_attributes()]
+
+
+def rows_payload(columns: List[str], records: Sequence[Any], key: str, row_format: str) -> Dict[str, Any]:
+    """
+    Linhas da página no formato pedido.
+
+    No `columnar` os valores saem direto das tuplas do asyncpg, sem montar um dicionário por linha.
+
+    Args:
+        columns (List[str]): Colunas da consulta.
+        records (Sequence): Linhas do asyncpg.
+        key (str): Chave da lista de objetos no formato `json` (ex.: `active_records`).
+        row_format (str): `json` ou `columnar`.
+    """
+    if row_format == "columnar":
+        return {"columns": columns, "rows": [list(record) for record in records]}
+    return {key: [dict(record) for record in records]}
+
+
+def page_rows(page: Optional[Dict[str, Any]], key: str) -> list:
+    """Linhas de uma página em qualquer formato (vazio quando a página não tem linhas)."""
+    if not page:
+        return []
+    return page.get(key) or page.get("rows") or []
@@ -0,0 +1,189 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config.config import SCHEMA_CACHE_TTL
+from db.async_pool import to_asyncpg
+
+CONSTRAINT_TYPES = {
+    "p": "PRIMARY KEY",
+    "u": "UNIQUE",
+    "f": "FOREIGN KEY",
+    "c": "CHECK",
+    "x": "EXCLUDE",
+}
+
+# Uma única consulta ao pg_catalog traz colunas, restrições e particionamento de todas as tabelas pedidas
+_LOAD_QUERY = """
+    SELECT
+        c.relname,
+        (
+            SELECT json_agg(json_build_object(
+                'name', a.attname,
+                'type', format_type(a.atttypid, a.atttypmod),
+                'data_type', format_type(a.atttypid, NULL),
+                'nullable', NOT a.attnotnull
+            ) ORDER BY a.attnum)
+            FROM pg_attribute a
+            WHERE a.attrelid = c.oid
+            AND a.attnum > 0
+            AND NOT a.attisdropped
+        ) AS columns,
+        (
+            SELECT json_agg(json_build_object(
+                'name', con.conname,
+                'type', con.contype,
+                'columns', (
+                    SELECT array_agg(att.attname ORDER BY k.ord)
+                    FROM unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+                    JOIN pg_attribute att ON att.attrelid = c.oid AND att.attnum = k.attnum
+                )
+            ))
+            FROM pg_constraint con
+            WHERE con.conrelid = c.oid
+        ) AS constraints,
+        c.relkind = 'p' AS partitioned,
+        obj_description(c.oid, 'pg_class') AS comment
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s
+    AND c.relname = ANY(%s)
+    AND c.relkind IN ('r', 'p');
+"""
+
+
+class SchemaCache:
+    """
+    Cache em memória dos metadados das tabelas dinâmicas, por (schema, tabela).
+
+    Cada entrada guarda as colunas (nome, tipo, nulidade), as restrições da tabela, se ela é
+    particionada e o seu comentário (ver `db.partitions.partition_interval`).
+    As operações de DDL do hands-on chamam `invalidate` e um TTL de segurança cobre
+    alterações feitas por outros processos.
+
+    Args:
+        ttl (float): Segundos de validade de uma entrada. 0 desativa a expiração.
+    """
+
+    def __init__(self, ttl: float = SCHEMA_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        loaded_at, table = entry
+        if self.ttl and time.monotonic() - loaded_at > self.ttl:
+            del self._entries[key]
+            return None
+        return table
+
+    def _parse(self, rows) -> Dict[str, Dict[str, Any]]:
+        loaded = {}
+        for row in rows:
+            relname, columns, constraints, partitioned, comment = row[0], row[1], row[2], row[3], row[4]
+            loaded[relname] = {
+                "columns": {column["name"]: column for column in (columns or [])},
+                "constraints": [
+                    {
+                        "name": constraint["name"],
+                        "type": CONSTRAINT_TYPES.get(constraint["type"], constraint["type"]),
+                        "columns": constraint["columns"] or [],
+                    }
+                    for constraint in (constraints or [])
+                ],
+                "partitioned": bool(partitioned),
+                "comment": comment,
+            }
+        return loaded
+
+    def _load(self, cursor, schema_name: str, table_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        cursor.execute(_LOAD_QUERY, (schema_name, list(table_names)))
+        return self._parse(cursor.fetchall())
+
+    def _split(self, schema_name: str, table_names: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        with self._lock:
+            for table_name in table_names:
+                table = self._lookup((schema_name, table_name))
+                if table is None:
+                    missing.append(table_name)
+                else:
+                    found[table_name] = table
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def _store(self, schema_name: str, loaded: Dict[str, Dict[str, Any]]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for table_name, table in loaded.items():
+                self._entries[(schema_name, table_name)] = (now, table)
+
+    def get_many(self, cursor, schema_name: str, table_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna os metadados das tabelas pedidas, carregando as ausentes em uma única consulta.
+
+        Tabelas inexistentes não aparecem no resultado e não são guardadas no cache.
+        """
+        found, missing = self._split(schema_name, list(dict.fromkeys(table_names)))
+        if missing:
+            loaded = self._load(cursor, schema_name, missing)
+            self._store(schema_name, loaded)
+            found.update(loaded)
+        return found
+
+    async def get_many_async(self, conn, schema_name: str, table_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Versão de `get_many` para uma conexão do asyncpg (com json decodificado)."""
+        found, missing = self._split(schema_name, list(dict.fromkeys(table_names)))
+        if missing:
+            loaded = self._parse(await conn.fetch(to_asyncpg(_LOAD_QUERY), schema_name, missing))
+            self._store(schema_name, loaded)
+            found.update(loaded)
+        return found
+
+    def get(self, cursor, schema_name: str, table_name: str) -> Optional[Dict[str, Any]]:
+        """Retorna os metadados de uma tabela ou None caso ela não exista."""
+        return self.get_many(cursor, schema_name, [table_name]).get(table_name)
+
+    def columns(self, cursor, schema_name: str, table_name: str) -> Dict[str, Dict[str, Any]]:
+        """Atalho para as colunas de uma tabela (vazio caso ela não exista)."""
+        table = self.get(cursor, schema_name, table_name)
+        return table["columns"] if table else {}
+
+    def invalidate(self, schema_name: str, table_name: Optional[str] = None) -> None:
+        """Remove do cache uma tabela ou, sem `table_name`, todas as tabelas do schema."""
+        with self._lock:
+            if table_name is None:
+                keys = [key for key in self._entries if key[0] == schema_name]
+            else:
+                keys = [(schema_name, table_name)]
+            for key in keys:
+                self._entries.pop(key, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de acertos, falhas e invalidações do cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Cache compartilhado pelo processo para o banco do hands-on
+schema_cache = SchemaCache()
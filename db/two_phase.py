@@ -0,0 +1,392 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+from loguru import logger
+
+from db.pool import ConnectionPool, get_clipping_pool, get_handson_pool
+from config.config import TWO_PHASE_RECOVERY_AGE, TWO_PHASE_RECOVERY_INTERVAL
+
+# Prefixo dos identificadores (gid) das transações preparadas por esta aplicação
+GID_PREFIX = "handson"
+
+DECISIONS_TABLE = "two_phase_decisions"
+
+# Primeira chave do advisory lock de sessão que o coordenador mantém enquanto o gtrid está vivo
+LOCK_NAMESPACE = "two_phase"
+
+_DDL = """
+    CREATE TABLE IF NOT EXISTS two_phase_pending (
+        gtrid TEXT PRIMARY KEY,
+        started_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    CREATE TABLE IF NOT EXISTS two_phase_decisions (
+        gtrid TEXT PRIMARY KEY,
+        decided_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+"""
+
+_tables_ready = False
+
+# Ramo da transação: conexão emprestada do pool + rotina que grava pelo cursor dela
+Branch = Tuple[Any, Callable[[Any], Any]]
+
+# Transação preparada encontrada na varredura: pool do banco onde ela está + xid
+Prepared = Tuple[ConnectionPool, Any]
+
+
+class TwoPhaseCommitError(Exception):
+    """A decisão de commit foi gravada, mas algum ramo não confirmou; a varredura de recuperação conclui o commit."""
+
+
+def _gid(gtrid: str, branch: str) -> str:
+    return f"{gtrid}:{branch}"
+
+
+def _gtrid(gid: str) -> str:
+    return gid.rsplit(":", 1)[0]
+
+
+def ensure_decisions_table() -> None:
+    """Cria as tabelas do coordenador (pendentes e decisões, no hands-on) caso ainda não existam."""
+    global _tables_ready
+    if _tables_ready:
+        return
+    with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (DECISIONS_TABLE,))
+        cursor.execute(_DDL)
+        connection.commit()
+    _tables_ready = True
+
+
+class _Coordinator:
+    """
+    Estado durável de um gtrid no hands-on enquanto a escrita em duas fases está em andamento.
+
+    Antes de qualquer ramo começar, grava a linha em `two_phase_pending` e toma um advisory lock
+    de sessão (`LOCK_NAMESPACE`, gtrid) numa conexão própria, mantida até o fim. A varredura só
+    resolve um gtrid cujo lock esteja livre, ou seja, cujo coordenador não existe mais.
+    """
+
+    def __init__(self, gtrid: str) -> None:
+        self.gtrid = gtrid
+        self.connection = None
+
+    def _execute(self, query: str, params: tuple) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+
+    def start(self) -> None:
+        ensure_decisions_table()
+        self.connection = get_handson_pool().getconn()
+        try:
+            self.connection.autocommit = True
+            self._execute("SELECT pg_advisory_lock(hashtext(%s), hashtext(%s));", (LOCK_NAMESPACE, self.gtrid))
+            self._execute("INSERT INTO two_phase_pending (gtrid) VALUES (%s);", (self.gtrid,))
+        except Exception:
+            self._release()
+            raise
+
+    def decide(self) -> None:
+        self._execute("INSERT INTO two_phase_decisions (gtrid) VALUES (%s);", (self.gtrid,))
+
+    def finish(self, forget: bool = True) -> None:
+        """
+        Libera o lock do gtrid e devolve a conexão.
+
+        Args:
+            forget (bool): Apaga as linhas de pendente/decisão. Falso quando algum ramo ficou
+                preparado e a varredura ainda precisa delas para concluir o gtrid.
+        """
+        if self.connection is None:
+            return
+        try:
+            if forget:
+                self._execute("DELETE FROM two_phase_decisions WHERE gtrid = %s;", (self.gtrid,))
+                self._execute("DELETE FROM two_phase_pending WHERE gtrid = %s;", (self.gtrid,))
+        except psycopg2.Error as e:
+            # Linhas que sobrarem sem transação preparada são apagadas pela varredura
+            logger.warning(f"Não foi possível apagar o estado de {self.gtrid}: {e}")
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        connection, self.connection = self.connection, None
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(hashtext(%s), hashtext(%s));", (LOCK_NAMESPACE, self.gtrid))
+        except psycopg2.Error:
+            # Lock de sessão sobrevive à devolução ao pool; encerrar a sessão é o que o libera
+            connection._close_physical()
+        get_handson_pool().putconn(connection, connection.lease_id)
+
+
+class TwoPhaseWrite:
+    """
+    Escrita atômica em mais de um banco com `PREPARE TRANSACTION` / `COMMIT PREPARED`.
+
+    `begin` registra o gtrid como pendente (ver `_Coordinator`) e abre uma transação em cada
+    ramo; `write` roda as rotinas dos ramos em paralelo, quantas vezes for preciso, sempre na
+    mesma transação; `commit` prepara todos os ramos, grava a decisão em `two_phase_decisions` e
+    confirma. Se algum ramo falhar antes da decisão, todos são desfeitos (`rollback`). Uma queda
+    entre o prepare e o commit deixa transações preparadas órfãs, resolvidas por
+    `recover_prepared_transactions` conforme a decisão gravada.
+
+    Args:
+        name (str): Identifica a operação no gid (ex.: 'news').
+    """
+
+    def __init__(self, name: str) -> None:
+        self.gtrid = f"{GID_PREFIX}:{name}:{uuid.uuid4()}"
+        self._connections: Dict[str, Any] = {}
+        self._coordinator: Optional[_Coordinator] = None
+
+    def begin(self, connections: Dict[str, Any]) -> None:
+        """
+        Registra o gtrid como pendente e abre a transação de cada ramo.
+
+        Args:
+            connections (Dict[str, Any]): Nome do ramo -> conexão emprestada do pool.
+        """
+        self._coordinator = _Coordinator(self.gtrid)
+        self._coordinator.start()
+        try:
+            for branch, connection in connections.items():
+                connection.tpc_begin(_gid(self.gtrid, branch))
+                self._connections[branch] = connection
+        except Exception:
+            self.rollback()
+            raise
+
+    def write(self, works: Dict[str, Callable[[Any], Any]]) -> Dict[str, Any]:
+        """
+        Executa uma rotina em cada ramo, em paralelo, dentro da transação aberta por `begin`.
+
+        Args:
+            works (Dict[str, Callable]): Nome do ramo -> rotina que recebe o cursor.
+
+        Returns:
+            Dict[str, Any]: Retorno da rotina de cada ramo.
+
+        Raises:
+            Exception: O erro do primeiro ramo que falhou. A transação continua aberta; quem
+                chama decide se desfaz tudo com `rollback`.
+        """
+        def execute(branch: str, work: Callable[[Any], Any]) -> Any:
+            with self._connections[branch].cursor() as cursor:
+                return work(cursor)
+
+        with ThreadPoolExecutor(max_workers=len(works), thread_name_prefix="two-phase") as executor:
+            futures = {branch: executor.submit(execute, branch, work) for branch, work in works.items()}
+        errors = [future.exception() for future in futures.values() if future.exception() is not None]
+        if errors:
+            raise errors[0]
+        return {branch: future.result() for branch, future in futures.items()}
+
+    def rollback(self) -> None:
+        """Desfaz todos os ramos (preparados ou não) e encerra o gtrid."""
+        for branch, connection in self._connections.items():
+            try:
+                connection.tpc_rollback()
+            except psycopg2.Error as e:
+                # A transação preparada que sobrar é desfeita pela varredura (não há decisão gravada)
+                logger.error(f"Falha ao desfazer o ramo '{branch}' de {self.gtrid}: {e}")
+        self._connections = {}
+        if self._coordinator is not None:
+            self._coordinator.finish()
+
+    def commit(self) -> None:
+        """
+        Prepara todos os ramos, grava a decisão de commit e confirma.
+
+        Raises:
+            Exception: Erro no prepare ou ao gravar a decisão (tudo é desfeito).
+            TwoPhaseCommitError: Caso algum ramo não confirme após a decisão de commit.
+        """
+        try:
+            for connection in self._connections.values():
+                connection.tpc_prepare()
+            self._coordinator.decide()
+        except Exception:
+            self.rollback()
+            raise
+
+        failed = []
+        for branch, connection in self._connections.items():
+            try:
+                connection.tpc_commit()
+            except psycopg2.Error as e:
+                logger.error(f"Falha no COMMIT PREPARED do ramo '{branch}' de {self.gtrid}: {e}")
+                failed.append(branch)
+        self._connections = {}
+        self._coordinator.finish(forget=not failed)
+        if failed:
+            raise TwoPhaseCommitError(f"Ramos {failed} de {self.gtrid} ficaram preparados; serão confirmados na recuperação.")
+
+    def run(self, branches: Dict[str, Branch]) -> Dict[str, Any]:
+        """
+        Executa os ramos em paralelo e confirma todos ou nenhum.
+
+        Args:
+            branches (Dict[str, Branch]): Nome do ramo -> (conexão, rotina que recebe o cursor).
+
+        Returns:
+            Dict[str, Any]: Retorno da rotina de cada ramo.
+
+        Raises:
+            Exception: O erro do primeiro ramo que falhou (nada é gravado).
+            TwoPhaseCommitError: Caso algum ramo não confirme após a decisão de commit.
+        """
+        self.begin({branch: connection for branch, (connection, _) in branches.items()})
+        try:
+            result = self.write({branch: work for branch, (_, work) in branches.items()})
+        except Exception:
+            self.rollback()
+            raise
+        self.commit()
+        return result
+
+
+def _prepared_transactions() -> Dict[str, List[Prepared]]:
+    """Transações preparadas desta aplicação nos dois bancos, agrupadas por gtrid."""
+    prepared: Dict[str, List[Prepared]] = {}
+    for pool in (get_handson_pool(), get_clipping_pool()):
+        with pool.connection() as connection:
+            database = connection.info.dbname
+            for xid in connection.tpc_recover():
+                gid = xid.gtrid
+                if gid and gid.startswith(f"{GID_PREFIX}:") and xid.database == database:
+                    prepared.setdefault(_gtrid(gid), []).append((pool, xid))
+    return prepared
+
+
+def _resolve(xids: List[Prepared], commit: bool) -> int:
+    """Confirma ou desfaz as transações preparadas de um gtrid; retorna quantas foram resolvidas."""
+    resolved = 0
+    for pool, xid in xids:
+        try:
+            with pool.connection() as connection:
+                if commit:
+                    connection.tpc_commit(xid)
+                else:
+                    connection.tpc_rollback(xid)
+            resolved += 1
+        except psycopg2.Error as e:
+            logger.error(f"Pool '{pool.name}': não foi possível resolver a transação preparada {xid.gtrid}: {e}")
+    return resolved
+
+
+def _sweep(cursor, gtrid: str, xids: List[Prepared], cutoff: datetime) -> Tuple[Optional[str], int]:
+    """
+    Resolve um gtrid cujo coordenador já não existe (o chamador detém o lock dele).
+
+    Com decisão gravada, os ramos são confirmados. Sem decisão, são desfeitos apenas se o gtrid
+    ficou pendente antes de `cutoff`; um gtrid sem linha pendente (gravado antes dela existir) usa
+    a idade da transação preparada mais antiga. Resolvido tudo, o estado do gtrid é apagado.
+
+    Returns:
+        Tuple[Optional[str], int]: Ação tomada ('committed', 'rolled_back' ou None) e quantas
+            transações preparadas foram resolvidas.
+    """
+    cursor.execute("SELECT started_at FROM two_phase_pending WHERE gtrid = %s;", (gtrid,))
+    pending = cursor.fetchone()
+    cursor.execute("SELECT 1 FROM two_phase_decisions WHERE gtrid = %s;", (gtrid,))
+    decided = cursor.fetchone() is not None
+
+    started_at = pending[0] if pending else min((xid.prepared for _, xid in xids), default=None)
+    if not decided and (started_at is None or started_at >= cutoff):
+        return None, 0
+
+    resolved = _resolve(xids, commit=decided)
+    if resolved == len(xids):
+        cursor.execute("DELETE FROM two_phase_decisions WHERE gtrid = %s;", (gtrid,))
+        cursor.execute("DELETE FROM two_phase_pending WHERE gtrid = %s;", (gtrid,))
+    return ("committed" if decided else "rolled_back"), resolved
+
+
+def recover_prepared_transactions(min_age: Optional[float] = None) -> Dict[str, int]:
+    """
+    Resolve transações preparadas órfãs deixadas por `TwoPhaseWrite`.
+
+    Um gtrid só é tocado se o advisory lock do seu coordenador estiver livre (o processo que o
+    abriu terminou ou perdeu a sessão). As transações com decisão de commit gravada são
+    confirmadas (`COMMIT PREPARED`); as demais são desfeitas (`ROLLBACK PREPARED`) quando o gtrid
+    está pendente há mais de `min_age` segundos. Linhas de pendente/decisão sem transação
+    preparada também são apagadas.
+
+    Returns:
+        Dict[str, int]: Quantidade de transações confirmadas e desfeitas.
+    """
+    min_age = TWO_PHASE_RECOVERY_AGE if min_age is None else min_age
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age)
+
+    ensure_decisions_table()
+    prepared = _prepared_transactions()
+
+    summary = {"committed": 0, "rolled_back": 0}
+    with get_handson_pool().connection() as connection:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT gtrid FROM two_phase_pending WHERE started_at < %s UNION SELECT gtrid FROM two_phase_decisions;",
+                (cutoff,),
+            )
+            gtrids = set(prepared) | {row[0] for row in cursor.fetchall()}
+
+            for gtrid in sorted(gtrids):
+                cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s), hashtext(%s));", (LOCK_NAMESPACE, gtrid))
+                if not cursor.fetchone()[0]:
+                    continue  # Coordenador ainda em andamento
+                try:
+                    action, resolved = _sweep(cursor, gtrid, prepared.get(gtrid, []), cutoff)
+                finally:
+                    cursor.execute("SELECT pg_advisory_unlock(hashtext(%s), hashtext(%s));", (LOCK_NAMESPACE, gtrid))
+                if action is not None:
+                    summary[action] += resolved
+
+    if summary["committed"] or summary["rolled_back"]:
+        logger.warning(f"Transações preparadas órfãs: {summary['committed']} confirmadas, {summary['rolled_back']} desfeitas.")
+    return summary
+
+
+class PreparedTransactionSweeper:
+    """
+    Roda `recover_prepared_transactions` numa thread de fundo: na subida e depois a cada `interval` segundos.
+
+    Um ramo que falhou no `COMMIT PREPARED` (`TwoPhaseCommitError`) segura os locks dele até ser
+    resolvido, então a varredura não pode esperar a próxima subida da aplicação.
+
+    Args:
+        interval (float): Segundos entre uma varredura e outra.
+    """
+
+    def __init__(self, interval: float = TWO_PHASE_RECOVERY_INTERVAL) -> None:
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="two-phase-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                recover_prepared_transactions()
+            except Exception as e:
+                logger.error(f"Não foi possível verificar as transações preparadas pendentes: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+
+prepared_sweeper = PreparedTransactionSweeper()
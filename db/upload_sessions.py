@@ -0,0 +1,205 @@
+import uuid
+from typing import Any, Dict, List, Optional
+
+from psycopg2.extras import Json, RealDictCursor
+
+from db.counting import count_cache
+from db.ingestion import HandsOnIngestion
+from db.pool import get_handson_pool
+
+SESSIONS_TABLE = "upload_sessions"
+SESSION_CHUNKS_TABLE = "upload_session_chunks"
+
+_DDL = """
+    CREATE TABLE IF NOT EXISTS upload_sessions (
+        id UUID PRIMARY KEY,
+        params JSONB NOT NULL DEFAULT '{}'::jsonb,
+        status TEXT NOT NULL DEFAULT 'open',
+        last_chunk INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        completed_at TIMESTAMPTZ
+    );
+    CREATE TABLE IF NOT EXISTS upload_session_chunks (
+        session_id UUID NOT NULL REFERENCES upload_sessions (id) ON DELETE CASCADE,
+        chunk_number INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        summary JSONB NOT NULL,
+        data JSONB NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (session_id, chunk_number)
+    );
+"""
+
+_SESSION_COLUMNS = "id::text AS id, params, status, last_chunk, created_at, updated_at, completed_at"
+
+
+class ChunkOrderError(ValueError):
+    """Bloco fora de ordem ou enviado para uma sessão já concluída."""
+
+    def __init__(self, message: str, next_chunk: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.next_chunk = next_chunk
+
+
+class UploadSessionStore:
+    """
+    Sessões de upload em blocos para a tabela dinâmica do hands-on.
+
+    Cada bloco numerado é gravado em uma transação própria junto com o seu checkpoint
+    (`upload_session_chunks` + `last_chunk`), então uma falha no meio do upload não desfaz os
+    blocos já confirmados e o cliente retoma a partir de `last_chunk + 1`. Reenviar um bloco já
+    confirmado não grava nada de novo: a resposta gravada no checkpoint é devolvida.
+    """
+
+    def __init__(self) -> None:
+        self._tables_ready = False
+
+    def ensure_tables(self) -> None:
+        """Cria as tabelas das sessões caso ainda não existam."""
+        if self._tables_ready:
+            return
+        with get_handson_pool().connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (SESSIONS_TABLE,))
+            cursor.execute(_DDL)
+            connection.commit()
+        self._tables_ready = True
+
+    def create(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Abre uma sessão de upload.
+
+        Args:
+            params (Dict[str, Any]): Schema, tabela e empresa do upload.
+        """
+        self.ensure_tables()
+        with get_handson_pool().connection() as connection, connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(f"INSERT INTO upload_sessions (id, params) VALUES (%s, %s) RETURNING {_SESSION_COLUMNS};",
+                           (str(uuid.uuid4()), Json(params)))
+            session = dict(cursor.fetchone())
+            connection.commit()
+        return self._with_progress(session, [])
+
+    @staticmethod
+    def _with_progress(session: Dict[str, Any], chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Acrescenta à sessão o próximo bloco esperado e o resumo consolidado dos blocos confirmados."""
+        totals: Dict[str, Dict[str, int]] = {}
+        for chunk in chunks:
+            for target, counts in chunk["summary"].items():
+                target_totals = totals.setdefault(target, {})
+                for name, value in counts.items():
+                    target_totals[name] = target_totals.get(name, 0) + value
+        return {
+            **session,
+            "next_chunk": session["last_chunk"] + 1 if session["status"] == "open" else None,
+            "chunks": len(chunks),
+            "rows": sum(chunk["rows"] for chunk in chunks),
+            "summary": totals,
+        }
+
+    def _chunks(self, cursor, session_id: str) -> List[Dict[str, Any]]:
+        cursor.execute("""
+            SELECT chunk_number, rows, summary
+            FROM upload_session_chunks
+            WHERE session_id = %s
+            ORDER BY chunk_number;
+        """, (session_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Estado da sessão com o resumo dos blocos confirmados, ou None caso ela não exista."""
+        self.ensure_tables()
+        with get_handson_pool().connection() as connection, connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(f"SELECT {_SESSION_COLUMNS} FROM upload_sessions WHERE id = %s;", (session_id,))
+            session = cursor.fetchone()
+            chunks = self._chunks(cursor, session_id) if session else []
+            connection.commit()
+        return self._with_progress(dict(session), chunks) if session else None
+
+    def apply_chunk(self, session_id: str, chunk_number: int, items: List[dict]) -> Optional[Dict[str, Any]]:
+        """
+        Grava um bloco da sessão e o seu checkpoint na mesma transação.
+
+        Os blocos de uma sessão são aplicados em ordem (a linha da sessão fica travada durante o
+        bloco). Um bloco já confirmado é respondido a partir do checkpoint, sem nova gravação.
+
+        Returns:
+            Resultado do bloco (ids gravados, contagens e o próximo bloco esperado), ou None caso a sessão não exista.
+
+        Raises:
+            ChunkOrderError: Caso o bloco não seja o próximo esperado ou a sessão já tenha sido concluída.
+            IngestionError: Caso algum item do bloco seja inválido. Nada é gravado nesse caso.
+        """
+        self.ensure_tables()
+        with get_handson_pool().connection() as connection:
+            with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("SELECT params, status, last_chunk FROM upload_sessions WHERE id = %s FOR UPDATE;", (session_id,))
+                session = cursor.fetchone()
+                if session is None:
+                    return None
+
+                cursor.execute("""
+                    SELECT rows, summary, data
+                    FROM upload_session_chunks
+                    WHERE session_id = %s
+                    AND chunk_number = %s;
+                """, (session_id, chunk_number))
+                acknowledged = cursor.fetchone()
+
+            if acknowledged is not None:
+                connection.commit()
+                next_chunk = session["last_chunk"] + 1 if session["status"] == "open" else None
+                return {"session_id": session_id, "chunk": chunk_number, "replayed": True, "next_chunk": next_chunk, **acknowledged}
+
+            if session["status"] != "open":
+                raise ChunkOrderError(f"A sessão {session_id} já foi concluída.")
+            expected = session["last_chunk"] + 1
+            if chunk_number != expected:
+                raise ChunkOrderError(f"Bloco {chunk_number} fora de ordem: o próximo bloco esperado é o {expected}.", expected)
+
+            params = session["params"]
+            ingestion = HandsOnIngestion(params["schema_name"], params["table_name"], params["company_id"])
+            with connection.cursor() as cursor:
+                data = ingestion.write(cursor, items)
+                cursor.execute("""
+                    INSERT INTO upload_session_chunks (session_id, chunk_number, rows, summary, data)
+                    VALUES (%s, %s, %s, %s, %s);
+                """, (session_id, chunk_number, len(items), Json(ingestion.summary), Json(data)))
+                cursor.execute("UPDATE upload_sessions SET last_chunk = %s, updated_at = now() WHERE id = %s;",
+                               (chunk_number, session_id))
+            connection.commit()
+
+        count_cache.invalidate(params["schema_name"], params["table_name"])
+        return {
+            "session_id": session_id,
+            "chunk": chunk_number,
+            "replayed": False,
+            "next_chunk": chunk_number + 1,
+            "rows": len(items),
+            "summary": ingestion.summary,
+            "data": data,
+        }
+
+    def complete(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Conclui a sessão (novos blocos passam a ser recusados) e devolve o resumo consolidado.
+
+        Concluir de novo uma sessão já concluída devolve o mesmo resumo.
+        """
+        self.ensure_tables()
+        with get_handson_pool().connection() as connection, connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(f"""
+                UPDATE upload_sessions
+                SET status = 'completed',
+                    completed_at = COALESCE(completed_at, now()),
+                    updated_at = now()
+                WHERE id = %s
+                RETURNING {_SESSION_COLUMNS};
+            """, (session_id,))
+            session = cursor.fetchone()
+            chunks = self._chunks(cursor, session_id) if session else []
+            connection.commit()
+        return self._with_progress(dict(session), chunks) if session else None
+
+
+upload_session_store = UploadSessionStore()
@@ -0,0 +1,240 @@
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - Brotli é opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard é opcional
+    zstandard = None
+
+# Níveis voltados para velocidade: as respostas são geradas por requisição, não pré-comprimidas
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+# Tipos de conteúdo comprimidos (xlsx e parquet já são comprimidos internamente)
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+
+class _StreamCompressor:
+    """Compressor incremental: `compress` devolve os bytes já descarregados do bloco e `finish` o final."""
+
+    def __init__(self, compress: Callable[[bytes], bytes], finish: Callable[[], bytes]) -> None:
+        self.compress = compress
+        self.finish = finish
+
+
+def _gzip() -> _StreamCompressor:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return _StreamCompressor(
+        lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def _brotli() -> _StreamCompressor:
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    return _StreamCompressor(lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish)
+
+
+def _zstd() -> _StreamCompressor:
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return _StreamCompressor(
+        lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush,
+    )
+
+
+# Codificações suportadas, na ordem de preferência do servidor
+ENCODINGS: Dict[str, Callable[[], _StreamCompressor]] = {
+    name: factory
+    for name, factory, available in (
+        ("br", _brotli, brotli is not None),
+        ("zstd", _zstd, zstandard is not None),
+        ("gzip", _gzip, True),
+    )
+    if available
+}
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    """Codificações do `Accept-Encoding` com o seu peso (q)."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Escolhe a codificação da resposta a partir do `Accept-Encoding`.
+
+    Vence o maior peso (q) aceito pelo cliente; no empate vale a preferência do servidor
+    (br, zstd, gzip). `*` vale para as codificações não listadas e q=0 recusa a codificação.
+
+    Returns:
+        O nome da codificação, ou None para responder sem compressão.
+    """
+    weights = _accepted(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    candidates = [(weights.get(name, wildcard), -index, name) for index, name in enumerate(ENCODINGS)]
+    weight, _, name = max(candidates, default=(0.0, 0, None))
+    return name if weight > 0 else None
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Compressão das respostas negociada pelo `Accept-Encoding` (br, zstd ou gzip).
+
+    Respostas menores que `minimum_size` saem sem compressão. Respostas em streaming
+    (`StreamingResponse`, exportações e NDJSON) são comprimidas bloco a bloco, com flush a cada
+    bloco para o cliente receber os dados assim que chegam. Blocos a partir de `thread_size`
+    bytes são comprimidos no threadpool, para não travar o event loop.
+
+    Args:
+        app (ASGIApp): Aplicação.
+        minimum_size (int): Tamanho mínimo (bytes) para comprimir.
+        thread_size (int): Tamanho a partir do qual a compressão sai do event loop.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, thread_size: int = 64 * 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_size = thread_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = _CompressedResponse(send, encoding, self.minimum_size, self.thread_size)
+        await self.app(scope, receive, response.on_message)
+
+
+class _CompressedResponse:
+    """Estado da compressão de uma resposta: segura o início até saber se vale comprimir."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int, thread_size: int) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.thread_size = thread_size
+        self.start: Optional[Message] = None
+        self.pending: List[bytes] = []
+        self.pending_size = 0
+        self.compressor: Optional[_StreamCompressor] = None
+        self.passthrough = False
+
+    async def _run(self, function: Callable[..., bytes], *args: bytes) -> bytes:
+        if sum(len(arg) for arg in args) >= self.thread_size:
+            return await run_in_threadpool(function, *args)
+        return function(*args)
+
+    async def _send_start(self, compressed: bool, content_length: Optional[int] = None) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        if compressed:
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if content_length is None:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(content_length)
+        await self.send(self.start)
+
+    async def on_message(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            self.start = message
+            if message["status"] in (204, 304) or not _compressible(Headers(raw=message["headers"])):
+                self.passthrough = True
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            await self._send_chunk(body, more_body)
+            return
+
+        # Ainda sem compressor: junta os blocos até atingir o mínimo ou a resposta terminar
+        if body:
+            self.pending.append(body)
+            self.pending_size += len(body)
+
+        if not more_body and self.pending_size < self.minimum_size:
+            self.passthrough = True
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": b"".join(self.pending)})
+            return
+
+        if self.pending_size < self.minimum_size:
+            return
+
+        buffered = b"".join(self.pending)
+        self.pending = []
+        self.compressor = ENCODINGS[self.encoding]()
+
+        if not more_body:
+            compressed = await self._run(self._compress_all, buffered)
+            await self._send_start(True, len(compressed))
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        await self._send_start(True)
+        await self._send_chunk(buffered, True)
+
+    def _compress_all(self, body: bytes) -> bytes:
+        return self.compressor.compress(body) + self.compressor.finish()
+
+    async def _send_chunk(self, body: bytes, more_body: bool) -> None:
+        data = await self._run(self.compressor.compress, body) if body else b""
+        if not more_body:
+            data += self.compressor.finish()
+        if data or not more_body:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
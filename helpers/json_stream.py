@@ -0,0 +1,68 @@
+from typing import AsyncIterator, List
+
+import ijson
+
+
+class JSONStreamError(ValueError):
+    """Corpo da requisição que não é uma lista JSON de objetos."""
+
+
+async def iter_json_batches(chunks: AsyncIterator[bytes], batch_size: int) -> AsyncIterator[List[dict]]:
+    """
+    Lê uma lista JSON de objetos em blocos de bytes (ex.: `request.stream()`) e devolve os objetos em lotes.
+
+    O parser do ijson é alimentado a cada bloco recebido e os objetos completos saem assim que
+    fecham, sem manter o corpo inteiro em memória. Números decimais viram `float`, como no
+    `json` da biblioteca padrão.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Blocos do corpo da requisição.
+        batch_size (int): Objetos por lote.
+
+    Raises:
+        JSONStreamError: Caso o corpo não seja uma lista JSON de objetos.
+    """
+    items = ijson.sendable_list()
+    parser = ijson.items_coro(items, "item", use_float=True)
+    batch: List[dict] = []
+    position = 0
+    started = False
+
+    def take() -> None:
+        nonlocal position
+        for item in items:
+            position += 1
+            if not isinstance(item, dict):
+                raise JSONStreamError(f"O item {position} da lista não é um objeto JSON.")
+            batch.append(item)
+        del items[:]
+
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                # Para o ijson um envio vazio é o fim do documento (o `request.stream()` termina com b"")
+                continue
+            if not started:
+                stripped = chunk.lstrip()
+                if not stripped:
+                    continue
+                if not stripped.startswith(b"["):
+                    raise JSONStreamError("O corpo da requisição deve ser uma lista JSON de objetos.")
+                started = True
+
+            parser.send(chunk)
+            take()
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                del batch[:batch_size]
+
+        if not started:
+            raise JSONStreamError("O corpo da requisição está vazio.")
+        parser.close()
+        take()
+    except ijson.JSONError as e:
+        message = str(e).splitlines()[0] if str(e) else type(e).__name__
+        raise JSONStreamError(f"JSON inválido após o item {position}: {message}")
+
+    if batch:
+        yield batch
@@ -0,0 +1,229 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from helpers.utils import normalize_column_name
+
+# Mesmos formatos aceitos por `parse_date`
+DATE_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y")
+
+DATE_HEADER = "DATA"
+NEWS_CODE_HEADER = "CÓDIGO DA NOTÍCIA"
+VALUATION_HEADER = "VALORAÇÃO"
+INTEGER_HEADERS = ("TIER", "ALCANCE")
+
+# Cabeçalho da planilha -> campo de `clippings_news` (os campos numéricos são tratados à parte)
+CLIPPING_TEXT_FIELDS = {
+    "vehicle": "VEÍCULO",
+    "title": "TÍTULO",
+    "theme": "TEMA",
+    "subject_name_slug": "MICROTEMA",
+    "media_type": "TIPO VEÍCULO",
+    "feeling": "SENTIMENTO",
+    "journalist": "JORNALISTA",
+    "original_link": "LINK ORIGINAL",
+}
+
+
+@lru_cache(maxsize=4096)
+def column_name(header: str) -> str:
+    """`normalize_column_name` com cache: cada cabeçalho é normalizado uma vez por processo."""
+    return normalize_column_name(header)
+
+
+def _missing(values: pd.Series) -> pd.Series:
+    """Células ausentes, nulas ou com texto vazio."""
+    text = values.astype("string").str.strip()
+    return (text.isna() | text.eq("")).fillna(True).astype(bool)
+
+
+def _to_list(values: pd.Series, missing: pd.Series) -> List[Any]:
+    """Converte para lista Python com None nas células ausentes (sem tipos do NumPy, para o psycopg2)."""
+    return [None if is_missing else value for value, is_missing in zip(values.tolist(), missing.tolist())]
+
+
+def detect_date_format(values: pd.Series) -> Optional[str]:
+    """Formato de data do primeiro valor preenchido da coluna, ou None se nenhum formato servir."""
+    filled = values.dropna()
+    if filled.empty:
+        return None
+    sample = str(filled.iloc[0]).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            datetime.strptime(sample, date_format)
+            return date_format
+        except ValueError:
+            continue
+    return None
+
+
+def parse_dates(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Converte a coluna de datas para 'YYYY-MM-DD' com `to_datetime` vetorizado.
+
+    O formato detectado no primeiro valor é aplicado à coluna inteira e os demais formatos
+    só são tentados nas linhas que não casaram com ele.
+
+    Returns:
+        (datas em texto, máscara das linhas inválidas).
+    """
+    text = values.astype("string").str.strip()
+    detected = detect_date_format(text)
+    formats = ([detected] if detected else []) + [date_format for date_format in DATE_FORMATS if date_format != detected]
+
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for date_format in formats:
+        pending = parsed.isna() & text.notna()
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(text[pending], format=date_format, errors="coerce")
+
+    invalid = parsed.isna()
+    return parsed.dt.strftime("%Y-%m-%d"), invalid
+
+
+def coerce_integers(values: pd.Series) -> Tuple[List[int], pd.Series]:
+    """
+    Converte a coluna para inteiros (vazio vira 0, como `clean_value(..., is_integer=True)`).
+
+    Returns:
+        (inteiros, máscara das linhas com valor não numérico).
+    """
+    missing = _missing(values)
+    numbers = pd.to_numeric(values.where(~missing).astype("string").str.strip(), errors="coerce")
+    numbers = numbers.to_numpy(dtype="float64", na_value=np.nan)
+    invalid = pd.Series(np.isnan(numbers), index=values.index) & ~missing
+    # Trunca como `int()` e devolve int do Python
+    return np.trunc(np.nan_to_num(numbers, nan=0.0)).astype(np.int64).tolist(), invalid
+
+
+def coerce_valuation(values: pd.Series) -> Tuple[List[str], pd.Series]:
+    """
+    Normaliza a VALORAÇÃO para texto decimal ('1234.56').
+
+    Textos em formato brasileiro ('R$ 1.234,56') perdem o 'R$' e os separadores de milhar e trocam
+    a vírgula por ponto; valores que já chegam numéricos (células do .xlsx) são mantidos. Vazio vira '0.00'.
+
+    Returns:
+        (valores em texto, máscara das linhas com valor não numérico).
+    """
+    missing = _missing(values)
+    is_text = values.map(lambda value: isinstance(value, str))
+    text = values.astype("string").str.strip()
+    brazilian = (
+        text.str.replace("R$", "", regex=False)
+        .str.replace(".", "", regex=False)
+        .str.replace(",", ".", regex=False)
+        .str.strip()
+    )
+    cleaned = brazilian.where(is_text, text).where(~missing, "0.00")
+    invalid = pd.to_numeric(cleaned, errors="coerce").isna()
+    return cleaned.tolist(), invalid
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)) else str(value)
+
+
+def _column(frame: pd.DataFrame, header: str) -> pd.Series:
+    if header in frame.columns:
+        return frame[header]
+    return pd.Series([None] * len(frame), index=frame.index, dtype=object)
+
+
+def _errors(frame: pd.DataFrame, header: str, invalid: pd.Series, message: str) -> List[Dict[str, Any]]:
+    values = _column(frame, header)
+    return [
+        {"row": position + 1, "column": header, "value": _text(values.iloc[position]), "message": message}
+        for position in invalid.to_numpy().nonzero()[0].tolist()
+    ]
+
+
+def normalize_news_batch(
+    json_data: Sequence[dict],
+    table_columns: set,
+    company_id: Any,
+    now: Optional[datetime] = None,
+) -> Tuple[List[Tuple[Any, Dict[str, Any], Dict[str, Any]]], List[Dict[str, Any]]]:
+    """
+    Etapa colunar de preparação de um lote do upload de notícias.
+
+    O lote vira um DataFrame; datas, TIER, ALCANCE e VALORAÇÃO são convertidos por coluna e o
+    mapeamento cabeçalho -> coluna da tabela dinâmica é feito uma vez por cabeçalho. A saída tem
+    o mesmo formato de `NewsIngestion._prepare`: (news_code, dados do clipping, dados da tabela
+    dinâmica) por item, na ordem do lote. Cada item só leva para a tabela dinâmica as chaves que
+    ele próprio trouxe.
+
+    Args:
+        json_data (Sequence[dict]): Itens do upload.
+        table_columns (set): Colunas da tabela dinâmica.
+        company_id: Identificador da empresa no clipping.
+        now (datetime): Data de criação/modificação gravada no clipping.
+
+    Returns:
+        (itens preparados, erros). Os erros trazem a linha (1 = primeiro item do lote), a coluna,
+        o valor e a mensagem; com algum erro, os itens preparados não devem ser gravados.
+    """
+    now = now or datetime.now()
+    frame = pd.DataFrame(list(json_data), dtype=object)
+    frame.index = pd.RangeIndex(len(frame))
+
+    dates, invalid_dates = parse_dates(_column(frame, DATE_HEADER))
+    integers = {}
+    errors = _errors(frame, DATE_HEADER, invalid_dates, "Formato de data inválido.")
+    for header in INTEGER_HEADERS:
+        integers[header], invalid = coerce_integers(_column(frame, header))
+        errors += _errors(frame, header, invalid, f"{header} deve ser numérico.")
+    valuations, invalid_valuations = coerce_valuation(_column(frame, VALUATION_HEADER))
+    errors += _errors(frame, VALUATION_HEADER, invalid_valuations, f"{VALUATION_HEADER} deve ser numérica.")
+
+    if errors:
+        return [], sorted(errors, key=lambda error: error["row"])
+
+    dates_list = dates.tolist()
+    codes = _column(frame, NEWS_CODE_HEADER)
+    news_codes = [None if value is None else str(value) for value in _to_list(codes, _missing(codes))]
+    texts = {}
+    for field, header in CLIPPING_TEXT_FIELDS.items():
+        values = _column(frame, header)
+        texts[field] = [None if is_null else value for value, is_null in zip(values.tolist(), values.isna().tolist())]
+
+    # Colunas da tabela dinâmica: cabeçalho -> (coluna, valores com '' como None)
+    dynamic: Dict[str, Tuple[str, List[Any]]] = {}
+    for header in frame.columns:
+        column = column_name(str(header))
+        if column in table_columns:
+            values = frame[header]
+            dynamic[header] = (column, [None if value == "" else value for value in values.tolist()])
+
+    prepared = []
+    for position, item in enumerate(json_data):
+        news_id = news_codes[position]
+        clipping_data = {
+            "news_code": news_id,
+            "publication_date": dates_list[position],
+            **{field: values[position] for field, values in texts.items()},
+            "tier": integers["TIER"][position],
+            "readers": integers["ALCANCE"][position],
+            "valuation": valuations[position],
+            "created_date": now,
+            "modified_date": now,
+            "is_active": True,
+            "approved_news": True,
+            "company_id": company_id,
+        }
+
+        normalized_data = {dynamic[key][0]: dynamic[key][1][position] for key in item if key in dynamic}
+        if "news_code" in table_columns:
+            normalized_data["news_code"] = news_id
+        if "date" in table_columns:
+            normalized_data["date"] = dates_list[position]
+        if "company_id" in table_columns:
+            normalized_data["company_id"] = company_id
+
+        prepared.append((news_id, clipping_data, normalized_data))
+
+    return prepared, []
@@ -0,0 +1,73 @@
+import uuid
+from decimal import Decimal
+from typing import Any, AsyncIterator, List, Optional
+
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Mesmas opções do `ORJSONResponse` do FastAPI: chaves não-texto e tipos do NumPy (pandas)
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """Tipos que o orjson não serializa sozinho, convertidos como no `jsonable_encoder`."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        # Subclasses de UUID (ex.: a do asyncpg) não são reconhecidas pelo orjson
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializa em JSON com orjson.
+
+    `date`, `datetime` e `UUID` saem em ISO 8601/texto direto do orjson, e `Decimal` vira número,
+    como no `jsonable_encoder`.
+    """
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Resposta JSON serializada direto com orjson, sem passar pelo `jsonable_encoder`.
+
+    As rotas de leitura devolvem esta resposta em vez do dicionário: o FastAPI só dispensa o
+    `jsonable_encoder` quando a rota já devolve um `Response`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def ndjson_lines(rows: List[Any]) -> bytes:
+    """Um objeto JSON por linha, cada linha terminada em '\\n'."""
+    return b"".join(dumps(row) + b"\n" for row in rows)
+
+
+async def ndjson_response(batches: AsyncIterator[List[Any]]) -> Optional[StreamingResponse]:
+    """
+    Resposta NDJSON enviada à medida que os lotes de linhas chegam.
+
+    O primeiro lote é lido antes de responder, então um erro na consulta ou uma listagem vazia
+    ainda podem virar um status de erro na rota.
+
+    Returns:
+        A resposta, ou None caso não haja nenhuma linha.
+    """
+    try:
+        first = await batches.__anext__()
+    except StopAsyncIteration:
+        return None
+
+    async def body() -> AsyncIterator[bytes]:
+        yield ndjson_lines(first)
+        async for batch in batches:
+            yield ndjson_lines(batch)
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
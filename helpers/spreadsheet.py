@@ -0,0 +1,124 @@
+import csv
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date, datetime, time
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+# Extensões aceitas no upload de planilhas
+SPREADSHEET_EXTENSIONS = (".xlsx", ".csv")
+
+# Bloco de cópia ao gravar o upload em disco
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def spreadsheet_extension(filename: Optional[str]) -> str:
+    """
+    Extensão (minúscula) de um arquivo de planilha.
+
+    Raises:
+        ValueError: Caso o arquivo não seja .xlsx nem .csv.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in SPREADSHEET_EXTENSIONS:
+        raise ValueError(f"Formato de arquivo não suportado: '{extension or filename}'. Envie um arquivo {' ou '.join(SPREADSHEET_EXTENSIONS)}.")
+    return extension
+
+
+def spool_to_disk(source: BinaryIO, extension: str) -> str:
+    """Grava o upload em um arquivo temporário em blocos e retorna o caminho (quem chama apaga o arquivo)."""
+    with tempfile.NamedTemporaryFile(prefix="upload_", suffix=extension, delete=False) as target:
+        shutil.copyfileobj(source, target, SPOOL_CHUNK_SIZE)
+        return target.name
+
+
+def _cell_value(value: Any) -> Any:
+    """Converte a célula para o mesmo formato dos itens JSON enviados hoje pelos clientes."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%d/%m/%Y %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%d/%m/%Y")
+    if isinstance(value, time):
+        return value.strftime("%H:%M:%S")
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _header(cells) -> List[Optional[str]]:
+    return [str(cell).strip() if cell not in (None, "") else None for cell in cells]
+
+
+def _rows(header: List[Optional[str]], rows) -> Iterator[Dict[str, Any]]:
+    for cells in rows:
+        values = [_cell_value(cell) for cell in cells]
+        if all(value == "" for value in values):
+            continue
+        yield {
+            column: values[index] if index < len(values) else ""
+            for index, column in enumerate(header)
+            if column
+        }
+
+
+def _iter_xlsx(path: str) -> Iterator[Dict[str, Any]]:
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    # read_only lê as linhas sob demanda a partir do XML, sem carregar a planilha inteira
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile) as e:
+        raise ValueError(f"Arquivo .xlsx inválido: {e}")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        for cells in rows:
+            if any(cell not in (None, "") for cell in cells):
+                yield from _rows(_header(cells), rows)
+                break
+    finally:
+        workbook.close()
+
+
+# Separadores reconhecidos no .csv (o Excel em pt-BR exporta com ';')
+CSV_DELIMITERS = (",", ";", "\t", "|")
+
+
+def _delimiter(file) -> str:
+    """Separador mais frequente na primeira linha não vazia (o cabeçalho)."""
+    for line in file:
+        if line.strip():
+            return max(CSV_DELIMITERS, key=line.count)
+    return ","
+
+
+def _iter_csv(path: str, encoding: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding=encoding) as file:
+        delimiter = _delimiter(file)
+        file.seek(0)
+
+        rows = csv.reader(file, delimiter=delimiter)
+        for cells in rows:
+            if any(cell.strip() for cell in cells):
+                yield from _rows(_header(cells), rows)
+                break
+
+
+def iter_spreadsheet(path: str, extension: str, encoding: str = "utf-8-sig") -> Iterator[Dict[str, Any]]:
+    """
+    Lê uma planilha linha a linha, como dicionários {cabeçalho: valor}.
+
+    A primeira linha não vazia é o cabeçalho e as linhas vazias são ignoradas. Datas do .xlsx
+    viram texto 'dd/mm/aaaa hh:mm:ss' e células vazias viram '', como nos itens JSON de upload.
+
+    Args:
+        path (str): Caminho do arquivo.
+        extension (str): `.xlsx` ou `.csv`.
+        encoding (str): Codificação do .csv.
+    """
+    if extension == ".xlsx":
+        return _iter_xlsx(path)
+    return _iter_csv(path, encoding)
@@ -1,5 +1,11 @@
 import unicodedata
 import re
+from datetime import datetime
+from typing import Optional, Union
+
+from fastapi import HTTPException
+
+from db.pagination import InvalidCursorError, Keyset, decode_cursor
 
 
 def normalize_string(value) -> str:
@@ -24,3 +30,64 @@ def normalize_string(value) -> str:
     value = re.sub(r'_+', '_', value)
 
     return value.lower()
+
+
+def parse_date(date_str):
+    """
+    Tenta converter uma string de data para um formato 'YYYY-MM-DD',
+    suportando diferentes formatos de entrada.
+    """
+    formats = ["%d/%m/%Y %H:%M:%S", "%d/%m/%Y"]
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"Formato de data inválido: {date_str}")
+
+def normalize_column_name(name: str) -> str:
+    """Converte nomes de colunas para minúsculas, substitui espaços por '_', remove acentos e caracteres especiais."""
+    name = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore').decode('utf-8')  # Remove acentos
+    name = re.sub(r'[^a-zA-Z0-9_]', '_', name)  # Substitui espaços e caracteres especiais por '_'
+    name = re.sub(r'__+', '_', name)  # Remove underscores duplos
+    return name.lower()  # Converte para minúsculas
+
+def clean_value(value: Union[str, None], is_integer: bool = False, is_string: bool = False) -> Union[str, int, None]:
+    """
+    Normaliza os valores:
+    - Se for string vazia, retorna None.
+    - Se for inteiro e inválido, retorna 0.
+    - Se for string e deve ser forçada para VARCHAR, converte para string.
+    """
+    if value is None or value == "":
+        return None if not is_integer else 0
+
+    if is_integer:
+        return int(value)
+
+    if is_string:
+        return str(value)  # 🔹 Converte explicitamente para string
+
+    return value
+
+
+def check_cursor(cursor: Optional[str], keyset: Optional[Keyset] = None) -> None:
+    """
+    Valida o token de paginação por cursor recebido na query string.
+
+    Args:
+        cursor (str): Token `next_cursor` recebido.
+        keyset (Keyset): Ordenação da listagem, quando conhecida, para validar também a origem do token.
+
+    Raises:
+        HTTPException: 400 caso o token seja inválido.
+    """
+    if not cursor:
+        return
+    try:
+        if keyset is not None:
+            keyset.after(cursor)
+        else:
+            decode_cursor(cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -6,11 +6,42 @@ import sys
 from fastapi import FastAPI
 import os   
 from fastapi.middleware.cors import CORSMiddleware
+from config.config import COMPRESSION_MINIMUM_SIZE, COMPRESSION_THREAD_SIZE
+from helpers.compression import CompressionMiddleware
 from api.v1.endpoints.routers import api_router
+from db.pool import close_pools
+from db.async_pool import close_async_pools
+from api.v1.apps.files.service.jobs import job_runner
+from db.two_phase import prepared_sweeper
 
 app = FastAPI(title='Hands-On')
 app.include_router(api_router)
 
+
+@app.on_event("startup")
+def recover_uploads():
+    """Sobe a varredura periódica das transações preparadas (2PC) deixadas pendentes por uploads interrompidos."""
+    prepared_sweeper.start()
+
+
+@app.on_event("startup")
+def start_job_workers():
+    """Sobe os workers dos jobs de upload e retoma os jobs pendentes."""
+    try:
+        job_runner.start()
+    except Exception as e:
+        # Sem banco na subida os workers são iniciados no primeiro upload
+        logger.error(f"Não foi possível iniciar os workers de jobs: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_pools():
+    """Encerra os workers de jobs, a varredura de 2PC e as conexões ociosas dos pools de banco de dados (psycopg2 e asyncpg)."""
+    job_runner.shutdown()
+    prepared_sweeper.stop()
+    close_pools()
+    await close_async_pools()
+
 origins = [
     "http://localhost.tiangolo.com",
     "https://localhost.tiangolo.com",
@@ -26,6 +57,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    thread_size=COMPRESSION_THREAD_SIZE,
+)
+
 
 logger.add("logs/logs.log",  serialize=False)
 logger.add(sys.stdout, colorize=True, format="<green>{time}</green> <level>{message}</level>", backtrace=True, diagnose=True)
@@ -1,6 +1,7 @@
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
-from api.v1.apps.companys.service.customize_company import create_table, create_column_string, create_column_integer
+from unittest.mock import patch, MagicMock, AsyncMock
+from api.v1.apps.companys.service.customize_company import create_table_service, create_columns_service, set_records_deleted_service
 
 @pytest.fixture
 def mock_create_in_db():
@@ -10,203 +11,1089 @@ def mock_create_in_db():
 def test_create_table_success(mock_create_in_db):
     mock_instance = MagicMock()
     mock_create_in_db.return_value = mock_instance
-    mock_instance.create_table.return_value = "Tabela criada com sucesso."
+    mock_instance._create_table.return_value = "Tabela criada com sucesso."
 
-    result = create_table("test_table")
+    result = create_table_service("test_table", "test_schema")
 
-    mock_instance.create_table.assert_called_once_with("test_table")
+    mock_instance._create_table.assert_called_once_with("test_table", "test_schema", None)
     assert result == "Tabela criada com sucesso."
 
 def test_create_table_error(mock_create_in_db):
     mock_instance = MagicMock()
     mock_create_in_db.return_value = mock_instance
-    mock_instance.create_table.side_effect = Exception("Erro simulado ao criar tabela.")
+    mock_instance._create_table.side_effect = Exception("Erro simulado ao criar tabela.")
 
-    result = create_table("invalid_table")
+    result = create_table_service("invalid_table", "test_schema")
 
-    mock_instance.create_table.assert_called_once_with("invalid_table")
+    mock_instance._create_table.assert_called_once_with("invalid_table", "test_schema", None)
     assert result == "Erro ao criar tabela: Erro simulado ao criar tabela."
 
 @pytest.fixture
-def mock_insert_column_string():
-    with patch("api.v1.apps.companys.service.customize_company.InsertColumn") as mock_class:  # Ajuste 'my_module' conforme necessário
+def mock_insert_columns():
+    with patch("api.v1.apps.companys.service.customize_company.InsertColumn") as mock_class:
         yield mock_class
 
-def test_create_column_string_success(mock_insert_column_string):
+def test_create_columns_success(mock_insert_columns):
     mock_instance = MagicMock()
-    mock_insert_column_string.return_value = mock_instance
-    mock_instance._insert_column_string.return_value = "Coluna criada com sucesso."
+    mock_insert_columns.return_value = mock_instance
+    mock_instance._insert_columns.return_value = "2 colunas criadas em test_schema.test_table."
 
-    result = create_column_string("test_db", "test_column")
+    result = create_columns_service("test_table", "test_schema", ["tema", "veiculo"], "text")
 
-    mock_instance._insert_column_string.assert_called_once_with("test_db", "test_column")
-    assert result == "Coluna criada com sucesso."
+    mock_instance._insert_columns.assert_called_once_with("test_table", "test_schema", ["tema", "veiculo"], "text")
+    assert result == "2 colunas criadas em test_schema.test_table."
 
-def test_create_column_string_error(mock_insert_column_string):
-    mock_instance = MagicMock()
-    mock_insert_column_string.return_value = mock_instance
-    mock_instance._insert_column_string.side_effect = Exception("Erro simulado ao criar coluna.")
+def test_add_columns_creates_each_table_once_and_maps_lock_timeout_to_503():
+    from api.v1.endpoints import custom
+    from db.insert_column import ColumnLockTimeout
+    from fastapi import HTTPException
+
+    payload = {
+        "tables": [{"table_name": "braskem"}, {"table_name": "vale"}],
+        "schemas": [{"schema_name": "clientes"}],
+        "columns": [{"column_name": "tema"}, {"column_name": "veiculo"}, {"column_name": "tema"}],
+    }
+    with patch.object(custom, "create_columns_service") as create_columns:
+        custom._add_columns(payload, "integer")
+    assert [call.args for call in create_columns.call_args_list] == [
+        ("braskem", "clientes", ["tema", "veiculo"], "integer"),
+        ("vale", "clientes", ["tema", "veiculo"], "integer"),
+    ]
 
-    result = create_column_string("invalid_db", "invalid_column")
+    with patch.object(custom, "create_columns_service", side_effect=ColumnLockTimeout("ocupada")):
+        with pytest.raises(HTTPException) as error:
+            custom._add_columns(payload, "integer")
+    assert error.value.status_code == 503
 
-    mock_instance._insert_column_string.assert_called_once_with("invalid_db", "invalid_column")
-    assert result == "Erro ao criar tabela: Erro simulado ao criar coluna."
+    with pytest.raises(HTTPException) as error:
+        custom._add_columns({**payload, "columns": [{"column_name": ""}]}, "integer")
+    assert error.value.status_code == 400
 
 
 @pytest.fixture
-def mock_insert_column_integer():
-    with patch("api.v1.apps.companys.service.customize_company.InsertColumn") as mock_class:  # Ajuste o caminho conforme necessário
+def mock_edit_registers():
+    with patch("api.v1.apps.companys.service.customize_company.EditRegisters") as mock_class:
         yield mock_class
 
-def test_insert_column_integer_success(mock_insert_column_integer):
+def test_set_records_deleted_success(mock_edit_registers):
     mock_instance = MagicMock()
-    mock_insert_column_integer.return_value = mock_instance
-    mock_instance._insert_column_integer.return_value = "Coluna adicionada com sucesso."
+    mock_edit_registers.return_value = mock_instance
+    mock_instance._set_deleted.return_value = {"updated": 2, "clipping_updated": 2, "clipping": "ok"}
 
-    result = mock_instance._insert_column_integer("test_table", "test_column")
+    result = set_records_deleted_service("test_table", "test_schema", True, [1, 2])
 
-    mock_instance._insert_column_integer.assert_called_once_with("test_table", "test_column")
-    assert result == "Coluna adicionada com sucesso."
+    mock_instance._set_deleted.assert_called_once_with("test_table", "test_schema", True, [1, 2], None, None)
+    assert result == {"updated": 2, "clipping_updated": 2, "clipping": "ok"}
 
-def test_insert_column_integer_error(mock_insert_column_integer):
+def test_set_records_deleted_failure(mock_edit_registers):
     mock_instance = MagicMock()
-    mock_insert_column_integer.return_value = mock_instance
-    mock_instance._insert_column_integer.side_effect = Exception("Erro simulado ao adicionar coluna.")
+    mock_edit_registers.return_value = mock_instance
+    mock_instance._set_deleted.side_effect = Exception("Erro simulado")
 
-    try:
-        result = mock_instance._insert_column_integer("invalid_table", "invalid_column")
-    except Exception as e:
-        result = f"Erro ao adicionar coluna: {str(e)}"
+    with pytest.raises(Exception, match="Erro simulado"):
+        set_records_deleted_service("test_table", "test_schema", False, start_date="2024-01-01", end_date="2024-01-31")
 
-    mock_instance._insert_column_integer.assert_called_once_with("invalid_table", "invalid_column")
-    assert result == "Erro ao adicionar coluna: Erro simulado ao adicionar coluna."
+    mock_instance._set_deleted.assert_called_once_with("test_table", "test_schema", False, None, "2024-01-01", "2024-01-31")
 
 
 @pytest.fixture
-def mock_delete_column():
-    with patch("api.v1.apps.companys.service.company_service.InsertColumn") as mock_class:
+def mock_insert_column():
+    with patch("api.v1.apps.companys.service.company_service.AsyncEditRegisters") as mock_class:
         yield mock_class
 
-def test_delete_column_success(mock_delete_column):
+def test_trash_success(mock_insert_column):
     mock_instance = MagicMock()
-    mock_delete_column.return_value = mock_instance
-    mock_instance._mark_as_deleted_by_id.return_value = "Registro marcado como deletado com sucesso."
+    mock_insert_column.return_value = mock_instance
+    page = {"trash": [{"id": 1}], "total_records": 1}
+    mock_instance._get_deleted_records = AsyncMock(return_value=page)
 
-    from api.v1.apps.companys.service.company_service import delete_column
+    from api.v1.apps.companys.service.company_service import trash_register_service
 
-    result = delete_column("test_db", "test_record_id")
+    result = asyncio.run(trash_register_service("test_db", "test_schema"))
 
-    mock_instance._mark_as_deleted_by_id.assert_called_once_with("test_db", "test_record_id")
+    mock_instance._get_deleted_records.assert_called_once_with("test_db", "test_schema", 10, 0, None, "exact")
 
-    assert result == "Registro marcado como deletado com sucesso."
+    assert result == page
 
-def test_delete_column_failure(mock_delete_column):
+def test_trash_failure(mock_insert_column):
     mock_instance = MagicMock()
-    mock_delete_column.return_value = mock_instance
-    mock_instance._mark_as_deleted_by_id.side_effect = Exception("Erro simulado")
+    mock_insert_column.return_value = mock_instance
+    mock_instance._get_deleted_records = AsyncMock(side_effect=Exception("Erro simulado"))
 
-    from api.v1.apps.companys.service.company_service import delete_column 
+    from api.v1.apps.companys.service.company_service import trash_register_service
 
-    result = delete_column("test_db", "test_record_id")
+    result = asyncio.run(trash_register_service("test_db", "test_schema"))
 
-    mock_instance._mark_as_deleted_by_id.assert_called_once_with("test_db", "test_record_id")
+    mock_instance._get_deleted_records.assert_called_once_with("test_db", "test_schema", 10, 0, None, "exact")
 
-    # Verifica o resultado
-    assert "Erro ao criar tabela: Erro simulado" in result
+    assert "Erro ao consultar tabela: Erro simulado" in result["error"]
 
 
 @pytest.fixture
-def mock_delete_column():
-    with patch("api.v1.apps.companys.service.company_service.InsertColumn") as mock_class:
+def mock_insert_column():
+    with patch("api.v1.apps.companys.service.company_service.AsyncEditRegisters") as mock_class:
         yield mock_class
 
-def test_delete_column_success(mock_delete_column):
+def test_get_records_success(mock_insert_column):
     mock_instance = MagicMock()
-    mock_delete_column.return_value = mock_instance
-    mock_instance._mark_as_deleted_by_id.return_value = "Registro marcado como deletado com sucesso."
+    mock_insert_column.return_value = mock_instance
+    page = {"active_records": [{"id": 1}], "total_records": 1}
+    mock_instance._get_active_record = AsyncMock(return_value=page)
 
-    from api.v1.apps.companys.service.company_service import delete_column
+    from api.v1.apps.companys.service.company_service import get_records_service
 
-    result = delete_column("test_db", "test_record_id")
+    result = asyncio.run(get_records_service("test_db", "test_schema"))
 
-    mock_instance._mark_as_deleted_by_id.assert_called_once_with("test_db", "test_record_id")
+    mock_instance._get_active_record.assert_called_once_with("test_db", "test_schema", 10, 0, None, "exact", "json")
 
-    assert result == "Registro marcado como deletado com sucesso."
+    assert result == page
 
-def test_delete_column_failure(mock_delete_column):
+def test_get_records_failure(mock_insert_column):
     mock_instance = MagicMock()
-    mock_delete_column.return_value = mock_instance
-    mock_instance._mark_as_deleted_by_id.side_effect = Exception("Erro simulado")
+    mock_insert_column.return_value = mock_instance
+    mock_instance._get_active_record = AsyncMock(side_effect=Exception("Erro simulado"))
 
-    from api.v1.apps.companys.service.company_service import delete_column 
+    from api.v1.apps.companys.service.company_service import get_records_service
 
-    result = delete_column("test_db", "test_record_id")
+    result = asyncio.run(get_records_service("test_db", "test_schema"))
 
-    mock_instance._mark_as_deleted_by_id.assert_called_once_with("test_db", "test_record_id")
+    mock_instance._get_active_record.assert_called_once_with("test_db", "test_schema", 10, 0, None, "exact", "json")
 
-    # Verifica o resultado
-    assert "Erro ao criar tabela: Erro simulado" in result
+    assert "Erro ao consultar tabela: Erro simulado" in result["error"]
 
+def test_copy_value_escapes_text_format():
+    from db.ingestion import _copy_value
 
-@pytest.fixture
-def mock_insert_column():
-    with patch("api.v1.apps.companys.service.company_service.InsertColumn") as mock_class:
-        yield mock_class
+    assert _copy_value(None) == "\\N"
+    assert _copy_value(True) == "true"
+    assert _copy_value("linha 1\nlinha 2\tfim\\") == "linha 1\\nlinha 2\\tfim\\\\"
 
-def test_trash_success(mock_insert_column):
-    mock_instance = MagicMock()
-    mock_insert_column.return_value = mock_instance
-    mock_instance.get_deleted_records.return_value = "Registros deletados consultados com sucesso."
 
-    from api.v1.apps.companys.service.company_service import trash
+def test_schema_cache_counts_hits_and_invalidates():
+    from db.schema_cache import SchemaCache
 
-    result = trash("test_db")
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [(
+        "braskem",
+        [{"name": "id", "type": "integer", "data_type": "integer", "nullable": False}],
+        [{"name": "braskem_pkey", "type": "p", "columns": ["id"]}],
+        False,
+        None,
+    )]
+    cache = SchemaCache(ttl=0)
 
-    mock_instance.get_deleted_records.assert_called_once_with("test_db")
+    assert list(cache.columns(cursor, "meu_schema", "braskem")) == ["id"]
+    assert cache.get(cursor, "meu_schema", "braskem")["constraints"][0]["type"] == "PRIMARY KEY"
+    assert cursor.execute.call_count == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
 
-    assert result == "Registros deletados consultados com sucesso."
+    cache.invalidate("meu_schema")
+    cache.get(cursor, "meu_schema", "braskem")
+    assert cursor.execute.call_count == 2
 
-def test_trash_failure(mock_insert_column):
-    mock_instance = MagicMock()
-    mock_insert_column.return_value = mock_instance
-    mock_instance.get_deleted_records.side_effect = Exception("Erro simulado")
 
-    from api.v1.apps.companys.service.company_service import trash
+def test_news_export_joins_batch_by_news_code():
+    from db.export import NewsExport
+
+    export = NewsExport("meu_schema", "braskem", "2024-01-01", "2024-12-31")
+    export.dynamic_columns = ["id", "news_code", "date", "value"]
+    export.clipping_columns = ["news_code", "title"]
+    export._clipping = MagicMock()
+    cursor = export._clipping.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [("B", "Notícia B")]
+    cursor.description = [("news_code",), ("title",)]
+
+    rows = list(export._join_batch([(1, "A", "2024-01-01", 10), (2, "B", "2024-01-02", 20), (3, None, "2024-01-03", 30)]))
+
+    assert export.columns == ["news_code", "title", "date", "value"]
+    assert rows == [
+        [None, None, "2024-01-01", 10],
+        ["B", "Notícia B", "2024-01-02", 20],
+        [None, None, "2024-01-03", 30],
+    ]
+
+
+def test_export_unique_names_for_parquet_schema():
+    from db.export import _unique_names
+
+    assert _unique_names(["news_code", "company_id", "date", "company_id"]) == ["news_code", "company_id", "date", "company_id_1"]
+
+
+def test_news_code_join_is_keyed_not_positional():
+    from db.clipping_db.news_join import NewsCodeJoin
+
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [{"news_code": "2", "title": "Dois"}, {"news_code": "1", "title": "Um"}]
+    rows = [{"id": 10, "news_code": 1}, {"id": 11, "news_code": None}, {"id": 12, "news_code": "2"}]
+
+    pairs = NewsCodeJoin(cursor, lookup_size=500).join(rows, lambda row: row.get("news_code"))
+
+    assert [clipping["title"] if clipping else None for _, clipping in pairs] == ["Um", None, "Dois"]
+    assert cursor.execute.call_args[0][1] == (["1", "2"],)
+
+
+def test_keyset_cursor_round_trip_and_condition():
+    from datetime import date
+    from db.pagination import BY_DATE_DESC, BY_ID, InvalidCursorError
+
+    rows = [{"id": 7, "date": date(2024, 5, 1)}, {"id": 9, "date": date(2024, 4, 30)}]
+    token = BY_DATE_DESC.next_cursor(rows, limit=2)
+
+    condition, params = BY_DATE_DESC.after(token)
+    assert condition.string == '("date" <= %s AND ("date" < %s OR ("date" = %s AND "id" > %s)))'
+    assert params == [date(2024, 4, 30), date(2024, 4, 30), date(2024, 4, 30), 9]
+    assert BY_DATE_DESC.next_cursor(rows, limit=3) is None
+
+    # Cursor nos valores não nulos: a página junta o resto deles com o começo dos nulos
+    query, params = BY_DATE_DESC.page_text('"s"."t"', "is_deleted = %s", [True], token, 10, 0)
+    assert "UNION ALL" in query and '"date" IS NULL AND TRUE' in query
+    assert params == [True, date(2024, 4, 30), date(2024, 4, 30), date(2024, 4, 30), 9, 10, True, 10, 10]
+
+    # Filtro que já exclui as datas nulas (`date BETWEEN`) nunca consulta a fase dos nulos
+    query, params = BY_DATE_DESC.page_text('"s"."t"', "date BETWEEN %s AND %s", ["a", "b"], token, 10, 0, nulls=False)
+    assert "UNION ALL" not in query and "IS NULL" not in query
+    assert params == ["a", "b", date(2024, 4, 30), date(2024, 4, 30), date(2024, 4, 30), 9, 10, 0]
+
+    with pytest.raises(InvalidCursorError):
+        BY_ID.after(token)
+    with pytest.raises(InvalidCursorError):
+        BY_ID.after("não-é-um-cursor")
+
+
+def test_count_cache_expires_and_invalidates_by_table():
+    from db.counting import CountCache
+
+    cache = CountCache(ttl=60, max_entries=2)
+    cache.set(("meu_schema", "braskem", "exact", "is_deleted = FALSE", ()), 10)
+    cache.set(("meu_schema", "outra", "exact", "", ()), 5)
+    cache.set(("meu_schema", "terceira", "exact", "", ()), 1)
+
+    assert cache.get(("meu_schema", "braskem", "exact", "is_deleted = FALSE", ())) is None
+    assert cache.get(("meu_schema", "outra", "exact", "", ())) == 5
+
+    cache.invalidate("meu_schema", "outra")
+    assert cache.get(("meu_schema", "outra", "exact", "", ())) is None
+    assert cache.get(("meu_schema", "terceira", "exact", "", ())) == 1
 
-    result = trash("test_db")
 
-    mock_instance.get_deleted_records.assert_called_once_with("test_db")
+def test_asyncpg_placeholders_and_clipping_server_settings():
+    from db.async_pool import server_settings, to_asyncpg
+    from db.pagination import BY_DATE_DESC
 
-    assert "Erro ao consultar tabela: Erro simulado" in result
+    rows = [{"id": 3, "date": None}]
+    condition, params = BY_DATE_DESC.after_text(BY_DATE_DESC.next_cursor(rows, limit=1))
+    query = to_asyncpg(f"SELECT * FROM t WHERE date BETWEEN %s AND %s AND {condition} AND name LIKE 'a%%' LIMIT %s;")
+
+    assert query == 'SELECT * FROM t WHERE date BETWEEN $1 AND $2 AND ("date" IS NULL AND "id" > $3) AND name LIKE \'a%\' LIMIT $4;'
+    assert params == [3]
+    assert server_settings("-c search_path=news_charisma -capplication_name=handson") == {
+        "search_path": "news_charisma",
+        "application_name": "handson",
+    }
+    assert server_settings(None) == {}
+
+
+def test_job_runner_skips_invalid_rows_and_stops_on_cancel():
+    from api.v1.apps.files.service import jobs
+    from db.ingestion import IngestionError
+
+    def handler(params, items):
+        for index, item in enumerate(items, start=1):
+            if item.get("DATA") == "inválida":
+                raise IngestionError(index, f"Erro ao processar a data no item {index}.")
+        return {"handson": {"inserted": len(items)}}
+
+    store = MagicMock()
+    store.claim.return_value = {"kind": "news", "params": {}, "processed_rows": 0, "result": None}
+    store.rows.side_effect = [
+        [(1, {"DATA": "01/01/2024"}), (2, {"DATA": "inválida"}), (3, {"DATA": "02/01/2024"})],
+        [(4, {"DATA": "03/01/2024"})],
+    ]
+    store.progress.side_effect = [False, True]
+
+    with patch.dict(jobs.JOB_HANDLERS, {"news": handler}):
+        jobs.JobRunner(store=store, workers=1, chunk_size=3).run("job-1")
+
+    first_progress = store.progress.call_args_list[0].args
+    assert first_progress[1] == 3
+    assert first_progress[2] == [{"row": 2, "message": "Erro ao processar a data no item 2."}]
+    assert store.progress.call_args_list[1].args[3] == {"saved_rows": 3, "handson": {"inserted": 3}}
+    store.finish.assert_called_once_with("job-1", "cancelled", "Cancelado a pedido do usuário.")
+
+
+def test_job_runner_requeues_own_jobs_at_startup_and_renews_heartbeat_periodically():
+    from api.v1.apps.files.service import jobs
+
+    store = MagicMock()
+    store.pending.side_effect = [["job-do-worker"], ["job-do-worker", "job-parado"]]
+    runner = jobs.JobRunner(store=store, workers=1, heartbeat_interval=60)
+    runner._stop = MagicMock()
+    # O primeiro `wait` libera uma verificação periódica; o segundo encerra a thread
+    runner._stop.wait.side_effect = [False, True]
+
+    with patch.object(jobs, "ThreadPoolExecutor") as executor, patch.object(jobs.threading, "Thread") as thread:
+        runner.start()
+        store.pending.assert_called_once_with(jobs.JOB_STALE_AFTER, runner.worker_name)
+        thread.assert_called_once_with(target=runner._loop, name="ingestion-job-heartbeat", daemon=True)
+        runner._loop()
+
+    store.heartbeat.assert_called_once_with(runner.worker_name)
+    assert store.pending.call_args_list[1].args == (jobs.JOB_STALE_AFTER,)
+    # O job ainda no pool deste worker não é entregue de novo; só o parado de outro worker
+    submitted = [call.args[1] for call in executor.return_value.submit.call_args_list]
+    assert submitted == ["job-do-worker", "job-parado"]
+
+    runner.store.claim.return_value = None
+    runner.run("job-do-worker")
+    assert runner._submitted == {"job-parado"}
+
+
+def test_ingest_stream_writes_every_batch_in_one_transaction_and_rolls_back_on_invalid_row():
+    from api.v1.apps.files.service.service import ingest_stream_service
+    from db.ingestion import IngestionError
+
+    async def batches(*chunks):
+        for chunk in chunks:
+            yield chunk
+
+    def write_batch(items):
+        if any(item.get("DATA") == "inválida" for item in items):
+            raise IngestionError(2, "1 itens inválidos.", [{"row": 2, "message": "Formato de data inválido."}])
+        return [{"table": "tabela", "id": item["id"]} for item in items]
+
+    ingestion = MagicMock(summary={"handson": {"inserted": 3}})
+    ingestion.write_batch.side_effect = write_batch
+    saved = asyncio.run(ingest_stream_service(batches([{"id": 1}, {"id": 2}], [{"id": 3}]), ingestion))
+
+    assert saved == {"data": [{"table": "tabela", "id": 1}, {"table": "tabela", "id": 2}, {"table": "tabela", "id": 3}],
+                     "summary": {"handson": {"inserted": 3}}}
+    assert [name for name, _, _ in ingestion.mock_calls if name != "write_batch"] == ["begin", "commit"]
+
+    ingestion = MagicMock()
+    ingestion.write_batch.side_effect = write_batch
+    with pytest.raises(IngestionError) as error:
+        asyncio.run(ingest_stream_service(batches([{"id": 1}, {"id": 2}], [{"id": 3}, {"DATA": "inválida"}]), ingestion))
+
+    # Linha relativa ao upload inteiro, e o primeiro lote também é desfeito
+    assert error.value.index == 4
+    assert error.value.errors == [{"row": 4, "message": "Formato de data inválido."}]
+    ingestion.rollback.assert_called_once_with()
+    ingestion.commit.assert_not_called()
+
+
+def test_hands_on_ingestion_creates_partitions_inside_the_transaction_after_the_first_batch():
+    from db import ingestion as module
+
+    pool = MagicMock()
+    cursor = pool.getconn.return_value.cursor.return_value.__enter__.return_value
+    table = {"columns": ["id", "company_id", "date"], "partitioned": True, "comment": "partition_interval=month"}
+    cursor.fetchone.return_value = (1,)
+    with patch.object(module, "get_handson_pool", return_value=pool), \
+            patch.object(module.schema_cache, "get", return_value=table), \
+            patch.object(module.rollup_store, "refresh"), \
+            patch.object(module.count_cache, "invalidate"), \
+            patch.object(module, "ensure_partitions") as ensure:
+        ingestion = module.HandsOnIngestion("clientes", "braskem", 7)
+        ingestion.begin()
+        ingestion.write_batch([{"DATA": "05/01/2024"}])
+        ingestion.write_batch([{"DATA": "10/02/2024"}, {"DATA": "11/02/2024"}])
+        ingestion.commit()
+
+    assert ensure.call_args_list[0].kwargs == {"cursor": None}
+    assert ensure.call_args_list[1].kwargs == {"cursor": cursor}
+    assert ingestion.summary == {"handson": {"inserted": 3, "skipped": 0}}
+    pool.getconn.return_value.commit.assert_called_once_with()
+    pool.putconn.assert_called_once_with(pool.getconn.return_value, pool.getconn.return_value.lease_id)
+
+
+def test_iter_spreadsheet_reads_csv_rows_like_json_items(tmp_path):
+    from helpers.spreadsheet import iter_spreadsheet, spreadsheet_extension
+
+    path = tmp_path / "noticias.csv"
+    path.write_text('\nDATA;TÍTULO;TIER\n30/01/2025 00:00:00;"Olá; mundo";1\n;;\n31/01/2025;Outra\n', encoding="utf-8-sig")
+
+    rows = iter_spreadsheet(str(path), spreadsheet_extension(path.name))
+
+    assert next(rows) == {"DATA": "30/01/2025 00:00:00", "TÍTULO": "Olá; mundo", "TIER": "1"}
+    assert list(rows) == [{"DATA": "31/01/2025", "TÍTULO": "Outra", "TIER": ""}]
+    with pytest.raises(ValueError):
+        spreadsheet_extension("noticias.xls")
+
+
+def test_normalize_news_batch_coerces_columns_and_reports_invalid_rows_in_bulk():
+    from datetime import datetime
+    from helpers.normalization import normalize_news_batch
+
+    now = datetime(2025, 1, 1)
+    prepared, errors = normalize_news_batch([
+        {"DATA": "30/01/2025 10:00:00", "CÓDIGO DA NOTÍCIA": 123, "TIER": "2", "ALCANCE": 1500, "VALORAÇÃO": "R$ 1.234,56", "MÊS": "JAN"},
+        {"DATA": "31/01/2025", "CÓDIGO DA NOTÍCIA": "abc", "TIER": "", "VALORAÇÃO": 99.5, "MÊS": ""},
+    ], {"news_code", "date", "company_id", "mes"}, 7, now)
+
+    assert errors == []
+    assert [news_id for news_id, _, _ in prepared] == ["123", "abc"]
+    assert [(data["publication_date"], data["tier"], data["readers"], data["valuation"]) for _, data, _ in prepared] == [
+        ("2025-01-30", 2, 1500, "1234.56"),
+        ("2025-01-31", 0, 0, "99.5"),
+    ]
+    assert prepared[1][2] == {"mes": None, "news_code": "abc", "date": "2025-01-31", "company_id": 7}
+
+    prepared, errors = normalize_news_batch([
+        {"DATA": "01/02/2025", "TIER": "1"},
+        {"DATA": "2025-02-01", "TIER": "x"},
+        {"DATA": "02/02/2025", "VALORAÇÃO": "abc"},
+    ], set(), 7, now)
+
+    assert prepared == []
+    assert [(error["row"], error["column"], error["value"]) for error in errors] == [
+        (2, "DATA", "2025-02-01"),
+        (2, "TIER", "x"),
+        (3, "VALORAÇÃO", "abc"),
+    ]
+
+
+def test_two_phase_write_commits_both_branches_only_after_both_prepare():
+    from db import two_phase
+
+    steps = MagicMock()
+    clipping, handson = steps.clipping, steps.handson
+    with patch.object(two_phase, "_Coordinator", return_value=steps.coordinator):
+        writer = two_phase.TwoPhaseWrite("news")
+        result = writer.run({
+            "clipping": (clipping, lambda cursor: {"inserted": 1, "updated": 0}),
+            "handson": (handson, lambda cursor: {0: 10}),
+        })
+
+    assert result == {"clipping": {"inserted": 1, "updated": 0}, "handson": {0: 10}}
+    clipping.tpc_begin.assert_called_once_with(f"{writer.gtrid}:clipping")
+    handson.tpc_begin.assert_called_once_with(f"{writer.gtrid}:handson")
+    for connection in (clipping, handson):
+        connection.tpc_prepare.assert_called_once()
+        connection.tpc_commit.assert_called_once()
+    # Pendente antes do primeiro ramo; decisão só depois de todos os ramos prepararem
+    order = [name for name, _, _ in steps.mock_calls]
+    assert order.index("coordinator.start") < order.index("clipping.tpc_begin")
+    assert order.index("coordinator.decide") > max(order.index("clipping.tpc_prepare"), order.index("handson.tpc_prepare"))
+    steps.coordinator.finish.assert_called_once_with(forget=True)
+
+
+def test_two_phase_write_rolls_back_every_branch_when_one_fails():
+    from db import two_phase
+
+    def fail(cursor):
+        raise RuntimeError("violação de restrição")
+
+    clipping, handson, coordinator = MagicMock(), MagicMock(), MagicMock()
+    with patch.object(two_phase, "_Coordinator", return_value=coordinator):
+        with pytest.raises(RuntimeError):
+            two_phase.TwoPhaseWrite("news").run({
+                "clipping": (clipping, lambda cursor: {}),
+                "handson": (handson, fail),
+            })
+
+    coordinator.decide.assert_not_called()
+    coordinator.finish.assert_called_once_with()
+    for connection in (clipping, handson):
+        connection.tpc_prepare.assert_not_called()
+        connection.tpc_rollback.assert_called_once_with()
+        connection.tpc_commit.assert_not_called()
+
+
+def test_two_phase_write_keeps_pending_state_when_a_branch_fails_to_commit():
+    import psycopg2
+    from db import two_phase
+
+    clipping, handson, coordinator = MagicMock(), MagicMock(), MagicMock()
+    handson.tpc_commit.side_effect = psycopg2.OperationalError("conexão perdida")
+    with patch.object(two_phase, "_Coordinator", return_value=coordinator):
+        with pytest.raises(two_phase.TwoPhaseCommitError):
+            two_phase.TwoPhaseWrite("news").run({"clipping": (clipping, lambda cursor: {}), "handson": (handson, lambda cursor: {})})
+
+    coordinator.decide.assert_called_once_with()
+    coordinator.finish.assert_called_once_with(forget=False)
+
+
+def test_prepared_transaction_sweep_waits_for_the_pending_age_and_follows_the_decision():
+    from datetime import datetime, timedelta, timezone
+    from db import two_phase
+
+    cutoff = datetime.now(timezone.utc)
+    xids = [(MagicMock(), MagicMock(prepared=cutoff - timedelta(hours=1)))]
+
+    def sweep(pending, decided):
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [pending, (1,) if decided else None]
+        with patch.object(two_phase, "_resolve", return_value=len(xids)) as resolve:
+            action = two_phase._sweep(cursor, "handson:news:1", xids, cutoff)
+        return action, resolve, cursor
+
+    # Pendente há pouco tempo: o ramo preparado há uma hora não é desfeito
+    action, resolve, cursor = sweep((cutoff + timedelta(seconds=1),), decided=False)
+    assert action == (None, 0)
+    resolve.assert_not_called()
+
+    action, resolve, cursor = sweep((cutoff - timedelta(seconds=1),), decided=False)
+    assert action == ("rolled_back", 1)
+    resolve.assert_called_once_with(xids, commit=False)
+    assert "DELETE FROM two_phase_pending" in cursor.execute.call_args_list[-1].args[0]
+
+    action, resolve, cursor = sweep((cutoff + timedelta(seconds=1),), decided=True)
+    assert action == ("committed", 1)
+    resolve.assert_called_once_with(xids, commit=True)
+
+
+def test_prepared_transaction_recovery_skips_gtrids_whose_coordinator_holds_the_lock():
+    from db import two_phase
+
+    cursor = MagicMock()
+    cursor.fetchall.return_value = []
+    cursor.fetchone.return_value = (False,)
+    pool, connection = _pool_with_cursor(cursor)
+    prepared = {"handson:news:1": [(MagicMock(), MagicMock())]}
+    with patch.object(two_phase, "ensure_decisions_table"), \
+            patch.object(two_phase, "_prepared_transactions", return_value=prepared), \
+            patch.object(two_phase, "get_handson_pool", return_value=pool), \
+            patch.object(two_phase, "_sweep") as sweep:
+        summary = two_phase.recover_prepared_transactions(min_age=60)
+
+    assert summary == {"committed": 0, "rolled_back": 0}
+    sweep.assert_not_called()
+    lock_query, lock_params = cursor.execute.call_args_list[-1].args
+    assert "pg_try_advisory_lock" in lock_query
+    assert lock_params == (two_phase.LOCK_NAMESPACE, "handson:news:1")
+
+
+def test_merge_handson_skips_rows_whose_content_hash_is_unchanged():
+    from datetime import date
+    from db.ingestion import NewsIngestion, content_hash, with_content_hash
+
+    columns = {"news_code", "company_id", "date", "mes", "row_hash"}
+    prepared = [
+        (code, {}, with_content_hash({"news_code": code, "company_id": 7, "date": "2025-01-30", "mes": mes}, columns))
+        for code, mes in (("A", "JAN"), ("B", "FEV"), ("C", "MAR"))
+    ]
+    stale_hash = content_hash({"news_code": "B", "company_id": 7, "date": "2025-01-30", "mes": "JAN"})
+
+    cursor = MagicMock()
+    cursor.fetchall.side_effect = [
+        # Hashes gravados: A igual ao do upload, B com conteúdo antigo, C ainda não existe
+        [(1, prepared[0][2]["row_hash"], "A", 7, date(2025, 1, 30)), (2, stale_hash, "B", 7, date(2025, 1, 30))],
+        # RETURNING id, chave, (xmax = 0) do upsert
+        [(2, "B", 7, date(2025, 1, 30), False), (3, "C", 7, date(2025, 1, 30), True)],
+    ]
+
+    ids, summary = NewsIngestion("schema", "tabela", "7")._merge_handson(cursor, prepared)
+
+    assert ids == {0: 1, 1: 2, 2: 3}
+    assert summary == {"inserted": 1, "updated": 1, "unchanged": 1}
+    upserted = cursor.execute.call_args_list[1].args[1][0].adapted
+    assert [row["news_code"] for row in upserted] == ["B", "C"]
+
+
+def _pool_with_cursor(cursor):
+    pool = MagicMock()
+    connection = pool.connection.return_value.__enter__.return_value
+    connection.cursor.return_value.__enter__.return_value = cursor
+    return pool, connection
+
+
+def test_upload_session_replays_acknowledged_chunk_and_rejects_out_of_order_chunks():
+    from db import upload_sessions
+
+    cursor = MagicMock()
+    cursor.fetchone.side_effect = [
+        {"params": {}, "status": "open", "last_chunk": 3},
+        {"rows": 2, "summary": {"handson": {"inserted": 2, "skipped": 0}}, "data": [{"id": 1}, {"id": 2}]},
+        {"params": {}, "status": "open", "last_chunk": 3},
+        None,
+    ]
+    pool, connection = _pool_with_cursor(cursor)
+    store = upload_sessions.UploadSessionStore()
+    store._tables_ready = True
+
+    with patch.object(upload_sessions, "get_handson_pool", return_value=pool), \
+            patch.object(upload_sessions, "HandsOnIngestion") as ingestion:
+        replayed = store.apply_chunk("sessao", 3, [{"DATA": "01/01/2025"}])
+        with pytest.raises(upload_sessions.ChunkOrderError) as error:
+            store.apply_chunk("sessao", 5, [{"DATA": "01/01/2025"}])
+
+    assert replayed["replayed"] is True
+    assert replayed["next_chunk"] == 4
+    assert replayed["data"] == [{"id": 1}, {"id": 2}]
+    assert error.value.next_chunk == 4
+    ingestion.assert_not_called()
+
+
+def test_iter_json_batches_parses_array_incrementally_in_batches():
+    import asyncio
+    from helpers.json_stream import JSONStreamError, iter_json_batches
+
+    async def chunks(body, size):
+        for start in range(0, len(body), size):
+            yield body[start:start + size]
+        yield b""
+
+    async def collect(body, size=5):
+        return [batch async for batch in iter_json_batches(chunks(body, size), 2)]
+
+    body = b' [{"DATA": "30/01/2025", "VALORACAO": 1.5}, {"TIER": 2}, {"TITULO": null}]'
+    assert asyncio.run(collect(body)) == [
+        [{"DATA": "30/01/2025", "VALORACAO": 1.5}, {"TIER": 2}],
+        [{"TITULO": None}],
+    ]
+    for invalid in (b'{"DATA": "30/01/2025"}', b"", b'[{"TIER": 1}, 2]', b'[{"TIER": 1},'):
+        with pytest.raises(JSONStreamError):
+            asyncio.run(collect(invalid))
+
+
+def test_fast_json_response_matches_jsonable_encoder_for_database_types():
+    import json
+    import uuid
+    from datetime import date, datetime
+    from decimal import Decimal
+    from fastapi.encoders import jsonable_encoder
+    from helpers.responses import FastJSONResponse
+
+    class DriverUUID(uuid.UUID):
+        pass
+
+    page = {
+        "data": [{
+            "id": 1,
+            "date": date(2024, 1, 1),
+            "created_at": datetime(2024, 1, 1, 10, 30, 0, 125000),
+            "valuation": Decimal("1234.56"),
+            "company_id": uuid.UUID(int=1),
+            "news_uuid": DriverUUID(int=2),
+            "deleted_at": None,
+        }],
+    }
+    response = FastJSONResponse(page)
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == jsonable_encoder(page)
+
+
+def test_columnar_rows_and_ndjson_response_formats():
+    import asyncio
+    from datetime import date
+    from db.row_formats import page_rows, rows_payload
+    from helpers.responses import NDJSON_MEDIA_TYPE, ndjson_response
+
+    columns = ["id", "date"]
+    records = [(1, date(2024, 1, 2)), (2, None)]
+    columnar = rows_payload(columns, records, "active_records", "columnar")
+    assert columnar == {"columns": ["id", "date"], "rows": [[1, date(2024, 1, 2)], [2, None]]}
+    assert page_rows(columnar, "active_records") == columnar["rows"]
+    assert page_rows({"message": "vazio"}, "active_records") == []
+
+    async def batches(*items):
+        for batch in items:
+            yield batch
+
+    async def body():
+        response = await ndjson_response(batches([{"id": 1, "date": date(2024, 1, 2)}], [{"id": 2}]))
+        return response.media_type, b"".join([chunk async for chunk in response.body_iterator])
+
+    assert asyncio.run(body()) == (NDJSON_MEDIA_TYPE, b'{"id":1,"date":"2024-01-02"}\n{"id":2}\n')
+    assert asyncio.run(ndjson_response(batches())) is None
+
+
+def test_compression_middleware_negotiates_encoding_and_skips_small_bodies():
+    import asyncio
+    import gzip
+    from starlette.responses import PlainTextResponse
+    from helpers.compression import CompressionMiddleware, negotiate_encoding
+
+    assert negotiate_encoding("gzip, br;q=0.5") == "gzip"
+    assert negotiate_encoding("br;q=0, *;q=0.1") in ("zstd", "gzip")
+    assert negotiate_encoding("identity") is None
+
+    async def call(body, accept_encoding):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+        await CompressionMiddleware(PlainTextResponse(body), minimum_size=100)(scope, None, send)
+        return dict(sent[0]["headers"]), sent[1]["body"]
+
+    text = "veículo tema sentimento " * 100
+    headers, body = asyncio.run(call(text, "gzip"))
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"content-length"] == str(len(body)).encode()
+    assert gzip.decompress(body).decode() == text
+
+    headers, body = asyncio.run(call("curto", "gzip"))
+    assert b"content-encoding" not in headers
+    assert body == b"curto"
+
+
+def test_retrofit_default_indexes_creates_missing_and_skips_tables_without_columns():
+    from db import indexes
+
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [
+        ("legacy", False, ["id", "date", "is_deleted", "news_code", "company_id"]),
+    ]
+    # active_date_idx inválido (criação concorrente interrompida), company_id_idx inexistente
+    cursor.fetchone.side_effect = [(False,), None]
+    pool, connection = _pool_with_cursor(cursor)
+
+    with patch.object(indexes, "get_handson_pool", return_value=pool):
+        report = indexes.retrofit_default_indexes("clientes", "legacy")
+
+    assert connection.autocommit is True
+    assert [(entry["index_name"], entry["status"]) for entry in report] == [
+        ("legacy_active_date_idx", "rebuilt"),
+        ("legacy_trash_idx", "skipped"),
+        ("legacy_company_id_idx", "created"),
+    ]
+    assert report[1]["missing_columns"] == ["deleted_at"]
+    long_name = indexes.index_name("t" * 80, "active_date_idx")
+    assert len(long_name) == indexes.MAX_IDENTIFIER_LENGTH and long_name.endswith("_active_date_idx")
+
+
+def test_partition_bounds_and_ensure_partitions_creates_only_missing():
+    from datetime import date
+    from db import partitions
+
+    assert partitions.partition_start("2024-12-15", "month") == date(2024, 12, 1)
+    assert partitions.partition_end(date(2024, 12, 1), "month") == date(2025, 1, 1)
+    assert partitions.partition_end(date(2024, 1, 1), "year") == date(2025, 1, 1)
+    assert partitions.partition_name("braskem", date(2024, 3, 1), "month") == "braskem_p2024_03"
+    assert partitions.partition_interval({"partitioned": True, "comment": "partition_interval=year"}) == "year"
+    assert partitions.partition_interval({"partitioned": False, "comment": None}) is None
+
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [("braskem_p2024_02",)]
+    pool, connection = _pool_with_cursor(cursor)
+
+    with patch.object(partitions, "get_handson_pool", return_value=pool):
+        created = partitions.ensure_partitions("clientes", "braskem", "month", ["2024-01-05", "2024-02-10", "2024-01-31", None])
+
+    assert created == ["braskem_p2024_02"]
+    checked = cursor.execute.call_args_list[0][0][1]
+    assert checked == (["braskem_p2024_01", "braskem_p2024_02"], "clientes")
+    # Verificação + lock + uma partição criada
+    assert cursor.execute.call_count == 3
+    connection.commit.assert_called_once()
+
+
+def test_rollup_refresh_recalculates_touched_days_and_aggregate_groups_by_declared_dimensions():
+    import asyncio
+    from datetime import date
+    from db import rollups
+
+    store = rollups.RollupStore()
+    store._tables_ready = True
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (["sentimento", "veiculo"], ["alcance"], False)
+    columns = {"sentimento": {}, "veiculo": {}, "alcance": {}}
+
+    with patch.object(rollups.schema_cache, "columns", return_value=columns):
+        refreshed = store.refresh(cursor, "clientes", "braskem", ["2024-01-02", date(2024, 1, 1), "2024-01-02", None])
+
+    assert refreshed == 2
+    # definição, lock, DELETE e INSERT dos dias, refreshed_at
+    assert cursor.execute.call_count == 5
+    assert cursor.execute.call_args_list[2][0][1] == ("clientes", "braskem", ["2024-01-01", "2024-01-02"])
+
+    cursor.reset_mock()
+    with patch.object(rollups.schema_cache, "columns", return_value={"sentimento": {}, "alcance": {}}):
+        assert store.refresh(cursor, "clientes", "braskem", ["2024-01-01"]) == 0
+    assert "stale = TRUE" in cursor.execute.call_args_list[-1][0][0]
+
+    queries = []
+
+    async def fetch(query, *args):
+        queries.append((query, args))
+        if "FROM dynamic_table_rollups\n" in query:
+            return [{"dimensions": ["sentimento", "veiculo"], "measures": ["alcance"], "stale": False, "refreshed_at": None}]
+        return [{"veiculo": "Folha", "records": 3, "alcance": 900}]
+
+    reader = rollups.AsyncRollups()
+    with patch.object(reader, "fetch", side_effect=fetch):
+        result = asyncio.run(reader._aggregate("clientes", "braskem", "2024-01-01", "2024-01-31", ["veiculo"], {"sentimento": "Positivo"}))
+        with pytest.raises(rollups.RollupError):
+            asyncio.run(reader._aggregate("clientes", "braskem", "2024-01-01", "2024-01-31", ["tema"]))
+
+    query, args = queries[1]
+    assert 'dimension_values[2] AS "veiculo"' in query and 'sum(sums[1]) AS "alcance"' in query
+    assert "dimension_values[1] = %s" in query and "GROUP BY 1" in query
+    assert args == ("clientes", "braskem", date(2024, 1, 1), date(2024, 1, 31), "Positivo")
+    assert result["rows"] == [{"veiculo": "Folha", "records": 3, "alcance": 900}]
+
+
+def test_insert_columns_uses_one_alter_table_and_retries_on_lock_timeout():
+    from psycopg2 import errors
+    from db import insert_column
+
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.execute.side_effect = [None, errors.LockNotAvailable("lock timeout"), None, None]
+
+    with patch.object(insert_column.InsertColumn, "_conn", return_value=connection), \
+            patch.object(insert_column.time, "sleep") as sleep:
+        insert_column.InsertColumn()._insert_columns("braskem", "clientes", ["tema", "veiculo"], "text")
+
+    sleep.assert_called_once()
+    connection.rollback.assert_called_once()
+    connection.commit.assert_called_once()
+    alter = cursor.execute.call_args_list[-1][0][0]
+    assert alter == cursor.execute.call_args_list[1][0][0]
+    assert insert_column.add_columns_query("clientes", "braskem", ["tema", "veiculo"], "text") == alter
+
+    cursor.execute.side_effect = errors.LockNotAvailable("lock timeout")
+    with patch.object(insert_column.InsertColumn, "_conn", return_value=connection), \
+            patch.object(insert_column.time, "sleep"):
+        with pytest.raises(insert_column.ColumnLockTimeout):
+            insert_column.InsertColumn()._insert_columns("braskem", "clientes", ["tema"], "integer")
+
+
+def test_delete_record_failure_returns_500_with_the_tables_already_changed():
+    from fastapi import HTTPException
+    from api.v1.endpoints import custom
+
+    payload = {
+        "tables": [{"table_name": "braskem"}, {"table_name": "vale"}],
+        "columns": [{"record_id": 1}],
+        "schemas": [{"schema_name": "clientes"}],
+    }
+    with patch.object(custom, "set_records_deleted_service", side_effect=[{"updated": 1, "clipping_updated": 1, "clipping": "ok"}, Exception("conexão perdida")]):
+        with pytest.raises(HTTPException) as error:
+            custom.deactive_record(payload)
+
+    assert error.value.status_code == 500
+    assert error.value.detail == {
+        "message": "Erro interno: conexão perdida",
+        "records": [{"table_name": "braskem", "schema_name": "clientes", "updated": 1, "clipping_updated": 1, "clipping": "ok"}],
+    }
+
+    # Clipping falhou depois do commit da tabela: ela aparece em `records` e as seguintes não são tocadas
+    failed = {"updated": 1, "clipping_updated": None, "clipping": "failed"}
+    with patch.object(custom, "set_records_deleted_service", return_value=failed) as service:
+        with pytest.raises(HTTPException) as error:
+            custom.deactive_record(payload)
+
+    service.assert_called_once()
+    assert error.value.status_code == 500
+    assert error.value.detail["records"] == [{"table_name": "braskem", "schema_name": "clientes", **failed}]
+
+    with pytest.raises(HTTPException) as error:
+        custom.active_register({**payload, "date_range": "2024-01-01"})
+    assert error.value.status_code == 400
+
+
+def test_bulk_soft_delete_updates_once_and_propagates_news_codes_in_batches():
+    from unittest.mock import PropertyMock
+    from db import register_update
+    from db.clipping_db.get_table_news import GetNews
+
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [("A", "2024-01-01"), ("B", "2024-01-02"), (None, "2024-01-02"), ("A", "2024-01-01")]
+
+    pool = MagicMock()
+    pool.getconn.return_value = connection
+    with patch.object(register_update.EditRegisters, "pool", new_callable=PropertyMock, return_value=pool), \
+            patch.object(register_update.schema_cache, "columns", return_value={"deleted_at": {}}), \
+            patch.object(register_update.rollup_store, "refresh") as refresh, \
+            patch.object(register_update, "GetNews") as news:
+        news.return_value._set_clipping_news_active.return_value = 2
+        result = register_update.EditRegisters()._set_deleted("braskem", "clientes", True, start_date="2024-01-01", end_date="2024-01-31")
+
+    assert result == {"updated": 4, "clipping_updated": 2, "clipping": "ok"}
+    cursor.execute.assert_called_once()
+    assert cursor.execute.call_args[0][1] == [True, "2024-01-01", "2024-01-31", True]
+    refresh.assert_called_once_with(cursor, "clientes", "braskem", ["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-01"])
+    news.return_value._set_clipping_news_active.assert_called_once_with(["A", "B"], False)
+    connection.commit.assert_called_once()
+
+    # Falha no clipping depois do commit não esconde os registros já alterados
+    with patch.object(register_update.EditRegisters, "pool", new_callable=PropertyMock, return_value=pool), \
+            patch.object(register_update.schema_cache, "columns", return_value={}), \
+            patch.object(register_update.rollup_store, "refresh"), \
+            patch.object(register_update, "GetNews") as news:
+        news.return_value._set_clipping_news_active.side_effect = Exception("clipping fora do ar")
+        result = register_update.EditRegisters()._set_deleted("braskem", "clientes", True, record_ids=[1, 2])
+
+    assert result == {"updated": 4, "clipping_updated": None, "clipping": "failed"}
+
+    # Os atalhos de um único id continuam devolvendo a linha do registro (ou None)
+    cursor.fetchall.return_value = [("A", "2024-01-01")]
+    with patch.object(register_update.EditRegisters, "pool", new_callable=PropertyMock, return_value=pool), \
+            patch.object(register_update.schema_cache, "columns", return_value={}), \
+            patch.object(register_update.rollup_store, "refresh"), \
+            patch.object(register_update, "GetNews"):
+        assert register_update.EditRegisters()._mark_as_deleted_by_id("braskem", "clientes", 7) == ("A", "2024-01-01")
+        cursor.fetchall.return_value = []
+        assert register_update.EditRegisters()._active_register("braskem", "clientes", 7) is None
+
+    clipping = MagicMock()
+    clipping_cursor = clipping.cursor.return_value.__enter__.return_value
+    clipping_cursor.rowcount = 2
+    clipping_pool = MagicMock()
+    clipping_pool.getconn.return_value = clipping
+    with patch.object(GetNews, "pool", new_callable=PropertyMock, return_value=clipping_pool):
+        updated = GetNews()._set_clipping_news_active(["A", "B", "C"], True, batch_size=2)
+
+    assert updated == 4
+    assert [call[0][1][1] for call in clipping_cursor.execute.call_args_list] == [["A", "B"], ["C"]]
+    clipping.commit.assert_called_once()
 
 
 @pytest.fixture
-def mock_insert_column():
-    with patch("api.v1.apps.companys.service.company_service.InsertColumn") as mock_class:
-        yield mock_class
+def fake_pool():
+    """`ConnectionPool` de verdade com conexões falsas (sem servidor)."""
+    from psycopg2 import extensions
+    from db.pool import ConnectionPool
 
-def test_get_records_success(mock_insert_column):
-    mock_instance = MagicMock()
-    mock_insert_column.return_value = mock_instance
-    mock_instance.get_active_record.return_value = "Registros ativos consultados com sucesso."
+    def connect(self):
+        conn = MagicMock(closed=0, autocommit=False, lease_id=0)
+        conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+        return conn
 
-    from api.v1.apps.companys.service.company_service import get_records
+    with patch.object(ConnectionPool, "_connect", connect):
+        yield lambda **kwargs: ConnectionPool("teste", **{"min_size": 0, "max_size": 2, "timeout": 0.05, "health_check": False, **kwargs})
 
-    result = get_records("test_db")
 
-    mock_instance.get_active_record.assert_called_once_with("test_db")
+def test_pool_lease_and_return(fake_pool):
+    pool = fake_pool(min_size=1)
+    conn = pool.getconn()
+    first_lease = conn.lease_id
+    assert pool.stats() == {"idle": 0, "in_use": 1, "max_size": 2}
 
-    assert result == "Registros ativos consultados com sucesso."
+    pool.putconn(conn)
+    assert pool.stats() == {"idle": 1, "in_use": 0, "max_size": 2}
 
-def test_get_records_failure(mock_insert_column):
-    mock_instance = MagicMock()
-    mock_insert_column.return_value = mock_instance
-    mock_instance.get_active_record.side_effect = Exception("Erro simulado")
+    assert pool.getconn() is conn
+    assert conn.lease_id != first_lease
+
+
+def test_pool_exhaustion_times_out(fake_pool):
+    from db.pool import PoolTimeoutError
+
+    pool = fake_pool(max_size=1)
+    pool.getconn()
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+
+
+def test_pool_closeall_closes_idle_connections(fake_pool):
+    pool = fake_pool(min_size=2)
+    idle = list(pool._idle)
+
+    pool.closeall()
+
+    assert pool.stats()["idle"] == 0
+    for conn in idle:
+        conn._close_physical.assert_called_once()
+
+
+def test_double_close_does_not_release_another_lease(fake_pool):
+    from unittest.mock import PropertyMock
+    from psycopg2 import extensions
+    from db.register_update import EditRegisters
+
+    pool = fake_pool(max_size=1)
+    with patch.object(EditRegisters, "pool", new_callable=PropertyMock, return_value=pool):
+        registers = EditRegisters()
+        conn = registers.conn_to_database
+        stale_lease = conn.lease_id
+        registers.close()
+
+        # Outro chamador recebe o mesmo objeto, no meio de uma transação
+        assert pool.getconn() is conn
+        conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_INTRANS
+
+        registers.close()
+        registers.rollback()
+        pool.putconn(conn, stale_lease)
+
+    conn.rollback.assert_not_called()
+    assert pool.stats()["in_use"] == 1
+
+
+def test_news_export_without_news_codes_keeps_id():
+    from db.export import NewsExport
+
+    export = NewsExport("meu_schema", "braskem", "2024-01-01", "2024-12-31")
+    export.dynamic_columns = ["id", "news_code", "date", "value", "row_hash"]
+    export.with_clipping = False
+    export._clipping = MagicMock()
+
+    rows = list(export._join_batch([(1, None, "2024-01-01", 10, "h1"), (2, "", "2024-01-02", 20, "h2")]))
+
+    assert export.columns == ["id", "date", "value"]
+    assert rows == [[1, "2024-01-01", 10], [2, "2024-01-02", 20]]
+    export._clipping.cursor.assert_not_called()
+
+
+def test_keyset_pages_cover_nulls_and_start_from_the_index():
+    import sqlite3
+    from db.pagination import BY_DATE_DESC
+
+    def run(condition, params, suffix="", extra=()):
+        query = f"SELECT id, date FROM t WHERE {condition} ORDER BY {BY_DATE_DESC.order_by_text()}{suffix}"
+        return db.execute(query.replace("%s", "?"), [*params, *extra]).fetchall()
+
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, date TEXT)")
+    db.execute("CREATE INDEX t_date ON t (date DESC, id)")
+    db.executemany("INSERT INTO t VALUES (?, ?)", [(i, None if i % 7 == 0 else f"2024-01-{i % 5 + 1:02d}") for i in range(1, 60)])
+
+    # 51 datas não nulas e 8 nulas: com páginas de 8 uma página cruza a fronteira entre as fases, e
+    # com páginas de 17 a última página dos não nulos termina exatamente nela
+    for limit in (8, 17):
+        seen, token, pages = [], None, 0
+        while True:
+            query, params = BY_DATE_DESC.page_text("t", "TRUE", [], token, limit, 0)
+            page = [{"id": row[0], "date": row[1]} for row in db.execute(query.replace("%s", "?"), params).fetchall()]
+            assert page, "página vazia com next_cursor"
+            seen += [row["id"] for row in page]
+            pages += 1
+            token = BY_DATE_DESC.next_cursor(page, limit)
+            if token is None:
+                break
+        assert seen == [row[0] for row in run("TRUE", [])]
+        assert pages == -(-59 // limit)
+
+    # As duas fases começam por uma busca no índice, não por uma varredura filtrada
+    for last in ({"id": 3, "date": "2024-01-03"}, {"id": 7, "date": None}):
+        condition, params = BY_DATE_DESC.after_text(BY_DATE_DESC.next_cursor([last], 1))
+        plan = db.execute(f"EXPLAIN QUERY PLAN SELECT id FROM t WHERE {condition} LIMIT 8".replace("%s", "?"), params).fetchall()
+        assert any(detail.startswith("SEARCH t USING") for *_, detail in plan)
+
+
+def test_job_store_fails_abandoned_receiving_jobs_and_requeues_running():
+    from db import jobs
 
-    from api.v1.apps.companys.service.company_service import get_records
+    cursor = MagicMock()
+    cursor.fetchall.side_effect = [[("job-recebendo",)], [("job-na-fila",)]]
+    pool, connection = _pool_with_cursor(cursor)
 
-    result = get_records("test_db")
+    with patch.object(jobs, "get_handson_pool", return_value=pool):
+        assert jobs.JobStore().pending(300, "host:42") == ["job-na-fila"]
 
-    mock_instance.get_active_record.assert_called_once_with("test_db")
+    queries = [call[0][0] for call in cursor.execute.call_args_list]
+    assert "SET status = 'queued', worker = NULL" in queries[0]
+    # Na subida, os jobs `running` deste mesmo worker voltam para a fila sem esperar o heartbeat vencer
+    assert "OR worker = %s" in queries[0] and cursor.execute.call_args_list[0][0][1] == (300, "host:42")
+    assert "SET status = 'failed'" in queries[1] and "WHERE status = 'receiving'" in queries[1]
+    assert cursor.execute.call_args_list[2][0] == ("DELETE FROM ingestion_job_rows WHERE job_id = ANY(%s::uuid[]);", (["job-recebendo"],))
+    connection.commit.assert_called_once()
 
-    assert "Erro ao consultar tabela: Erro simulado" in result
\ No newline at end of file
+
+def test_job_store_append_rejects_job_no_longer_receiving():
+    from db import jobs
+
+    cursor = MagicMock()
+    cursor.fetchone.return_value = None
+    pool, connection = _pool_with_cursor(cursor)
+
+    with patch.object(jobs, "get_handson_pool", return_value=pool), patch.object(jobs, "copy_rows"):
+        with pytest.raises(ValueError):
+            jobs.JobStore().append("job-expirado", 1, [{"a": 1}])
+    connection.commit.assert_not_called()